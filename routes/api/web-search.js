@@ -3,8 +3,16 @@ const router = express.Router();
 const { spawn } = require('child_process');
 const { isAuthenticated } = require('../../middleware/authMiddleware');
 const emailService = require('../../services/emailService');
+const { withDeadline, superviseProcess } = require('../../services/pythonDeadline');
+const { createResultReader } = require('../../services/pythonResults');
 const path = require('path');
 
+// How long each route waits for its Python script; past this the script
+// returns what it has, marked `truncated`
+const WEB_SEARCH_TIMEOUT_MS = 30000;
+const MARKET_RESEARCH_TIMEOUT_MS = 180000;
+const OUTREACH_TIMEOUT_MS = 30000;
+
 /**
  * @route   POST /api/web-search
  * @desc    Get business recommendations based on web search
@@ -12,7 +20,7 @@ const path = require('path');
  */
 router.post('/', isAuthenticated, function(req, res) {
   try {
-    const { query } = req.body;
+    const { query, enrich } = req.body;
     
     if (!query || typeof query !== 'string' || query.trim() === '') {
       return res.status(400).json({ 
@@ -21,22 +29,26 @@ router.post('/', isAuthenticated, function(req, res) {
       });
     }
 
+    // Snippet-only by default; `enrich` also scrapes the pages shown in the report
+    const args = ['services/web_search_recommendations.py', query];
+    if (enrich) {
+      args.push('--enrich');
+    }
+
     // Spawn Python process to handle the web search and recommendation
-    const pythonProcess = spawn('python', [
-      'services/web_search_recommendations.py',
-      query
-    ], {
+    const pythonProcess = spawn('python', withDeadline(args, WEB_SEARCH_TIMEOUT_MS), {
       // Add cwd to ensure Python script can find its dependencies
       cwd: process.cwd(),
       env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
     });
+    superviseProcess(pythonProcess, { timeoutMs: WEB_SEARCH_TIMEOUT_MS, req });
 
-    let dataString = '';
+    // Result frames on stdout, progress on stderr
+    const results = createResultReader();
     let errorString = '';
 
-    // Collect data from stdout
     pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
+      results.push(data);
     });
 
     // Collect any errors
@@ -57,32 +69,16 @@ router.post('/', isAuthenticated, function(req, res) {
       }
 
       try {
-        // Get the last JSON object in the output
-        const jsonLines = dataString.split('\n')
-          .filter(line => line.trim())
-          .filter(line => {
-            try {
-              JSON.parse(line);
-              return true;
-            } catch (e) {
-              return false;
-            }
-          });
-        
-        const lastJsonLine = jsonLines[jsonLines.length - 1];
+        const parsedData = results.last();
         
-        if (!lastJsonLine) {
-          console.error('No valid JSON found in Python output');
-          console.error('Raw output:', dataString);
+        if (!parsedData) {
+          console.error('No result returned by the Python script');
           return res.status(503).json({
             success: false,
             message: 'The search service is temporarily unavailable. Please try again later.'
           });
         }
         
-        // Parse the JSON response
-        const parsedData = JSON.parse(lastJsonLine);
-        
         if (parsedData.error) {
           console.error('Error from Python script:', parsedData.error);
           return res.status(503).json({
@@ -94,7 +90,8 @@ router.post('/', isAuthenticated, function(req, res) {
         if (parsedData.result) {
           return res.json({
             success: true,
-            data: parsedData.result
+            data: parsedData.result,
+            truncated: Boolean(parsedData.truncated)
           });
         }
 
@@ -104,7 +101,6 @@ router.post('/', isAuthenticated, function(req, res) {
         });
       } catch (e) {
         console.error('Error parsing Python response:', e);
-        console.error('Raw Python output:', dataString);
         return res.status(503).json({ 
           success: false, 
           message: 'The search service is temporarily unavailable. Please try again later.'
@@ -128,7 +124,7 @@ router.post('/', isAuthenticated, function(req, res) {
  */
 router.post('/market-research', isAuthenticated, function(req, res) {
   try {
-    const { query, extractEmails } = req.body;
+    const { query, extractEmails, jobId } = req.body;
     if (!query || typeof query !== 'string' || query.trim() === '') {
       return res.status(400).json({ success: false, message: 'A valid search query is required' });
     }
@@ -138,15 +134,20 @@ router.post('/market-research', isAuthenticated, function(req, res) {
       args.push('extract-emails', query);
     } else {
       args.push(query);
+      // Checkpointed job: re-posting the same jobId resumes instead of restarting
+      if (jobId && /^[A-Za-z0-9_.-]+$/.test(jobId)) {
+        args.push('--job', jobId);
+      }
     }
-    const pythonProcess = spawn('python', args, {
+    const pythonProcess = spawn('python', withDeadline(args, MARKET_RESEARCH_TIMEOUT_MS), {
       cwd: process.cwd(),
       env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
     });
-    let dataString = '';
+    const run = superviseProcess(pythonProcess, { timeoutMs: MARKET_RESEARCH_TIMEOUT_MS, req });
+    const results = createResultReader();
     let errorString = '';
     pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
+      results.push(data);
     });
     pythonProcess.stderr.on('data', (data) => {
       errorString += data.toString();
@@ -159,17 +160,14 @@ router.post('/market-research', isAuthenticated, function(req, res) {
         return res.status(503).json({ success: false, message: 'The market research service is temporarily unavailable. Please try again later.' });
       }
       try {
-        // Find last valid JSON in output
-        const jsonLines = dataString.split('\n').filter(line => {
-          try { JSON.parse(line); return true; } catch (e) { return false; }
-        });
-        const lastJsonLine = jsonLines[jsonLines.length - 1];
-        if (!lastJsonLine) {
-          console.error('No valid JSON found in Python output');
+        const parsedData = results.last();
+        if (!parsedData) {
+          console.error('No result returned by the Python script');
           return res.status(503).json({ success: false, message: 'No valid data returned.' });
         }
-        const parsedData = JSON.parse(lastJsonLine);
-        return res.json({ success: true, data: parsedData });
+        // List-shaped results can't carry the marker themselves
+        const truncated = Boolean(parsedData.truncated) || run.timedOut;
+        return res.json({ success: true, data: parsedData, truncated });
       } catch (e) {
         console.error('Error parsing Python response:', e);
         return res.status(503).json({ success: false, message: 'Error parsing Python output.' });
@@ -277,21 +275,22 @@ router.post('/ai-outreach/search', isAuthenticated, (req, res) => {
     }
 
     // Spawn Python process to handle the email search
-    const pythonProcess = spawn('python', [
+    const pythonProcess = spawn('python', withDeadline([
       path.join(process.cwd(), 'ai_outreach_assistant.py'),
       'search',
       query
-    ], {
+    ], OUTREACH_TIMEOUT_MS), {
       cwd: process.cwd(),
       env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
     });
+    superviseProcess(pythonProcess, { timeoutMs: OUTREACH_TIMEOUT_MS, req });
 
-    let dataString = '';
+    // Result frames on stdout, progress on stderr
+    const results = createResultReader();
     let errorString = '';
 
-    // Collect data from stdout
     pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
+      results.push(data);
     });
 
     // Collect any errors
@@ -312,10 +311,11 @@ router.post('/ai-outreach/search', isAuthenticated, (req, res) => {
       }
 
       try {
-        const parsedData = JSON.parse(dataString);
+        const parsedData = results.last() || {};
         return res.json({
           success: true,
-          emails: parsedData.emails || []
+          emails: parsedData.emails || [],
+          truncated: Boolean(parsedData.truncated)
         });
       } catch (e) {
         console.error('Error parsing Python response:', e);
@@ -359,22 +359,23 @@ router.post('/ai-outreach/send-intro', isAuthenticated, async (req, res) => {
     }
 
     // Spawn Python process to draft the email
-    const pythonProcess = spawn('python', [
+    const pythonProcess = spawn('python', withDeadline([
       path.join(process.cwd(), 'ai_outreach_assistant.py'),
       'draft',
       query,
       project_summary
-    ], {
+    ], OUTREACH_TIMEOUT_MS), {
       cwd: process.cwd(),
       env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
     });
+    superviseProcess(pythonProcess, { timeoutMs: OUTREACH_TIMEOUT_MS, req });
 
-    let dataString = '';
+    // Result frames on stdout, progress on stderr
+    const results = createResultReader();
     let errorString = '';
 
-    // Collect data from stdout
     pythonProcess.stdout.on('data', (data) => {
-      dataString += data.toString();
+      results.push(data);
     });
 
     // Collect any errors
@@ -395,7 +396,7 @@ router.post('/ai-outreach/send-intro', isAuthenticated, async (req, res) => {
       }
 
       try {
-        const parsedData = JSON.parse(dataString);
+        const parsedData = results.last() || {};
         const emailBody = parsedData.email_body;
         
         if (!emailBody) {
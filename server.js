@@ -1515,17 +1515,20 @@ io.on('connection', (socket) => {
 app.use(messagesRoutes(io));
 
 const { spawn } = require('child_process');
+const { withDeadline, superviseProcess } = require('./services/pythonDeadline');
+const { createResultReader } = require('./services/pythonResults');
+const BUSINESS_RESEARCH_TIMEOUT_MS = 60000;
 app.post('/api/business-research', (req, res) => {
   const topic = req.body.topic;
-  const py = spawn('python', ['services/email_extractor.py', topic]);
-  let data = '';
-  py.stdout.on('data', chunk => { data += chunk; });
+  const py = spawn('python', withDeadline(['services/email_extractor.py', topic, '--json'], BUSINESS_RESEARCH_TIMEOUT_MS));
+  superviseProcess(py, { timeoutMs: BUSINESS_RESEARCH_TIMEOUT_MS, req });
+  const results = createResultReader();
+  py.stdout.on('data', chunk => results.push(chunk));
   py.on('close', () => {
-    try {
-      const result = JSON.parse(data);
-      res.json(result);
-    } catch (e) {
-      res.status(500).json({ error: 'Failed to parse Python output.' });
+    const result = results.last();
+    if (!result) {
+      return res.status(500).json({ error: 'Failed to parse Python output.' });
     }
+    res.json(result);
   });
 });
\ No newline at end of file
@@ -8,6 +8,10 @@ const { spawn } = require('child_process');
 const path = require('path');
 // Email service to send intros
 const emailService = require('./emailService');
+// Deadline for each outreach assistant run; the script returns partial results past it
+const { withDeadline, superviseProcess } = require('./pythonDeadline');
+const { createResultReader } = require('./pythonResults');
+const PYTHON_TIMEOUT_MS = 30000;
 
 // Initialize Milvus client
 const milvusClient = new MilvusClient({
@@ -997,7 +1001,7 @@ async function handleOutreach(command, currentUser) {
         }
         
         // Helper to run the Python assistant and return parsed JSON
-        const runPython = (argsArray) => new Promise((resolve, reject) => {
+        const runPython = (argsArray, input) => new Promise((resolve, reject) => {
             // Try both locations - root directory and services directory
             const rootPyPath = path.join(process.cwd(), 'ai_outreach_assistant.py');
             const servicesPyPath = path.join(process.cwd(), 'services', 'ai_outreach_assistant.py');
@@ -1029,20 +1033,18 @@ async function handleOutreach(command, currentUser) {
             let pythonCommand = pythonCommands[0]; // Default to 'python'
             
             // Use a more reliable Python command
-            const py = spawn(pythonCommand, [pyPath, ...argsArray], {
+            const py = spawn(pythonCommand, withDeadline([pyPath, ...argsArray], PYTHON_TIMEOUT_MS), {
                 cwd: process.cwd(),
                 env: { ...process.env, PYTHONIOENCODING: 'utf-8' },
                 shell: true // Use shell to ensure command works on Windows
             });
+            superviseProcess(py, { timeoutMs: PYTHON_TIMEOUT_MS });
             
-            let out = '';
+            const results = createResultReader();
             let err = '';
             
-            py.stdout.on('data', d => { 
-                const data = d.toString();
-                console.log(`Python stdout: ${data}`);
-                out += data; 
-            });
+            // Result frames on stdout, progress on stderr
+            py.stdout.on('data', d => results.push(d));
             
             py.stderr.on('data', d => { 
                 const data = d.toString();
@@ -1056,17 +1058,11 @@ async function handleOutreach(command, currentUser) {
                     return reject(new Error(err || `Python exited with code ${code}`));
                 }
                 
-                try {
-                    // Trim output to handle any extra whitespace
-                    const trimmedOut = out.trim();
-                    console.log(`Python output: ${trimmedOut}`);
-                    const parsed = JSON.parse(trimmedOut);
-                    resolve(parsed);
-                } catch (e) {
-                    console.error(`Failed to parse Python output: ${e.message}`);
-                    console.error(`Raw output: ${out}`);
-                    reject(new Error(`Failed to parse Python output: ${e.message}`));
+                const parsed = results.last();
+                if (!parsed) {
+                    return reject(new Error('Python returned no result'));
                 }
+                resolve(parsed);
             });
             
             // Handle process errors
@@ -1074,6 +1070,10 @@ async function handleOutreach(command, currentUser) {
                 console.error(`Failed to start Python process: ${err.message}`);
                 reject(new Error(`Failed to start Python process: ${err.message}`));
             });
+
+            if (input !== undefined) {
+                py.stdin.end(input);
+            }
         });
         
         // 1) Find emails for the topic
@@ -1101,6 +1101,23 @@ async function handleOutreach(command, currentUser) {
             };
         }
         
+        // Drop undeliverable (bad syntax, placeholders, no MX) and already contacted or opted-out addresses before drafting
+        try {
+            const validation = await runPython(['validate'], JSON.stringify(emails));
+            if (Array.isArray(validation?.valid)) {
+                emails = validation.valid;
+            }
+        } catch (error) {
+            console.error('Error validating emails:', error);
+        }
+        
+        if (emails.length === 0) {
+            return {
+                action: 'none',
+                message: `None of the emails found for "${topic}" look deliverable. Try a different topic or broaden your search.`
+            };
+        }
+        
         // Limit to maxEmails
         emails = emails.slice(0, maxEmails);
         
@@ -1160,6 +1177,16 @@ ${fromName}`;
         }
         const failed = results.filter(r => !r.success);
         
+        // Record who was contacted so later outreach skips them
+        const contacted = results.filter(r => r.success).map(r => r.email);
+        if (contacted.length > 0) {
+            try {
+                await runPython(['suppress', 'contacted'], JSON.stringify(contacted));
+            } catch (error) {
+                console.error('Error recording contacted emails:', error);
+            }
+        }
+        
         // Save AI chat interaction
         await saveAIChatInteraction(
             currentUser._id,
@@ -1,93 +1,160 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import re
-import time
-import requests
-from openai import OpenAI
 import os
 import sys
 import json
 
+from outreach_core import (
+    find_emails_for_query as core_find_emails,
+    draft_intro_email, fallback_intro_email, send_email_via_api as core_send_email,
+    validate_contacts, install_dump, draft_intro_variants, fill_sender,
+)
+from outreach_core.deadline import (
+    truncated, install_deadlines, pop_deadline_option, set_deadline, install_cancel_handlers, usage_error,
+)
+from outreach_core.log import log, WARNING
+from outreach_core.metrics import instrument_app
+from outreach_core.outbox import OutboxDrainer, SkipMessage, campaign_id, get_outbox
+from outreach_core.output import emit
+from outreach_core.profiling import install_profiling, pop_profile_option, profile_run
+from outreach_core.scheduler import Overloaded
+from outreach_core.suppression import CONTACTED, OPTED_OUT, REASONS, get_suppression_list, normalize_address
+from outreach_core.warmer import CacheWarmer, record_query
+from outreach_core.config import is_configured, METRICS_DUMP, WARM_ENABLED
+
 # --- CONFIGURATION ---
 SERPAPI_API_KEY = os.environ.get('SERPAPI_API_KEY', 'YOUR_SERPAPI_API_KEY')
 OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY', 'YOUR_OPENROUTER_API_KEY')
 EMAIL_API_ENDPOINT = 'http://localhost:3000/api/web-search/send-intro-email'  # Node.js service endpoint
 
-# --- Initialize App and Clients ---
-app = Flask(__name__)
-CORS(app)
-openrouter_client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key=OPENROUTER_API_KEY,
-)
+# --- Initialize App ---
+# flask is imported lazily: the app is only built by create_app() when serving.
+def create_app():
+    from flask import Flask
+    from flask_cors import CORS
+    app = Flask(__name__)
+    CORS(app)
+    app.add_url_rule('/api/search', view_func=handle_search, methods=['POST'])
+    app.add_url_rule('/api/send-intro', view_func=handle_send_intro, methods=['POST'])
+    app.add_url_rule('/api/send-intro/<campaign>', view_func=handle_send_intro_status, methods=['GET'])
+    app.add_url_rule('/api/suppress', view_func=handle_suppress, methods=['POST'])
+    app.register_error_handler(Overloaded, handle_overloaded)
+    instrument_app(app)  # also serves GET /metrics
+    install_profiling(app)  # ?profile=1 / X-Profile header, or OUTREACH_PROFILE for every request
+    install_deadlines(app)  # X-Deadline / X-Timeout headers
+    # Intros queued by /api/send-intro are validated, drafted and sent from here, outside any request
+    app.extensions['outbox_drainer'] = OutboxDrainer(get_outbox(), send_outbox_message, prepare=prepare_outbox_batch,
+                                                     on_sent=record_contacted).start()
+    if WARM_ENABLED:
+        # Popular searches are re-run before the working day so this process's caches are warm
+        app.extensions['cache_warmer'] = CacheWarmer({"outreach_search": warm_outreach_search}).start()
+    return app
 
 # --- HELPER FUNCTIONS ---
 
-def find_emails_for_query(topic, max_emails=10):
-    print(f"🚀 Starting search for '{topic}'...")
-    found_emails = set()
-    search_queries = [f'"{topic}" contact email', f'"{topic}" startup founder email "@"']
-    for query in search_queries:
-        params = {"engine": "google", "q": query, "api_key": SERPAPI_API_KEY}
-        try:
-            response = requests.get("https://serpapi.com/search.json", params=params)
-            response.raise_for_status()
-            results = response.json().get("organic_results", [])
-            for result in results:
-                snippet = result.get("snippet", "")
-                emails_in_snippet = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', snippet)
-                if emails_in_snippet:
-                    found_emails.update(emails_in_snippet)
-        except Exception as e:
-            print(f"    - API Error: {e}")
-    print(f"✅ Search complete. Found {len(found_emails)} emails.")
-    return list(found_emails)
+def find_emails_for_query(topic, max_emails=10, use_samples=False, project_summary=None):
+    emails = core_find_emails(topic, max_emails, api_key=SERPAPI_API_KEY, use_samples=use_samples,
+                              project_summary=project_summary)
+    # Nobody already contacted or opted out is offered again
+    return get_suppression_list().filter(emails)[0]
 
 def draft_intro_email_with_ai(topic, project_summary):
-    print("🤖 AI is drafting the intro email...")
-    prompt = f"""
-    You are a professional business communication assistant. Write a concise and compelling cold outreach email to a potential contact in the '{topic}' space.
-    The email should be based on the following project summary: "{project_summary}"
-    Keep the email under 150 words and end with a clear call to action. Return ONLY the raw text of the email body.
-    """
-    try:
-        completion = openrouter_client.chat.completions.create(
-            model="anthropic/claude-3-haiku",
-            messages=[{"role": "user", "content": prompt}],
-        )
-        return completion.choices[0].message.content
-    except Exception as e:
-        print(f"    - AI drafting error: {e}")
-        return None
+    return draft_intro_email(topic, project_summary, api_key=OPENROUTER_API_KEY)
+
+def draft_personalized_intros(topic, project_summary, emails, sender=None):
+    """One draft per address, batched into as few LLM calls as possible; {email: body}."""
+    recipients = [{"id": email, "email": email, "company": email.rsplit('@', 1)[-1]} for email in emails]
+    return draft_intro_variants(topic, project_summary, recipients, api_key=OPENROUTER_API_KEY, sender=sender)
 
 def send_email_via_api(email_address, subject, body, from_name, from_email):
-    payload = {
-        'toEmails': [email_address],
-        'fromName': from_name,
-        'fromEmail': from_email,
-        'businessContext': body
-    }
-    try:
-        response = requests.post(EMAIL_API_ENDPOINT, json=payload)
-        return response.status_code == 200
-    except Exception as e:
-        print(f"    - Sending error: {e}")
-        return False
+    return core_send_email(email_address, subject, body, from_name, from_email, endpoint=EMAIL_API_ENDPOINT)
+
+def warm_outreach_search(topic):
+    """Cache-warmer recipe: the search and harvest behind /api/search."""
+    find_emails_for_query(topic)
+
+def prepare_outbox_batch(batch):
+    """
+    The drainer's step before sending a batch: drops suppressed recipients
+    (anyone contacted or opted out since the message was queued, and all
+    but one message per person in the batch), checks the mail servers,
+    then drafts the bodies of the messages queued without one, a campaign
+    at a time. Returns {message id: skip reason}.
+    """
+    skips = {}
+    suppressed = {entry["email"]: entry["reason"]
+                  for entry in get_suppression_list().filter([message["recipient"] for message in batch])[1]}
+    people = set()
+    for message in batch:
+        person = normalize_address(message["recipient"])
+        if message["recipient"] in suppressed:
+            skips[message["id"]] = f"suppressed ({suppressed[message['recipient']]})"
+        elif person in people:
+            skips[message["id"]] = "suppressed (another campaign in this batch)"
+        people.add(person)
+
+    validation = validate_contacts(sorted({message["recipient"] for message in batch if message["id"] not in skips}))
+    undeliverable = {rejection["email"]: rejection["reason"] for rejection in validation["rejected"]}
+    skips.update((message["id"], f"undeliverable ({undeliverable[message['recipient']]})")
+                 for message in batch if message["recipient"] in undeliverable)
+
+    campaigns = {}
+    for message in batch:
+        if message["id"] not in skips and not message["body"]:
+            key = (message["campaign"], message["topic"], message["project_summary"], message["from_name"])
+            campaigns.setdefault(key, []).append(message)
+    for (_, topic, project_summary, sender), messages in campaigns.items():
+        # With `personalize`, every contact gets its own draft; the shared draft
+        # covers anyone whose variant failed
+        personal = [message["recipient"] for message in messages if message["personalize"]]
+        variants = draft_personalized_intros(topic, project_summary, personal, sender) if personal else {}
+        shared = None
+        if any(message["recipient"] not in variants for message in messages):
+            shared = draft_intro_email_with_ai(topic, project_summary)
+        for message in messages:
+            body = variants.get(message["recipient"], shared)
+            if body:
+                message["body"] = fill_sender(body, sender)
+    return skips
+
+def send_outbox_message(message):
+    # Checked again right before sending: an opt-out may have arrived while the message waited
+    suppressed = get_suppression_list().filter([message["recipient"]])[1]
+    if suppressed:
+        raise SkipMessage(f"suppressed ({suppressed[0]['reason']})")
+    return send_email_via_api(message["recipient"], message["subject"], message["body"],
+                              message["from_name"], message["from_email"])
+
+def record_contacted(message):
+    get_suppression_list().add([message["recipient"]], CONTACTED)
+
+def handle_overloaded(error):
+    # Shed load fast so the caller can retry instead of queueing behind bulk work
+    from flask import jsonify
+    return jsonify({"error": str(error)}), 503, {"Retry-After": "5"}
 
 # --- API ENDPOINT 1: SEARCH FOR EMAILS ---
-@app.route('/api/search', methods=['POST'])
 def handle_search():
+    from flask import request, jsonify
     data = request.get_json()
     query = data.get('query')
     if not query:
         return jsonify({"error": "Query is missing"}), 400
-    
-    emails = find_emails_for_query(query)
-    return jsonify({"emails": emails})
+    record_query("outreach_search", query)
+
+    # With a project summary, the most relevant contacts come first
+    emails = find_emails_for_query(query, project_summary=data.get('project_summary'))
+    return jsonify({"emails": emails, "truncated": truncated()})
 
 # --- API ENDPOINT 2: DRAFT AND SEND INTROS ---
-@app.route('/api/send-intro', methods=['POST'])
 def handle_send_intro():
+    return send_intros()
+
+def send_intros():
+    """
+    Queues intros and returns 202 at once. Only the checks that need no
+    network run here; MX validation, drafting and sending happen in the
+    outbox drainer, and the status URL shows their progress.
+    """
+    from flask import current_app, request, jsonify
     data = request.get_json()
     emails = data.get('emails')
     query = data.get('query')
@@ -98,22 +165,187 @@ def handle_send_intro():
     if not all([emails, query, project_summary, from_name, from_email]):
         return jsonify({"error": "Missing required data"}), 400
 
-    intro_body = draft_intro_email_with_ai(query, project_summary)
-    if not intro_body:
-        return jsonify({"error": "Failed to draft the email."}), 500
-    
-    print(f"📬 Preparing to send intros to {len(emails)} emails...")
+    # Drop malformed and placeholder addresses now; the drainer checks mail servers
+    validation = validate_contacts(emails, check_mx=False)
+    rejected = validation["rejected"]
+    emails = validation["valid"]
+    if rejected:
+        log(f"    - Skipping {len(rejected)} undeliverable addresses")
+    if not emails:
+        return jsonify({"error": "None of the addresses passed validation.", "rejected": rejected}), 400
+
+    # Nor anyone already contacted or opted out, by any campaign
+    emails, suppressed = get_suppression_list().filter(emails)
+    if suppressed:
+        log(f"    - Skipping {len(suppressed)} suppressed addresses")
+    if not emails:
+        return jsonify({"error": "All of the addresses are suppressed.", "rejected": rejected,
+                        "suppressed": suppressed}), 400
+
+    # Queue the draft inputs and return; the outbox drainer drafts and sends in the background
+    campaign = data.get('campaign') or campaign_id(query, from_email)
     subject = f"Introduction & Inquiry: {query}"
-    sent_count = 0
-    for email in emails:
-        if send_email_via_api(email, subject, intro_body, from_name, from_email):
-            sent_count += 1
-            print(f"    - Intro sent successfully to {email}")
-        else:
-            print(f"    - Failed to send intro to {email}")
+    personalize = bool(data.get('personalize'))
+    queued = get_outbox().enqueue(campaign, [
+        {"recipient": email, "subject": subject, "topic": query, "project_summary": project_summary,
+         "personalize": personalize, "from_name": from_name, "from_email": from_email}
+        for email in emails
+    ])
+    current_app.extensions['outbox_drainer'].wake()
+    log(f"📬 Queued intros to {len(queued['queued'])} emails for campaign {campaign}")
+
+    report = {
+        "message": f"Queued introductions to {len(queued['queued'])} of {len(emails)} contacts.",
+        "campaign": campaign,
+        "status_url": f"/api/send-intro/{campaign}",
+        "queued": queued["queued"],
+        "duplicates": queued["duplicates"],
+        "rejected": rejected,
+        "suppressed": suppressed,
+        "personalize": personalize,
+        "truncated": truncated()
+    }
+    return jsonify(report), 202
+
+# --- API ENDPOINT 3: SEND STATUS ---
+def handle_send_intro_status(campaign):
+    from flask import jsonify
+    status = get_outbox().status(campaign)
+    if not status["messages"]:
+        return jsonify({"error": "Unknown campaign"}), 404
+    return jsonify(status)
+
+# --- API ENDPOINT 4: OPT-OUTS ---
+def handle_suppress():
+    from flask import request, jsonify
+    data = request.get_json() or {}
+    emails = data.get('emails')
+    reason = data.get('reason', OPTED_OUT)
+    if not isinstance(emails, list) or reason not in REASONS:
+        return jsonify({"error": f"Expected a list of emails and a reason in {list(REASONS)}"}), 400
+    added = get_suppression_list().add([e for e in emails if isinstance(e, str)], reason)
+    return jsonify({"added": added, "reason": reason})
+
+# --- COMMAND LINE INTERFACE ---
+
+def cli_search(query):
+    """Handle search command from Node.js"""
+    if not query:
+        return {"error": "Query is missing"}
+    record_query("outreach_search", query)
+
+    emails = find_emails_for_query(query, use_samples=True)
+    return {"emails": emails, "truncated": truncated()}
+
+def cli_draft(query, project_summary):
+    """Handle draft command from Node.js"""
+    if not query or not project_summary:
+        return {"error": "Missing required data"}
+
+    if not is_configured(OPENROUTER_API_KEY):
+        log("    - Error: OPENROUTER_API_KEY is not configured", WARNING)
+        return {"email_body": "Sample email body for testing. Please configure OPENROUTER_API_KEY for production use."}
+
+    # Always return a valid email body, even if it's a fallback template
+    email_body = draft_intro_email_with_ai(query, project_summary)
+    return {"email_body": email_body or fallback_intro_email(query, project_summary),
+            "truncated": truncated()}
+
+def cli_draft_variants(query, project_summary, recipients_json):
+    """Handle draft-variants command from Node.js: a JSON list of emails or recipient objects"""
+    if not query or not project_summary:
+        return {"error": "Missing required data"}
+    try:
+        recipients = json.loads(recipients_json)
+    except ValueError:
+        return {"error": "Expected a JSON list of recipients"}
+    if not isinstance(recipients, list):
+        return {"error": "Expected a JSON list of recipients"}
+    recipients = [{"id": r, "email": r} if isinstance(r, str) else r for r in recipients
+                  if isinstance(r, str) or (isinstance(r, dict) and "id" in r)]
+
+    if not is_configured(OPENROUTER_API_KEY):
+        log("    - Error: OPENROUTER_API_KEY is not configured", WARNING)
+        variants = {}
+    else:
+        variants = draft_intro_variants(query, project_summary, recipients, api_key=OPENROUTER_API_KEY)
+    # Anyone without a valid variant gets the template, as cli_draft does
+    fallback = fallback_intro_email(query, project_summary)
+    return {"variants": {str(r["id"]): variants.get(str(r["id"]), fallback) for r in recipients},
+            "truncated": truncated()}
+
+def cli_validate(emails_json):
+    """Handle validate command from Node.js: a JSON list of candidate emails"""
+    try:
+        emails = json.loads(emails_json)
+    except ValueError:
+        return {"error": "Expected a JSON list of emails"}
+    if not isinstance(emails, list):
+        return {"error": "Expected a JSON list of emails"}
+    result = validate_contacts([e for e in emails if isinstance(e, str)])
+    result["valid"], suppressed = get_suppression_list().filter(result["valid"])
+    result["rejected"].extend(suppressed)
+    return dict(result, truncated=truncated())
+
+def cli_suppress(reason, emails_json):
+    """Handle suppress command from Node.js: record sends or opt-outs for a JSON list of emails"""
+    if reason not in REASONS:
+        return {"error": f"Reason must be one of {list(REASONS)}"}
+    try:
+        emails = json.loads(emails_json)
+    except ValueError:
+        return {"error": "Expected a JSON list of emails"}
+    if not isinstance(emails, list):
+        return {"error": "Expected a JSON list of emails"}
+    return {"added": get_suppression_list().add([e for e in emails if isinstance(e, str)], reason)}
+
+def main(argv):
+    """
+    `search <query>`, `draft <query> <project_summary>`,
+    `draft-variants <query> <project_summary> [json list]`,
+    `validate [json list]` and `suppress <contacted|opted_out> [json list]`
+    emit one JSON result line for the Node.js side; no
+    command (or `serve`) runs the Flask API. `--profile[=sample]` profiles
+    a single command. `--deadline <unix time>` / `--timeout <seconds>` bound
+    a command's run time; SIGTERM makes it print what it has so far.
+    """
+    profile_mode = pop_profile_option(argv)
+    try:
+        expires_at = pop_deadline_option(argv)
+    except ValueError as e:
+        usage_error(str(e))
+    command = argv[1] if len(argv) > 1 else "serve"
+    if METRICS_DUMP and command != "serve":
+        install_dump()
+    if command != "serve":
+        profile_run(f"ai_outreach_assistant {command}", profile_mode)
+        # The server keeps default signal handling; its requests carry their own deadlines
+        set_deadline(expires_at)
+        install_cancel_handlers()
+
+    if command == "serve":
+        create_app().run(host='0.0.0.0', port=5000)
+
+    elif command == "search" and len(argv) >= 3:
+        emit(cli_search(argv[2]))
+
+    elif command == "draft" and len(argv) >= 4:
+        emit(cli_draft(argv[2], argv[3]))
+
+    elif command == "draft-variants" and len(argv) >= 4:
+        # Recipient lists can be large, so they may also come on stdin
+        emit(cli_draft_variants(argv[2], argv[3], argv[4] if len(argv) >= 5 else sys.stdin.read()))
+
+    elif command == "validate":
+        # The list can be large, so it may also come on stdin
+        emit(cli_validate(argv[2] if len(argv) >= 3 else sys.stdin.read()))
+
+    elif command == "suppress" and len(argv) >= 3:
+        emit(cli_suppress(argv[2], argv[3] if len(argv) >= 4 else sys.stdin.read()))
 
-    report = {"message": f"Process complete. Successfully sent introductions to {sent_count} of {len(emails)} contacts."}
-    return jsonify(report)
+    else:
+        emit({"error": "Invalid command or missing arguments"})
+        sys.exit(1)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    main(sys.argv)
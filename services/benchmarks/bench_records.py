@@ -0,0 +1,135 @@
+"""
+Memory benchmark for harvest result storage.
+
+Builds the same synthetic 10k-email harvest twice: once as the per-email
+dicts the harvest engine used to keep, and once as an EmailHarvest. It
+reports the memory each store holds and the peak while it is serialized to
+JSON: the dicts through json.dumps of the formatted list, as the scripts do,
+the EmailHarvest by streaming dump_json(). The mix is site pages with many addresses each,
+search snippets and linked pages, like a real run.
+
+Usage:
+    python services/benchmarks/bench_records.py [--emails 10000]
+"""
+import os
+import sys
+import io
+import json
+import random
+import argparse
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from outreach_core.extract import email_context, format_email_results  # noqa: E402
+from outreach_core.records import EmailHarvest  # noqa: E402
+
+WORDS = ("fund venture partner seed series capital portfolio founder team contact "
+         "invest fintech climate health early stage lead round thesis").split()
+EMAILS_PER_SITE = 20
+EMAILS_PER_SNIPPET = 2
+EMAILS_PER_LINKED_PAGE = 6
+
+
+def filler(rng, n_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def synthetic_harvest(n_emails, seed=7):
+    """Yields (kind, title, link, text, emails) hits totalling `n_emails` addresses."""
+    rng = random.Random(seed)
+    produced = 0
+    i = 0
+    while produced < n_emails:
+        kind = ("site", "snippet", "linked")[i % 3]
+        count = {"site": EMAILS_PER_SITE, "snippet": EMAILS_PER_SNIPPET, "linked": EMAILS_PER_LINKED_PAGE}[kind]
+        count = min(count, n_emails - produced)
+        emails = [f"partner{produced + k}@fund{i}.com" for k in range(count)]
+        if kind == "snippet":
+            text = filler(rng, 20) + ' ' + ' '.join(emails)
+        else:
+            parts = []
+            for email in emails:
+                parts.append(filler(rng, 60))
+                parts.append(email)
+            text = ' '.join(parts) + ' ' + filler(rng, 200)
+        yield kind, f"Fund {i} - Team", f"https://fund{i}.com/team", text, emails
+        produced += count
+        i += 1
+
+
+def build_dicts(hits):
+    found = {}
+    for kind, title, link, text, emails in hits:
+        for email in emails:
+            if kind == "site":
+                found[email] = {"title": "From fund.com", "link": link,
+                                "context": email_context(text, email, default="Found on website")}
+            elif kind == "snippet":
+                found[email] = {"title": title, "link": link, "context": text}
+            else:
+                found[email] = {"title": title, "link": link, "context": "Found on linked page"}
+    return found
+
+
+def build_records(hits):
+    found = EmailHarvest()
+    for kind, title, link, text, emails in hits:
+        if kind == "site":
+            found.add_page_hits(emails, "From fund.com", link, text, default="Found on website")
+        elif kind == "snippet":
+            for email in emails:
+                found.add(email, title, link, text)
+        else:
+            for email in emails:
+                found.add(email, title, link, "Found on linked page")
+    return found
+
+
+class NullWriter(io.TextIOBase):
+    """Discards output, so serialization peaks don't include the output itself."""
+
+    def write(self, s):
+        return len(s)
+
+
+def serialize_dicts(found):
+    NullWriter().write(json.dumps(format_email_results(found)))
+
+
+def serialize_records(found):
+    found.dump_json(NullWriter())
+
+
+def measure(build, serialize, hits):
+    tracemalloc.start()
+    store = build(iter(hits))
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    serialize(store)
+    peak = tracemalloc.get_traced_memory()[1] - held
+    tracemalloc.stop()
+    return store, held, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of harvest result stores.")
+    parser.add_argument("--emails", type=int, default=10000, help="Addresses in the synthetic harvest")
+    args = parser.parse_args()
+
+    hits = list(synthetic_harvest(args.emails))
+    legacy, legacy_held, legacy_peak = measure(build_dicts, serialize_dicts, hits)
+    compact, compact_held, compact_peak = measure(build_records, serialize_records, hits)
+    legacy_results = format_email_results(legacy)
+    assert legacy_results == compact.to_dicts(), "stores disagree"
+
+    print(f"{len(legacy_results)} emails from {len(hits)} pages/snippets")
+    for name, held, peak in [("dict per email", legacy_held, legacy_peak),
+                             ("EmailHarvest", compact_held, compact_peak)]:
+        print(f"{name:<16} held {held / 1024:9.1f} KiB ({held / len(legacy_results):6.1f} B/email)"
+              f"  extra while serializing {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
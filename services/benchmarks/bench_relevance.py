@@ -0,0 +1,78 @@
+"""
+Benchmark for TF-IDF relevance ranking of outreach candidates.
+
+Generates synthetic search results (title + snippet) where a fraction are
+on-topic for the project summary, scores them with the numpy path and the
+pure-Python fallback, and reports time per batch and how many on-topic
+candidates land in the top k.
+
+Usage:
+    python services/benchmarks/bench_relevance.py [--candidates 10000 50000] [--top-k 100]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from outreach_core.relevance import relevance_scores, result_text  # noqa: E402
+
+PROJECT_SUMMARY = ("Seed-stage fintech startup building embedded payments and lending APIs "
+                   "for small business banking; looking for fintech investors and payments partners")
+ON_TOPIC = ("fintech payments lending embedded banking api seed investor small business "
+            "partner venture fund infrastructure").split()
+OFF_TOPIC = ("recipe travel hotel football weather music concert fashion garden movie "
+             "gaming fitness yoga pets cooking holiday camera phone review news").split()
+FILLER = "the best top list guide contact team about company new 2024 learn more how why".split()
+
+
+def synthetic_results(n, on_topic_share=0.1, seed=3):
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        relevant = rng.random() < on_topic_share
+        vocab = ON_TOPIC if relevant else OFF_TOPIC
+        words = [rng.choice(vocab) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(30)]
+        results.append({
+            "title": ' '.join(words[:6]).title(),
+            "snippet": ' '.join(words[6:]),
+            "link": f"https://example{i}.com/",
+            "relevant": relevant,
+        })
+    return results
+
+
+def timed(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark relevance ranking.")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10000, 50000], help="Batch sizes")
+    parser.add_argument("--top-k", type=int, default=100, help="Candidates kept after ranking")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    for n in args.candidates:
+        results = synthetic_results(n)
+        texts = [result_text(r) for r in results]
+        print(f"{n} candidates, {sum(r['relevant'] for r in results)} on-topic")
+        for name, use_numpy in [("numpy", True), ("pure python", False)]:
+            elapsed, scores = timed(lambda: relevance_scores(PROJECT_SUMMARY, texts, use_numpy=use_numpy), args.repeat)
+            top = sorted(range(n), key=lambda i: -scores[i])[:args.top_k]
+            precision = sum(results[i]["relevant"] for i in top) / len(top)
+            print(f"  {name:<12} {elapsed * 1000:8.1f} ms  ({elapsed / n * 1e6:5.2f} us/candidate)"
+                  f"  top-{args.top_k} precision {precision:.0%}")
+
+
+if __name__ == "__main__":
+    main()
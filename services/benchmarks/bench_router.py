@@ -0,0 +1,86 @@
+"""
+Micro-benchmark and accuracy check for the web-search keyword router.
+
+Compares the compiled KeywordRouter with the substring scan it replaced on
+the labelled messages in fixtures/router_queries.json, and times both per
+message and in batch.
+
+Usage:
+    python services/benchmarks/bench_router.py [--repeat 2000]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from outreach_core.router import KeywordRouter  # noqa: E402
+
+FIXTURES = os.path.join(BENCH_DIR, 'fixtures', 'router_queries.json')
+
+# The original needs_web_search keyword list and substring scan
+LEGACY_KEYWORDS = [
+    "find", "search", "look up", "discover", "locate",
+    "identify", "recommend", "suggest", "latest",
+    "recent", "news", "trends", "investors", "companies",
+    "startups", "who is", "what is", "where is", "when is",
+    "how to", "best", "top", "popular", "review"
+]
+
+
+def legacy_needs_web_search(query):
+    query_lower = query.lower()
+    for keyword in LEGACY_KEYWORDS:
+        if keyword in query_lower:
+            return True
+    return False
+
+
+def accuracy(classify, fixtures):
+    correct = 0
+    misses = []
+    for case in fixtures:
+        if classify(case["text"]) == case["web_search"]:
+            correct += 1
+        else:
+            misses.append(case["text"])
+    return correct / len(fixtures), misses
+
+
+def time_per_message(classify, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            classify(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the web-search keyword router.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the fixture set")
+    args = parser.parse_args()
+
+    with open(FIXTURES, 'r', encoding='utf-8') as f:
+        fixtures = json.load(f)
+    texts = [case["text"] for case in fixtures]
+    router = KeywordRouter()
+
+    for name, classify in [("substring scan", legacy_needs_web_search), ("KeywordRouter", router.needs_web_search)]:
+        acc, misses = accuracy(classify, fixtures)
+        per_msg = time_per_message(classify, texts, args.repeat)
+        print(f"{name:<16} accuracy {acc:6.1%}  {per_msg * 1e6:7.2f} us/message")
+        for text in misses:
+            print(f"    misrouted: {text}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        router.classify_batch(texts)
+    per_msg = (time.perf_counter() - start) / (args.repeat * len(texts))
+    print(f"{'classify_batch':<16} {'':>15}  {per_msg * 1e6:7.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Interactive latency under bulk load, with and without priority classes.
+
+Bulk threads keep the upstream slots busy with simulated calls while
+interactive requests (a few sequential calls each) arrive at a steady
+rate. The same load runs twice: once with a single shared class (plain
+concurrency cap, no priorities) and once with the default interactive and
+bulk classes. Reports interactive p50/p99 and how much bulk work got done.
+
+Usage:
+    python services/benchmarks/bench_scheduler.py [--seconds 5] [--bulk-threads 32]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from outreach_core.scheduler import (  # noqa: E402
+    Scheduler, PriorityClass, Overloaded, INTERACTIVE, BULK,
+)
+
+CAPACITY = 8
+BULK_CALL = 0.05         # seconds per simulated bulk upstream call
+INTERACTIVE_CALL = 0.02  # seconds per simulated interactive upstream call
+INTERACTIVE_CALLS = 3    # upstream calls per interactive request
+ARRIVAL_INTERVAL = 0.05  # seconds between interactive requests
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(scheduler, class_of, seconds, bulk_threads):
+    stop = threading.Event()
+    bulk_done = [0]
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+
+    def bulk_worker():
+        while not stop.is_set():
+            try:
+                with scheduler.slot(class_of(BULK)):
+                    time.sleep(BULK_CALL)
+            except Overloaded:
+                time.sleep(BULK_CALL)
+                continue
+            with lock:
+                bulk_done[0] += 1
+
+    def interactive_request():
+        start = time.perf_counter()
+        try:
+            for _ in range(INTERACTIVE_CALLS):
+                with scheduler.slot(class_of(INTERACTIVE)):
+                    time.sleep(INTERACTIVE_CALL)
+        except Overloaded:
+            with lock:
+                rejected[0] += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=bulk_worker, daemon=True) for _ in range(bulk_threads)]
+    for worker in workers:
+        worker.start()
+    requests = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        request = threading.Thread(target=interactive_request, daemon=True)
+        request.start()
+        requests.append(request)
+        time.sleep(ARRIVAL_INTERVAL)
+    for request in requests:
+        request.join()
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return latencies, bulk_done[0], rejected[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the priority scheduler.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of each run")
+    parser.add_argument("--bulk-threads", type=int, default=32, help="Concurrent bulk workers")
+    args = parser.parse_args()
+
+    shared = Scheduler([PriorityClass('shared', CAPACITY, 10000, 600.0)], capacity=CAPACITY)  # plain FIFO
+    prioritized = Scheduler([
+        PriorityClass(INTERACTIVE, CAPACITY, 64, 10.0),
+        PriorityClass(BULK, CAPACITY // 2, 10000, 600.0),
+    ], capacity=CAPACITY)
+
+    ideal = INTERACTIVE_CALLS * INTERACTIVE_CALL
+    print(f"capacity {CAPACITY}, {args.bulk_threads} bulk workers, interactive floor {ideal * 1000:.0f} ms")
+    for name, scheduler, class_of in [("no priorities", shared, lambda _: 'shared'),
+                                      ("priority classes", prioritized, lambda c: c)]:
+        latencies, bulk_done, rejected = run(scheduler, class_of, args.seconds, args.bulk_threads)
+        print(f"{name:<17} interactive p50 {percentile(latencies, 50) * 1000:7.1f} ms"
+              f"  p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+              f"  rejected {rejected:3d}  bulk calls {bulk_done / args.seconds:6.1f}/s")
+
+
+if __name__ == "__main__":
+    main()
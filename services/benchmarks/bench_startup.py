@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark for the Python entry points spawned by the Node layer.
+
+Each entry point is imported in a fresh interpreter (the same thing that
+happens on every `spawn('python', ...)`), and we report the median import
+time plus which heavy dependencies ended up loaded.
+
+Usage:
+    python services/benchmarks/bench_startup.py [--runs 10]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "web_search_recommendations",
+    "email_extractor",
+    "market_research",
+    "ai_outreach_assistant",
+]
+
+HEAVY_MODULES = ["openai", "bs4", "flask", "requests"]
+
+# Runs inside the child interpreter: time the import and list heavy modules
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure(module, runs):
+    """Imports `module` in `runs` fresh interpreters and returns the samples."""
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=SERVICES_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1:]
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(data["seconds"])
+        loaded = data["loaded"]
+    return samples, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time per Python entry point.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per entry point")
+    args = parser.parse_args()
+
+    print(f"{'entry point':<30} {'median ms':>10} {'max ms':>10}  heavy modules loaded")
+    print("-" * 80)
+    for module in ENTRY_POINTS:
+        samples, loaded = measure(module, args.runs)
+        if samples is None:
+            print(f"{module:<30} {'failed':>10} {'':>10}  {' '.join(loaded)}")
+            continue
+        median_ms = statistics.median(samples) * 1000
+        max_ms = max(samples) * 1000
+        print(f"{module:<30} {median_ms:>10.1f} {max_ms:>10.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import sys
+
+from outreach_core.config import METRICS_DUMP
+from outreach_core.deadline import start_script
+from outreach_core.metrics import install_dump
+from outreach_core.output import emit
+from outreach_core.profiling import pop_profile_option, profile_run
+from outreach_core.warmer import CacheWarmer, in_window, last_warm_report, top_topics
+from email_extractor import warm_emails
+from web_search_recommendations import warm_recommendations
+from ai_outreach_assistant import warm_outreach_search
+
+# --- RECIPES ---
+# One per logged query source: the cached path a user query from it takes
+RECIPES = {
+    "recommendations": warm_recommendations,
+    "emails": warm_emails,
+    "outreach_search": warm_outreach_search,
+}
+
+
+# Command-line interface, e.g. from cron inside the warming window
+if __name__ == "__main__":
+    if METRICS_DUMP:
+        install_dump()
+    profile_run("cache_warmer", pop_profile_option(sys.argv))
+    start_script(sys.argv)
+    import argparse
+    parser = argparse.ArgumentParser(description="Pre-populate the caches with the most asked topics from the query log.")
+    parser.add_argument("--top", type=int, help="Topics to warm (default OUTREACH_WARM_TOP_N)")
+    parser.add_argument("--budget", type=int, help="Upstream calls to spend at most (default OUTREACH_WARM_BUDGET)")
+    parser.add_argument("--force", action="store_true", help="Run even outside OUTREACH_WARM_HOURS")
+    parser.add_argument("--list", action="store_true", help="Only show the topics that would be warmed")
+    parser.add_argument("--report", action="store_true", help="Show the report of the last run")
+    args = parser.parse_args()
+
+    options = {k: v for k, v in (("top_n", args.top), ("budget", args.budget)) if v is not None}
+    warmer = CacheWarmer(RECIPES, **options)
+    if args.report:
+        emit(last_warm_report() or {"error": "No warm-up has run yet"})
+    elif args.list:
+        emit({"topics": [{"source": s, "topic": t, "queries": n}
+                         for s, t, n in top_topics(warmer.top_n, sources=set(RECIPES))]})
+    elif not args.force and not in_window(warmer.hours):
+        emit({"skipped": f"outside the warming window ({warmer.hours})"})
+    else:
+        emit(warmer.run_once())
@@ -1,249 +1,121 @@
 import os 
-import re 
 import time 
-import json
-from openai import OpenAI 
-import requests 
-from bs4 import BeautifulSoup 
+
+from outreach_core import (
+    harvest_emails, serpapi_search, scrape_many, complete, fetch_page_html, html_to_text,
+)
+from outreach_core.deadline import deadline_reached, remaining, truncated, sleep, start_script
+from outreach_core.dedup import NearDuplicateIndex, drop_near_duplicates, snippet_index
+from outreach_core.jobs import JobStore, NullJobStore, new_job_id
+from outreach_core.listing import extract_listing
+from outreach_core.log import log, WARNING
+from outreach_core.profiles import get_profile_store
+from outreach_core.relevance import rank_contacts
+from outreach_core.metrics import install_dump
+from outreach_core.output import emit
+from outreach_core.profiling import pop_profile_option, profile_run
+from outreach_core.scheduler import BULK, Overloaded, set_priority
+from outreach_core.config import MODEL_FAST, MODEL_ANALYSIS, METRICS_DUMP, SCRAPE_TOP_K, LISTING_MIN_CONFIDENCE
  
 # --- CONFIGURATION --- 
 SERPAPI_API_KEY = 'YOUR_SERPAPI_API_KEY' 
 OPENROUTER_API_KEY = 'YOUR_OPENROUTER_API_KEY' 
- 
-# --- CLIENT SETUP --- 
-openrouter_client = OpenAI( 
-  base_url="https://openrouter.ai/api/v1", 
-  api_key=OPENROUTER_API_KEY, 
-) 
+PROFILE_ERROR_PREFIX = "    - AI profiling error"
 
 # --- EMAIL SCRAPING FUNCTIONALITY ---
+INVESTOR_SITES = [
+    "https://investorhunt.co/markets/email",
+    "https://ramp.com/vc-database/fintech-vc-angel-list",
+    "https://www.failory.com/fintech-investors"
+]
+
+SAMPLE_INVESTOR_EMAILS = [
+    "thomas.jones@venturefirm.com",
+    "kinga.stanislawska@microvc.com",
+    "anne.vazquez@equityfirm.com",
+    "steven.vine@angelinvestor.com",
+    "colin.hanna@vcpartners.com",
+    "brandon.zeuner@venturecap.com",
+    "klaus.lovgreen@angelinvestor.com",
+    "steve.anderson@venturecap.com",
+    "justin.mccarthy@angelinvestor.com",
+    "samantha.mcgonigle@venturecap.com",
+    "james.wise@equityfirm.com",
+    "dan.galpern@venturecap.com",
+    "brahm.klar@venturecap.com",
+    "tcm.sundaram@microvc.com",
+    "maxime.ledantec@venturecap.com"
+]
+
+
+def _sample_investor_source(email):
+    name_part = email.split('@')[0].replace('.', ' ').title()
+    domain_part = email.split('@')[1]
+    company_name = domain_part.split('.')[0].title()
+    return {
+        "title": f"{name_part} - {company_name}",
+        "link": f"https://www.{domain_part}",
+        "context": f"Investor at {company_name}"
+    }
+
+
 def find_emails_in_field(industry_topic, max_results=50, min_emails=10):
     """
     Dedicated function to find emails related to a specific industry or field.
     Returns emails in a structured format for easy display.
+    Contacts are ordered by how relevant their source is to the topic.
     """
-    print(f"\n🔍 Starting email search for: {industry_topic}")
-    
-    # First, try to extract emails directly from known investor databases
-    investor_sites = [
-        "https://investorhunt.co/markets/email",
-        "https://ramp.com/vc-database/fintech-vc-angel-list",
-        "https://www.failory.com/fintech-investors"
+    log(f"\n🔍 Starting email search for: {industry_topic}")
+    search_queries = [
+        f'"{industry_topic}" investor email address',
+        f'"{industry_topic}" VC email contacts',
+        f'"{industry_topic}" angel investor email',
+        f'"{industry_topic}" investment firm contact',
+        f'"{industry_topic}" venture capital partner email',
+        f'"{industry_topic}" investor relations email',
+        f'"{industry_topic}" founder email address',
+        f'"{industry_topic}" team contact information',
+        f'"{industry_topic}" company directory email',
+        f'"{industry_topic}" executive team email',
+        f'"{industry_topic}" CEO email address',
+        f'"{industry_topic}" contact information',
+        f'"{industry_topic}" leadership team contact',
+        f'"{industry_topic}" staff directory'
     ]
-    
-    found_emails = set()  # Use a set to avoid duplicates
-    email_sources = {}    # Track where each email was found
-    
-    # First try to extract from known investor sites
-    for site in investor_sites:
-        if len(found_emails) >= min_emails:
-            break
-            
-        print(f"  - Checking investor database: {site}")
-        try:
-            page_content = scrape_text_from_url(site)
-            
-            # Look for email patterns in the content
-            # Standard email pattern
-            emails_in_page = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', page_content)
-            
-            # Also look for obfuscated emails (e.g., "name [at] domain [dot] com")
-            obfuscated_emails = re.findall(r'[a-zA-Z0-9._%+-]+\s*[\[\(]at[\]\)]\s*[a-zA-Z0-9.-]+\s*[\[\(]dot[\]\)]\s*[a-zA-Z]{2,}', page_content)
-            
-            # Process obfuscated emails
-            for obf_email in obfuscated_emails:
-                clean_email = obf_email.replace(" ", "").replace("[at]", "@").replace("(at)", "@").replace("[dot]", ".").replace("(dot)", ".")
-                emails_in_page.append(clean_email)
-            
-            # Extract names and positions if available
-            for email in emails_in_page:
-                found_emails.add(email)
-                
-                # Try to find context around this email (name, position)
-                context_window = 200  # characters before and after
-                email_pos = page_content.find(email)
-                if email_pos != -1:
-                    start = max(0, email_pos - context_window)
-                    end = min(len(page_content), email_pos + len(email) + context_window)
-                    context = page_content[start:end]
-                else:
-                    context = "Found on investor database"
-                
-                email_sources[email] = {
-                    "title": f"Investor from {site.split('/')[2]}",
-                    "link": site,
-                    "context": context
-                }
-        except Exception as e:
-            print(f"    - Error scraping {site}: {e}")
-    
-    # If we still need more emails, use search queries
-    if len(found_emails) < min_emails:
-        # Craft targeted queries to find contact pages and email addresses
-        search_queries = [
-            f'"{industry_topic}" investor email address',
-            f'"{industry_topic}" VC email contacts',
-            f'"{industry_topic}" angel investor email',
-            f'"{industry_topic}" investment firm contact',
-            f'"{industry_topic}" venture capital partner email',
-            f'"{industry_topic}" investor relations email',
-            f'"{industry_topic}" founder email address',
-            f'"{industry_topic}" team contact information',
-            f'"{industry_topic}" company directory email',
-            f'"{industry_topic}" executive team email',
-            f'"{industry_topic}" CEO email address',
-            f'"{industry_topic}" contact information',
-            f'"{industry_topic}" leadership team contact',
-            f'"{industry_topic}" staff directory'
-        ]
-        
-        total_hits = 0
-        
-        # Continue searching until we find at least min_emails or exhaust all queries
-        for query in search_queries:
-            if len(found_emails) >= min_emails or total_hits >= max_results:
-                break
-                
-            print(f"  - Searching: '{query}'")
-            params = {
-                "engine": "google",
-                "q": query,
-                "api_key": SERPAPI_API_KEY,
-                "num": "100"
-            }
-            
-            try:
-                response = requests.get("https://serpapi.com/search.json", params=params)
-                response.raise_for_status()
-                results = response.json().get("organic_results", [])
-                
-                if not results:
-                    continue
-                    
-                for result in results:
-                    # Check snippet for emails
-                    snippet = result.get("snippet", "")
-                    title = result.get("title", "")
-                    link = result.get("link", "")
-                    
-                    # Extract emails from snippet
-                    emails_in_snippet = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', snippet)
-                    
-                    # If we find emails in the snippet, add them to our collection
-                    if emails_in_snippet:
-                        for email in emails_in_snippet:
-                            found_emails.add(email)
-                            email_sources[email] = {
-                                "title": title,
-                                "link": link,
-                                "context": snippet
-                            }
-                            total_hits += 1
-                    
-                    # If we haven't found enough emails yet, try to scrape the page
-                    if len(found_emails) < min_emails:
-                        try:
-                            page_content = scrape_text_from_url(link)
-                            emails_in_page = re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', page_content)
-                            
-                            for email in emails_in_page:
-                                found_emails.add(email)
-                                email_sources[email] = {
-                                    "title": title,
-                                    "link": link,
-                                    "context": "Found on linked page"
-                                }
-                                total_hits += 1
-                        except Exception as e:
-                            print(f"    - Error scraping {link}: {e}")
-                    
-                    if len(found_emails) >= min_emails or total_hits >= max_results:
-                        break
-                        
-                time.sleep(1)  # Be nice to the API
-                    
-            except Exception as e:
-                print(f"    - API Error: {e}")
-    
-    # If we still don't have enough emails, add some sample investor emails
-    # This is a fallback to ensure we always return something useful
-    if len(found_emails) < min_emails:
-        sample_emails = [
-            "thomas.jones@venturefirm.com",
-            "kinga.stanislawska@microvc.com",
-            "anne.vazquez@equityfirm.com",
-            "steven.vine@angelinvestor.com",
-            "colin.hanna@vcpartners.com",
-            "brandon.zeuner@venturecap.com",
-            "klaus.lovgreen@angelinvestor.com",
-            "steve.anderson@venturecap.com",
-            "justin.mccarthy@angelinvestor.com",
-            "samantha.mcgonigle@venturecap.com",
-            "james.wise@equityfirm.com",
-            "dan.galpern@venturecap.com",
-            "brahm.klar@venturecap.com",
-            "tcm.sundaram@microvc.com",
-            "maxime.ledantec@venturecap.com"
-        ]
-        
-        for email in sample_emails:
-            if len(found_emails) >= min_emails:
-                break
-            if email not in found_emails:
-                found_emails.add(email)
-                name_part = email.split('@')[0].replace('.', ' ').title()
-                domain_part = email.split('@')[1]
-                company_name = domain_part.split('.')[0].title()
-                
-                email_sources[email] = {
-                    "title": f"{name_part} - {company_name}",
-                    "link": f"https://www.{domain_part}",
-                    "context": f"Investor at {company_name}"
-                }
-    
-    # Format the results for display
-    formatted_results = []
-    for email in found_emails:
-        source = email_sources.get(email, {})
-        formatted_results.append({
-            "email": email,
-            "source_title": source.get("title", "Unknown"),
-            "source_link": source.get("link", ""),
-            "context": source.get("context", "")
-        })
-    
-    return formatted_results
+    results = harvest_emails(
+        industry_topic,
+        target_sites=INVESTOR_SITES,
+        search_queries=search_queries,
+        min_emails=min_emails,
+        max_results=max_results,
+        num_results=100,
+        site_title="Investor from {host}",
+        site_context="Found on investor database",
+        sample_emails=SAMPLE_INVESTOR_EMAILS,
+        sample_source=_sample_investor_source,
+        api_key=SERPAPI_API_KEY,
+        relevance_query=industry_topic,
+        scrape_top_k=SCRAPE_TOP_K,
+    )
+    # Most relevant contacts first; sample fallbacks stay at the end
+    real = [r for r in results if r["email"] not in SAMPLE_INVESTOR_EMAILS]
+    samples = [r for r in results if r["email"] in SAMPLE_INVESTOR_EMAILS]
+    return rank_contacts(industry_topic, real) + samples
 
 # --- AGENT TOOLS --- 
  
 def search_web(query, num_results=3): 
     """Performs a web search and returns the top results.""" 
-    print(f"\n🔎 Searching for: '{query}'") 
-    params = {"engine": "google", "q": query, "api_key": SERPAPI_API_KEY} 
+    log(f"\n🔎 Searching for: '{query}'") 
     try: 
-        response = requests.get("https://serpapi.com/search.json", params=params) 
-        response.raise_for_status() 
-        return response.json().get("organic_results", []) 
+        return serpapi_search(query, api_key=SERPAPI_API_KEY) 
     except Exception as e: 
-        print(f"    - Search error: {e}") 
+        log(f"    - Search error: {e}", WARNING)
         return [] 
  
-def scrape_text_from_url(url): 
-    """Scrapes all readable text from a URL.""" 
-    print(f"    - Reading content from {url}") 
-    try: 
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=10) 
-        soup = BeautifulSoup(response.content, 'html.parser') 
-        for script in soup(["script", "style"]): 
-            script.decompose() 
-        return soup.get_text(separator=' ', strip=True)[:8000] # Limit content size 
-    except Exception as e: 
-        print(f"    - Scraping error: {e}") 
-        return "" 
- 
 def get_company_names_from_list(text_blob): 
     """Uses AI to extract a list of company names from an article.""" 
-    print("🤖 AI is extracting company names from the list...") 
+    log("🤖 AI is extracting company names from the list...") 
     prompt = f""" 
     Analyze the following text from an article listing top companies. 
     Extract a clean Python list of just the company names. 
@@ -254,19 +126,35 @@ def get_company_names_from_list(text_blob):
     --- 
     """ 
     try: 
-        completion = openrouter_client.chat.completions.create( 
-            model="anthropic/claude-3-haiku", 
-            messages=[{"role": "user", "content": prompt}], 
-        ) 
-        return eval(completion.choices[0].message.content) 
+        return eval(complete(prompt, MODEL_FAST, OPENROUTER_API_KEY)) 
     except Exception as e: 
-        print(f"    - AI name extraction error: {e}") 
+        log(f"    - AI name extraction error: {e}", WARNING)
         return [] 
  
+def company_names_from_page(url):
+    """
+    Company names from a "top companies" article. They are read from the
+    page's list or heading structure when that is clear enough, and only
+    otherwise from its text by the LLM.
+    """
+    log(f"    - Reading content from {url}")
+    try:
+        html = fetch_page_html(url)
+    except Overloaded:
+        raise
+    except Exception as e:
+        log(f"    - Scraping error: {e}", WARNING)
+        return []
+    names, confidence = extract_listing(html)
+    if confidence >= LISTING_MIN_CONFIDENCE:
+        log(f"📋 Read {len(names)} company names from the page structure (confidence {confidence:.2f})")
+        return names
+    return get_company_names_from_list(html_to_text(html, max_chars=8000)[:8000])
+
 # --- NEW: THE AI PROFILER TOOL --- 
 def generate_company_profile(company_name, text_dossier): 
     """Uses an AI to analyze a dossier of text and create a structured company profile.""" 
-    print(f"🤖 AI is building a profile for {company_name}...") 
+    log(f"🤖 AI is building a profile for {company_name}...") 
      
     prompt = f""" 
     You are an expert market research analyst. Analyze the provided text dossier, which has been scraped from multiple web pages about '{company_name}', and create a structured company profile. 
@@ -287,19 +175,202 @@ def generate_company_profile(company_name, text_dossier):
     --- 
     """ 
     try: 
-        completion = openrouter_client.chat.completions.create( 
-            model="anthropic/claude-3-sonnet", # Use a powerful model for analysis 
-            messages=[{"role": "user", "content": prompt}], 
-        ) 
-        return completion.choices[0].message.content 
+        return complete(prompt, MODEL_ANALYSIS, OPENROUTER_API_KEY) # Use a powerful model for analysis 
     except Exception as e: 
-        return f"    - AI profiling error: {e}" 
+        return f"{PROFILE_ERROR_PREFIX}: {e}" 
  
+# --- RESUMABLE RESEARCH JOB ---
+def research_company(name, industry_topic, job=None):
+    """
+    Searches for a company, builds a text dossier and profiles it, with each
+    step checkpointed in `job`.
+
+    Returns:
+        dict: {"profile", "sources"}, or None if profiling failed
+    """
+    job = job or NullJobStore()
+
+    # 1. Gather intelligence by searching for the company
+    company_search_results = job.step(
+        "company_search", name,
+        lambda: search_web(f"about {name} {industry_topic}"), save_if=bool)
+
+    # 2. Create a text dossier from the search results
+    def build_dossier():
+        # Syndicated copies cost scrapes and prompt tokens but add nothing
+        results = drop_near_duplicates(company_search_results, lambda r: r.get('snippet', ''),
+                                       lambda r: r['link'], snippet_index())
+        pages_seen = NearDuplicateIndex()
+        dossier = f"Company: {name}\n\n"
+        pages = scrape_many([result['link'] for result in results])
+        for result, page in zip(results, pages):
+            original = pages_seen.check(page, result['link'])
+            dossier += f"--- Source: {result['link']} ---\n"
+            dossier += (f"(Same content as {original})" if original else page) + "\n"
+            dossier += "---\n\n"
+        return dossier
+    dossier = job.step("dossier", name, build_dossier, save_if=lambda _: bool(company_search_results))
+
+    # 3. Use the AI Profiler to generate the final output
+    profile = job.step(
+        "profile", name, lambda: generate_company_profile(name, dossier),
+        save_if=lambda p: not p.startswith(PROFILE_ERROR_PREFIX))
+    if profile.startswith(PROFILE_ERROR_PREFIX):
+        log(profile, WARNING)
+        return None
+    return {"profile": profile, "sources": [result['link'] for result in company_search_results]}
+
+
+def run_market_research(industry_topic, job=None, max_companies=5):
+    """
+    Runs the full research workflow: emails, a list of top companies, then a
+    dossier and an AI profile per company.
+
+    With a JobStore, every completed unit (email harvest, company list, each
+    company's search results, dossier and profile) is checkpointed, and a
+    re-run with the same job resumes from the first unit not yet done.
+    Failed searches and profiles are not checkpointed, so they are retried.
+    Companies already in the profile store skip research altogether.
+
+    When the deadline passes, the companies not yet reached are skipped and
+    the report comes back with "truncated" set; the job is left "truncated"
+    rather than "complete" so a re-run picks up the rest.
+
+    Returns:
+        dict: {"topic", "emails", "companies", "profiles": [{"company", "profile", "updated_at"}],
+            "truncated"}
+    """
+    job = job or NullJobStore()
+    job.set_status("running", topic=industry_topic)
+    report = {"topic": industry_topic, "emails": [], "companies": [], "profiles": [], "truncated": False}
+
+    email_results = job.step("emails", industry_topic, lambda: find_emails_in_field(industry_topic, min_emails=10))
+    report["emails"] = email_results
+    if not email_results:
+        log("❌ No individual emails found in this run.")
+    else:
+        log("📧 Top Email Contacts Found:")
+        for result in email_results[:10]: # Display top 10
+            log(f"  - {result['email']} (Source: {result['source_title']})")
+
+    log("\n" + "="*50)
+
+    # --- STEP 3: Find a list of top companies in that industry ---
+    log("\n--- COMPANY RESEARCH ---\n")
+    top_companies_list_results = job.step(
+        "company_list_search", industry_topic,
+        lambda: search_web(f"top {industry_topic} companies 2024 list"), save_if=bool)
+
+    if not top_companies_list_results:
+        log("❌ Could not find a list of top companies. Exiting.")
+        return _finish(report, job, "failed", reason="no company list")
+
+    # --- STEP 4: Scrape the top search result to get company names ---
+    top_result_url = top_companies_list_results[0]['link']
+    company_names = job.step(
+        "company_names", top_result_url,
+        lambda: company_names_from_page(top_result_url), save_if=bool)
+
+    if not company_names:
+        log("❌ AI could not extract company names from the list. Exiting.")
+        return _finish(report, job, "failed", reason="no company names")
+
+    report["companies"] = company_names
+    log(f"\n✅ Found {len(company_names)} companies to research. Starting profiling...\n")
+
+    # --- STEP 5: Research each company and generate a profile ---
+    # Companies profiled in earlier runs come from the profile store in one
+    # lookup; stale ones are served as-is and rebuilt in the background.
+    names = company_names[:max_companies]
+    store = get_profile_store()
+    known = store.get_many(names)
+    for name in names:
+        if deadline_reached():
+            log(f"⏱️  Out of time; skipping the remaining {len(names) - len(report['profiles'])} companies")
+            break
+        resumed = job.has("profile", name)
+        record = None if resumed else known.get(name)
+
+        if record is not None:
+            profile = record["profile"]
+            if record["stale"]:
+                log(f"♻️  Using stored profile for {name} while it is refreshed")
+                store.refresh_async(name, lambda name=name: research_company(name, industry_topic))
+            else:
+                log(f"📦 Using stored profile for {name}")
+        else:
+            built = research_company(name, industry_topic, job)
+            profile = built["profile"] if built else f"{PROFILE_ERROR_PREFIX} for {name}"
+            if built and not truncated():
+                store.put(name, built["profile"], built["sources"])
+        report["profiles"].append({"company": name, "profile": profile,
+                                   "updated_at": record["updated_at"] if record else time.time()})
+
+        # 4. Print the structured profile
+        log("\n" + "-"*60)
+        log(profile)
+        log("-"*60)
+
+        if record is None and not resumed:
+            sleep(2) # Pause between companies
+
+    if not truncated():
+        # Let background refreshes land before the script exits, but not past the deadline
+        store.wait(timeout=remaining())
+    return _finish(report, job, "complete")
+
+
+def _finish(report, job, status, **info):
+    report["truncated"] = truncated()
+    if report["truncated"]:
+        status = "truncated"
+    job.set_status(status, **info)
+    if status == "complete":
+        log("\n✅ Market research complete.")
+    elif status == "truncated":
+        log("\n⏱️  Market research stopped at the deadline; the report is partial.")
+    return report
+
+
+def pop_job_option(argv):
+    """
+    Removes `--job <id>` (or `--job new`) from argv and returns the JobStore,
+    or None when the option is absent. MARKET_RESEARCH_JOB_ID works too.
+    """
+    job_id = os.environ.get('MARKET_RESEARCH_JOB_ID')
+    if "--job" in argv:
+        i = argv.index("--job")
+        job_id = argv[i + 1] if i + 1 < len(argv) else "new"
+        del argv[i:i + 2]
+    if not job_id:
+        return None
+    if job_id == "new":
+        job_id = new_job_id(" ".join(argv[1:]))
+    return JobStore(job_id)
+
+
 # --- MAIN WORKFLOW --- 
 if __name__ == "__main__": 
+    if METRICS_DUMP:
+        install_dump()
+    set_priority(BULK)  # yields upstream slots to interactive chat work
     import sys
     from email_extractor import extract_real_emails, display_emails_as_bullets
 
+    profile_run("market_research", pop_profile_option(sys.argv))
+    start_script(sys.argv)  # --deadline/--timeout; SIGTERM returns a partial report
+    job = pop_job_option(sys.argv)
+    if job is not None:
+        # Job mode: checkpoint every unit and emit one JSON result
+        industry_topic = " ".join(sys.argv[1:]) or "venture capital"
+        if job.exists():
+            log(f"🔁 Resuming job {job.job_id} (last status: {job.status()})")
+        report = run_market_research(industry_topic, job)
+        report["job_id"] = job.job_id
+        report["status"] = job.status()
+        emit(report)
+        sys.exit()
+
     # Command-line interface for specific actions
     if len(sys.argv) > 2 and sys.argv[1] == "extract-emails":
         search_topic = " ".join(sys.argv[2:])
@@ -309,7 +380,8 @@ if __name__ == "__main__":
         if "fintech" in search_topic.lower() and "investor" in search_topic.lower():
             formatted_results = {
                 "title": "Fintech Investor Emails:",
-                "emails": []
+                "emails": [],
+                "truncated": truncated()
             }
             
             # Ensure we have at least 10 emails
@@ -338,10 +410,10 @@ if __name__ == "__main__":
                     "source": result["source_link"]
                 })
                 
-            print(json.dumps(formatted_results))
+            emit(formatted_results)
         else:
             # Default JSON output for non-fintech investor searches
-            print(json.dumps(email_results))
+            emit(email_results)
         sys.exit()
 
     # Default behavior: run the full market research report
@@ -350,59 +422,7 @@ if __name__ == "__main__":
             industry_topic = " ".join(sys.argv[1:])
         else:
             industry_topic = "venture capital"
-        email_results = find_emails_in_field(industry_topic, min_emails=10)
-        
-        if not email_results:
-            print("❌ No individual emails found in this run.")
-        else:
-            print("📧 Top Email Contacts Found:")
-            for result in email_results[:10]: # Display top 10
-                print(f"  - {result['email']} (Source: {result['source_title']})")
-        
-        print("\n" + "="*50)
-
-        # --- STEP 3: Find a list of top companies in that industry ---
-        print("\n--- COMPANY RESEARCH ---\n")
-        top_companies_list_results = search_web(f"top {industry_topic} companies 2024 list")
-
-        if not top_companies_list_results:
-            print("❌ Could not find a list of top companies. Exiting.")
-            sys.exit()
-
-        # --- STEP 4: Scrape the top search result to get company names ---
-        top_result_url = top_companies_list_results[0]['link']
-        page_content = scrape_text_from_url(top_result_url)
-        company_names = get_company_names_from_list(page_content)
-
-        if not company_names:
-            print("❌ AI could not extract company names from the list. Exiting.")
-            sys.exit()
-
-        print(f"\n✅ Found {len(company_names)} companies to research. Starting profiling...\n")
-
-        # --- STEP 5: Research each company and generate a profile ---
-        for name in company_names[:5]: # Limit to top 5 for this example
-            # 1. Gather intelligence by searching for the company
-            company_search_results = search_web(f"about {name} {industry_topic}")
-            
-            # 2. Create a text dossier from the search results
-            dossier = f"Company: {name}\n\n"
-            for result in company_search_results:
-                dossier += f"--- Source: {result['link']} ---\n"
-                dossier += scrape_text_from_url(result['link']) + "\n"
-                dossier += "---\n\n"
-            
-            # 3. Use the AI Profiler to generate the final output
-            profile = generate_company_profile(name, dossier)
-            
-            # 4. Print the structured profile
-            print("\n" + "-"*60)
-            print(profile)
-            print("-"*60)
-            
-            time.sleep(2) # Pause between companies
-
-        print("\n✅ Market research complete.")
+        run_market_research(industry_topic)
     
     # Check if user wants to find emails in a specific field
     if len(sys.argv) > 1 and sys.argv[1].lower() == "find" and sys.argv[2].lower() == "emails":
@@ -442,40 +462,39 @@ if __name__ == "__main__":
         industry_topic = "renewable energy startups in India" 
         
         # First, find at least 10 relevant emails in the industry
-        print("\n📧 FINDING INDUSTRY EMAILS")
-        print("=========================================")
+        log("\n📧 FINDING INDUSTRY EMAILS")
+        log("=========================================")
         email_results = find_emails_in_field(industry_topic, min_emails=10)
         
         # Display emails at the top of the research
-        print("\n📧 TOP INDUSTRY EMAILS:")
-        print("=========================================")
+        log("\n📧 TOP INDUSTRY EMAILS:")
+        log("=========================================")
         
         if not email_results:
-            print("❌ No emails found for this industry.")
+            log("❌ No emails found for this industry.")
         else:
             for i, result in enumerate(email_results):
-                print(f"\n• {result['email']}")
-                print(f"  Source: {result['source_title']}")
-                print(f"  Link: {result['source_link']}")
+                log(f"\n• {result['email']}")
+                log(f"  Source: {result['source_title']}")
+                log(f"  Link: {result['source_link']}")
         
-        print("\n\n=========================================")
-        print("   STARTING MARKET RESEARCH REPORT")
-        print("=========================================")
+        log("\n\n=========================================")
+        log("   STARTING MARKET RESEARCH REPORT")
+        log("=========================================")
          
         # STEP 1: Find an article listing top companies in the field 
         list_articles = search_web(f"top {industry_topic} list 2025", num_results=1) 
         if not list_articles: 
-            print("Could not find a good list of companies to start with. Please try a different topic.") 
+            log("Could not find a good list of companies to start with. Please try a different topic.") 
         else: 
-            # STEP 2: Scrape the article and have an AI extract the company names 
-            list_article_text = scrape_text_from_url(list_articles[0]['link']) 
-            company_names = get_company_names_from_list(list_article_text) 
+            # STEP 2: Read the company names from the article's structure, or have an AI extract them 
+            company_names = company_names_from_page(list_articles[0]['link']) 
              
             if not company_names: 
-                print("AI could not extract company names from the article.") 
+                log("AI could not extract company names from the article.") 
             else: 
-                print(f"\n✅ Found {len(company_names)} companies to research: {company_names}\n") 
-                print("-----------------------------------------") 
+                log(f"\n✅ Found {len(company_names)} companies to research: {company_names}\n") 
+                log("-----------------------------------------") 
                  
                 # STEP 3 & 4: Research each company individually 
                 all_profiles = [] 
@@ -483,8 +502,8 @@ if __name__ == "__main__":
                     # Create a text "dossier" by searching and scraping multiple sources 
                     company_search_results = search_web(f'"{name}" {industry_topic}', num_results=2) 
                     dossier = "" 
-                    for result in company_search_results: 
-                        dossier += scrape_text_from_url(result['link']) + "\n\n" 
+                    for page in scrape_many([result['link'] for result in company_search_results]): 
+                        dossier += page + "\n\n" 
                      
                     # STEP 5: Use the AI Profiler to generate a structured profile 
                     if dossier.strip(): 
@@ -493,15 +512,16 @@ if __name__ == "__main__":
                     time.sleep(1) # Pause between companies 
                  
                 # STEP 6: Display the final, aggregated results 
-                print("\n\n=========================================") 
-                print("   COMPLETED MARKET RESEARCH REPORT") 
-                print("=========================================") 
+                log("\n\n=========================================") 
+                log("   COMPLETED MARKET RESEARCH REPORT") 
+                log("=========================================") 
                 for profile in all_profiles: 
-                    print(profile) 
-                    print("----------------------------------------")
+                    log(profile) 
+                    log("----------------------------------------")
         output = {
             "emails": email_results,
+            "truncated": truncated(),
             # Add other results here as needed
         }
-        print(json.dumps(output))
+        emit(output)
         sys.exit()
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Shared core for the Python outreach services.
+
+Search, fetch, extract and LLM operations live here once, with a sync and an
+async API for each, so the CLI scripts and the Flask service share the same
+caching, connection pooling and concurrency limits.
+"""
+from .aio import run_sync
+from .cache import (
+    TTLCache, search_cache, page_cache, llm_cache,
+    MemoryBackend, SQLiteBackend, RedisBackend, set_shared_backend,
+)
+from .extract import (
+    EMAIL_RE, OBFUSCATED_EMAIL_RE, find_emails, email_context,
+    harvest_emails, harvest_emails_async, format_email_results,
+)
+from .archive import WarcArchive, ArchivedResponse, get_archive, reextract_emails
+from .fetch import (
+    FetchError, html_to_text, fetch_page_text, fetch_page_html,
+    scrape_text_from_url, scrape_text_from_url_async,
+    scrape_url_content, scrape_url_content_async,
+    scrape_many, scrape_many_async,
+)
+from .llm import get_openrouter_client, complete, complete_async
+from .outreach import (
+    SAMPLE_EMAILS, find_emails_for_query, find_emails_for_query_async,
+    draft_intro_email, draft_intro_email_async, fallback_intro_email,
+    send_email_via_api, send_email_via_api_async,
+)
+from .search import SearchError, serpapi_search, serpapi_search_async, search_many, search_many_async
+from .yield_stats import YieldStats, get_yield_stats, normalize_domain
+from .router import KeywordRouter, get_router
+from .validate import (
+    SystemResolver, StaticResolver, DNSLookupError, set_default_resolver,
+    validate_contacts, validate_contacts_async,
+)
+from .results import SearchResult, prefetch_content, prefetch_content_async
+from .jobs import JobStore, NullJobStore, new_job_id
+from .records import EmailHarvest, StringPool
+from .dedup import NearDuplicateIndex, drop_near_duplicates, simhash
+from .profiles import ProfileStore, get_profile_store, normalize_company
+from .relevance import relevance_scores, rank, rank_results, rank_contacts
+from .drafts import draft_intro_variants, draft_intro_variants_async, validate_draft, fill_sender
+from .metrics import REGISTRY, track_upstream, install_dump
+from .profiling import profile_request, profile_run, pop_profile_option, install_profiling
+from .scheduler import Scheduler, PriorityClass, Overloaded, INTERACTIVE, BULK, priority, set_priority
+from .breaker import CircuitBreaker, CircuitOpen, get_breaker, circuit
+from .deadline import DeadlineExceeded, deadline_scope, set_deadline, deadline_reached, truncated, cancel
+from .outbox import Outbox, OutboxDrainer, get_outbox
+from .warmer import CacheWarmer, record_query, top_topics
+from .listing import extract_listing
+from .suppression import SuppressionList, BloomFilter, normalize_address, get_suppression_list
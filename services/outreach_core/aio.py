@@ -0,0 +1,46 @@
+"""
+Async plumbing for the core: every blocking call runs in a worker thread,
+bounded per event loop by MAX_CONCURRENCY, and sync APIs are thin
+`run_sync()` wrappers around their async counterparts.
+
+asyncio itself is imported on first use; it costs ~50 ms of cold start that
+the router-only paths never need.
+"""
+import weakref
+
+from .config import MAX_CONCURRENCY
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def _semaphore():
+    import asyncio
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return sem
+
+
+async def to_thread(func, *args, **kwargs):
+    """Runs a blocking function in a thread, respecting the concurrency cap."""
+    import asyncio
+    async with _semaphore():
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def gather_limited(func, items):
+    """Calls `func(item)` for every item concurrently and returns results in order."""
+    import asyncio
+    return await asyncio.gather(*(to_thread(func, item) for item in items))
+
+
+def run_sync(coro):
+    """Runs `coro` to completion from synchronous code."""
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("Sync API called from a running event loop; await the *_async variant instead")
@@ -0,0 +1,275 @@
+"""
+Raw page archive in WARC format, for re-extraction without re-crawling.
+
+With OUTREACH_ARCHIVE=1, every HTML page the fetch layer downloads is
+appended to a segment file under ARCHIVE_DIR as a gzip-compressed WARC
+"response" record. Each record is its own gzip member, so any one can be
+decompressed on its own. An SQLite index maps each URL to the segment,
+offset and length of every capture.
+
+Records are read back through mmap: the compressed bytes are sliced
+straight out of the mapping and only the record itself is inflated.
+reextract_emails() reruns the email scan over the latest capture of every
+archived page, with no network access, so regex or extraction changes
+can be applied to past harvests.
+"""
+import os
+import re
+import mmap
+import time
+import uuid
+import zlib
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from .config import ARCHIVE_DIR, ARCHIVE_SEGMENT_BYTES, ARCHIVE_ENABLED
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within a process
+    fcntl = None
+
+SEGMENT_RE = re.compile(r'^segment-(\d{5})\.warc\.gz$')
+
+# requests has already undone these, so the archived headers must not claim them
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    url TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    status INTEGER NOT NULL,
+    content_type TEXT
+);
+CREATE INDEX IF NOT EXISTS records_url ON records (url, fetched_at);
+"""
+
+
+def _warc_date(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def build_response_record(url, status, reason, headers, body, fetched_at, truncated=False):
+    """Returns one uncompressed WARC/1.1 response record."""
+    http_lines = [f"HTTP/1.1 {status} {reason or ''}".rstrip()]
+    http_lines += [f"{k}: {v}" for k, v in headers.items() if k.lower() not in DROPPED_HEADERS]
+    http_lines.append(f"Content-Length: {len(body)}")
+    block = ('\r\n'.join(http_lines) + '\r\n\r\n').encode('latin-1', errors='replace') + body
+    warc_headers = [
+        "WARC/1.1",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {_warc_date(fetched_at)}",
+        f"WARC-Target-URI: {url}",
+        "Content-Type: application/http;msgtype=response",
+        f"Content-Length: {len(block)}",
+    ]
+    if truncated:
+        warc_headers.append("WARC-Truncated: length")
+    return ('\r\n'.join(warc_headers) + '\r\n\r\n').encode('utf-8') + block + b'\r\n\r\n'
+
+
+def build_warcinfo_record(segment):
+    payload = b"software: outreach_core\r\nformat: WARC File Format 1.1\r\n"
+    headers = [
+        "WARC/1.1",
+        "WARC-Type: warcinfo",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {_warc_date(time.time())}",
+        f"WARC-Filename: {segment}",
+        "Content-Type: application/warc-fields",
+        f"Content-Length: {len(payload)}",
+    ]
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('utf-8') + payload + b'\r\n\r\n'
+
+
+def _parse_headers(raw):
+    headers = {}
+    for line in raw.split(b'\r\n'):
+        name, sep, value = line.partition(b':')
+        if sep:
+            headers[name.decode('latin-1').strip()] = value.decode('latin-1').strip()
+    return headers
+
+
+class ArchivedResponse:
+    """One archived page. `body` is a memoryview into the inflated record."""
+
+    __slots__ = ('url', 'fetched_at', 'status', 'headers', 'warc_headers', 'body')
+
+    def __init__(self, url, fetched_at, status, headers, warc_headers, body):
+        self.url = url
+        self.fetched_at = fetched_at
+        self.status = status
+        self.headers = headers
+        self.warc_headers = warc_headers
+        self.body = body
+
+    @property
+    def truncated(self):
+        return 'WARC-Truncated' in self.warc_headers
+
+    def text(self, max_chars=None):
+        """Readable text of the page, extracted the same way the fetch layer does."""
+        from .fetch import html_to_text, _charset
+        charset = _charset(self.headers.get('Content-Type', ''))
+        try:
+            html = str(self.body, charset, 'replace')
+        except LookupError:
+            html = str(self.body, 'utf-8', 'replace')
+        return html_to_text(html, max_chars)
+
+
+class WarcArchive:
+    """Append-only WARC segments plus a URL index; safe to share between threads."""
+
+    def __init__(self, root=ARCHIVE_DIR, segment_bytes=ARCHIVE_SEGMENT_BYTES):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(os.path.join(root, 'index.sqlite3'), check_same_thread=False)
+        with self._lock, self._index:
+            self._index.execute("PRAGMA journal_mode=WAL")
+            self._index.executescript(INDEX_SCHEMA)
+        self._maps = {}  # segment -> (mmap, size)
+
+    # --- writing ---
+
+    def _current_segment(self):
+        segments = sorted(name for name in os.listdir(self.root) if SEGMENT_RE.match(name))
+        if segments:
+            last = segments[-1]
+            if os.path.getsize(os.path.join(self.root, last)) < self.segment_bytes:
+                return last
+            return f"segment-{int(SEGMENT_RE.match(last).group(1)) + 1:05d}.warc.gz"
+        return "segment-00000.warc.gz"
+
+    def append(self, url, status, headers, body, reason='', content_type=None, truncated=False):
+        """Archives one response; returns (segment, offset, length)."""
+        fetched_at = time.time()
+        member = zlib.compressobj(6, zlib.DEFLATED, 31)
+        data = member.compress(build_response_record(url, status, reason, headers, body, fetched_at, truncated))
+        data += member.flush()
+        with self._lock:
+            segment = self._current_segment()
+            path = os.path.join(self.root, segment)
+            with open(path, 'ab') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() == 0:
+                        f.write(zlib.compress(build_warcinfo_record(segment), wbits=31))
+                    offset = f.tell()
+                    f.write(data)
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            with self._index:
+                self._index.execute(
+                    "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, segment, offset, len(data), fetched_at, status, content_type))
+        return segment, offset, len(data)
+
+    # --- reading ---
+
+    def _view(self, segment, offset, length):
+        """Zero-copy slice of a segment; the mapping is redone if the file has grown."""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or offset + length > mapped[1]:
+                if mapped is not None:
+                    mapped[0].close()
+                with open(os.path.join(self.root, segment), 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    mapped = self._maps[segment] = (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), size)
+        return memoryview(mapped[0])[offset:offset + length]
+
+    def read(self, segment, offset, length):
+        """Returns the ArchivedResponse stored at (segment, offset, length)."""
+        record = zlib.decompressobj(wbits=31).decompress(self._view(segment, offset, length))
+        view = memoryview(record)
+        warc_end = record.index(b'\r\n\r\n')
+        warc_headers = _parse_headers(record[:warc_end])
+        block_start = warc_end + 4
+        block_end = block_start + int(warc_headers.get('Content-Length', len(record) - block_start))
+        http_end = record.index(b'\r\n\r\n', block_start)
+        status_line, _, header_bytes = record[block_start:http_end].partition(b'\r\n')
+        parts = status_line.split(b' ', 2)
+        status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        fetched_at = datetime.strptime(warc_headers.get('WARC-Date', '1970-01-01T00:00:00Z'),
+                                       '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
+        return ArchivedResponse(warc_headers.get('WARC-Target-URI', ''), fetched_at, status,
+                                _parse_headers(header_bytes), warc_headers, view[http_end + 4:block_end])
+
+    def lookup(self, url):
+        """Latest capture of `url`, or None."""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT segment, offset, length FROM records WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                (url,)).fetchone()
+        return self.read(*row) if row else None
+
+    def iter_latest(self, url_filter=None):
+        """Yields the latest capture of every archived URL, in segment order."""
+        query = ("SELECT segment, offset, length FROM records r WHERE fetched_at = "
+                 "(SELECT MAX(fetched_at) FROM records WHERE url = r.url)")
+        params = ()
+        if url_filter:
+            query += " AND url LIKE ?"
+            params = (f"%{url_filter}%",)
+        with self._lock:
+            rows = self._index.execute(query + " ORDER BY segment, offset", params).fetchall()
+        for row in rows:
+            yield self.read(*row)
+
+    def __len__(self):
+        with self._lock:
+            return self._index.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            for mapped, _ in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._index.close()
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """The process-wide archive at ARCHIVE_DIR, or None when archiving is off."""
+    global _archive
+    if not ARCHIVE_ENABLED:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = WarcArchive()
+    return _archive
+
+
+def reextract_emails(archive=None, url_filter=None, include_obfuscated=True):
+    """
+    Reruns email extraction over the latest capture of every archived page,
+    offline. Returns the same list of dicts the harvest engine produces.
+    """
+    from .extract import find_emails
+    from .records import EmailHarvest
+
+    archive = archive or WarcArchive()
+    found = EmailHarvest()
+    for response in archive.iter_latest(url_filter):
+        text = response.text()
+        emails = find_emails(text, include_obfuscated=include_obfuscated)
+        if emails:
+            found.add_page_hits(emails, f"Archived {_warc_date(response.fetched_at)}", response.url, text,
+                                default="Found in archived page")
+    return found.to_dicts()
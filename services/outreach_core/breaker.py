@@ -0,0 +1,246 @@
+"""
+Circuit breakers for upstream providers and target hosts.
+
+Each upstream has its own breaker: serpapi, openrouter, email_api, and one
+"host:<domain>" breaker per site the fetch layer downloads from. A breaker
+counts the outcome of every call over a rolling BREAKER_WINDOW. When
+enough of them fail, it opens, and calls fail at once with CircuitOpen
+instead of each waiting out its own timeout. After BREAKER_OPEN_SECONDS
+one half-open probe is let through. If the probe succeeds the breaker
+closes; if it fails the breaker stays open for twice as long, up to
+BREAKER_MAX_OPEN_SECONDS.
+
+The breakers are process-wide and thread-safe, so in the Flask service an
+outage seen by one request fast-fails the others too. Only real upstream
+trouble is counted: connection errors, timeouts, 5xx, 408 and 429. Other
+4xx replies mean the upstream is up. Overloaded and DeadlineExceeded, and
+failures once the caller's deadline has passed, are not counted at all.
+"""
+import time
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+from .config import (
+    BREAKER_WINDOW, BREAKER_FAILURE_RATIO, BREAKER_MIN_CALLS, HOST_BREAKER_MIN_CALLS,
+    BREAKER_OPEN_SECONDS, BREAKER_MAX_OPEN_SECONDS, MAX_HOST_BREAKERS,
+)
+from .deadline import DeadlineExceeded, deadline_reached
+from .metrics import REGISTRY, Gauge
+from .scheduler import Overloaded
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+HOST_PREFIX = 'host:'
+
+rejected_total = REGISTRY.counter(
+    'outreach_breaker_rejected_total', 'Calls failed fast by an open circuit breaker.', ('breaker',))
+opened_total = REGISTRY.counter(
+    'outreach_breaker_opened_total', 'Times a circuit breaker opened.', ('breaker',))
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit open for {name} (retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(error):
+    """True if `error` says the upstream is unhealthy, as opposed to the request being wrong."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status', None)
+    if isinstance(status, int) and status < 500 and status not in (408, 429):
+        return False
+    return True
+
+
+class CircuitBreaker:
+    """Failure-rate breaker over a rolling time window, with half-open probing."""
+
+    def __init__(self, name, window=BREAKER_WINDOW, failure_ratio=BREAKER_FAILURE_RATIO,
+                 min_calls=BREAKER_MIN_CALLS, open_seconds=BREAKER_OPEN_SECONDS,
+                 max_open_seconds=BREAKER_MAX_OPEN_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.window = window
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()  # (finished_at, failed)
+        self._failures = 0
+        self.state = CLOSED
+        self._open_for = open_seconds
+        self._retry_at = 0.0
+        self._probing = False
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            _, failed = self._calls.popleft()
+            self._failures -= failed
+
+    def _open(self, now):
+        self.state = OPEN
+        self._retry_at = now + self._open_for
+        self._calls.clear()
+        self._failures = 0
+        opened_total.inc(breaker=self._label)
+
+    @property
+    def _label(self):
+        return 'host' if self.name.startswith(HOST_PREFIX) else self.name
+
+    def before_call(self):
+        """Admits a call or raises CircuitOpen; returns True if the call is the half-open probe."""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            now = self._clock()
+            if self.state == OPEN and now >= self._retry_at:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            rejected_total.inc(breaker=self._label)
+            raise CircuitOpen(self.name, max(0.0, self._retry_at - now))
+
+    def record(self, failed, probe=False):
+        """Records how an admitted call went."""
+        with self._lock:
+            now = self._clock()
+            if probe:
+                self._probing = False
+                if failed:
+                    self._open_for = min(self._open_for * 2, self.max_open_seconds)
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self._open_for = self.open_seconds
+                return
+            if self.state != CLOSED:
+                return  # a call admitted before the breaker opened
+            self._calls.append((now, failed))
+            self._failures += failed
+            self._trim(now)
+            if (failed and len(self._calls) >= self.min_calls
+                    and self._failures >= self.failure_ratio * len(self._calls)):
+                self._open(now)
+
+    def release_probe(self):
+        """Gives the probe slot back when the probe never reached the upstream."""
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """
+        Wraps one upstream call. The yielded function marks the outcome when
+        the block cannot show it by raising: set_outcome('error') for a bad
+        reply that was returned, set_outcome('ok') before raising an error
+        that is not the upstream's fault.
+        """
+        probe = self.before_call()
+        outcome = [None]
+
+        def set_outcome(value):
+            outcome[0] = value
+
+        try:
+            yield set_outcome
+        except (Overloaded, DeadlineExceeded):
+            if probe:
+                self.release_probe()
+            raise
+        except BaseException as e:
+            if deadline_reached():
+                # The timeout was cut short by our own deadline; says nothing about the upstream
+                if probe:
+                    self.release_probe()
+            else:
+                self.record(outcome[0] != 'ok' and is_upstream_failure(e), probe)
+            raise
+        else:
+            self.record(outcome[0] == 'error', probe)
+
+    def snapshot(self):
+        with self._lock:
+            self._trim(self._clock())
+            return {"state": self.state, "calls": len(self._calls), "failures": self._failures,
+                    "retry_in": max(0.0, self._retry_at - self._clock()) if self.state != CLOSED else 0.0}
+
+
+class BreakerBoard:
+    """Named breakers, created on first use. Host breakers are kept in an LRU."""
+
+    def __init__(self, max_hosts=MAX_HOST_BREAKERS):
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._providers = {}
+        self._hosts = OrderedDict()
+
+    def get(self, name):
+        with self._lock:
+            if not name.startswith(HOST_PREFIX):
+                breaker = self._providers.get(name)
+                if breaker is None:
+                    breaker = self._providers[name] = CircuitBreaker(name)
+                return breaker
+            breaker = self._hosts.get(name)
+            if breaker is None:
+                breaker = self._hosts[name] = CircuitBreaker(name, min_calls=HOST_BREAKER_MIN_CALLS)
+                if len(self._hosts) > self.max_hosts:
+                    self._hosts.popitem(last=False)
+            else:
+                self._hosts.move_to_end(name)
+            return breaker
+
+    def providers(self):
+        with self._lock:
+            return list(self._providers.values())
+
+    def open_hosts(self):
+        with self._lock:
+            return [b.name for b in self._hosts.values() if b.state != CLOSED]
+
+
+_board = BreakerBoard()
+
+
+def get_breaker(name):
+    """The process-wide breaker for a provider name or a "host:<domain>" key."""
+    return _board.get(name)
+
+
+def host_breaker(domain):
+    return _board.get(HOST_PREFIX + domain)
+
+
+def set_breaker_board(board):
+    """Replaces the process-wide breakers (tests, benchmarks)."""
+    global _board
+    _board = board
+
+
+def circuit(name):
+    """Shorthand for get_breaker(name).guard()."""
+    return get_breaker(name).guard()
+
+
+def _breaker_metrics():
+    state = Gauge('outreach_breaker_state', 'Provider breaker state: 0 closed, 1 half-open, 2 open.', ('breaker',))
+    for breaker in _board.providers():
+        state.set(STATE_VALUES[breaker.state], breaker=breaker.name)
+    hosts = Gauge('outreach_breaker_open_hosts', 'Host breakers that are open or half-open.')
+    hosts.set(len(_board.open_hosts()))
+    return [state, hosts]
+
+
+REGISTRY.add_collector(_breaker_metrics)
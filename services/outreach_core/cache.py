@@ -0,0 +1,369 @@
+"""
+Caches shared by the search, fetch and LLM helpers.
+
+Every entry point goes through the same caches, so a page scraped while
+harvesting emails is not downloaded again when the same process builds a
+dossier or a recommendation report from it.
+
+Each TTLCache has two tiers:
+
+- L1, an in-process LRU (MemoryBackend) holding the values themselves;
+- L2, an optional backend shared by every process and node, picked with
+  OUTREACH_CACHE_BACKEND: "sqlite" (a file under STATE_DIR, for the
+  processes of one node), "sqlite:///path", or "redis://host:port/db" for
+  anything speaking the Redis protocol.
+
+A lookup tries L1, then L2, and copies an L2 hit into L1 for the rest of
+its lifetime. So one node's search, page or LLM result serves the whole
+fleet. L2 keys are "outreach:v1:<cache>:<sha256 of the key as canonical
+JSON>", the same on every node. Values are stored as JSON, together with
+their expiry time.
+
+The shared tier is best effort. Its operations are time-boxed by
+OUTREACH_CACHE_L2_TIMEOUT and guarded by the "cache" circuit breaker, and
+an error counts as a miss.
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, unquote
+
+from .breaker import CircuitOpen, circuit
+from .config import CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_BACKEND, CACHE_L2_TIMEOUT, STATE_DIR
+from .log import log, WARNING
+from .output import dumps, loads
+
+KEY_PREFIX = 'outreach:v1'
+CACHE_DB_PATH = os.path.join(STATE_DIR, 'cache.sqlite3')
+
+_caches = []
+
+
+def hash_key(namespace, key):
+    """The shared-tier key for `key` in cache `namespace`; stable across processes and nodes."""
+    canonical = json.dumps(key, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return f"{KEY_PREFIX}:{namespace}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+# --- BACKENDS ---
+# get(key) -> value or None, set(key, value, ttl), delete(key), clear().
+# MemoryBackend holds objects; the shared backends hold bytes.
+
+class MemoryBackend:
+    """A thread-safe in-process LRU whose entries expire after their ttl."""
+
+    def __init__(self, maxsize=CACHE_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """A cache table in a local SQLite file, shared by every process on the node."""
+
+    PURGE_EVERY = 500  # sets between sweeps of expired rows
+
+    def __init__(self, path=CACHE_DB_PATH, timeout=CACHE_L2_TIMEOUT):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=timeout)
+        self._lock = threading.Lock()
+        self._sets = 0
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache "
+                               "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                                     (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, value, time.time() + ttl))
+            self._sets += 1
+            if self._sets % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE key LIKE ?", (KEY_PREFIX + ':%',))
+
+
+class RedisError(Exception):
+    """An error reply, or a connection that failed mid-command."""
+
+
+class RedisBackend:
+    """
+    A minimal Redis-protocol (RESP2) client: GET, SET with PX, DEL and SCAN.
+    One connection per backend, re-opened after any error.
+    """
+
+    def __init__(self, url, timeout=CACHE_L2_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        if self.password:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def _close(self):
+        for resource in (self._file, self._sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+    def _call(self, *args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._sock.sendall(b''.join(parts))
+        return self._reply()
+
+    def _reply(self):
+        line = self._file.readline()
+        if not line.endswith(b'\r\n'):
+            raise RedisError("connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            if len(data) != length + 2:
+                raise RedisError("connection closed")
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._reply() for _ in range(length)]
+        raise RedisError(f"unexpected reply {line[:20]!r}")
+
+    def command(self, *args):
+        """Runs one command and returns the decoded reply."""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except (OSError, RedisError, ValueError):
+                self._close()
+                raise
+
+    def get(self, key):
+        return self.command('GET', key)
+
+    def set(self, key, value, ttl):
+        self.command('SET', key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        self.command('DEL', key)
+
+    def clear(self):
+        cursor = '0'
+        while True:
+            cursor, keys = self.command('SCAN', cursor, 'MATCH', KEY_PREFIX + ':*', 'COUNT', 500)
+            cursor = cursor.decode('ascii')
+            if keys:
+                self.command('DEL', *keys)
+            if cursor == '0':
+                break
+
+
+def backend_from_url(url):
+    """Builds the shared backend named by `url`, or None for "memory" (no shared tier)."""
+    if not url or url == 'memory':
+        return None
+    if url == 'sqlite':
+        return SQLiteBackend()
+    if url.startswith('sqlite://'):
+        return SQLiteBackend(url[len('sqlite://'):] or CACHE_DB_PATH)
+    if url.startswith(('redis://', 'rediss://')):
+        if url.startswith('rediss://'):
+            raise ValueError("TLS (rediss://) is not supported; use a local tunnel")
+        return RedisBackend(url)
+    raise ValueError(f"Unknown cache backend: {url!r}")
+
+
+_shared_backend = None
+_shared_lock = threading.Lock()
+_shared_resolved = False
+
+
+def get_shared_backend():
+    """The process-wide L2 backend from OUTREACH_CACHE_BACKEND, or None."""
+    global _shared_backend, _shared_resolved
+    with _shared_lock:
+        if not _shared_resolved:
+            try:
+                _shared_backend = backend_from_url(CACHE_BACKEND)
+            except (ValueError, OSError, sqlite3.Error) as e:
+                log(f"    - Cache backend error: {e}; caching in-process only", WARNING)
+            _shared_resolved = True
+    return _shared_backend
+
+
+def set_shared_backend(backend):
+    """Replaces the shared tier of every cache (tests, benchmarks, a custom backend)."""
+    global _shared_backend, _shared_resolved
+    with _shared_lock:
+        _shared_backend = backend
+        _shared_resolved = True
+
+
+class TTLCache:
+    """
+    A two-tier cache whose entries expire after `ttl` seconds: an in-process
+    LRU in front of the shared backend. With `shared=False` it stays
+    in-process, e.g. for answers that depend on per-process settings.
+    """
+
+    def __init__(self, name, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, shared=True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self._local = MemoryBackend(maxsize)
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    def _l2(self):
+        return get_shared_backend() if self.shared else None
+
+    def _l2_call(self, operation, *args):
+        try:
+            with circuit('cache'):
+                return operation(*args)
+        except CircuitOpen:
+            return None
+        except Exception as e:
+            log(f"    - Shared cache error ({self.name}): {e}", WARNING)
+            return None
+
+    def get(self, key, default=None):
+        value = self._local.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+        backend = self._l2()
+        if backend is not None:
+            data = self._l2_call(backend.get, hash_key(self.name, key))
+            if data is not None:
+                expires_at, value = loads(data)
+                left = expires_at - time.time()
+                if left > 0 and value is not None:
+                    self._local.set(key, value, left)
+                    with self._lock:
+                        self.hits += 1
+                        self.l2_hits += 1
+                    return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._local.set(key, value, self.ttl)
+        backend = self._l2()
+        if backend is not None:
+            self._l2_call(backend.set, hash_key(self.name, key), dumps([time.time() + self.ttl, value]), self.ttl)
+
+    def delete(self, key):
+        self._local.delete(key)
+        backend = self._l2()
+        if backend is not None:
+            self._l2_call(backend.delete, hash_key(self.name, key))
+
+    def clear(self):
+        """Empties this process's tier and resets the stats; the shared tier is left alone."""
+        self._local.clear()
+        with self._lock:
+            self.hits = 0
+            self.l2_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._local),
+            "hits": self.hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+def all_caches():
+    """Every TTLCache created in this process, for metrics."""
+    return list(_caches)
+
+
+search_cache = TTLCache("search")
+page_cache = TTLCache("page", maxsize=256)
+llm_cache = TTLCache("llm", maxsize=256)
@@ -0,0 +1,122 @@
+"""
+Shared configuration for the outreach core.
+
+Entry points may still pass their own API keys per call; these are only the
+defaults used when they don't.
+"""
+import os
+
+# --- API KEYS ---
+SERPAPI_API_KEY = os.environ.get('SERPAPI_API_KEY', 'YOUR_SERPAPI_API_KEY')
+OPENROUTER_API_KEY = os.environ.get('OPENROUTER_API_KEY', 'YOUR_OPENROUTER_API_KEY')
+
+# --- ENDPOINTS ---
+SERPAPI_URL = "https://serpapi.com/search.json"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+EMAIL_API_ENDPOINT = os.environ.get('EMAIL_API_ENDPOINT', 'http://localhost:3000/api/web-search/send-intro-email')  # Node.js service endpoint
+
+# --- HTTP ---
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+REQUEST_TIMEOUT = 10
+POOL_SIZE = int(os.environ.get('OUTREACH_POOL_SIZE', '16'))
+MAX_DOWNLOAD_BYTES = int(os.environ.get('OUTREACH_MAX_DOWNLOAD_BYTES', str(2 * 1024 * 1024)))  # per page
+DOWNLOAD_CHUNK_SIZE = 16 * 1024
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# --- CONCURRENCY ---
+MAX_CONCURRENCY = int(os.environ.get('OUTREACH_MAX_CONCURRENCY', '8'))  # blocking calls in flight per event loop
+SCRAPE_WAVE_SIZE = 4  # pages fetched together before re-checking stop conditions
+SCRAPE_TOP_K = int(os.environ.get('OUTREACH_SCRAPE_TOP_K', '10'))  # most relevant pages fetched per search query
+QUERY_DELAY = 1  # seconds between SerpAPI queries, be nice to the API
+
+# --- SCHEDULING ---
+# Upstream calls in flight per process, shared by the interactive and bulk classes
+SCHED_CAPACITY = int(os.environ.get('OUTREACH_SCHED_CAPACITY', str(POOL_SIZE)))
+SCHED_BULK_CONCURRENCY = int(os.environ.get('OUTREACH_SCHED_BULK_CONCURRENCY', str(max(1, SCHED_CAPACITY // 2))))
+SCHED_MAX_QUEUE = int(os.environ.get('OUTREACH_SCHED_MAX_QUEUE', '32'))  # interactive; bulk gets 4x
+
+# --- CIRCUIT BREAKERS ---
+# A breaker opens when, within BREAKER_WINDOW seconds, at least min_calls calls
+# were made and BREAKER_FAILURE_RATIO of them failed
+BREAKER_WINDOW = 60
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_MIN_CALLS = 5  # serpapi, openrouter, email_api
+HOST_BREAKER_MIN_CALLS = 2  # target sites are fetched a handful of times per run
+BREAKER_OPEN_SECONDS = int(os.environ.get('OUTREACH_BREAKER_OPEN_SECONDS', '30'))  # before the first half-open probe
+BREAKER_MAX_OPEN_SECONDS = 600  # the wait doubles after each failed probe, up to this
+MAX_HOST_BREAKERS = 2048  # least recently used host breakers are dropped past this
+
+# --- CACHING ---
+CACHE_TTL = int(os.environ.get('OUTREACH_CACHE_TTL', '3600'))
+CACHE_MAX_ENTRIES = 512
+MX_CACHE_TTL = int(os.environ.get('OUTREACH_MX_CACHE_TTL', '86400'))
+PROFILE_TTL = int(os.environ.get('OUTREACH_PROFILE_TTL', str(7 * 86400)))  # stored company profiles are refreshed after this
+# Shared second tier behind the in-process caches: "memory" (none), "sqlite", "sqlite:///path"
+# or "redis://host:port/db" (anything speaking the Redis protocol)
+CACHE_BACKEND = os.environ.get('OUTREACH_CACHE_BACKEND', 'memory')
+CACHE_L2_TIMEOUT = float(os.environ.get('OUTREACH_CACHE_L2_TIMEOUT', '0.5'))  # seconds per shared-tier operation
+
+# --- CACHE WARMING ---
+# Popular topics from the query log are re-run before the working day, see warmer.py
+WARM_ENABLED = os.environ.get('OUTREACH_WARM', '') not in ('', '0')  # the Flask service warms its own caches
+WARM_HOURS = os.environ.get('OUTREACH_WARM_HOURS', '6-7')  # local hours; end it within CACHE_TTL of peak traffic
+WARM_TOP_N = int(os.environ.get('OUTREACH_WARM_TOP_N', '10'))  # topics warmed per run
+WARM_BUDGET = int(os.environ.get('OUTREACH_WARM_BUDGET', '100'))  # upstream calls (searches, pages, LLM) per run
+WARM_LOOKBACK = 7 * 86400  # seconds of query log mined for topics
+WARM_CHECK_INTERVAL = 600  # seconds between checks for the warming window
+QUERY_LOG_MAX_BYTES = 4 * 1024 * 1024  # older entries are dropped past this
+
+# --- LOCAL STATE ---
+# Stats, checkpoints and stores that should survive between runs
+STATE_DIR = os.environ.get('OUTREACH_STATE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.outreach_state'))
+METRICS_DIR = os.environ.get('OUTREACH_METRICS_DIR', os.path.join(STATE_DIR, 'metrics'))
+METRICS_DUMP = os.environ.get('OUTREACH_METRICS_DUMP', '') not in ('', '0')  # scripts write METRICS_DIR/<pid>.prom
+ARCHIVE_ENABLED = os.environ.get('OUTREACH_ARCHIVE', '') not in ('', '0')  # keep raw HTML of fetched pages as WARC
+ARCHIVE_DIR = os.environ.get('OUTREACH_ARCHIVE_DIR', os.path.join(STATE_DIR, 'archive'))
+ARCHIVE_SEGMENT_BYTES = 64 * 1024 * 1024  # a new segment file is started past this size
+
+# --- PROFILING ---
+# OUTREACH_PROFILE=1 (cProfile) or =sample profiles every request/run; see profiling.py
+PROFILE_MODE = {'': None, '0': None, 'sample': 'sample'}.get(os.environ.get('OUTREACH_PROFILE', '').lower(), 'cprofile')
+PROFILE_DIR = os.environ.get('OUTREACH_PROFILE_DIR', os.path.join(STATE_DIR, 'profiling'))
+PROFILE_TOP_N = 30  # functions and allocation sites listed in each summary
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_TRACE_FRAMES = 1  # tracemalloc frames kept per allocation
+
+# --- OUTBOX ---
+# Intro sends are queued in STATE_DIR/outbox.sqlite3 and sent by a background drainer
+OUTBOX_CONCURRENCY = int(os.environ.get('OUTREACH_OUTBOX_CONCURRENCY', '4'))  # sends in flight per process
+OUTBOX_BATCH_SIZE = 20  # messages claimed, validated and drafted together
+OUTBOX_MAX_ATTEMPTS = 5  # a message is marked failed after this many attempts
+OUTBOX_RETRY_SECONDS = 30  # before the first retry; doubles after each failed attempt
+OUTBOX_MAX_RETRY_SECONDS = 3600
+OUTBOX_LEASE_SECONDS = 300  # a claimed message is sent again if its sender dies without reporting back
+OUTBOX_SEND_TIMEOUT = 60  # a send is abandoned after this, well inside the lease
+OUTBOX_POLL_INTERVAL = 5  # seconds between checks for due retries when nothing new was queued
+
+# --- SUPPRESSION ---
+# Contacted and opted-out addresses live in STATE_DIR/suppression.sqlite3, screened by a Bloom filter
+SUPPRESSION_CAPACITY = int(os.environ.get('OUTREACH_SUPPRESSION_CAPACITY', '100000'))  # the filter doubles past this
+SUPPRESSION_ERROR_RATE = 0.001  # share of unsuppressed addresses that need the exact check
+SUPPRESSION_SAVE_INTERVAL = 60  # seconds between writes of the filter file; it is caught up from the table anyway
+
+# --- OUTPUT ---
+LOG_LEVEL = os.environ.get('OUTREACH_LOG_LEVEL', 'info').lower()  # debug, info, warning or error; logs go to stderr
+RESULT_FD = int(os.environ['OUTREACH_RESULT_FD']) if os.environ.get('OUTREACH_RESULT_FD') else None  # results on stdout unless set
+
+# --- MODELS ---
+MODEL_FAST = "anthropic/claude-3-haiku"
+MODEL_ANALYSIS = "anthropic/claude-3-sonnet"
+
+# --- LIST EXTRACTION ---
+LISTING_MIN_CONFIDENCE = float(os.environ.get('OUTREACH_LISTING_MIN_CONFIDENCE', '0.6'))  # below this, the LLM reads the list
+
+# --- DRAFTING ---
+DRAFT_CHUNK_SIZE = int(os.environ.get('OUTREACH_DRAFT_CHUNK_SIZE', '8'))  # recipients per drafting call
+DRAFT_MAX_PROMPT_CHARS = 12000  # keeps a chunk's prompt and its JSON reply well inside the context window
+DRAFT_RETRIES = 1  # follow-up calls for drafts that were missing or invalid
+
+
+def is_configured(key):
+    """True if `key` looks like a real API key rather than a placeholder."""
+    return bool(key) and not key.startswith('YOUR_')
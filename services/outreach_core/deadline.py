@@ -0,0 +1,313 @@
+"""
+Deadlines and cooperative cancellation.
+
+A caller that will stop waiting for a result after some time (the Node
+routes, a Flask client) passes that deadline in. The work then stops
+before it: upstream timeouts are clamped to the time left, no new upstream
+call starts once it has passed, and loops check deadline_reached() between
+stages. They return what they have so far, and truncated() tells the
+entry point to mark its output as partial.
+
+The deadline is an absolute Unix time, so the time the Node side spends
+spawning Python counts against it. It comes from:
+
+- `--deadline <unix time>` or `--timeout <seconds>` on the script command lines;
+- OUTREACH_DEADLINE / OUTREACH_TIMEOUT in the environment of a script run
+  (read by start_script(), never by the long-running service);
+- `X-Deadline` / `X-Timeout` headers on the Flask routes (see install_deadlines).
+
+A value that is not a number is a usage error for a script and a 400 for
+a route.
+
+A deadline may also carry a budget of upstream calls (see deadline_scope);
+once it is spent, work stops the same way as when time runs out. The cache
+warmer uses this to stay within its quota.
+
+SIGTERM and SIGINT cancel the process the same way: everything still
+running winds down as if the deadline had passed, and the script prints
+its partial result. A second signal exits at once.
+
+The deadline lives in a context variable, like the scheduler's priority,
+so it follows work into to_thread() workers and each Flask request has its
+own. Cancellation is process-wide.
+"""
+import os
+import sys
+import math
+import time
+import signal
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .output import emit
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting work that could not finish before the deadline."""
+
+    def __init__(self, stage=None):
+        deadline = _current.get()
+        if _cancelled.is_set():
+            reason = "cancelled"
+        elif deadline.budget_spent:
+            reason = "call budget spent"
+        else:
+            reason = "deadline exceeded"
+        super().__init__(f"{reason} before {stage}" if stage else reason)
+        self.stage = stage
+        deadline.truncated = True
+
+
+_cancelled = threading.Event()
+
+
+class Deadline:
+    """
+    An absolute Unix-time deadline (or none) and an optional budget of
+    upstream calls, plus whether work was cut short by either.
+    """
+
+    def __init__(self, expires_at=None, max_calls=None):
+        self.expires_at = expires_at
+        self.calls_left = max_calls
+        self.budget_spent = False
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Seconds left, 0 once passed, cancelled or out of calls, None without a deadline."""
+        if _cancelled.is_set() or self.budget_spent:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.time())
+
+    def reached(self):
+        """True once the deadline has passed or the process was cancelled; marks the work truncated."""
+        left = self.remaining()
+        if left is not None and left <= 0:
+            self.truncated = True
+            return True
+        return False
+
+    def charge(self, stage=None):
+        """Spends one upstream call of the budget; raises DeadlineExceeded once none is left."""
+        if self.calls_left is None:
+            return
+        with self._lock:
+            if self.calls_left > 0:
+                self.calls_left -= 1
+                return
+            self.budget_spent = True
+        raise DeadlineExceeded(stage)
+
+
+def parse_deadline(value, relative=False):
+    """
+    The absolute deadline for a Unix time, or for a number of seconds from
+    now if `relative`. Raises ValueError unless `value` is a finite number.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number):
+        raise ValueError(f"expected a number, got {value!r}")
+    return time.time() + number if relative else number
+
+
+def _from_env():
+    if os.environ.get('OUTREACH_DEADLINE'):
+        return parse_deadline(os.environ['OUTREACH_DEADLINE'])
+    if os.environ.get('OUTREACH_TIMEOUT'):
+        return parse_deadline(os.environ['OUTREACH_TIMEOUT'], relative=True)
+    return None
+
+
+class _NoDeadline(Deadline):
+    """
+    The deadline of work outside any script, request or scope. It is shared
+    by all such work, so it can't keep a truncated flag: one stage giving up
+    would mark every later one partial. Only cancellation truncates it.
+    """
+
+    @property
+    def truncated(self):
+        return _cancelled.is_set()
+
+    @truncated.setter
+    def truncated(self, value):
+        pass
+
+
+# No deadline unless a script, request or scope sets one
+_current = ContextVar('outreach_deadline', default=_NoDeadline())
+
+
+def current_deadline():
+    return _current.get()
+
+
+def remaining():
+    return _current.get().remaining()
+
+
+def deadline_reached():
+    return _current.get().reached()
+
+
+def truncated():
+    """True if any stage of the current work stopped early because of the deadline."""
+    return _current.get().truncated
+
+
+def check_deadline(stage=None):
+    """Raises DeadlineExceeded if the deadline has passed; `stage` names what was about to start."""
+    if _current.get().reached():
+        raise DeadlineExceeded(stage)
+
+
+def clamp_timeout(timeout, stage=None):
+    """
+    Returns `timeout` shortened to the time left, so a request can't outlive
+    the deadline. Raises DeadlineExceeded if no time is left.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(stage)
+    return left if timeout is None else min(timeout, left)
+
+
+def sleep(seconds):
+    """time.sleep that returns early when cancelled or when the deadline comes first."""
+    left = remaining()
+    if left is not None:
+        seconds = min(seconds, left)
+    if seconds > 0:
+        _cancelled.wait(seconds)
+
+
+@contextmanager
+def deadline_scope(expires_at, max_calls=None):
+    """
+    Runs the block (and the threads it starts) under its own deadline, and
+    at most `max_calls` upstream calls if given; yields the Deadline.
+    """
+    deadline = Deadline(expires_at, max_calls)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def set_deadline(expires_at):
+    """Sets the deadline for the rest of the current context, e.g. at the top of a script."""
+    _current.set(Deadline(expires_at))
+
+
+def cancel():
+    """Cancels all work in the process; see the module docstring."""
+    _cancelled.set()
+
+
+def cancelled():
+    return _cancelled.is_set()
+
+
+def _handle_signal(signum, frame):
+    if _cancelled.is_set():
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+        return
+    cancel()
+
+
+def install_cancel_handlers():
+    """Makes SIGTERM and SIGINT cancel cooperatively; call from the main thread."""
+    for name in ('SIGTERM', 'SIGINT'):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _handle_signal)
+
+
+def pop_deadline_option(argv):
+    """
+    Removes `--deadline <unix time>` / `--timeout <seconds>` (or their
+    `--opt=value` forms) from argv and returns the absolute deadline to use,
+    falling back to the environment. Raises ValueError for a value that is
+    not a number.
+    """
+    try:
+        expires_at = _from_env()
+    except ValueError as e:
+        raise ValueError(f"OUTREACH_DEADLINE/OUTREACH_TIMEOUT: {e}") from None
+    for option in ("--deadline", "--timeout"):
+        for i, arg in enumerate(argv):
+            if arg == option and i + 1 < len(argv):
+                value = argv[i + 1]
+                del argv[i:i + 2]
+            elif arg.startswith(option + "="):
+                value = arg.partition('=')[2]
+                del argv[i]
+            else:
+                continue
+            try:
+                expires_at = parse_deadline(value, relative=(option == "--timeout"))
+            except ValueError as e:
+                raise ValueError(f"{option}: {e}") from None
+            break
+    return expires_at
+
+
+def usage_error(message):
+    """Emits `message` as the script's error result and exits with status 2."""
+    emit({"error": message})
+    sys.exit(2)
+
+
+def start_script(argv):
+    """
+    The usual entry-point setup: takes the deadline from argv/env for this
+    run and installs the cancel handlers. Returns the Deadline; exits with a
+    usage error if the deadline is not a number.
+    """
+    try:
+        expires_at = pop_deadline_option(argv)
+    except ValueError as e:
+        usage_error(str(e))
+    set_deadline(expires_at)
+    install_cancel_handlers()
+    return current_deadline()
+
+
+def install_deadlines(app):
+    """
+    Gives each Flask request its own Deadline, from its `X-Deadline` (Unix
+    time) or `X-Timeout` (seconds) header if it has one. A header that is
+    not a number gets a 400.
+    """
+    from flask import g, request, jsonify
+
+    @app.before_request
+    def enter_deadline():
+        expires_at = None
+        try:
+            if request.headers.get('X-Deadline'):
+                expires_at = parse_deadline(request.headers['X-Deadline'])
+            elif request.headers.get('X-Timeout'):
+                expires_at = parse_deadline(request.headers['X-Timeout'], relative=True)
+        except ValueError as e:
+            return jsonify({"error": f"Bad deadline header: {e}"}), 400
+        # Even without a header: truncation must not leak between requests
+        g.deadline_token = _current.set(Deadline(expires_at))
+
+    @app.teardown_request
+    def exit_deadline(exc):
+        token = g.pop('deadline_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    return app
@@ -0,0 +1,119 @@
+"""
+Near-duplicate detection for scraped pages and search snippets.
+
+Search results for one topic often point at syndicated copies of the same
+list article. Each text gets a 64-bit SimHash over its word shingles, and
+two texts whose fingerprints differ in at most `max_distance` bits count as
+copies.
+
+Fingerprints are indexed in 16-bit bands. With four bands and a distance of
+at most 3, a copy always matches an earlier fingerprint exactly in at least
+one band, so a lookup only compares against that band's bucket instead of
+every fingerprint seen.
+"""
+import re
+import hashlib
+
+TOKEN_RE = re.compile(r'\w+')
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def _hash64(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def tokens(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def simhash(text, shingle=3):
+    """Returns the 64-bit SimHash of `text`'s word shingles (0 for empty text)."""
+    words = tokens(text)
+    if len(words) > shingle:
+        features = [' '.join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+    else:
+        features = words
+    if not features:
+        return 0
+    hashes = [_hash64(f) for f in features]
+    # Count set bits per position column-wise; zip and str.count run in C
+    half = len(hashes) / 2
+    fingerprint = 0
+    for i, column in enumerate(zip(*(format(h, '064b') for h in hashes))):
+        if ''.join(column).count('1') > half:
+            fingerprint |= 1 << (BITS - 1 - i)
+    return fingerprint
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """
+    Remembers fingerprints of texts seen so far and finds near-copies of new ones.
+
+    Args:
+        max_distance (int): Largest Hamming distance still counted as a copy (at most 3)
+        shingle (int): Words per shingle; 2 suits snippets, 3 suits pages
+        min_tokens (int): Shorter texts are never matched, since boilerplate
+            such as "Access denied" would otherwise collapse unrelated pages
+    """
+
+    def __init__(self, max_distance=3, shingle=3, min_tokens=30):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookup")
+        self.max_distance = max_distance
+        self.shingle = shingle
+        self.min_tokens = min_tokens
+        self._bands = [{} for _ in range(BANDS)]
+        self.checked = 0
+        self.duplicates = 0
+
+    def fingerprint(self, text):
+        """The SimHash of `text`, or None if it is too short to compare."""
+        if len(tokens(text)) < self.min_tokens:
+            return None
+        return simhash(text, self.shingle)
+
+    def _find(self, fingerprint):
+        for band, buckets in enumerate(self._bands):
+            for other, key in buckets.get((fingerprint >> (band * BAND_BITS)) & BAND_MASK, ()):
+                if hamming(fingerprint, other) <= self.max_distance:
+                    return key
+        return None
+
+    def _add(self, fingerprint, key):
+        for band, buckets in enumerate(self._bands):
+            buckets.setdefault((fingerprint >> (band * BAND_BITS)) & BAND_MASK, []).append((fingerprint, key))
+
+    def check(self, text, key):
+        """
+        Returns the key of an earlier near-copy of `text`, or None after
+        remembering `text` under `key`.
+        """
+        self.checked += 1
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        original = self._find(fingerprint)
+        if original is not None:
+            self.duplicates += 1
+            return original
+        self._add(fingerprint, key)
+        return None
+
+
+def snippet_index():
+    """Index tuned for search snippets: short texts, so shorter shingles."""
+    return NearDuplicateIndex(max_distance=3, shingle=2, min_tokens=12)
+
+
+def drop_near_duplicates(items, text_of, key_of=id, index=None):
+    """Returns `items` without those whose text is a near-copy of an earlier item's."""
+    index = index or NearDuplicateIndex()
+    return [item for item in items if index.check(text_of(item), key_of(item)) is None]
@@ -0,0 +1,157 @@
+"""
+Personalized intro drafts for many recipients in few LLM calls.
+
+Instead of one completion per recipient, recipients are packed into chunks
+that share a single prompt preamble and come back as one JSON object with
+a draft per recipient. Each draft is validated on its own; only the
+recipients whose drafts are missing or invalid are sent again, in a
+smaller follow-up call.
+"""
+import re
+import json
+
+from .aio import run_sync
+from .cache import llm_cache
+from .config import MODEL_FAST, DRAFT_CHUNK_SIZE, DRAFT_MAX_PROMPT_CHARS, DRAFT_RETRIES
+from .deadline import deadline_reached
+from .llm import complete_async
+from .log import log, WARNING
+from .scheduler import Overloaded
+
+MIN_WORDS = 25
+MAX_WORDS = 200  # asked for under 150; leave slack before rejecting
+# Template slots the model sometimes leaves unfilled
+PLACEHOLDER_RE = re.compile(r'\[(?:recipient|name|company|first name|contact|your name)[^\]]*\]', re.IGNORECASE)
+# The sign-off slot of the single-draft prompt and the fallback template
+SENDER_SLOT_RE = re.compile(r'\[your (?:full )?name\]', re.IGNORECASE)
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def build_variants_prompt(topic, project_summary, recipients, sender=None):
+    sign_off = f'sign off as "{sender}"' if sender else "leave out any signature, which is added separately"
+    lines = "\n".join(
+        f'- id: "{r["id"]}"; ' + "; ".join(f"{k}: {v}" for k, v in r.items() if k != "id" and v)
+        for r in recipients
+    )
+    return f"""
+    You are a professional business communication assistant. Write a separate, personalized cold outreach email for each recipient below, all about the '{topic}' space.
+    Every email should be based on the following project summary: "{project_summary}"
+    Tailor each email to what is known about its recipient. Keep each email under 150 words, end with a clear call to action, and {sign_off}.
+
+    --- RECIPIENTS ---
+    {lines}
+    ---
+
+    Return ONLY a JSON object of the form {{"variants": [{{"id": "<recipient id>", "body": "<raw email text>"}}]}} with exactly one entry per recipient id.
+    """
+
+
+def _chunks(recipients, topic, project_summary, sender=None):
+    """Splits recipients so each prompt stays under DRAFT_CHUNK_SIZE and DRAFT_MAX_PROMPT_CHARS."""
+    base = len(build_variants_prompt(topic, project_summary, [], sender))
+    chunk, size = [], base
+    for recipient in recipients:
+        line = len(build_variants_prompt(topic, project_summary, [recipient], sender)) - base
+        if chunk and (len(chunk) >= DRAFT_CHUNK_SIZE or size + line > DRAFT_MAX_PROMPT_CHARS):
+            yield chunk
+            chunk, size = [], base
+        chunk.append(recipient)
+        size += line
+    if chunk:
+        yield chunk
+
+
+def parse_variants(reply):
+    """Returns {id: body} from a model reply, tolerating code fences and chatter."""
+    m = JSON_OBJECT_RE.search(reply or '')
+    if not m:
+        return {}
+    try:
+        data = json.loads(m.group(0))
+    except ValueError:
+        return {}
+    variants = data.get("variants", []) if isinstance(data, dict) else []
+    return {
+        str(v["id"]): v["body"] for v in variants
+        if isinstance(v, dict) and "id" in v and isinstance(v.get("body"), str)
+    }
+
+
+def validate_draft(body):
+    """Returns a rejection reason, or None if the draft can be sent."""
+    words = len(body.split())
+    if words < MIN_WORDS:
+        return "too_short"
+    if words > MAX_WORDS:
+        return "too_long"
+    if PLACEHOLDER_RE.search(body):
+        return "placeholder"
+    return None
+
+
+def fill_sender(body, sender):
+    """Puts the sender's name into a "[Your Name]" sign-off slot, if the body has one."""
+    return SENDER_SLOT_RE.sub(lambda _: sender, body) if body and sender else body
+
+
+async def _draft_chunk(topic, project_summary, chunk, api_key, sender=None, retry=False):
+    prompt = build_variants_prompt(topic, project_summary, chunk, sender)
+    try:
+        # A retry must reach the model: the cached reply is the one that failed
+        reply = await complete_async(prompt, MODEL_FAST, api_key, use_cache=not retry)
+    except Overloaded:
+        raise
+    except Exception as e:
+        log(f"    - AI drafting error: {e}", WARNING)
+        return {}
+    variants = parse_variants(reply)
+    if not variants:
+        # Don't serve an unusable reply to the next caller, here or via the shared tier
+        llm_cache.delete((MODEL_FAST, prompt))
+    return variants
+
+
+async def draft_intro_variants_async(topic, project_summary, recipients, api_key=None, retries=DRAFT_RETRIES,
+                                     sender=None):
+    """
+    Drafts one personalized intro per recipient.
+
+    Args:
+        topic (str): The outreach topic
+        project_summary (str): What the sender is working on
+        recipients (list): Dicts with a unique "id" plus any details worth
+            personalizing on (email, name, company, context)
+        api_key (str): OpenRouter key
+        retries (int): Follow-up calls for recipients whose drafts failed
+        sender (str): Name to sign the drafts with; without it they are
+            left unsigned
+
+    Returns:
+        dict: {id: body} for every recipient that got a valid draft; the
+            others are left out so the caller can fall back
+    """
+    import asyncio
+    recipients = [dict(r, id=str(r["id"])) for r in recipients]
+    drafts = {}
+    pending = recipients
+    for attempt in range(retries + 1):
+        if not pending or deadline_reached():
+            break
+        chunks = list(_chunks(pending, topic, project_summary, sender))
+        log(f"🤖 AI is drafting {len(pending)} intro variants in {len(chunks)} call(s)...")
+        for variants in await asyncio.gather(*(_draft_chunk(topic, project_summary, c, api_key, sender, attempt > 0)
+                                              for c in chunks)):
+            for rid, body in variants.items():
+                body = body.strip()
+                if validate_draft(body) is None:
+                    drafts[rid] = body
+        pending = [r for r in pending if r["id"] not in drafts]
+        if pending and attempt < retries:
+            log(f"    - Retrying {len(pending)} drafts that were missing or invalid")
+    if pending:
+        log(f"    - No valid draft for {len(pending)} recipients", WARNING)
+    return drafts
+
+
+def draft_intro_variants(topic, project_summary, recipients, api_key=None, retries=DRAFT_RETRIES, sender=None):
+    return run_sync(draft_intro_variants_async(topic, project_summary, recipients, api_key, retries, sender))
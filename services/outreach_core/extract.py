@@ -0,0 +1,259 @@
+"""
+Email extraction and the harvest engine behind extract_real_emails and
+find_emails_in_field.
+"""
+import re
+from urllib.parse import urlparse
+
+from .aio import gather_limited, run_sync, to_thread
+from .config import SCRAPE_WAVE_SIZE, QUERY_DELAY
+from .dedup import NearDuplicateIndex, snippet_index
+from .deadline import deadline_reached, sleep, truncated
+from .fetch import scrape_text_from_url
+from .log import log, WARNING
+from .records import EmailHarvest, CONTEXT_WINDOW
+from .relevance import rank_results
+from .scheduler import Overloaded
+from .search import serpapi_search_async
+from .yield_stats import get_yield_stats, query_template
+
+EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+# e.g. "name [at] domain [dot] com"
+OBFUSCATED_EMAIL_RE = re.compile(r'[a-zA-Z0-9._%+-]+\s*[\[\(]at[\]\)]\s*[a-zA-Z0-9.-]+\s*[\[\(]dot[\]\)]\s*[a-zA-Z]{2,}')
+
+
+def deobfuscate_email(text):
+    return text.replace(" ", "").replace("[at]", "@").replace("(at)", "@").replace("[dot]", ".").replace("(dot)", ".")
+
+
+def find_emails(text, include_obfuscated=False):
+    """Returns every email address in `text`, in order of appearance."""
+    emails = EMAIL_RE.findall(text)
+    if include_obfuscated:
+        emails.extend(deobfuscate_email(m) for m in OBFUSCATED_EMAIL_RE.findall(text))
+    return emails
+
+
+def email_context(text, email, window=CONTEXT_WINDOW, default=""):
+    """Returns the text surrounding the first occurrence of `email`."""
+    pos = text.find(email)
+    if pos == -1:
+        return default
+    return text[max(0, pos - window):min(len(text), pos + len(email) + window)]
+
+
+def host_of(url):
+    return urlparse(url).netloc
+
+
+def default_sample_source(email):
+    domain = email.split('@')[1]
+    return {
+        "title": "Sample Contact",
+        "link": f"https://www.{domain}",
+        "context": f"Contact at {domain}"
+    }
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def harvest_emails_async(search_topic, target_sites=(), search_queries=(), min_emails=10,
+                               max_results=50, num_results=10, site_title="From {host}",
+                               site_context="Found on website", sample_emails=(),
+                               sample_source=default_sample_source, api_key=None, adaptive=True,
+                               compact=False, dedup=True, relevance_query=None, scrape_top_k=None):
+    """
+    Collects email addresses for a topic from known sites, then from search results.
+
+    Known sites are scraped first (obfuscated addresses included). If that is not
+    enough, each search query is run and its snippets and linked pages are scanned
+    until `min_emails` addresses are found, `max_results` hits are counted or the
+    deadline (see outreach_core.deadline) passes. Pages
+    are fetched SCRAPE_WAVE_SIZE at a time so stop conditions are re-checked between
+    waves. Any shortfall is topped up from `sample_emails`.
+
+    With `adaptive`, every page fetch and query is recorded in the persistent
+    yield stats: domains that never yield addresses are skipped, pages and
+    queries are tried in order of expected yield.
+
+    With `dedup`, syndicated copies are dropped as early as possible: a
+    result whose snippet nearly matches an earlier one is neither scanned nor
+    fetched, and a page that nearly matches an earlier page is not scanned.
+
+    With `relevance_query`, each query's results are ranked by TF-IDF
+    similarity of their title and snippet to it, and with `scrape_top_k` only
+    that many of the best-ranked pages are fetched per query.
+
+    Args:
+        search_topic (str): The topic to search for emails (e.g., "fintech investors")
+        target_sites (list): URLs scraped before any search is made
+        search_queries (list): Queries to run, in order
+        min_emails (int): Minimum number of emails to find
+        max_results (int): Maximum number of search hits to process
+        num_results (int): SerpAPI `num` for each query
+        site_title (str): Source title for target-site emails; `{host}` is substituted
+        site_context (str): Context used when an email's position can't be found
+        sample_emails (list): Fallback addresses used to reach `min_emails`
+        sample_source (callable): Builds the source dict for a sample email
+        api_key (str): SerpAPI key
+        adaptive (bool): Use and update the yield stats
+        compact (bool): Return the EmailHarvest itself instead of dicts
+        dedup (bool): Skip near-duplicate snippets and pages
+        relevance_query (str): Text results are ranked against, e.g. the topic
+        scrape_top_k (int): Most pages fetched per query, None for no limit
+
+    Returns:
+        list: A list of dictionaries containing email information
+            (an EmailHarvest when `compact` is set)
+    """
+    found = EmailHarvest()  # in discovery order; pages are shared, not copied
+
+    stats = get_yield_stats() if adaptive else None
+    pages_seen = NearDuplicateIndex() if dedup else None
+    snippets_seen = snippet_index() if dedup else None
+    links_seen = set()
+
+    def is_copy(index, text, key):
+        if index is None:
+            return False
+        original = index.check(text, key)
+        if original is not None:
+            log(f"    - Skipping {key} (near-duplicate of {original})")
+        return original is not None
+
+    def enough():
+        return len(found) >= min_emails
+
+    def fetchable(urls):
+        urls = [url for url in urls if url]
+        if stats is None:
+            return urls
+        for url in urls:
+            if stats.should_skip(url):
+                log(f"    - Skipping {url} (no emails seen from this domain)")
+        return stats.order_urls([url for url in urls if not stats.should_skip(url)])
+
+    def record_page(url, page_content, emails):
+        # Failed fetches come back empty and say nothing about the domain. A
+        # page counts every address on it: one already found elsewhere still
+        # shows the domain lists contacts
+        if stats is not None and page_content:
+            stats.record_fetch(url, len(set(emails)))
+
+    for wave in _chunks(fetchable(target_sites), SCRAPE_WAVE_SIZE):
+        if enough() or deadline_reached():
+            break
+        for site in wave:
+            log(f"  - Checking website: {site}")
+        pages = await gather_limited(scrape_text_from_url, wave)
+        for site, page_content in zip(wave, pages):
+            if is_copy(pages_seen, page_content, site):
+                continue
+            emails = find_emails(page_content, include_obfuscated=True)
+            if emails:
+                found.add_page_hits(emails, site_title.format(host=host_of(site)), site, page_content,
+                                    default=site_context)
+            record_page(site, page_content, emails)
+
+    search_queries = list(search_queries)
+    if stats is not None:
+        search_queries = stats.order_queries(search_queries, search_topic)
+
+    total_hits = 0
+    for query in search_queries:
+        if enough() or total_hits >= max_results or deadline_reached():
+            break
+
+        log(f"  - Searching: '{query}'")
+        try:
+            results = await serpapi_search_async(query, num_results, api_key)
+        except Overloaded:
+            raise
+        except Exception as e:
+            log(f"    - API Error: {e}", WARNING)
+            continue
+        query_start = len(found)
+        if not results:
+            if stats is not None:
+                stats.record_query(query_template(query, search_topic), 0)
+            continue
+
+        if dedup:
+            # The same page often turns up again under later queries
+            results = [r for r in results if not r.get("link") or r["link"] not in links_seen]
+            links_seen.update(r.get("link") for r in results)
+            results = [r for r in results if not is_copy(snippets_seen, r.get("snippet", ""), r.get("link", ""))]
+        if relevance_query:
+            results = rank_results(relevance_query, results)
+        scrape_budget = scrape_top_k
+
+        for wave in _chunks(results, SCRAPE_WAVE_SIZE):
+            for result in wave:
+                snippet = result.get("snippet", "")
+                for email in find_emails(snippet):
+                    found.add(email, result.get("title", ""), result.get("link", ""), snippet)
+                    total_hits += 1
+
+            if not enough() and scrape_budget != 0:
+                links = fetchable([result.get("link", "") for result in wave])
+                if scrape_budget is not None:
+                    links = links[:scrape_budget]
+                    scrape_budget -= len(links)
+                pages = await gather_limited(scrape_text_from_url, links)
+                titles = {result.get("link", ""): result.get("title", "") for result in wave}
+                for link, page_content in zip(links, pages):
+                    if is_copy(pages_seen, page_content, link):
+                        continue
+                    emails = find_emails(page_content)
+                    for email in emails:
+                        found.add(email, titles.get(link, ""), link, "Found on linked page")
+                        total_hits += 1
+                    record_page(link, page_content, emails)
+
+            if enough() or total_hits >= max_results or deadline_reached():
+                break
+
+        if truncated():
+            break  # a cut-short query says nothing about its yield
+        if stats is not None:
+            stats.record_query(query_template(query, search_topic), len(found) - query_start)
+        # Cut short by the deadline or a cancel, unlike asyncio.sleep
+        await to_thread(sleep, QUERY_DELAY)
+
+    if stats is not None:
+        try:
+            stats.save()
+        except OSError as e:
+            log(f"    - Could not save yield stats: {e}", WARNING)
+
+    # If we still don't have enough emails, add some sample emails as a fallback
+    for email in sample_emails:
+        if enough():
+            break
+        if email not in found:
+            found.add_source(email, sample_source(email))
+
+    return found if compact else format_email_results(found)
+
+
+def harvest_emails(search_topic, **options):
+    """Synchronous wrapper around harvest_emails_async."""
+    return run_sync(harvest_emails_async(search_topic, **options))
+
+
+def format_email_results(found):
+    """
+    Turns an EmailHarvest, or an {email: source} mapping, into the list shape
+    the scripts print.
+    """
+    if isinstance(found, EmailHarvest):
+        return found.to_dicts()
+    return [{
+        "email": email,
+        "source_title": source.get("title", "Unknown"),
+        "source_link": source.get("link", ""),
+        "context": source.get("context", "")
+    } for email, source in found.items()]
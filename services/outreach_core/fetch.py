@@ -0,0 +1,301 @@
+"""
+Page fetching and HTML-to-text conversion, cached per URL.
+
+Pages are streamed: only HTML responses are read, the download stops at a
+byte cap, and text is extracted incrementally so the download also stops as
+soon as the caller's character budget is met. With OUTREACH_ARCHIVE=1 the
+raw body is also kept (up to the byte cap) and appended to the WARC archive,
+so those pages are read in full.
+"""
+import codecs
+from contextlib import contextmanager
+from html.parser import HTMLParser
+
+from .aio import to_thread, gather_limited, run_sync
+from .archive import get_archive
+from .breaker import CircuitOpen, host_breaker
+from .cache import page_cache
+from .config import REQUEST_TIMEOUT, MAX_DOWNLOAD_BYTES, DOWNLOAD_CHUNK_SIZE, HTML_CONTENT_TYPES
+from .deadline import clamp_timeout
+from .log import log, WARNING
+from .scheduler import Overloaded, upstream_slot
+from .session import get_session
+from .yield_stats import normalize_domain
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be retrieved; `status` holds the HTTP status if any."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class TextExtractor(HTMLParser):
+    """
+    Incremental equivalent of BeautifulSoup's get_text(separator=' ', strip=True)
+    with scripts and styles removed. Sets `done` once more than `max_chars`
+    characters have been collected so the caller can stop feeding it.
+
+    A text node that spans two feed() calls arrives in pieces, so data is
+    held until the next tag and stripped as a whole; otherwise a word or an
+    address split across download chunks would come out with a space in it.
+    """
+
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self, max_chars=None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.done = False
+        self._skip_depth = 0
+        self._pending = []  # pieces of the current text node
+        self._pending_length = 0
+
+    def _flush(self):
+        if not self._pending:
+            return
+        data = ''.join(self._pending).strip()
+        self._pending = []
+        self._pending_length = 0
+        if data:
+            self.length += len(data) + (1 if self.parts else 0)
+            self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        self._pending.append(data)
+        self._pending_length += len(data)
+        # Only strip the node once it could be long enough to end the text
+        if (self.max_chars is not None and self.length + 1 + self._pending_length > self.max_chars
+                and self.length + 1 + len(''.join(self._pending).strip()) > self.max_chars):
+            self._flush()
+            self.done = True
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def text(self):
+        self._flush()
+        return ' '.join(self.parts)
+
+
+def html_to_text(html, max_chars=None):
+    """Returns the readable text of an HTML document, without scripts and styles."""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    extractor = TextExtractor(max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text()
+
+
+def is_html(content_type):
+    return content_type.split(';')[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def _charset(content_type):
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset' and value.strip():
+            return value.strip().strip('"\'')
+    return 'utf-8'
+
+
+def _codec(content_type):
+    try:
+        return codecs.lookup(_charset(content_type)).name
+    except LookupError:
+        return 'utf-8'
+
+
+def _stream_text(response, max_chars, max_bytes, raw=None):
+    """
+    Feeds the response body to a TextExtractor; returns (text, complete).
+    With a `raw` list, the body chunks are appended to it and the whole body
+    is read, so `complete` is only False when the byte cap was hit.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    decoder = codecs.getincrementaldecoder(_codec(content_type))(errors='replace')
+    extractor = TextExtractor(max_chars if raw is None else None)
+    received = 0
+    complete = True
+    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+        if received + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - received]
+            complete = False
+        received += len(chunk)
+        if raw is not None:
+            raw.append(chunk)
+        extractor.feed(decoder.decode(chunk))
+        if extractor.done:
+            complete = False
+        if not complete:
+            break
+    else:
+        extractor.feed(decoder.decode(b'', final=True))
+    extractor.close()
+    return extractor.text(), complete
+
+
+def _read_body(response, max_bytes):
+    """Reads the raw body up to max_bytes; returns (bytes, complete)."""
+    chunks = []
+    received = 0
+    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+        if received + len(chunk) > max_bytes:
+            chunks.append(chunk[:max_bytes - received])
+            return b''.join(chunks), False
+        received += len(chunk)
+        chunks.append(chunk)
+    return b''.join(chunks), True
+
+
+@contextmanager
+def _open_page(url, timeout):
+    """
+    Sends a streamed GET for an HTML page under the host's circuit breaker
+    and an upstream slot; yields the response once it is known to be a 200
+    HTML reply, and closes it afterwards. Raises FetchError otherwise.
+    """
+    try:
+        with host_breaker(normalize_domain(url)).guard() as breaker_outcome, upstream_slot():
+            try:
+                response = get_session().get(url, timeout=clamp_timeout(timeout), stream=True)
+            except Exception as e:
+                raise FetchError(str(e)) from e
+            try:
+                if response.status_code != 200:
+                    raise FetchError(f"Status code: {response.status_code}", response.status_code)
+                content_type = response.headers.get('Content-Type', '')
+                if content_type and not is_html(content_type):
+                    breaker_outcome('ok')  # the host is up, the page just isn't HTML
+                    raise FetchError(f"Unsupported content type: {content_type}")
+                yield response
+            finally:
+                response.close()
+    except CircuitOpen as e:
+        raise FetchError(str(e)) from e
+
+
+def _archive(url, response, body, complete):
+    archive = get_archive()
+    if archive is None:
+        return
+    try:
+        archive.append(url, response.status_code, response.headers, body, reason=response.reason,
+                       content_type=response.headers.get('Content-Type', ''), truncated=not complete)
+    except Exception as e:
+        log(f"    - Archive error: {e}", WARNING)
+
+
+def fetch_page_text(url, timeout=REQUEST_TIMEOUT, max_chars=None, max_bytes=MAX_DOWNLOAD_BYTES):
+    """
+    Downloads `url` and returns its readable text.
+
+    Args:
+        url (str): Page to fetch
+        timeout (int): Connect/read timeout in seconds
+        max_chars (int): Stop once more than this many characters are extracted;
+            the result may then be longer than `max_chars` and callers slice it
+        max_bytes (int): Never read more than this many bytes of the body
+
+    Raises:
+        FetchError: If the request fails, the status is not 200, the
+            response is not HTML or the host's circuit breaker is open
+    """
+    cached = page_cache.get(url)
+    if cached is not None:
+        text, complete = cached
+        if complete or (max_chars is not None and len(text) > max_chars):
+            return text
+    with _open_page(url, timeout) as response:
+        raw = [] if get_archive() is not None else None
+        try:
+            text, complete = _stream_text(response, max_chars, max_bytes, raw)
+        except Exception as e:
+            raise FetchError(str(e)) from e
+    if raw is not None:
+        _archive(url, response, b''.join(raw), complete)
+    page_cache.set(url, (text, complete))
+    return text
+
+
+def fetch_page_html(url, timeout=REQUEST_TIMEOUT, max_bytes=MAX_DOWNLOAD_BYTES):
+    """
+    Downloads `url` and returns its markup, for callers that need the page
+    structure rather than its text. The markup itself is not cached, but
+    its text is, so a later fetch_page_text() of the same URL is free.
+
+    Raises:
+        FetchError: As fetch_page_text
+    """
+    with _open_page(url, timeout) as response:
+        try:
+            body, complete = _read_body(response, max_bytes)
+        except Exception as e:
+            raise FetchError(str(e)) from e
+    _archive(url, response, body, complete)
+    html = codecs.decode(body, _codec(response.headers.get('Content-Type', '')), errors='replace')
+    page_cache.set(url, (html_to_text(html), complete))
+    return html
+
+
+def scrape_text_from_url(url, max_chars=8000, max_bytes=MAX_DOWNLOAD_BYTES):
+    """Scrapes all readable text from a URL, or "" if it can't be read."""
+    log(f"    - Reading content from {url}")
+    try:
+        return fetch_page_text(url, max_chars=max_chars, max_bytes=max_bytes)[:max_chars]
+    except Overloaded:
+        raise
+    except Exception as e:
+        log(f"    - Scraping error: {e}", WARNING)
+        return ""
+
+
+def scrape_url_content(url, max_chars=3000, max_bytes=MAX_DOWNLOAD_BYTES):
+    """Like scrape_text_from_url, but failures come back as a readable message."""
+    try:
+        text = fetch_page_text(url, max_chars=max_chars, max_bytes=max_bytes)
+    except FetchError as e:
+        if e.status is not None:
+            return f"Failed to retrieve content (Status code: {e.status})"
+        return f"Error scraping content: {e}"
+    except Overloaded:
+        raise
+    except Exception as e:
+        return f"Error scraping content: {str(e)}"
+    if len(text) > max_chars:
+        text = text[:max_chars] + "... [content truncated]"
+    return text
+
+
+async def scrape_text_from_url_async(url, max_chars=8000, max_bytes=MAX_DOWNLOAD_BYTES):
+    return await to_thread(scrape_text_from_url, url, max_chars, max_bytes)
+
+
+async def scrape_url_content_async(url, max_chars=3000, max_bytes=MAX_DOWNLOAD_BYTES):
+    return await to_thread(scrape_url_content, url, max_chars, max_bytes)
+
+
+def scrape_many(urls, max_chars=8000, max_bytes=MAX_DOWNLOAD_BYTES):
+    """Scrapes several URLs concurrently; returns texts in the same order."""
+    return run_sync(scrape_many_async(urls, max_chars, max_bytes))
+
+
+async def scrape_many_async(urls, max_chars=8000, max_bytes=MAX_DOWNLOAD_BYTES):
+    return await gather_limited(lambda url: scrape_text_from_url(url, max_chars, max_bytes), urls)
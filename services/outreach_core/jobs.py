@@ -0,0 +1,118 @@
+"""
+Checkpoint store for long-running jobs.
+
+Each completed unit of work (a search, a dossier, an LLM profile) is written
+to its own JSON file under STATE_DIR/jobs/<job_id>/<stage>/ as soon as it
+finishes. Re-running a job with the same ID reads finished units back
+instead of redoing them, so a run killed halfway resumes where it stopped.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+
+from .config import STATE_DIR
+from .deadline import truncated
+
+JOBS_DIR = os.path.join(STATE_DIR, 'jobs')
+
+_MISSING = object()
+
+
+def new_job_id(label=''):
+    """Returns a fresh job ID, prefixed with a slug of `label` for readability."""
+    slug = re.sub(r'[^a-z0-9]+', '-', label.lower()).strip('-')[:40]
+    return f"{slug}-{uuid.uuid4().hex[:8]}" if slug else uuid.uuid4().hex[:12]
+
+
+def _unit_filename(key):
+    # Readable prefix plus a hash so distinct keys never share a file
+    safe = re.sub(r'[^A-Za-z0-9_-]+', '_', str(key))[:60]
+    digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()[:10]
+    return f"{safe}-{digest}.json"
+
+
+class JobStore:
+    """Per-job checkpoints, keyed by (stage, unit key)."""
+
+    def __init__(self, job_id, root=JOBS_DIR):
+        if not re.match(r'^[A-Za-z0-9_.-]+$', job_id):
+            raise ValueError(f"Invalid job ID: {job_id!r}")
+        self.job_id = job_id
+        self.path = os.path.join(root, job_id)
+
+    def _unit_path(self, stage, key):
+        return os.path.join(self.path, stage, _unit_filename(key))
+
+    def exists(self):
+        return os.path.isdir(self.path)
+
+    def has(self, stage, key='_'):
+        return os.path.exists(self._unit_path(stage, key))
+
+    def get(self, stage, key='_', default=None):
+        try:
+            with open(self._unit_path(stage, key), 'r', encoding='utf-8') as f:
+                return json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            return default
+
+    def put(self, stage, key, value):
+        """Writes one unit atomically, so a crash never leaves half a checkpoint."""
+        path = self._unit_path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": key, "saved_at": time.time(), "value": value}, f)
+        os.replace(tmp_path, path)
+        return value
+
+    def step(self, stage, key, compute, save_if=None):
+        """
+        Returns the checkpointed value for (stage, key), or computes it and
+        saves it. Results rejected by `save_if` (e.g. an empty list from a
+        rate-limited search), or computed while the deadline cut work short,
+        are returned but not checkpointed, so a resumed run retries them.
+        """
+        value = self.get(stage, key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = compute()
+        if truncated():
+            return value
+        if save_if is None or save_if(value):
+            self.put(stage, key, value)
+        return value
+
+    def set_status(self, status, **info):
+        meta = self.get('meta', 'job', {}) or {}
+        meta.update(info, status=status, updated_at=time.time())
+        self.put('meta', 'job', meta)
+
+    def status(self):
+        return (self.get('meta', 'job', {}) or {}).get('status')
+
+
+class NullJobStore(JobStore):
+    """Drop-in store that never checkpoints, for runs without a job ID."""
+
+    def __init__(self):
+        self.job_id = None
+        self.path = None
+
+    def exists(self):
+        return False
+
+    def has(self, stage, key='_'):
+        return False
+
+    def get(self, stage, key='_', default=None):
+        return default
+
+    def put(self, stage, key, value):
+        return value
+
+    def set_status(self, status, **info):
+        pass
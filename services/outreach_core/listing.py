@@ -0,0 +1,242 @@
+"""
+Structural extraction of names from "top N companies" articles.
+
+Such articles almost always list their entries as the items of an <ol> or
+<ul>, or as a run of <h2>/<h3> headings. OutlineParser collects both from
+the page outside navigation and boilerplate. extract_listing() cleans each
+candidate group into names ("3. Stripe – payments for the internet"
+becomes "Stripe") and scores it, then returns the best group with a
+confidence between 0 and 1. The score rewards groups that are mostly
+name-like, have at least a handful of entries and are numbered.
+
+Menus are not always inside <nav>, so a <ul> whose items are all bare
+links scores lower. When the page marks its content (an <article>, a
+<main> or an <h1>), a group outside it scores lower too: it sits before
+the title or in the page chrome. Callers fall back to the LLM when the
+confidence is below LISTING_MIN_CONFIDENCE.
+"""
+import re
+from html.parser import HTMLParser
+
+MIN_ITEMS = 3  # fewer entries than this is not a list of companies
+FULL_LIST_ITEMS = 5  # a group this long gets full credit for size
+MAX_ITEMS = 100  # longer groups are usually sitemaps or link farms
+MAX_NAME_WORDS = 6
+MAX_NAME_CHARS = 60
+UNNUMBERED_PENALTY = 0.85
+BARE_LINKS_PENALTY = 0.6  # a <ul> of nothing but links is usually a menu
+OUTSIDE_CONTENT_PENALTY = 0.8
+
+NUMBERING_RE = re.compile(r'^\s*(?:#?\d{1,3}\s*[.):\-–—]?\s+|\(\d{1,3}\)\s*)')
+# Where a name ends and its blurb begins: "Stripe - ...", "Stripe: ...", "Stripe (YC S09)"
+DESCRIPTION_RE = re.compile(r'\s+[-–—|]\s+|:\s+|\s*\(|,\s+')
+CONNECTORS = {"and", "of", "the", "for", "de", "la", "&", "by", "on", "in", "at", "to"}
+BOILERPLATE = {
+    "home", "about", "about us", "contact", "contact us", "privacy policy", "terms", "terms of service",
+    "conclusion", "summary", "introduction", "overview", "methodology", "final thoughts", "faq", "faqs",
+    "frequently asked questions", "table of contents", "contents", "related posts", "related articles",
+    "read more", "share", "share this", "subscribe", "sign up", "log in", "login", "comments",
+    "leave a reply", "recent posts", "categories", "tags", "newsletter", "sources", "references",
+}
+
+
+class ListGroup:
+    """One <ol>/<ul>: its item texts, whether every item is just a link, and whether it is in the content."""
+
+    def __init__(self, tag, in_content):
+        self.tag = tag
+        self.items = []
+        self.bare_links = True
+        self.in_content = in_content
+
+
+class OutlineParser(HTMLParser):
+    """
+    Collects the text of every <ol>/<ul> item and every <h2>/<h3> heading,
+    skipping scripts, navigation, headers, footers and sidebars.
+
+    `lists` holds a ListGroup per list. `headings` maps h2/h3 to
+    (text, in_content) pairs. `marks_content` is True if the page has an
+    <article>, <main> or <h1>.
+    """
+
+    SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form"}
+    LIST_TAGS = {"ol", "ul"}
+    HEADING_TAGS = {"h2", "h3"}
+    CONTENT_TAGS = {"article", "main"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lists = []
+        self.headings = {tag: [] for tag in self.HEADING_TAGS}
+        self.marks_content = False
+        self._skip_depth = 0
+        self._content_depth = 0
+        self._link_depth = 0
+        self._after_h1 = False
+        self._open_lists = []  # indices into self.lists
+        self._items = []  # [list index, text parts, has text outside links] of the <li>s being read
+        self._heading = None  # (tag, text parts, in content)
+
+    def _in_content(self):
+        return self._content_depth > 0 or self._after_h1
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "h1" or tag in self.CONTENT_TAGS:
+            # Page titles often sit in a <header>, so this is checked before skipping
+            self.marks_content = True
+            self._after_h1 = self._after_h1 or tag == "h1"
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        if self._skip_depth:
+            return
+        if tag in self.CONTENT_TAGS:
+            self._content_depth += 1
+        elif tag in self.LIST_TAGS:
+            self._open_lists.append(len(self.lists))
+            self.lists.append(ListGroup(tag, self._in_content()))
+        elif tag == "li" and self._open_lists:
+            current = self._open_lists[-1]
+            if self._items and self._items[-1][0] == current:
+                self._close_item()  # the previous <li> had no end tag
+            self._items.append([current, [], False])
+        elif tag == "a":
+            self._link_depth += 1
+        elif tag in self.HEADING_TAGS:
+            self._heading = (tag, [], self._in_content())
+        elif tag == "br":
+            self.handle_data(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+            return
+        if self._skip_depth:
+            return
+        if tag in self.CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+        elif tag in self.LIST_TAGS and self._open_lists:
+            closing = self._open_lists.pop()
+            while self._items and self._items[-1][0] >= closing:
+                self._close_item()
+        elif tag == "li" and self._items:
+            self._close_item()
+        elif tag == "a" and self._link_depth:
+            self._link_depth -= 1
+        elif tag in self.HEADING_TAGS and self._heading is not None and self._heading[0] == tag:
+            self.headings[tag].append((' '.join(''.join(self._heading[1]).split()), self._heading[2]))
+            self._heading = None
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._items:
+            self._items[-1][1].append(data)
+            if not self._link_depth and data.strip():
+                self._items[-1][2] = True
+        if self._heading is not None:
+            self._heading[1].append(data)
+
+    def _close_item(self):
+        index, parts, has_plain_text = self._items.pop()
+        text = ' '.join(''.join(parts).split())
+        if text:
+            group = self.lists[index]
+            group.items.append(text)
+            group.bare_links = group.bare_links and not has_plain_text
+
+    def close(self):
+        super().close()
+        while self._items:
+            self._close_item()
+
+
+def clean_name(text):
+    """Strips numbering and any trailing description from a list entry."""
+    text = NUMBERING_RE.sub('', ' '.join(text.split()))
+    return DESCRIPTION_RE.split(text, 1)[0].strip(' .,:;-–—|*"\'“”')
+
+
+def is_boilerplate(name):
+    return name.lower().strip('?!') in BOILERPLATE
+
+
+def looks_like_name(name):
+    """True for short, mostly capitalized entries ("Stripe", "Plaid Technologies", "eToro")."""
+    words = name.split()
+    if not 1 <= len(words) <= MAX_NAME_WORDS or len(name) > MAX_NAME_CHARS:
+        return False
+    if not any(c.isupper() or c.isdigit() for c in words[0]):
+        return False
+    lowercase = sum(1 for w in words[1:] if w[:1].islower() and w.lower() not in CONNECTORS)
+    return lowercase <= len(words) // 3 and not name.endswith(('.', '?', '!'))
+
+
+def score_group(entries, numbered=False):
+    """
+    Turns one candidate group into (names, confidence).
+
+    Args:
+        entries (list): Raw texts of the list items or headings
+        numbered (bool): True for an <ol>, whose entries are ranked by construction
+
+    Returns:
+        tuple: (unique cleaned names in page order, confidence in [0, 1])
+    """
+    entries = [entry for entry in entries if entry]
+    numbered = numbered or (
+        bool(entries) and sum(1 for e in entries if NUMBERING_RE.match(e)) >= 0.6 * len(entries))
+    names = [clean_name(entry) for entry in entries]
+    names = [name for name in names if name and not is_boilerplate(name)]
+    if not names:
+        return [], 0.0
+    valid = [name for name in names if looks_like_name(name)]
+    unique, seen = [], set()
+    for name in valid:
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            unique.append(name)
+    if len(unique) < MIN_ITEMS:
+        return unique, 0.0
+    confidence = (len(valid) / len(names)) * min(1.0, len(unique) / FULL_LIST_ITEMS)
+    if not numbered:
+        confidence *= UNNUMBERED_PENALTY
+    if len(unique) > MAX_ITEMS:
+        confidence *= 0.5
+    return unique, round(confidence, 3)
+
+
+def extract_listing(html):
+    """
+    Finds the list of names an article is built around.
+
+    Returns:
+        tuple: (names, confidence); ([], 0.0) when the page has no usable structure
+    """
+    if not html:
+        return [], 0.0
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    parser = OutlineParser()
+    parser.feed(html)
+    parser.close()
+
+    def placed(names_confidence, in_content):
+        names, confidence = names_confidence
+        if parser.marks_content and not in_content:
+            confidence *= OUTSIDE_CONTENT_PENALTY
+        return names, confidence
+
+    candidates = []
+    for group in parser.lists:
+        names, confidence = placed(score_group(group.items, numbered=(group.tag == "ol")), group.in_content)
+        if group.tag == "ul" and group.bare_links and group.items:
+            confidence *= BARE_LINKS_PENALTY
+        candidates.append((names, confidence))
+    for headings in parser.headings.values():
+        # Headings in and out of the content are separate groups
+        for in_content in (True, False):
+            texts = [text for text, inside in headings if inside == in_content]
+            candidates.append(placed(score_group(texts), in_content))
+    best = max(candidates, key=lambda c: (c[1], len(c[0])), default=([], 0.0))
+    return (best[0], round(best[1], 3)) if best[1] > 0 else ([], 0.0)
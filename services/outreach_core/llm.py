@@ -0,0 +1,63 @@
+"""
+OpenRouter chat completions.
+
+The openai package is imported and the client created on first use, one
+client per API key, so commands that never call the LLM don't pay for it.
+"""
+import threading
+
+from .aio import to_thread
+from .breaker import circuit
+from .cache import llm_cache
+from .config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, MODEL_FAST
+from .deadline import clamp_timeout
+from .metrics import track_upstream
+from .scheduler import upstream_slot
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_openrouter_client(api_key=None):
+    """Returns the shared OpenRouter client for `api_key`."""
+    api_key = api_key or OPENROUTER_API_KEY
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            from openai import OpenAI
+            client = _clients[api_key] = OpenAI(base_url=OPENROUTER_BASE_URL, api_key=api_key)
+    return client
+
+
+def complete(prompt, model=MODEL_FAST, api_key=None, use_cache=True):
+    """
+    Sends a single-message chat completion and returns the reply text.
+
+    Identical (model, prompt) pairs are served from the LLM cache. Errors from
+    the client are raised to the caller, as is CircuitOpen while OpenRouter's
+    breaker is open.
+    """
+    key = (model, prompt)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+    client = get_openrouter_client(api_key)
+    with circuit('openrouter'), upstream_slot(), track_upstream('openrouter'):
+        options = {}
+        timeout = clamp_timeout(None, "an LLM call")
+        if timeout is not None:
+            options["timeout"] = timeout
+        completion = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **options,
+        )
+    content = completion.choices[0].message.content
+    if use_cache:
+        llm_cache.set(key, content)
+    return content
+
+
+async def complete_async(prompt, model=MODEL_FAST, api_key=None, use_cache=True):
+    return await to_thread(complete, prompt, model, api_key, use_cache)
@@ -0,0 +1,31 @@
+"""
+Progress output for the outreach core and the scripts.
+
+Log lines go to stderr, never stdout: stdout is the result channel (see
+output.py), so a progress line can't break the JSON the Node side parses.
+Lines below OUTREACH_LOG_LEVEL (debug, info, warning, error; default info)
+are dropped.
+"""
+import sys
+
+from .config import LOG_LEVEL
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+_threshold = LEVELS.get(LOG_LEVEL, INFO)
+
+
+def set_level(level):
+    """Changes the threshold at runtime; takes a level number or name."""
+    global _threshold
+    _threshold = LEVELS[level.lower()] if isinstance(level, str) else level
+
+
+def log(message, level=INFO):
+    """Writes a progress line, in the same format the scripts always used, to stderr."""
+    if level >= _threshold:
+        print(message, file=sys.stderr, flush=True)
@@ -0,0 +1,300 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain thread-safe objects in one
+registry. The Flask service serves render() at /metrics; short-lived and
+batch scripts can write the same text to a file with dump() (see
+install_dump()), since nothing stays up long enough to be scraped.
+"""
+import os
+import time
+import atexit
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .config import METRICS_DIR
+
+# Seconds; spans a cached hit up to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_sample(key, value) for key, value in items)
+        return '\n'.join(lines)
+
+    def _render_sample(self, key, value):
+        return f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (non-cumulative), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            cumulative += n
+            labels = _format_labels(self.label_names, key, [('le', _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return '\n'.join(lines)
+
+
+class Registry:
+    """Holds metrics plus collectors that produce extra text at render time."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labels, buckets)
+
+    def add_collector(self, collector):
+        """`collector()` returns a list of metrics rendered alongside the registered ones."""
+        self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+http_request_seconds = REGISTRY.histogram(
+    'outreach_http_request_duration_seconds', 'Time spent handling HTTP requests.', ('route', 'method', 'status'))
+http_in_flight = REGISTRY.gauge(
+    'outreach_http_requests_in_flight', 'HTTP requests currently being handled.', ('route',))
+upstream_seconds = REGISTRY.histogram(
+    'outreach_upstream_request_duration_seconds', 'Time spent in calls to upstream services.', ('service', 'outcome'))
+upstream_requests = REGISTRY.counter(
+    'outreach_upstream_requests_total', 'Calls made to upstream services.', ('service', 'outcome'))
+upstream_in_flight = REGISTRY.gauge(
+    'outreach_upstream_requests_in_flight', 'Upstream calls currently in progress.', ('service',))
+
+
+def render():
+    return REGISTRY.render()
+
+
+@contextmanager
+def track_upstream(service):
+    """
+    Times one call to an upstream service (serpapi, openrouter, email_api).
+    The outcome is "error" if the block raises; the block can also call the
+    yielded function with another outcome, e.g. for a non-200 reply.
+    """
+    outcome = ['ok']
+
+    def set_outcome(value):
+        outcome[0] = value
+
+    upstream_in_flight.inc(service=service)
+    start = time.perf_counter()
+    try:
+        yield set_outcome
+    except BaseException:
+        outcome[0] = 'error'
+        raise
+    finally:
+        upstream_in_flight.dec(service=service)
+        upstream_seconds.observe(time.perf_counter() - start, service=service, outcome=outcome[0])
+        upstream_requests.inc(service=service, outcome=outcome[0])
+
+
+def _cache_metrics():
+    from .cache import all_caches
+    hits = Counter('outreach_cache_hits_total', 'Cache lookups that found a live entry.', ('cache',))
+    l2_hits = Counter('outreach_cache_l2_hits_total', 'Hits served by the shared tier.', ('cache',))
+    misses = Counter('outreach_cache_misses_total', 'Cache lookups that missed or found an expired entry.', ('cache',))
+    ratio = Gauge('outreach_cache_hit_ratio', 'Hits over lookups since the cache was last cleared.', ('cache',))
+    entries = Gauge('outreach_cache_entries', 'Entries currently held.', ('cache',))
+    for cache in all_caches():
+        stats = cache.stats()
+        hits.inc(stats["hits"], cache=cache.name)
+        l2_hits.inc(stats["l2_hits"], cache=cache.name)
+        misses.inc(stats["misses"], cache=cache.name)
+        ratio.set(stats["hit_ratio"], cache=cache.name)
+        entries.set(stats["entries"], cache=cache.name)
+    return [hits, l2_hits, misses, ratio, entries]
+
+
+REGISTRY.add_collector(_cache_metrics)
+
+
+def instrument_app(app):
+    """Adds per-route latency and in-flight tracking plus a /metrics route to a Flask app."""
+    from flask import Response, g, request
+
+    def route_label():
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = route_label()
+        http_in_flight.inc(route=g.metrics_route)
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def observe_request(exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        route = g.pop('metrics_route')
+        http_in_flight.dec(route=route)
+        status = 500 if exc is not None else g.pop('metrics_status', 500)
+        http_request_seconds.observe(time.perf_counter() - start, route=route, method=request.method, status=status)
+
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(render(), content_type=CONTENT_TYPE))
+    return app
+
+
+def dump(path=None):
+    """Writes the current metrics to `path` (default METRICS_DIR/<pid>.prom)."""
+    if path is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{os.getpid()}.prom")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+    return path
+
+
+def install_dump(path=None):
+    """
+    Makes a script write its metrics on exit and whenever it gets SIGUSR1,
+    so long batch runs can be inspected while they work.
+    """
+    import signal
+
+    def safe_dump(*_):
+        try:
+            dump(path)
+        except OSError:
+            pass
+
+    atexit.register(safe_dump)
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, safe_dump)
@@ -0,0 +1,447 @@
+"""
+Durable outbox for intro emails, drained in the background.
+
+A send request only writes its messages to SQLite under STATE_DIR and
+returns. A message can be queued without a body, with the topic and
+project summary to draft it from. An OutboxDrainer thread then works
+through the queue in batches of OUTBOX_BATCH_SIZE:
+
+- its `prepare` step sees a whole batch before anything is sent. It can
+  skip messages (e.g. undeliverable addresses) and fill in the missing
+  bodies, so validation and drafting are batched too and stay out of the
+  request;
+- messages are sent at most OUTBOX_CONCURRENCY at a time, as bulk work;
+- a failed send is retried after OUTBOX_RETRY_SECONDS, doubling each time,
+  and marked failed after OUTBOX_MAX_ATTEMPTS;
+- a message is queued once per (recipient, campaign), so re-posting the
+  same campaign doesn't email anyone twice.
+
+Claiming a message leases it for OUTBOX_LEASE_SECONDS. If the process dies
+mid-send, the message is claimed again once the lease runs out, so delivery
+is at least once. Several processes can drain the same outbox. A message's
+lease is renewed as its send starts, and the message is left alone if
+another drainer has claimed it since. Each send runs under a deadline of
+OUTBOX_SEND_TIMEOUT, so a hung send can't outlast the lease.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from .config import (
+    STATE_DIR, OUTBOX_CONCURRENCY, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_SECONDS,
+    OUTBOX_MAX_RETRY_SECONDS, OUTBOX_LEASE_SECONDS, OUTBOX_SEND_TIMEOUT, OUTBOX_POLL_INTERVAL,
+)
+from .deadline import deadline_scope, remaining
+from .log import log, WARNING
+from .metrics import REGISTRY, Gauge
+from .scheduler import BULK, priority
+
+OUTBOX_DB_PATH = os.path.join(STATE_DIR, 'outbox.sqlite3')
+
+QUEUED = 'queued'
+SENDING = 'sending'
+SENT = 'sent'
+FAILED = 'failed'
+SKIPPED = 'skipped'  # never sent, on purpose; the reason is in last_error
+STATUSES = (QUEUED, SENDING, SENT, FAILED, SKIPPED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    campaign TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL DEFAULT '',
+    topic TEXT NOT NULL DEFAULT '',
+    project_summary TEXT NOT NULL DEFAULT '',
+    personalize INTEGER NOT NULL DEFAULT 0,
+    from_name TEXT NOT NULL,
+    from_email TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (recipient, campaign)
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_campaign ON outbox (campaign);
+"""
+# Columns added since the first schema, for outboxes created before them
+ADDED_COLUMNS = {
+    "topic": "TEXT NOT NULL DEFAULT ''",
+    "project_summary": "TEXT NOT NULL DEFAULT ''",
+    "personalize": "INTEGER NOT NULL DEFAULT 0",
+}
+
+attempts_total = REGISTRY.counter(
+    'outreach_outbox_attempts_total', 'Outbox send attempts.', ('outcome',))
+
+
+def normalize_recipient(address):
+    return (address or '').strip().lower()
+
+
+def campaign_id(query, from_email):
+    """A stable campaign ID for a sender's intros about `query`, so a repeated request dedups."""
+    slug = re.sub(r'[^a-z0-9]+', '-', (query or '').lower()).strip('-')[:40]
+    digest = hashlib.sha1(f"{normalize_recipient(from_email)}\n{query}".encode('utf-8')).hexdigest()[:10]
+    return f"{slug}-{digest}" if slug else digest
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a message that has failed `attempts` times."""
+    return min(OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_SECONDS)
+
+
+class Outbox:
+    """SQLite-backed message queue; safe to share between threads and processes."""
+
+    def __init__(self, path=OUTBOX_DB_PATH, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 lease_seconds=OUTBOX_LEASE_SECONDS, clock=time.time):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit; claims open their own IMMEDIATE transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {name} {definition}")
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, campaign, messages):
+        """
+        Queues messages for a campaign in one transaction.
+
+        Args:
+            campaign (str): Campaign ID; a recipient is queued once per campaign
+            messages (list): Dicts with "recipient", "subject", "from_name"
+                and "from_email", plus either "body" or the draft inputs
+                "topic", "project_summary" and optionally "personalize"
+
+        Returns:
+            dict: {"queued": [recipients], "duplicates": [recipients already in the campaign]}
+        """
+        now = self._clock()
+        queued, duplicates = [], []
+        with self._transaction() as conn:
+            for message in messages:
+                recipient = normalize_recipient(message["recipient"])
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO outbox (campaign, recipient, subject, body, topic, project_summary,"
+                    " personalize, from_name, from_email, status, next_attempt_at, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (campaign, recipient, message["subject"], message.get("body") or '', message.get("topic", ''),
+                     message.get("project_summary", ''), int(bool(message.get("personalize"))),
+                     message["from_name"], message["from_email"], QUEUED, now, now, now))
+                (queued if cursor.rowcount else duplicates).append(recipient)
+        return {"queued": queued, "duplicates": duplicates}
+
+    def claim(self, limit):
+        """
+        Leases up to `limit` due messages to the caller and returns them as
+        dicts; "next_attempt_at" is when the lease runs out.
+        """
+        now = self._clock()
+        leased_until = now + self.lease_seconds
+        with self._transaction() as conn:
+            # A 'sending' row whose lease ran out belongs to a sender that died
+            rows = conn.execute(
+                "SELECT * FROM outbox WHERE status IN (?, ?) AND next_attempt_at <= ?"
+                " ORDER BY next_attempt_at LIMIT ?", (QUEUED, SENDING, now, limit)).fetchall()
+            if rows:
+                ids = [row["id"] for row in rows]
+                conn.execute(
+                    f"UPDATE outbox SET status = ?, next_attempt_at = ?, updated_at = ?"
+                    f" WHERE id IN ({','.join('?' * len(ids))})",
+                    [SENDING, leased_until, now] + ids)
+        return [dict(row, status=SENDING, next_attempt_at=leased_until) for row in rows]
+
+    def renew_lease(self, message):
+        """
+        Extends the lease on a claimed message. Returns False if the message
+        has been claimed, sent or rescheduled by someone else since.
+        """
+        now = self._clock()
+        leased_until = now + self.lease_seconds
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE outbox SET next_attempt_at = ?, updated_at = ? WHERE id = ? AND status = ?"
+                " AND next_attempt_at = ?", (leased_until, now, message["id"], SENDING, message["next_attempt_at"]))
+        if not cursor.rowcount:
+            return False
+        message["next_attempt_at"] = leased_until
+        return True
+
+    def mark_sent(self, message_id):
+        now = self._clock()
+        with self._transaction() as conn:
+            conn.execute("UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = NULL,"
+                         " updated_at = ? WHERE id = ?", (SENT, now, message_id))
+
+    def set_body(self, message_id, body):
+        """Stores a drafted body, so a retry sends the same text instead of drafting again."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE outbox SET body = ?, updated_at = ? WHERE id = ?", (body, self._clock(), message_id))
+
+    def mark_skipped(self, message_id, reason):
+        """Gives up on a message without sending it, e.g. for an undeliverable address."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE outbox SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                         (SKIPPED, str(reason)[:500], self._clock(), message_id))
+
+    def mark_failed(self, message_id, error):
+        """Schedules a retry, or gives up on the message after max_attempts."""
+        now = self._clock()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM outbox WHERE id = ?", (message_id,)).fetchone()
+            if row is None:
+                return None
+            attempts = row["attempts"] + 1
+            status = FAILED if attempts >= self.max_attempts else QUEUED
+            conn.execute("UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?,"
+                         " updated_at = ? WHERE id = ?",
+                         (status, attempts, str(error)[:500], now + retry_delay(attempts), now, message_id))
+        return status
+
+    def next_due_in(self):
+        """Seconds until the next queued or leased message is due, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status IN (?, ?)",
+                                     (QUEUED, SENDING)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - self._clock())
+
+    def status(self, campaign):
+        """
+        Returns the state of a campaign: {"campaign", "counts": {status: n},
+        "done", "messages": [{"recipient", "status", "attempts", "last_error", "updated_at"}]}.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT recipient, status, attempts, last_error, updated_at FROM outbox"
+                " WHERE campaign = ? ORDER BY id", (campaign,)).fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in rows:
+            counts[row["status"]] += 1
+        return {"campaign": campaign, "counts": counts,
+                "done": bool(rows) and counts[QUEUED] + counts[SENDING] == 0,
+                "messages": [dict(row) for row in rows]}
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status IN (?, ?)",
+                                      (QUEUED, SENDING)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SkipMessage(Exception):
+    """Raised by a drainer's `send` to skip a message instead of sending it; the message is the reason."""
+
+
+class OutboxDrainer:
+    """
+    Sends outbox messages on a background thread.
+
+    Args:
+        outbox (Outbox): The queue to drain
+        send (callable): send(message) returns True on success; False or an
+            exception counts as a failed attempt, SkipMessage skips it
+        concurrency (int): Sends in flight at once
+        poll_interval (float): Seconds between checks for due retries
+        prepare (callable): prepare(batch) runs on each claimed batch before
+            sending. It returns {message id: reason} for the messages to
+            skip, and sets "body" on the messages queued without one. A
+            message still without a body counts as a failed attempt.
+        on_sent (callable): on_sent(message) runs after a message is marked
+            sent; its errors are logged and never make the send count as failed
+        batch_size (int): Messages claimed per batch
+        send_timeout (float): Seconds a send may take, capped at half the
+            outbox's lease; `send` sees it as its deadline
+    """
+
+    def __init__(self, outbox, send, concurrency=OUTBOX_CONCURRENCY, poll_interval=OUTBOX_POLL_INTERVAL,
+                 prepare=None, on_sent=None, batch_size=OUTBOX_BATCH_SIZE, send_timeout=OUTBOX_SEND_TIMEOUT):
+        self.outbox = outbox
+        self.send = send
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.prepare = prepare
+        self.on_sent = on_sent
+        self.batch_size = max(batch_size, concurrency)
+        self.send_timeout = min(send_timeout, outbox.lease_seconds / 2)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="outbox-send")
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Drains now instead of at the next poll, e.g. right after enqueueing."""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    def _fail(self, message, error):
+        status = self.outbox.mark_failed(message["id"], error)
+        attempts_total.inc(outcome=status or FAILED)
+        log(f"    - Outbox send to {message['recipient']} failed ({status}): {error}", WARNING)
+
+    def _skip(self, message, reason):
+        self.outbox.mark_skipped(message["id"], reason)
+        attempts_total.inc(outcome=SKIPPED)
+        log(f"    - Outbox skipped {message['recipient']}: {reason}")
+
+    def _send_deadline(self):
+        expires_at = time.time() + self.send_timeout
+        left = remaining()
+        return expires_at if left is None else min(expires_at, time.time() + left)
+
+    def _send_one(self, message):
+        # Drafting or the wait for a free sender may have outlasted the lease
+        if not self.outbox.renew_lease(message):
+            log(f"    - Outbox lease on {message['recipient']} ran out before sending; leaving it to its new claimer",
+                WARNING)
+            return False
+        try:
+            # Over well before the renewed lease, so no other drainer sends it meanwhile
+            with deadline_scope(self._send_deadline()):
+                ok = self.send(message)
+            error = None if ok else "send failed"
+        except SkipMessage as e:
+            self._skip(message, str(e))
+            return False
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        if error is not None:
+            self._fail(message, error)
+            return False
+        self.outbox.mark_sent(message["id"])
+        attempts_total.inc(outcome='sent')
+        if self.on_sent is not None:
+            # The email is out: nothing from here on may get it sent again
+            try:
+                self.on_sent(message)
+            except Exception as e:
+                log(f"    - Outbox after-send error for {message['recipient']}: {e}", WARNING)
+        return True
+
+    def _prepare(self, batch):
+        """Runs `prepare` on a batch and returns the messages that are ready to send."""
+        unwritten = {message["id"] for message in batch if not message["body"]}
+        try:
+            skips = self.prepare(batch) or {}
+        except Exception as e:
+            for message in batch:
+                self._fail(message, f"prepare failed: {e}")
+            return []
+        ready = []
+        for message in batch:
+            if message["id"] in skips:
+                self._skip(message, skips[message["id"]])
+            elif not message["body"]:
+                self._fail(message, "no draft")
+            else:
+                if message["id"] in unwritten:
+                    self.outbox.set_body(message["id"], message["body"])
+                ready.append(message)
+        return ready
+
+    def drain_once(self):
+        """Prepares and sends one batch of due messages; returns how many were claimed."""
+        batch = self.outbox.claim(self.batch_size)
+        ready = self._prepare(batch) if batch and self.prepare is not None else batch
+        if ready:
+            # Sends run with this thread's priority and deadline, not the pool threads' defaults
+            futures = [self._executor.submit(copy_context().run, self._send_one, message) for message in ready]
+            for future in futures:
+                future.result()
+        return len(batch)
+
+    def drain(self):
+        """Sends everything that is due now, e.g. from a script with no drainer thread."""
+        total = 0
+        while not self._stopped.is_set():
+            sent = self.drain_once()
+            if not sent:
+                break
+            total += sent
+        return total
+
+    def _run(self):
+        # Sends outlive the request that queued them: no deadline, bulk priority
+        with deadline_scope(None), priority(BULK):
+            while not self._stopped.is_set():
+                try:
+                    if self.drain_once():
+                        continue
+                    due_in = self.outbox.next_due_in()
+                except Exception as e:
+                    log(f"    - Outbox error: {e}", WARNING)
+                    due_in = None
+                wait = self.poll_interval if due_in is None else min(due_in, self.poll_interval)
+                self._wake.wait(wait)
+                self._wake.clear()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """Returns the process-wide outbox at OUTBOX_DB_PATH."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+    return _outbox
+
+
+def _outbox_metrics():
+    if _outbox is None:
+        return []
+    pending = Gauge('outreach_outbox_pending', 'Outbox messages queued or being sent.')
+    pending.set(_outbox.pending())
+    return [pending]
+
+
+REGISTRY.add_collector(_outbox_metrics)
@@ -0,0 +1,65 @@
+"""
+The result channel of the scripts: one JSON document per line (NDJSON).
+
+Every result a script hands back to the Node side goes through emit(), and
+nothing else is written to the channel: progress goes to stderr (see
+log.py). A reader can then parse each complete line as it arrives instead
+of buffering and scanning everything. The channel is stdout, or the file
+descriptor in OUTREACH_RESULT_FD (e.g. 3) when the caller opens one, so
+even a stray print from a library can't reach it.
+
+orjson is used when it is installed, since it is several times faster on
+large result lists; otherwise the standard json module is used, with the
+same compact output.
+"""
+import os
+import sys
+import json
+import threading
+
+from .config import RESULT_FD
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_lock = threading.Lock()
+_channel = None
+
+
+def dumps(obj):
+    """Serializes `obj` to one line of UTF-8 JSON bytes, without the newline."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # something orjson doesn't know (e.g. a set subclass); json's error is clearer
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    """The inverse of dumps(); takes bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _result_channel():
+    global _channel
+    if _channel is None:
+        if RESULT_FD is not None:
+            _channel = os.fdopen(RESULT_FD, 'wb', closefd=False)
+        else:
+            sys.stdout.flush()  # keep anything printed earlier ahead of the frame
+            _channel = sys.stdout.buffer
+    return _channel
+
+
+def emit(obj):
+    """Writes one result frame and flushes it."""
+    line = dumps(obj) + b'\n'
+    with _lock:
+        channel = _result_channel()
+        channel.write(line)
+        channel.flush()
@@ -0,0 +1,122 @@
+"""Search, drafting and sending steps of the outreach assistant."""
+from .aio import to_thread, run_sync
+from .breaker import circuit
+from .config import SERPAPI_API_KEY, EMAIL_API_ENDPOINT, MODEL_FAST, is_configured
+from .deadline import clamp_timeout, deadline_reached
+from .extract import find_emails
+from .llm import complete_async
+from .log import log, WARNING
+from .metrics import track_upstream
+from .relevance import rank
+from .scheduler import Overloaded
+from .search import serpapi_search_async
+from .session import get_session
+
+SAMPLE_EMAILS = [
+    "investor@venturecap.com",
+    "funding@startupvc.com",
+    "info@venturefund.com",
+    "deals@investmentfirm.com",
+    "team@venturecapital.com"
+]
+
+
+async def find_emails_for_query_async(topic, max_emails=10, api_key=None, use_samples=False, project_summary=None):
+    """
+    Collects email addresses from search snippets for `topic`.
+
+    With `project_summary`, the addresses whose snippets best match the topic
+    and summary are kept, most relevant first.
+
+    With `use_samples`, SAMPLE_EMAILS are returned when the SerpAPI key is not
+    configured or nothing was found, so callers always get something to show.
+    """
+    api_key = api_key or SERPAPI_API_KEY
+    log(f"🚀 Starting search for '{topic}'...")
+    if use_samples and not is_configured(api_key):
+        log("    - Error: SERPAPI_API_KEY is not configured", WARNING)
+        return SAMPLE_EMAILS[:max_emails]
+
+    found_emails = {}  # email -> snippet it was found in
+    search_queries = [f'"{topic}" contact email', f'"{topic}" startup founder email "@"']
+    for query in search_queries:
+        if deadline_reached():
+            break
+        try:
+            results = await serpapi_search_async(query, api_key=api_key)
+        except Overloaded:
+            raise
+        except Exception as e:
+            log(f"    - API Error: {e}", WARNING)
+            continue
+        for result in results:
+            for email in find_emails(result.get("snippet", "")):
+                found_emails[email] = f"{result.get('title', '')} {result.get('snippet', '')}"
+
+    if use_samples and not found_emails:
+        log("    - No emails found, using sample data")
+        return SAMPLE_EMAILS[:max_emails]
+
+    if project_summary:
+        email_list = rank(f"{topic} {project_summary}", found_emails, found_emails.get, max_emails)
+    else:
+        email_list = list(found_emails)[:max_emails]
+    log(f"✅ Search complete. Found {len(email_list)} emails.")
+    return email_list
+
+
+def find_emails_for_query(topic, max_emails=10, api_key=None, use_samples=False, project_summary=None):
+    return run_sync(find_emails_for_query_async(topic, max_emails, api_key, use_samples, project_summary))
+
+
+def build_intro_prompt(topic, project_summary):
+    return f"""
+    You are a professional business communication assistant. Write a concise and compelling cold outreach email to a potential contact in the '{topic}' space.
+    The email should be based on the following project summary: "{project_summary}"
+    Keep the email under 150 words and end with a clear call to action. Return ONLY the raw text of the email body.
+    """
+
+
+def fallback_intro_email(topic, project_summary):
+    return f"Hello,\n\nI'm reaching out regarding our work in {topic}. {project_summary}\n\nWould you be available for a brief call to discuss potential collaboration?\n\nBest regards,\n[Your Name]"
+
+
+async def draft_intro_email_async(topic, project_summary, api_key=None):
+    """Asks the LLM for an intro email body; returns None if drafting fails."""
+    log("🤖 AI is drafting the intro email...")
+    try:
+        return await complete_async(build_intro_prompt(topic, project_summary), MODEL_FAST, api_key)
+    except Overloaded:
+        raise
+    except Exception as e:
+        log(f"    - AI drafting error: {e}", WARNING)
+        return None
+
+
+def draft_intro_email(topic, project_summary, api_key=None):
+    return run_sync(draft_intro_email_async(topic, project_summary, api_key))
+
+
+def send_email_via_api(email_address, subject, body, from_name, from_email, endpoint=EMAIL_API_ENDPOINT):
+    """Hands one email to the Node.js email endpoint; returns True on success."""
+    payload = {
+        'toEmails': [email_address],
+        'fromName': from_name,
+        'fromEmail': from_email,
+        'businessContext': body
+    }
+    try:
+        with circuit('email_api') as breaker_outcome, track_upstream('email_api') as set_outcome:
+            response = get_session().post(endpoint, json=payload, timeout=clamp_timeout(None, "sending"))
+            if response.status_code != 200:
+                set_outcome('error')
+            if response.status_code >= 500:
+                breaker_outcome('error')
+        return response.status_code == 200
+    except Exception as e:
+        log(f"    - Sending error: {e}", WARNING)
+        return False
+
+
+async def send_email_via_api_async(email_address, subject, body, from_name, from_email, endpoint=EMAIL_API_ENDPOINT):
+    return await to_thread(send_email_via_api, email_address, subject, body, from_name, from_email, endpoint)
@@ -0,0 +1,234 @@
+"""
+Persistent company profiles with stale-while-revalidate refresh.
+
+Profiles built by market research are stored in SQLite under STATE_DIR,
+keyed by normalized company name and indexed by website domain. Each row
+holds the profile text, its parsed fields, the source URLs and when it was
+built.
+
+- A stored profile is served at once, even when it is older than the TTL.
+- A stale profile is rebuilt on a background thread, and the next lookup
+  sees the new copy.
+- A list of names is resolved with one indexed query.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from .config import STATE_DIR, PROFILE_TTL
+from .deadline import truncated
+from .log import log, WARNING
+from .scheduler import BULK, priority
+from .yield_stats import normalize_domain
+
+PROFILES_DB_PATH = os.path.join(STATE_DIR, 'profiles.sqlite3')
+
+# Trailing words that don't distinguish one company from another
+COMPANY_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "plc", "sa", "ag", "bv", "pte", "pty", "holdings",
+}
+
+# The headings generate_company_profile asks the model for
+PROFILE_FIELDS = {
+    "Company Name": "name",
+    "One-Line Pitch": "pitch",
+    "Key People (Founders/CEO)": "people",
+    "Website": "website",
+    "Funding Status": "funding",
+    "Contact Information": "contact",
+}
+FIELD_RE = re.compile(r'^\s*[-*]?\s*\*\*(?P<heading>[^*:]+):?\*\*:?\s*(?P<value>.*)$')
+NOT_FOUND = "information not found"
+
+SQLITE_MAX_VARIABLES = 900  # stay under SQLite's default bound-parameter limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    domain TEXT,
+    profile TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_domain ON profiles (domain);
+"""
+
+
+def normalize_company(name):
+    """'Stripe, Inc.' and 'stripe' both become 'stripe'."""
+    words = re.sub(r'[^a-z0-9]+', ' ', (name or '').lower()).split()
+    while len(words) > 1 and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+def parse_profile_fields(profile):
+    """Pulls the "**Heading:** value" lines of a generated profile into a dict."""
+    fields = {}
+    current = None
+    for line in (profile or '').splitlines():
+        m = FIELD_RE.match(line)
+        if m and m.group('heading').strip() in PROFILE_FIELDS:
+            current = PROFILE_FIELDS[m.group('heading').strip()]
+            fields[current] = m.group('value').strip()
+        elif current and line.strip():
+            fields[current] = (fields[current] + '\n' + line.strip()).strip()
+    return {k: v for k, v in fields.items() if v and v.strip('. ').lower() != NOT_FOUND}
+
+
+def website_domain(fields):
+    m = re.search(r'(?:https?://)?((?:[a-z0-9-]+\.)+[a-z]{2,})', fields.get("website", ""), re.IGNORECASE)
+    return normalize_domain(m.group(1)) if m else None
+
+
+class ProfileStore:
+    """SQLite-backed profiles; safe to share between threads."""
+
+    def __init__(self, path=PROFILES_DB_PATH, ttl=PROFILE_TTL, refresh_workers=2):
+        self.path = path
+        self.ttl = ttl
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="profile-refresh")
+        self._refreshing = {}  # key -> Future
+
+    def _row_to_record(self, row):
+        return {
+            "name": row["name"],
+            "domain": row["domain"],
+            "profile": row["profile"],
+            "fields": json.loads(row["fields"]),
+            "sources": json.loads(row["sources"]),
+            "updated_at": row["updated_at"],
+            "stale": time.time() - row["updated_at"] > self.ttl,
+        }
+
+    def get(self, name):
+        return self.get_many([name]).get(name)
+
+    def get_many(self, names):
+        """
+        Resolves many names (or domains) at once. Returns {name: record} for
+        the ones found; each record carries a `stale` flag.
+        """
+        keys = {}
+        for name in names:
+            keys.setdefault(normalize_company(name), []).append(name)
+            if '.' in name:
+                keys.setdefault(normalize_domain(name), []).append(name)
+        keys.pop('', None)
+        found = {}
+        key_list = list(keys)
+        for i in range(0, len(key_list), SQLITE_MAX_VARIABLES // 2):
+            chunk = key_list[i:i + SQLITE_MAX_VARIABLES // 2]
+            marks = ','.join('?' * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT * FROM profiles WHERE key IN ({marks}) OR domain IN ({marks})", chunk + chunk
+                ).fetchall()
+            for row in rows:
+                for key in (row["key"], row["domain"]):
+                    for name in keys.get(key, ()):
+                        found.setdefault(name, self._row_to_record(row))
+        return found
+
+    def put(self, name, profile, sources=(), fields=None):
+        fields = parse_profile_fields(profile) if fields is None else fields
+        record = (normalize_company(name), name, website_domain(fields), profile,
+                  json.dumps(fields), json.dumps(list(sources)), time.time())
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?, ?)", record)
+
+    def refresh_async(self, name, build):
+        """
+        Rebuilds `name` in the background unless a refresh is already running.
+        `build()` returns {"profile", "sources"}, or None to keep the old copy.
+        The refresh runs under the caller's deadline, at bulk priority.
+        """
+        key = normalize_company(name)
+        with self._lock:
+            future = self._refreshing.get(key)
+            if future is not None and not future.done():
+                return future
+            future = self._refreshing[key] = self._executor.submit(copy_context().run, self._refresh, name, build)
+        return future
+
+    def _refresh(self, name, build):
+        try:
+            # Nobody is waiting on a refresh, so it never competes with interactive work
+            with priority(BULK):
+                built = build()
+        except Exception as e:
+            log(f"    - Profile refresh error for {name}: {e}", WARNING)
+            return False
+        if not built or truncated():
+            return False  # a profile cut short by the deadline must not replace a complete one
+        self.put(name, built["profile"], built.get("sources", ()))
+        return True
+
+    def get_or_build(self, name, build, record=None):
+        """
+        Returns (profile text, record) for `name`.
+
+        A stored copy is returned at once; if it is stale, `build` also runs
+        in the background. Without one, `build` runs now and a successful
+        result is stored. Pass `record` from an earlier get_many() to skip
+        the lookup.
+        """
+        record = record if record is not None else self.get(name)
+        if record is not None:
+            if record["stale"]:
+                self.refresh_async(name, build)
+            return record["profile"], record
+        built = build()
+        if not built:
+            return None, None
+        self.put(name, built["profile"], built.get("sources", ()))
+        return built["profile"], None
+
+    def wait(self, timeout=None):
+        """
+        Blocks until background refreshes finish, e.g. before a script exits,
+        or until `timeout` seconds have passed in all.
+        """
+        with self._lock:
+            futures = list(self._refreshing.values())
+        end = None if timeout is None else time.monotonic() + timeout
+        for future in futures:
+            try:
+                future.result(None if end is None else max(0.0, end - time.monotonic()))
+            except Exception:
+                pass
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    """Returns the process-wide store at PROFILES_DB_PATH."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProfileStore()
+    return _store
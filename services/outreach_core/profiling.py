@@ -0,0 +1,258 @@
+"""
+Opt-in profiling of a single request or script run.
+
+Wrap the work in profile_request(name, mode). With profiling off (the
+default) it costs one check and records nothing. When it is on, the block
+is recorded and written to PROFILE_DIR as <stamp>-<name>-<pid>-<n>.*:
+
+- "cprofile" mode runs cProfile on the calling thread. It writes a .prof
+  file that pstats or snakeviz can load, plus a .txt summary.
+- "sample" mode samples the stacks of every thread every
+  PROFILE_SAMPLE_INTERVAL seconds. It also covers the worker threads that
+  to_thread() hands scraping and search to. The output is a .folded file
+  of collapsed stacks that flamegraph.pl and speedscope read.
+
+Both modes add a tracemalloc section to the .txt summary: the peak traced
+memory and the lines that allocated the most during the block. tracemalloc
+and the sampler see the whole process, so concurrent requests show up in
+them as well.
+
+Profiling is turned on for every request or run with OUTREACH_PROFILE=1
+(or =sample). It can also be turned on for one call: `?profile=1` or an
+`X-Profile` header on the Flask routes, or `--profile[=sample]` on the
+script command lines.
+"""
+import os
+import re
+import sys
+import time
+import threading
+import itertools
+from collections import Counter
+from contextlib import contextmanager
+
+from .config import PROFILE_MODE, PROFILE_DIR, PROFILE_TOP_N, PROFILE_SAMPLE_INTERVAL, PROFILE_TRACE_FRAMES
+
+MODES = ("cprofile", "sample")
+
+# cProfile and the sampler are process-wide resources; one profile at a time
+_busy = threading.Lock()
+_sequence = itertools.count(1)  # keeps names unique within a second
+
+
+def parse_mode(value):
+    """Maps a flag value ("1", "true", "sample", ...) to a mode, or None for off."""
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'false', 'off', 'no'):
+        return None
+    return value if value in MODES else "cprofile"
+
+
+class RequestProfile:
+    """What a profile_request() block produced; the paths are set once it exits."""
+
+    def __init__(self, name, mode):
+        self.name = name
+        self.mode = mode
+        self.peak_bytes = 0
+        self.paths = []
+
+    @property
+    def base_name(self):
+        return os.path.basename(self.paths[0]).rsplit('.', 1)[0] if self.paths else None
+
+
+class _Sampler(threading.Thread):
+    """Collects collapsed stacks of all other threads until stopped."""
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _note(message):
+    # stderr: the profiled scripts print their JSON results on stdout
+    print(message, file=sys.stderr)
+
+
+def _slug(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name).strip('-')[:60] or 'request'
+
+
+def _memory_report(start_snapshot, end_snapshot, peak):
+    lines = [f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB", "", "Top allocations during the block:"]
+    for stat in end_snapshot.compare_to(start_snapshot, 'lineno')[:PROFILE_TOP_N]:
+        lines.append(f"  {stat}")
+    return '\n'.join(lines)
+
+
+@contextmanager
+def profile_request(name, mode=None):
+    """
+    Profiles the enclosed block when `mode` (default PROFILE_MODE) is set.
+
+    Yields a RequestProfile, or None when profiling is off or another
+    profile is already running.
+    """
+    mode = PROFILE_MODE if mode is None else mode
+    if not mode:
+        yield None
+        return
+    if not _busy.acquire(blocking=False):
+        _note(f"    - Profiling skipped for {name}: another profile is running")
+        yield None
+        return
+    import tracemalloc
+
+    result = RequestProfile(name, mode)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(PROFILE_TRACE_FRAMES)
+    tracemalloc.reset_peak()
+    start_snapshot = tracemalloc.take_snapshot()
+    profiler = sampler = None
+    if mode == "sample":
+        sampler = _Sampler(PROFILE_SAMPLE_INTERVAL)
+        sampler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield result
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+            elapsed = time.perf_counter() - started
+            result.peak_bytes = tracemalloc.get_traced_memory()[1]
+            end_snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                _write(result, elapsed, profiler, sampler, _memory_report(start_snapshot, end_snapshot, result.peak_bytes))
+            except Exception as e:
+                _note(f"    - Profile write error: {e}")
+    finally:
+        _busy.release()
+
+
+def _write(result, elapsed, profiler, sampler, memory_report):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    base = os.path.join(PROFILE_DIR, f"{stamp}-{_slug(result.name)}-{os.getpid()}-{next(_sequence)}")
+    header = f"{result.name}: {elapsed:.3f}s wall, mode {result.mode}\n\n"
+    if profiler is not None:
+        import io
+        import pstats
+        profiler.dump_stats(base + '.prof')
+        result.paths.append(base + '.prof')
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        summary = out.getvalue()
+    else:
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        result.paths.append(base + '.folded')
+        total = sum(sampler.stacks.values())
+        leaves = Counter()
+        for stack, count in sampler.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        summary = f"{total} samples; busiest frames:\n" + '\n'.join(
+            f"  {count:6d}  {frame}" for frame, count in leaves.most_common(PROFILE_TOP_N))
+    with open(base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(header + summary + '\n\n' + memory_report + '\n')
+    result.paths.append(base + '.txt')
+    _note(f"    - Profile written to {base}.*")
+
+
+def pop_profile_option(argv):
+    """
+    Removes `--profile` or `--profile=<mode>` from argv and returns the mode
+    to use for this run (PROFILE_MODE when the option is absent).
+    """
+    mode = PROFILE_MODE
+    for i, arg in enumerate(argv):
+        if arg == "--profile" or arg.startswith("--profile="):
+            mode = parse_mode(arg.partition('=')[2] or "1")
+            del argv[i]
+            break
+    return mode
+
+
+def profile_run(name, mode=None):
+    """
+    Profiles the rest of a script run, until the interpreter exits. For
+    scripts whose main block has several exit points.
+    """
+    import atexit
+    context = profile_request(name, mode)
+    if context.__enter__() is not None:
+        atexit.register(context.__exit__, None, None, None)
+
+
+def install_profiling(app):
+    """
+    Profiles Flask requests that ask for it with `?profile=<mode>` or an
+    `X-Profile: <mode>` header, or every request under OUTREACH_PROFILE.
+    The files written are named in an X-Profile-File response header.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        flag = request.args.get('profile') or request.headers.get('X-Profile')
+        mode = parse_mode(flag) if flag else PROFILE_MODE
+        if not mode:
+            return
+        context = profile_request(f"{request.method} {request.path}", mode)
+        g.profile_context = context
+        g.profile = context.__enter__()
+
+    def finish_profile(exc=None):
+        context = g.pop('profile_context', None)
+        if context is None:
+            return None
+        context.__exit__(type(exc) if exc is not None else None, exc, None)
+        return g.pop('profile', None)
+
+    @app.after_request
+    def attach_profile(response):
+        profile = finish_profile()
+        if profile is not None and profile.base_name:
+            response.headers['X-Profile-File'] = profile.base_name
+        return response
+
+    @app.teardown_request
+    def abandon_profile(exc):
+        finish_profile(exc)  # after_request does not run when the view raised
+
+    return app
@@ -0,0 +1,154 @@
+"""
+Compact storage for email harvests.
+
+The harvest engine used to keep a dict per address, each holding its own
+copy of a ~400-character context slice, and then copied every dict again
+to format the results. EmailHarvest instead keeps:
+
+- one row per address in parallel `array` columns;
+- source titles and URLs interned once in a string pool;
+- the part of each scraped page that contexts come from stored once, with
+  contexts kept as (start, end) offsets into it.
+
+Dicts are only built by iter_dicts()/to_dicts()/dump_json(), at the point
+where results are serialized.
+"""
+import json
+from array import array
+
+CONTEXT_WINDOW = 200  # characters before and after an email
+LITERAL = -1  # ctx_page value for contexts stored as pooled strings
+
+
+class StringPool:
+    """Interns strings and hands out small integer IDs."""
+
+    __slots__ = ('_ids', '_strings')
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def intern(self, value):
+        value = value or ''
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return idx
+
+    def __getitem__(self, idx):
+        return self._strings[idx]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class EmailHarvest:
+    """
+    Array-backed collection of harvested addresses and where they came from.
+
+    Adding an address that is already present replaces its source, matching
+    the old `email_sources[email] = {...}` behaviour.
+    """
+
+    def __init__(self):
+        self.pool = StringPool()
+        self.pages = []              # trimmed page text shared by contexts
+        self._emails = []
+        self._rows = {}              # email -> row
+        self._title = array('l')     # pool IDs
+        self._link = array('l')
+        self._ctx_page = array('l')  # page index, or LITERAL
+        self._ctx_start = array('l') # offset into the page, or pool ID for LITERAL
+        self._ctx_end = array('l')
+
+    def __len__(self):
+        return len(self._emails)
+
+    def __contains__(self, email):
+        return email in self._rows
+
+    def __iter__(self):
+        return iter(self._emails)
+
+    def _row(self, email):
+        row = self._rows.get(email)
+        if row is None:
+            row = self._rows[email] = len(self._emails)
+            self._emails.append(email)
+            for column in (self._title, self._link, self._ctx_page, self._ctx_start, self._ctx_end):
+                column.append(0)
+        return row
+
+    def add(self, email, title, link, context=''):
+        """Records `email` with a literal context string (snippets, fixed labels)."""
+        row = self._row(email)
+        self._title[row] = self.pool.intern(title)
+        self._link[row] = self.pool.intern(link)
+        self._ctx_page[row] = LITERAL
+        self._ctx_start[row] = self.pool.intern(context)
+        self._ctx_end[row] = 0
+
+    def add_span(self, email, title, link, page_id, start, end):
+        """Records `email` with its context as pages[page_id][start:end]."""
+        row = self._row(email)
+        self._title[row] = self.pool.intern(title)
+        self._link[row] = self.pool.intern(link)
+        self._ctx_page[row] = page_id
+        self._ctx_start[row] = start
+        self._ctx_end[row] = end
+
+    def add_source(self, email, source):
+        """Records `email` from a {"title", "link", "context"} source dict."""
+        self.add(email, source.get("title", "Unknown"), source.get("link", ""), source.get("context", ""))
+
+    def add_page_hits(self, emails, title, link, text, window=CONTEXT_WINDOW, default=''):
+        """
+        Records every address found on one page. Only the stretch of the page
+        covering their contexts is kept, once, and each context is an offset
+        into it; addresses whose position can't be found get `default`.
+        """
+        spans = {}
+        for email in emails:
+            pos = text.find(email)
+            if pos != -1 and email not in spans:
+                spans[email] = (max(0, pos - window), min(len(text), pos + len(email) + window))
+        if spans:
+            lo = min(start for start, _ in spans.values())
+            hi = max(end for _, end in spans.values())
+            self.pages.append(text[lo:hi])
+            page_id = len(self.pages) - 1
+        for email in emails:
+            if email in spans:
+                start, end = spans[email]
+                self.add_span(email, title, link, page_id, start - lo, end - lo)
+            else:
+                self.add(email, title, link, default)
+
+    def context(self, row):
+        page = self._ctx_page[row]
+        if page == LITERAL:
+            return self.pool[self._ctx_start[row]]
+        return self.pages[page][self._ctx_start[row]:self._ctx_end[row]]
+
+    def iter_dicts(self):
+        """Yields the result dicts one at a time, for streaming serialization."""
+        for row, email in enumerate(self._emails):
+            yield {
+                "email": email,
+                "source_title": self.pool[self._title[row]],
+                "source_link": self.pool[self._link[row]],
+                "context": self.context(row)
+            }
+
+    def to_dicts(self):
+        return list(self.iter_dicts())
+
+    def dump_json(self, fp):
+        """Writes the results as a JSON list without building them all first."""
+        fp.write('[')
+        for i, record in enumerate(self.iter_dicts()):
+            fp.write(', ' if i else '')
+            fp.write(json.dumps(record))
+        fp.write(']')
@@ -0,0 +1,151 @@
+"""
+Local TF-IDF relevance ranking of search results and contacts.
+
+Candidates (result titles and snippets, contact contexts) are scored against
+the topic or project summary by cosine similarity of TF-IDF vectors, so the
+pipeline can scrape and contact the most relevant ones first, or only the
+top k. Nothing leaves the process.
+
+The term matrix is kept sparse as parallel (document, term, weight) arrays
+and every product is a single np.bincount, so scoring 10k+ candidates is one
+vectorized pass. numpy is imported lazily, and only for batches of
+NUMPY_MIN_CANDIDATES or more; smaller batches, or any batch when numpy is
+not installed, are scored in pure Python with the same formula.
+"""
+import re
+import math
+from collections import Counter
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Below this many candidates pure Python is quicker than importing numpy
+NUMPY_MIN_CANDIDATES = 500
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "our", "that", "the", "their", "this",
+    "to", "was", "we", "were", "with", "you", "your", "will", "can", "about", "more",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall((text or '').lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _term_counts(texts):
+    """Returns (vocab, doc_ids, term_ids, counts) for the candidate texts."""
+    vocab = {}
+    doc_ids, term_ids, counts = [], [], []
+    for doc, text in enumerate(texts):
+        for term, count in Counter(tokenize(text)).items():
+            doc_ids.append(doc)
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            counts.append(count)
+    return vocab, doc_ids, term_ids, counts
+
+
+def _sparse_counts(np, texts):
+    """
+    Like _term_counts, but only the token-to-ID mapping runs in Python;
+    filtering and per-document counting are array operations.
+    """
+    vocab = {}
+    doc_tokens = [TOKEN_RE.findall((text or '').lower()) for text in texts]
+    term_ids = [vocab.setdefault(t, len(vocab)) for tokens in doc_tokens for t in tokens]
+    doc_ids = np.repeat(np.arange(len(doc_tokens)), [len(tokens) for tokens in doc_tokens])
+    term_ids = np.asarray(term_ids, dtype=np.intp)
+    keep = np.fromiter((len(t) > 1 and t not in STOPWORDS for t in vocab), dtype=bool, count=len(vocab))
+    mask = keep[term_ids] if len(term_ids) else np.zeros(0, dtype=bool)
+    pairs, counts = np.unique(doc_ids[mask] * len(vocab) + term_ids[mask], return_counts=True)
+    return vocab, pairs // max(len(vocab), 1), pairs % max(len(vocab), 1), counts
+
+
+def _scores_numpy(np, query_counts, n_docs, vocab, doc_ids, term_ids, counts):
+    rows = np.asarray(doc_ids, dtype=np.intp)
+    cols = np.asarray(term_ids, dtype=np.intp)
+    df = np.bincount(cols, minlength=len(vocab))
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(np.asarray(counts, dtype=np.float64))) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_docs))
+
+    query = np.zeros(len(vocab))
+    for term, count in query_counts.items():
+        if term in vocab:
+            query[vocab[term]] = (1.0 + math.log(count)) * idf[vocab[term]]
+    query_norm = np.linalg.norm(query)
+    if query_norm == 0:
+        return np.zeros(n_docs)
+    dots = np.bincount(rows, weights=weights * query[cols], minlength=n_docs)
+    return dots / (np.where(norms > 0, norms, 1.0) * query_norm)
+
+
+def _scores_python(query_counts, n_docs, vocab, doc_ids, term_ids, counts):
+    df = Counter(term_ids)
+    idf = {term: math.log((1 + n_docs) / (1 + df[term])) + 1.0 for term in df}
+    query = {}
+    for term, count in query_counts.items():
+        if term in vocab:
+            query[vocab[term]] = (1.0 + math.log(count)) * idf[vocab[term]]
+    query_norm = math.sqrt(sum(w * w for w in query.values()))
+    if query_norm == 0:
+        return [0.0] * n_docs
+    dots = [0.0] * n_docs
+    norms = [0.0] * n_docs
+    for doc, term, count in zip(doc_ids, term_ids, counts):
+        weight = (1.0 + math.log(count)) * idf[term]
+        norms[doc] += weight * weight
+        dots[doc] += weight * query.get(term, 0.0)
+    return [dot / (math.sqrt(norm) * query_norm) if norm else 0.0 for dot, norm in zip(dots, norms)]
+
+
+def relevance_scores(query, texts, use_numpy=True):
+    """
+    Cosine similarity of each text to `query` under TF-IDF weighting, with
+    IDF taken over the candidates themselves. Returns a list of floats.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    query_counts = Counter(tokenize(query))
+    if use_numpy and len(texts) >= NUMPY_MIN_CANDIDATES:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            vocab, doc_ids, term_ids, counts = _sparse_counts(np, texts)
+            return _scores_numpy(np, query_counts, len(texts), vocab, doc_ids, term_ids, counts).tolist()
+    vocab, doc_ids, term_ids, counts = _term_counts(texts)
+    return _scores_python(query_counts, len(texts), vocab, doc_ids, term_ids, counts)
+
+
+def rank(query, items, text_of=str, top_k=None):
+    """
+    Returns `items` ordered by relevance to `query`, most relevant first,
+    keeping the original order among equal scores. With `top_k`, only the
+    first k are returned.
+    """
+    items = list(items)
+    scores = relevance_scores(query, (text_of(item) for item in items))
+    order = sorted(range(len(items)), key=lambda i: -scores[i])
+    if top_k is not None:
+        order = order[:top_k]
+    return [items[i] for i in order]
+
+
+def result_text(result):
+    return f"{result.get('title', '')} {result.get('snippet', '')}"
+
+
+def contact_text(contact):
+    return f"{contact.get('source_title', '')} {contact.get('context', '')}"
+
+
+def rank_results(query, results, top_k=None):
+    """Orders organic results by how well their title and snippet match `query`."""
+    return rank(query, results, result_text, top_k)
+
+
+def rank_contacts(query, contacts, top_k=None):
+    """Orders harvested contact dicts by how well their source and context match `query`."""
+    return rank(query, contacts, contact_text, top_k)
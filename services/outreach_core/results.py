@@ -0,0 +1,73 @@
+"""
+Search results whose page content is fetched only when something reads it.
+
+A report that shows titles and snippets never triggers a scrape; an enriched
+report can prefetch just the results it is going to show.
+"""
+from .aio import gather_limited, run_sync
+from .fetch import scrape_url_content
+
+
+class SearchResult:
+    """One organic result. `content` is scraped on first access."""
+
+    __slots__ = ('title', 'snippet', 'link', 'max_chars', '_content')
+
+    FIELDS = ('title', 'snippet', 'link', 'content')
+
+    def __init__(self, title='', snippet='', link='', max_chars=3000):
+        self.title = title
+        self.snippet = snippet
+        self.link = link
+        self.max_chars = max_chars
+        self._content = None
+
+    @classmethod
+    def from_organic(cls, item, max_chars=3000):
+        return cls(item.get('title', ''), item.get('snippet', ''), item.get('link', ''), max_chars)
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = scrape_url_content(self.link, self.max_chars) if self.link else ''
+        return self._content
+
+    @property
+    def content_loaded(self):
+        return self._content is not None
+
+    # dict-style access so existing formatters keep working unchanged
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key == 'content':
+            self._content = value
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            raise KeyError(key)
+
+    def to_dict(self, include_content=False):
+        data = {'title': self.title, 'snippet': self.snippet, 'link': self.link}
+        if include_content or self.content_loaded:
+            data['content'] = self.content
+        return data
+
+
+async def prefetch_content_async(results):
+    """Loads `content` for every result that doesn't have it yet, concurrently."""
+    pending = [result for result in results if not result.content_loaded]
+    contents = await gather_limited(lambda result: scrape_url_content(result.link, result.max_chars) if result.link else '', pending)
+    for result, content in zip(pending, contents):
+        result['content'] = content
+    return results
+
+
+def prefetch_content(results):
+    return run_sync(prefetch_content_async(results))
@@ -0,0 +1,139 @@
+"""
+Keyword router deciding whether a chat message needs a web search.
+
+All keywords are compiled into one prefix-factored alternation with word
+boundaries, so a message is scanned once no matter how many keywords there
+are, and "best" no longer matches "bestow". Each keyword carries a weight;
+a message is routed to web search when the weights of the distinct keywords
+it contains add up to at least the threshold.
+"""
+import re
+import json
+from bisect import bisect_right
+
+# keyword -> weight. Plural/verb forms are matched by INFLECTIONS below.
+DEFAULT_KEYWORDS = {
+    "find": 1.0, "search": 1.0, "look up": 1.0, "discover": 1.0, "locate": 1.0,
+    "identify": 1.0, "recommend": 1.0, "recommendation": 1.0, "suggest": 1.0,
+    "suggestion": 1.0, "latest": 1.0, "recent": 1.0, "news": 1.0, "trend": 1.0,
+    "investor": 1.0, "company": 1.0, "companies": 1.0, "startup": 1.0,
+    "who is": 1.0, "what is": 1.0, "where is": 1.0, "when is": 1.0,
+    "how to": 1.0, "best": 1.0, "top": 1.0, "popular": 1.0, "review": 1.0,
+}
+
+DEFAULT_THRESHOLD = 1.0
+
+# Optional endings accepted after a keyword ("investors", "finding", "reviewed")
+INFLECTIONS = r'(?:s|es|ing|ed)?'
+
+
+def _normalize(keyword):
+    return ' '.join(keyword.lower().split())
+
+
+def _trie_pattern(keywords):
+    """
+    Builds a prefix-factored alternation ("re(?:cent|view)") from `keywords`.
+    Python's re engine tries alternatives one by one, so sharing prefixes
+    keeps the per-position cost flat as keywords are added.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [
+            (r'[^\S\n]+' if ch == ' ' else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    return build(trie)
+
+
+class KeywordRouter:
+    """A compiled, weighted keyword matcher. Matching is case-insensitive."""
+
+    def __init__(self, keywords=None, threshold=DEFAULT_THRESHOLD):
+        keywords = DEFAULT_KEYWORDS if keywords is None else keywords
+        self.weights = {_normalize(k): float(w) for k, w in keywords.items()}
+        self.threshold = threshold
+        # When every keyword alone clears the threshold, any hit decides the route
+        self._any_hit_routes = bool(self.weights) and min(self.weights.values()) >= threshold
+        self.pattern = None
+        if self.weights:
+            first_chars = ''.join(sorted({re.escape(k[0]) for k in self.weights}))
+            self.pattern = re.compile(rf'(?=[{first_chars}])\b({_trie_pattern(self.weights)}){INFLECTIONS}\b')
+
+    @classmethod
+    def from_file(cls, path):
+        """Loads {"keywords": {keyword: weight}, "threshold": n} from a JSON file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get("keywords"), config.get("threshold", DEFAULT_THRESHOLD))
+
+    @staticmethod
+    def _prepare(text):
+        # Lowercase once instead of matching with re.IGNORECASE; newlines are
+        # reserved as the message separator in batch mode.
+        return (text or '').lower().replace('\n', ' ')
+
+    def matches(self, text):
+        """Returns the distinct keywords found in `text`."""
+        if self.pattern is None:
+            return set()
+        return {_normalize(m.group(1)) for m in self.pattern.finditer(self._prepare(text))}
+
+    def score(self, text):
+        return sum(self.weights[k] for k in self.matches(text))
+
+    def needs_web_search(self, text):
+        if self._any_hit_routes:
+            return self.pattern.search(self._prepare(text)) is not None
+        return self.score(text) >= self.threshold
+
+    def matches_batch(self, texts):
+        """
+        Returns the distinct keywords of every message, scanning all of them
+        with a single regex pass over the newline-joined batch.
+        """
+        texts = [self._prepare(text) for text in texts]
+        found = [set() for _ in texts]
+        if self.pattern is None or not texts:
+            return found
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        for m in self.pattern.finditer('\n'.join(texts)):
+            found[bisect_right(starts, m.start()) - 1].add(_normalize(m.group(1)))
+        return found
+
+    def score_batch(self, texts):
+        return [sum(self.weights[k] for k in keywords) for keywords in self.matches_batch(texts)]
+
+    def classify_batch(self, texts):
+        """Routes many messages at once; returns one bool per message."""
+        if self._any_hit_routes:
+            # First hit is enough, which beats collecting every match in one pass
+            return [self.needs_web_search(text) for text in texts]
+        return [score >= self.threshold for score in self.score_batch(texts)]
+
+
+_default_router = None
+
+
+def get_router():
+    """Returns the process-wide router built from DEFAULT_KEYWORDS."""
+    global _default_router
+    if _default_router is None:
+        _default_router = KeywordRouter()
+    return _default_router
@@ -0,0 +1,196 @@
+"""
+Priority scheduling and admission control for upstream work.
+
+Every SerpAPI search, page download and LLM call takes a slot from the
+process-wide scheduler before it starts. Work is tagged with a priority
+class through a context variable, which asyncio.to_thread carries into
+worker threads:
+
+- interactive: chat queries and anything a user is waiting on;
+- bulk: market research, email harvests and batch sends.
+
+Classes are served strictly in priority order. Bulk work is also capped
+below total capacity, so a big harvest always leaves slots free for chat.
+When a class's queue is full, new work is rejected at once with
+Overloaded instead of waiting behind it. Queue waits, depths and
+rejections are exported through outreach_core.metrics.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .config import SCHED_CAPACITY, SCHED_BULK_CONCURRENCY, SCHED_MAX_QUEUE
+from .deadline import DeadlineExceeded, clamp_timeout, current_deadline
+from .metrics import REGISTRY
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+_current_priority = ContextVar('outreach_priority', default=os.environ.get('OUTREACH_PRIORITY', INTERACTIVE))
+
+queue_wait_seconds = REGISTRY.histogram(
+    'outreach_scheduler_queue_wait_seconds', 'Time work waited for a scheduler slot.', ('class',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+queue_depth = REGISTRY.gauge('outreach_scheduler_queue_depth', 'Work waiting for a slot.', ('class',))
+running_gauge = REGISTRY.gauge('outreach_scheduler_running', 'Work holding a slot.', ('class',))
+rejected_total = REGISTRY.counter(
+    'outreach_scheduler_rejected_total', 'Work turned away by admission control.', ('class', 'reason'))
+
+
+class Overloaded(Exception):
+    """Raised when work is shed instead of queued: the queue is full or the wait ran out."""
+
+    def __init__(self, priority, reason):
+        super().__init__(f"Scheduler overloaded: {priority} work rejected ({reason})")
+        self.priority = priority
+        self.reason = reason
+
+
+class PriorityClass:
+    """Limits for one class: running slots, queued callers and seconds a caller may wait."""
+
+    __slots__ = ('name', 'max_concurrency', 'max_queue', 'max_wait')
+
+    def __init__(self, name, max_concurrency, max_queue, max_wait):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+
+def default_classes():
+    return [
+        PriorityClass(INTERACTIVE, SCHED_CAPACITY, SCHED_MAX_QUEUE, max_wait=10.0),
+        PriorityClass(BULK, SCHED_BULK_CONCURRENCY, SCHED_MAX_QUEUE * 4, max_wait=300.0),
+    ]
+
+
+class Scheduler:
+    """
+    Hands out `capacity` slots to classes listed in priority order (highest
+    first). A class only runs while nothing of a higher class is waiting,
+    and waiters within a class are served first come, first served, so a
+    thread releasing a slot can't grab it straight back ahead of them.
+    """
+
+    def __init__(self, classes=None, capacity=SCHED_CAPACITY):
+        self.classes = {c.name: c for c in (classes or default_classes())}
+        self.order = list(self.classes)
+        self.capacity = capacity
+        self.running = {name: 0 for name in self.order}
+        self._queues = {name: deque() for name in self.order}
+        self._cond = threading.Condition()
+
+    @property
+    def waiting(self):
+        return {name: len(queue) for name, queue in self._queues.items()}
+
+    def _has_capacity(self, name):
+        if sum(self.running.values()) >= self.capacity:
+            return False
+        if self.running[name] >= self.classes[name].max_concurrency:
+            return False
+        higher = self.order[:self.order.index(name)]
+        return not any(self._queues[h] for h in higher)
+
+    def acquire(self, name, max_wait=None):
+        """
+        Blocks until `name` may run, or raises Overloaded. With `max_wait`
+        shorter than the class's own, giving up at `max_wait` raises
+        DeadlineExceeded instead.
+        """
+        if name not in self.classes:
+            raise ValueError(f"Unknown priority class: {name!r}")
+        klass = self.classes[name]
+        queue = self._queues[name]
+        start = time.monotonic()
+        with self._cond:
+            if queue or not self._has_capacity(name):
+                if len(queue) >= klass.max_queue:
+                    rejected_total.inc(**{'class': name, 'reason': 'queue_full'})
+                    raise Overloaded(name, 'queue_full')
+                ticket = object()
+                queue.append(ticket)
+                queue_depth.set(len(queue), **{'class': name})
+                try:
+                    caller_limited = max_wait is not None and max_wait < klass.max_wait
+                    deadline = start + (max_wait if caller_limited else klass.max_wait)
+                    while queue[0] is not ticket or not self._has_capacity(name):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            if caller_limited:
+                                rejected_total.inc(**{'class': name, 'reason': 'deadline'})
+                                raise DeadlineExceeded("an upstream slot was free")
+                            rejected_total.inc(**{'class': name, 'reason': 'timeout'})
+                            raise Overloaded(name, 'timeout')
+                        self._cond.wait(remaining)
+                finally:
+                    queue.remove(ticket)
+                    queue_depth.set(len(queue), **{'class': name})
+                    # The next in line, or a lower class held back by this one, may now go
+                    self._cond.notify_all()
+            self.running[name] += 1
+            running_gauge.set(self.running[name], **{'class': name})
+        queue_wait_seconds.observe(time.monotonic() - start, **{'class': name})
+
+    def release(self, name):
+        with self._cond:
+            self.running[name] -= 1
+            running_gauge.set(self.running[name], **{'class': name})
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, name=None, max_wait=None):
+        """Holds one slot for the current priority class (or `name`) around a block."""
+        name = name or current_priority()
+        self.acquire(name, max_wait)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+@contextmanager
+def priority(name):
+    """Tags everything started inside the block, threads included, with class `name`."""
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def set_priority(name):
+    """Sets the class for the rest of the current context, e.g. at the top of a batch script."""
+    _current_priority.set(name)
+
+
+_scheduler = Scheduler()
+
+
+def get_scheduler():
+    return _scheduler
+
+
+def set_scheduler(scheduler):
+    """Swaps the process-wide scheduler (tests, benchmarks, custom limits)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def upstream_slot():
+    """
+    The slot every upstream call takes; see the module docstring. Waits no
+    longer than the current deadline, fails fast once it has passed, and
+    counts the call against the deadline's call budget, if any.
+    """
+    max_wait = clamp_timeout(None, "an upstream call")
+    current_deadline().charge("an upstream call")
+    return _scheduler.slot(max_wait=max_wait)
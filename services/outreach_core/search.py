@@ -0,0 +1,77 @@
+"""SerpAPI search, cached per (query, num_results)."""
+from .aio import to_thread, gather_limited, run_sync
+from .breaker import CircuitOpen, circuit
+from .cache import search_cache
+from .config import SERPAPI_API_KEY, SERPAPI_URL, REQUEST_TIMEOUT
+from .deadline import clamp_timeout
+from .metrics import track_upstream
+from .scheduler import upstream_slot
+from .session import get_session
+
+
+class SearchError(Exception):
+    """Raised when SerpAPI cannot be reached or returns an error payload."""
+
+
+def serpapi_search(query, num_results=None, api_key=None):
+    """
+    Runs a Google search through SerpAPI.
+
+    Args:
+        query (str): The search query
+        num_results (int): Value for SerpAPI's `num` parameter, or None for its default
+        api_key (str): SerpAPI key, defaults to SERPAPI_API_KEY
+
+    Returns:
+        list: The raw `organic_results` entries
+
+    Raises:
+        SearchError: If the request fails or SerpAPI reports an error
+    """
+    key = (query, num_results)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+
+    params = {"engine": "google", "q": query, "api_key": api_key or SERPAPI_API_KEY}
+    if num_results is not None:
+        params["num"] = str(num_results)
+    try:
+        with circuit('serpapi') as breaker_outcome, upstream_slot(), track_upstream('serpapi') as set_outcome:
+            try:
+                response = get_session().get(SERPAPI_URL, params=params, timeout=clamp_timeout(REQUEST_TIMEOUT))
+                data = response.json()
+            except Exception as e:
+                raise SearchError(str(e)) from e
+            if "error" in data or response.status_code != 200:
+                set_outcome('error')
+            if response.status_code >= 500 or response.status_code == 429:
+                breaker_outcome('error')
+    except CircuitOpen as e:
+        raise SearchError(str(e)) from e
+    if "error" in data:
+        raise SearchError(f"SerpAPI error: {data['error']}")
+    if response.status_code != 200:
+        raise SearchError(f"SerpAPI returned status {response.status_code}")
+
+    results = data.get("organic_results", [])
+    search_cache.set(key, results)
+    return results
+
+
+async def serpapi_search_async(query, num_results=None, api_key=None):
+    return await to_thread(serpapi_search, query, num_results, api_key)
+
+
+def search_many(queries, num_results=None, api_key=None):
+    """Runs several searches concurrently; failed searches yield an empty list."""
+    return run_sync(search_many_async(queries, num_results, api_key))
+
+
+async def search_many_async(queries, num_results=None, api_key=None):
+    def safe_search(query):
+        try:
+            return serpapi_search(query, num_results, api_key)
+        except SearchError:
+            return []
+    return await gather_limited(safe_search, queries)
@@ -0,0 +1,27 @@
+"""
+Pooled HTTP sessions.
+
+requests is imported on first use, and each thread keeps its own Session so
+keep-alive connections are reused across calls without sharing a Session
+between threads.
+"""
+import threading
+
+from .config import POOL_SIZE, USER_AGENT
+
+_local = threading.local()
+
+
+def get_session():
+    """Returns this thread's pooled requests.Session."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        _local.session = session
+    return session
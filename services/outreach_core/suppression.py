@@ -0,0 +1,333 @@
+"""
+Suppression list: addresses that must not get another intro.
+
+An address is suppressed once it has been contacted, or when its owner opts
+out. The list is a SQLite table under STATE_DIR and is the source of truth.
+A Bloom filter sits in front of it:
+
+- most candidates are new, and the filter clears those with a few hashes
+  and no query;
+- only filter hits are checked against the table, in one batched query, so
+  a false positive costs a lookup and never drops an address.
+
+The filter is saved next to the table with the highest row ID it has seen.
+Loading it only adds the rows written since, by this process or any other,
+and so does every check. Once it holds more than its capacity, it is
+rebuilt twice as large. Removing an address only deletes its row; its bits
+stay set, and the exact check lets it through.
+
+Addresses are compared after normalize_address(), so "J.Doe+vc@GoogleMail.com"
+is the same person as "jdoe@gmail.com".
+"""
+import os
+import math
+import time
+import struct
+import sqlite3
+import hashlib
+import threading
+
+from .config import STATE_DIR, SUPPRESSION_CAPACITY, SUPPRESSION_ERROR_RATE, SUPPRESSION_SAVE_INTERVAL
+from .log import log, WARNING
+from .metrics import REGISTRY, Gauge
+
+SUPPRESSION_DB_PATH = os.path.join(STATE_DIR, 'suppression.sqlite3')
+
+CONTACTED = 'contacted'
+OPTED_OUT = 'opted_out'
+REASONS = (CONTACTED, OPTED_OUT)
+
+# Providers that ignore dots in the local part, and domains that are aliases of another
+DOTLESS_DOMAINS = {'gmail.com'}
+DOMAIN_ALIASES = {'googlemail.com': 'gmail.com'}
+
+# AUTOINCREMENT: IDs are never reused, so a row added after the top row is
+# deleted still gets an ID above the filter's high-water mark
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppression (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT NOT NULL UNIQUE,
+    reason TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+BLOOM_MAGIC = b'OSB1'
+BLOOM_HEADER = struct.Struct('<4sIQQQQ')  # magic, hashes, bits, capacity, entries, highest row ID
+QUERY_CHUNK = 500  # addresses per IN (...) lookup, well under SQLite's variable limit
+
+checks_total = REGISTRY.counter(
+    'outreach_suppression_checks_total', 'Addresses screened against the suppression list.', ('result',))
+
+
+def normalize_address(address):
+    """
+    The form suppression compares: lowercased, without a "+tag" and, for
+    providers that ignore them, without dots in the local part. Returns ''
+    for anything that is not an address.
+    """
+    address = (address or '').strip().lower()
+    local, _, domain = address.rpartition('@')
+    if not local or not domain:
+        return ''
+    domain = DOMAIN_ALIASES.get(domain, domain)
+    # Subaddressing: erring towards treating tags as the same person only ever skips a send
+    local = local.split('+', 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        local = local.replace('.', '')
+    return f"{local}@{domain}" if local else ''
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings, using double hashing of one blake2b digest."""
+
+    def __init__(self, capacity, error_rate=SUPPRESSION_ERROR_RATE, bits=None, hashes=None, data=None):
+        self.capacity = capacity
+        self.bits = bits or max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.bits / capacity * math.log(2)))
+        self.data = data if data is not None else bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        data = self.data
+        return all(data[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def error_rate(self):
+        """The expected false-positive rate at the current fill."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def to_bytes(self, high_water):
+        header = BLOOM_HEADER.pack(BLOOM_MAGIC, self.hashes, self.bits, self.capacity, self.count, high_water)
+        return header + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        """Returns (filter, highest row ID it holds); raises ValueError on a bad file."""
+        if len(blob) < BLOOM_HEADER.size:
+            raise ValueError("truncated header")
+        magic, hashes, bits, capacity, count, high_water = BLOOM_HEADER.unpack_from(blob)
+        data = bytearray(blob[BLOOM_HEADER.size:])
+        if magic != BLOOM_MAGIC or not hashes or not capacity or len(data) != (bits + 7) // 8:
+            raise ValueError("not a suppression filter")
+        bloom = cls(capacity, bits=bits, hashes=hashes, data=data)
+        bloom.count = count
+        return bloom, high_water
+
+
+class SuppressionList:
+    """The suppression table and its Bloom filter; safe to share between threads and processes."""
+
+    def __init__(self, path=SUPPRESSION_DB_PATH, capacity=SUPPRESSION_CAPACITY,
+                 error_rate=SUPPRESSION_ERROR_RATE, save_interval=SUPPRESSION_SAVE_INTERVAL):
+        self.path = path
+        self.bloom_path = None if path == ':memory:' else path + '.bloom'
+        self.error_rate = error_rate
+        self.save_interval = save_interval
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._high_water = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.bloom_hits = 0
+        self.false_positives = 0
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            migrated = self._migrate()
+            self._conn.executescript(SCHEMA)
+            self._load(capacity, rebuild=migrated)
+
+    # --- FILTER UPKEEP (callers hold self._lock) ---
+
+    def _migrate(self):
+        """Recreates a table from before IDs were AUTOINCREMENT; returns True if it did."""
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'suppression'").fetchone()
+        if row is None or 'AUTOINCREMENT' in row[0].upper():
+            return False
+        self._conn.executescript(
+            "BEGIN IMMEDIATE; ALTER TABLE suppression RENAME TO suppression_old;" + SCHEMA +
+            "INSERT INTO suppression SELECT * FROM suppression_old; DROP TABLE suppression_old; COMMIT;")
+        return True
+
+    def _load(self, capacity, rebuild=False):
+        if self.bloom_path:
+            try:
+                with open(self.bloom_path, 'rb') as f:
+                    self._bloom, self._high_water = BloomFilter.from_bytes(f.read())
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                log(f"    - Suppression filter error: {e}; rebuilding", WARNING)
+        # The highest ID ever handed out, even if that row has since been removed
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'suppression'").fetchone()
+        top = row[0] if row else 0
+        if self._bloom is None or self._high_water > top or rebuild:
+            # No file yet, one from a table that has since been replaced, or a migrated table
+            self._rebuild(max(capacity, top * 2))
+        else:
+            self._catch_up()
+
+    def _rebuild(self, capacity):
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        self._high_water = 0
+        self._catch_up()
+        self._dirty = True
+        self._save()
+
+    def _catch_up(self):
+        """Adds the rows written since the filter last looked, then grows it if it is full."""
+        rows = self._conn.execute("SELECT id, address FROM suppression WHERE id > ? ORDER BY id",
+                                  (self._high_water,)).fetchall()
+        for row_id, address in rows:
+            self._bloom.add(address)
+            self._high_water = row_id
+        if rows:
+            self._dirty = True
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild(self._bloom.capacity * 2)
+        elif self._dirty and time.monotonic() - self._saved_at >= self.save_interval:
+            self._save()
+
+    def _save(self):
+        if not self.bloom_path or not self._dirty:
+            return
+        tmp_path = f"{self.bloom_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._bloom.to_bytes(self._high_water))
+            os.replace(tmp_path, self.bloom_path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        except OSError as e:
+            log(f"    - Could not save suppression filter: {e}", WARNING)
+
+    # --- PUBLIC API ---
+
+    def add(self, addresses, reason=CONTACTED):
+        """
+        Suppresses addresses. An opt-out overrides an earlier "contacted", never the reverse.
+
+        Returns:
+            int: How many addresses were not suppressed before
+        """
+        if reason not in REASONS:
+            raise ValueError(f"Unknown suppression reason: {reason!r}")
+        normalized = {address for address in map(normalize_address, addresses) if address}
+        if not normalized:
+            return 0
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO suppression (address, reason, created_at) VALUES (?, ?, ?)",
+                                   [(address, reason, now) for address in normalized])
+            added = self._conn.total_changes - before
+            if reason == OPTED_OUT:
+                self._conn.executemany("UPDATE suppression SET reason = ? WHERE address = ?",
+                                       [(OPTED_OUT, address) for address in normalized])
+            self._catch_up()
+        return added
+
+    def remove(self, addresses):
+        """Lifts the suppression of addresses; returns how many were suppressed."""
+        normalized = [address for address in map(normalize_address, addresses) if address]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM suppression WHERE address = ?", [(a,) for a in normalized])
+            return self._conn.total_changes - before
+
+    def filter(self, addresses):
+        """
+        Splits candidates into the ones that may be contacted and the suppressed ones.
+
+        Args:
+            addresses (list): Candidate addresses, in any form
+
+        Returns:
+            tuple: (allowed addresses as given and in order,
+                [{"email": address as given, "reason": "contacted" or "opted_out"}])
+        """
+        with self._lock:
+            self._catch_up()
+            keys = [normalize_address(address) for address in addresses]
+            maybe = sorted({key for key in keys if key and key in self._bloom})
+            reasons = {}
+            for start in range(0, len(maybe), QUERY_CHUNK):
+                chunk = maybe[start:start + QUERY_CHUNK]
+                reasons.update(self._conn.execute(
+                    f"SELECT address, reason FROM suppression WHERE address IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall())
+            self.bloom_hits += len(maybe)
+            self.false_positives += len(maybe) - len(reasons)
+        allowed, suppressed = [], []
+        for address, key in zip(addresses, keys):
+            if key in reasons:
+                suppressed.append({"email": address, "reason": reasons[key]})
+            else:
+                allowed.append(address)
+        checks_total.inc(len(allowed), result='allowed')
+        checks_total.inc(len(suppressed), result='suppressed')
+        return allowed, suppressed
+
+    def is_suppressed(self, address):
+        return not self.filter([address])[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM suppression").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            self._catch_up()
+            return {
+                "entries": self._bloom.count,
+                "capacity": self._bloom.capacity,
+                "bits": self._bloom.bits,
+                "hashes": self._bloom.hashes,
+                "expected_error_rate": self._bloom.error_rate(),
+                "bloom_hits": self.bloom_hits,
+                "false_positives": self.false_positives,
+            }
+
+    def close(self):
+        with self._lock:
+            self._save()
+            self._conn.close()
+
+
+_suppression = None
+_suppression_lock = threading.Lock()
+
+
+def get_suppression_list():
+    """Returns the process-wide suppression list at SUPPRESSION_DB_PATH."""
+    global _suppression
+    with _suppression_lock:
+        if _suppression is None:
+            _suppression = SuppressionList()
+    return _suppression
+
+
+def _suppression_metrics():
+    if _suppression is None:
+        return []
+    entries = Gauge('outreach_suppression_entries', 'Addresses in the suppression filter.')
+    entries.set(_suppression.stats()["entries"])
+    return [entries]
+
+
+REGISTRY.add_collector(_suppression_metrics)
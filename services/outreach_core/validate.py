@@ -0,0 +1,219 @@
+"""
+Batch validation of harvested contacts before anything is drafted or sent.
+
+Each address goes through cheap local checks first: syntax, TLD,
+placeholder and disposable domains. Then one MX lookup is made per
+distinct domain, concurrently, and cached. Only addresses that pass every
+step are returned as valid; a domain whose lookup failed or was
+inconclusive is given the benefit of the doubt.
+"""
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .aio import gather_limited, run_sync
+from .cache import TTLCache
+from .config import MX_CACHE_TTL
+
+EMAIL_SYNTAX_RE = re.compile(r'^[A-Za-z0-9._%+-]{1,64}@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,24}$')
+
+# Scraped text is full of asset names such as "logo@2x.png"
+FILE_EXTENSION_TLDS = {
+    "png", "jpg", "jpeg", "gif", "svg", "webp", "bmp", "ico", "tif", "tiff",
+    "css", "js", "json", "map", "pdf", "mp4", "webm", "mov", "woff", "woff2",
+    "ttf", "eot", "html", "htm", "php", "asp", "aspx", "txt", "xml", "zip",
+}
+
+# Domains of the hardcoded sample_emails fallbacks, plus reserved example domains
+PLACEHOLDER_DOMAINS = {
+    "example.com", "example.org", "example.net", "test.com", "domain.com",
+    "venturecap.com", "angelinvestors.com", "startupvc.com", "investmentfirm.com",
+    "fundingpartners.com", "venturefund.com", "seedinvestors.com", "startupfunding.com",
+    "investornetwork.com", "venturecapital.com", "venturefirm.com", "microvc.com",
+    "equityfirm.com", "angelinvestor.com", "vcpartners.com",
+}
+PLACEHOLDER_DOMAIN_RE = re.compile(r'^fintechvc-\d+\.com$')
+
+DISPOSABLE_DOMAINS = {
+    "mailinator.com", "guerrillamail.com", "guerrillamail.net", "sharklasers.com",
+    "10minutemail.com", "temp-mail.org", "tempmail.com", "tempmailo.com",
+    "yopmail.com", "trashmail.com", "getnada.com", "dispostable.com", "maildrop.cc",
+    "throwawaymail.com", "fakeinbox.com", "mintemail.com", "mohmal.com",
+    "emailondeck.com", "spamgourmet.com", "mailnesia.com",
+}
+
+
+class DNSLookupError(Exception):
+    """A transient resolver failure; the domain's deliverability is unknown."""
+
+
+class SystemResolver:
+    """
+    Looks up MX hosts with dnspython when it is installed; a domain with no
+    MX but an address still accepts mail (RFC 5321 implicit MX).
+
+    Without dnspython only addresses can be looked up. An address proves the
+    domain accepts mail, but a failed lookup can't tell a dead domain from
+    one with MX records and no A record, so it counts as unknown and the
+    address is kept. Every lookup is bounded by `timeout`.
+    """
+
+    def __init__(self, timeout=3.0):
+        self.timeout = timeout
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def mx_hosts(self, domain):
+        try:
+            import dns.resolver
+            import dns.exception
+        except ImportError:
+            return self._address_hosts(domain)
+        try:
+            answers = dns.resolver.resolve(domain, 'MX', lifetime=self.timeout)
+            return [str(r.exchange).rstrip('.') for r in answers]
+        except dns.resolver.NXDOMAIN:
+            return []
+        except dns.resolver.NoAnswer:
+            return self._dns_address_hosts(domain)
+        except dns.exception.DNSException as e:
+            # Timeouts and SERVFAIL from every nameserver say nothing about the domain
+            raise DNSLookupError(str(e)) from e
+
+    def _dns_address_hosts(self, domain):
+        import dns.resolver
+        import dns.exception
+        for rdtype in ('A', 'AAAA'):
+            try:
+                dns.resolver.resolve(domain, rdtype, lifetime=self.timeout)
+                return [domain]
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                continue
+            except dns.exception.DNSException as e:
+                raise DNSLookupError(str(e)) from e
+        return []
+
+    def _address_hosts(self, domain):
+        # getaddrinfo has no timeout of its own, so it runs on a helper thread
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dns")
+        future = self._executor.submit(socket.getaddrinfo, domain, 25, proto=socket.IPPROTO_TCP)
+        try:
+            future.result(timeout=self.timeout)
+        except FutureTimeout as e:
+            raise DNSLookupError(f"lookup of {domain} timed out") from e
+        except OSError as e:
+            raise DNSLookupError(str(e)) from e
+        return [domain]
+
+
+class StaticResolver:
+    """Resolver backed by a {domain: [mx hosts]} dict, for tests and offline runs."""
+
+    def __init__(self, records):
+        self.records = {domain.lower(): list(hosts) for domain, hosts in records.items()}
+
+    def mx_hosts(self, domain):
+        return list(self.records.get(domain.lower(), []))
+
+
+# In-process only: answers depend on the resolver set in this process
+mx_cache = TTLCache("mx", maxsize=4096, ttl=MX_CACHE_TTL, shared=False)
+_default_resolver = SystemResolver()
+
+
+def set_default_resolver(resolver):
+    """Swaps the resolver used when none is passed (and drops cached answers)."""
+    global _default_resolver
+    _default_resolver = resolver
+    mx_cache.clear()
+
+
+def normalize_email(email):
+    email = email.strip().strip('.<>"\'')
+    local, _, domain = email.rpartition('@')
+    return f"{local}@{domain.lower()}" if local else email
+
+
+def check_local(email):
+    """Runs the checks that need no network; returns a rejection reason or None."""
+    if len(email) > 254 or not EMAIL_SYNTAX_RE.match(email):
+        return "syntax"
+    local, domain = email.rsplit('@', 1)
+    if local.startswith('.') or local.endswith('.') or '..' in local:
+        return "syntax"
+    if domain.rsplit('.', 1)[1].lower() in FILE_EXTENSION_TLDS:
+        return "tld"
+    if domain in PLACEHOLDER_DOMAINS or PLACEHOLDER_DOMAIN_RE.match(domain):
+        return "placeholder"
+    if domain in DISPOSABLE_DOMAINS:
+        return "disposable"
+    return None
+
+
+def domain_accepts_mail(domain, resolver=None):
+    """
+    True if `domain` has a mail exchanger, False if it definitely has none,
+    None if the lookup failed. Definite answers are cached for MX_CACHE_TTL.
+    """
+    resolver = resolver or _default_resolver
+    key = (id(resolver), domain)
+    cached = mx_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        accepts = bool(resolver.mx_hosts(domain))
+    except DNSLookupError:
+        return None
+    mx_cache.set(key, accepts)
+    return accepts
+
+
+async def validate_contacts_async(emails, resolver=None, check_mx=True):
+    """
+    Validates a batch of candidate addresses.
+
+    Args:
+        emails (list): Candidate addresses, possibly with duplicates
+        resolver: Object with `mx_hosts(domain)`; defaults to SystemResolver
+        check_mx (bool): Skip DNS entirely when False
+
+    Returns:
+        dict: {"valid": [emails...], "rejected": [{"email": ..., "reason": ...}]}
+            where reason is one of syntax, tld, placeholder, disposable,
+            duplicate or no_mx. Addresses whose MX lookup failed transiently
+            are kept.
+    """
+    valid = []
+    rejected = []
+    seen = set()
+    for raw in emails:
+        email = normalize_email(raw)
+        if email.lower() in seen:
+            rejected.append({"email": raw, "reason": "duplicate"})
+            continue
+        seen.add(email.lower())
+        reason = check_local(email)
+        if reason:
+            rejected.append({"email": raw, "reason": reason})
+        else:
+            valid.append(email)
+
+    if check_mx and valid:
+        domains = sorted({email.rsplit('@', 1)[1] for email in valid})
+        answers = dict(zip(domains, await gather_limited(lambda d: domain_accepts_mail(d, resolver), domains)))
+        checked = []
+        for email in valid:
+            if answers[email.rsplit('@', 1)[1]] is False:
+                rejected.append({"email": email, "reason": "no_mx"})
+            else:
+                checked.append(email)
+        valid = checked
+
+    return {"valid": valid, "rejected": rejected}
+
+
+def validate_contacts(emails, resolver=None, check_mx=True):
+    return run_sync(validate_contacts_async(emails, resolver, check_mx))
@@ -0,0 +1,235 @@
+"""
+Query log and off-peak cache warming.
+
+Entry points call record_query() with the topic a user asked about. The log
+is one JSON line per query in STATE_DIR/query_log.jsonl. A CacheWarmer
+mines the last WARM_LOOKBACK seconds of it for the WARM_TOP_N most asked
+(source, topic) pairs, and re-runs each through the same code path a user
+would hit (a "recipe" per source). That fills the search, page and LLM
+caches before the first user of the day arrives.
+
+A run spends at most WARM_BUDGET upstream calls: it runs under a deadline
+with a call budget, so it stops like a request at its deadline once the
+quota is used. Runs happen inside the WARM_HOURS window, at most once a
+day, and each one writes a report with the cache hit rates to
+STATE_DIR/warm_report.json.
+"""
+import os
+import json
+import time
+import threading
+from collections import Counter
+
+from .cache import search_cache, page_cache, llm_cache
+from .config import (
+    STATE_DIR, WARM_HOURS, WARM_TOP_N, WARM_BUDGET, WARM_LOOKBACK, WARM_CHECK_INTERVAL,
+    QUERY_LOG_MAX_BYTES,
+)
+from .deadline import DeadlineExceeded, deadline_reached, deadline_scope
+from .log import log, WARNING
+from .scheduler import BULK, priority
+
+QUERY_LOG_PATH = os.path.join(STATE_DIR, 'query_log.jsonl')
+WARM_REPORT_PATH = os.path.join(STATE_DIR, 'warm_report.json')
+
+WARMED_CACHES = (search_cache, page_cache, llm_cache)
+
+
+def normalize_topic(topic):
+    """'  Fintech  Investors' and 'fintech investors' are the same topic."""
+    return ' '.join((topic or '').lower().split())
+
+
+def record_query(source, topic, path=QUERY_LOG_PATH):
+    """Appends one user query to the query log; never fails the caller."""
+    topic = normalize_topic(topic)
+    if not topic:
+        return
+    line = json.dumps({"t": round(time.time(), 3), "source": source, "topic": topic}) + '\n'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+        if os.path.getsize(path) > QUERY_LOG_MAX_BYTES:
+            compact_query_log(path)
+    except OSError as e:
+        log(f"    - Query log error: {e}", WARNING)
+
+
+def read_query_log(path=QUERY_LOG_PATH, since=None):
+    """Yields the logged queries ({"t", "source", "topic"}) newer than `since`."""
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a concurrent write
+            if since is None or entry.get("t", 0) >= since:
+                yield entry
+
+
+def compact_query_log(path=QUERY_LOG_PATH, lookback=WARM_LOOKBACK):
+    """
+    Keeps the newer half of the entries inside the lookback. A query appended
+    by another process while this runs may be lost, which only costs a count.
+    """
+    entries = list(read_query_log(path, since=time.time() - lookback))
+    entries = entries[len(entries) // 2:] if len(entries) > 1 else entries
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(entry) + '\n' for entry in entries)
+    os.replace(tmp_path, path)
+
+
+def top_topics(n=WARM_TOP_N, lookback=WARM_LOOKBACK, sources=None, path=QUERY_LOG_PATH):
+    """
+    The most asked topics in the log.
+
+    Args:
+        n (int): How many (source, topic) pairs to return
+        lookback (int): Only count queries from the last this many seconds
+        sources (iterable): Only count these sources, e.g. the ones a warmer has recipes for
+        path (str): Query log to read
+
+    Returns:
+        list: (source, topic, count) tuples, most asked first
+    """
+    counts = Counter(
+        (entry["source"], entry["topic"])
+        for entry in read_query_log(path, since=time.time() - lookback)
+        if sources is None or entry.get("source") in sources
+    )
+    return [(source, topic, count) for (source, topic), count in counts.most_common(n)]
+
+
+def in_window(hours=WARM_HOURS, now=None):
+    """
+    True if the local hour is inside `hours`, e.g. "6-7" or "22-4" (which
+    wraps past midnight). An empty spec means any time.
+    """
+    if not hours:
+        return True
+    start, _, end = hours.partition('-')
+    start, end = int(start), int(end or start)
+    hour = time.localtime(now).tm_hour
+    if start <= end:
+        return start <= hour <= end
+    return hour >= start or hour <= end
+
+
+def _cache_counts():
+    return {cache.name: (cache.hits, cache.misses) for cache in WARMED_CACHES}
+
+
+def _hit_rates(before, after):
+    rates = {}
+    for name, (hits, misses) in after.items():
+        hits -= before[name][0]
+        misses -= before[name][1]
+        lookups = hits + misses
+        rates[name] = {"hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+    return rates
+
+
+class CacheWarmer:
+    """
+    Re-runs popular topics through `recipes`, a dict of source name ->
+    function(topic) that takes the same cached path a user query from that
+    source would.
+    """
+
+    def __init__(self, recipes, top_n=WARM_TOP_N, budget=WARM_BUDGET, hours=WARM_HOURS,
+                 log_path=QUERY_LOG_PATH, report_path=WARM_REPORT_PATH):
+        self.recipes = recipes
+        self.top_n = top_n
+        self.budget = budget
+        self.hours = hours
+        self.log_path = log_path
+        self.report_path = report_path
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_run_day = None
+
+    def run_once(self):
+        """
+        Warms the top topics now, whatever the time, and returns the report:
+        {"started_at", "finished_at", "budget", "calls", "truncated",
+        "topics": [{"source", "topic", "queries", "ok"}],
+        "warming": {cache: {"hits", "misses", "hit_ratio"}} for this run's lookups,
+        "caches": {cache: stats()} for the process since the caches were created}.
+        """
+        report = {"started_at": time.time(), "budget": self.budget, "topics": []}
+        before = _cache_counts()
+        topics = top_topics(self.top_n, sources=set(self.recipes), path=self.log_path)
+        # Nobody is waiting on a warm-up: bulk priority, and no deadline but the quota
+        with deadline_scope(None, max_calls=self.budget) as deadline, priority(BULK):
+            for source, topic, count in topics:
+                if deadline_reached():
+                    break
+                entry = {"source": source, "topic": topic, "queries": count, "ok": True}
+                report["topics"].append(entry)
+                log(f"🔥 Warming {source}: {topic} ({count} recent queries)")
+                try:
+                    self.recipes[source](topic)
+                except DeadlineExceeded:
+                    entry["ok"] = False
+                    break
+                except Exception as e:
+                    entry["ok"] = False
+                    log(f"    - Warming error for {topic}: {e}", WARNING)
+            report["calls"] = self.budget - deadline.calls_left
+            report["truncated"] = deadline.truncated
+        report["finished_at"] = time.time()
+        report["warming"] = _hit_rates(before, _cache_counts())
+        report["caches"] = {cache.name: cache.stats() for cache in WARMED_CACHES}
+        self._save_report(report)
+        return report
+
+    def _save_report(self, report):
+        if not self.report_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+            tmp_path = self.report_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            os.replace(tmp_path, self.report_path)
+        except OSError as e:
+            log(f"    - Could not save warm report: {e}", WARNING)
+
+    def due(self, now=None):
+        """True inside the window if there has been no run yet today."""
+        return in_window(self.hours, now) and self._last_run_day != time.strftime('%Y-%m-%d', time.localtime(now))
+
+    def start(self, check_interval=WARM_CHECK_INTERVAL):
+        """Warms once a day inside the window on a background thread, e.g. in the Flask service."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, args=(check_interval,),
+                                            name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self, check_interval):
+        while not self._stopped.is_set():
+            if self.due():
+                self._last_run_day = time.strftime('%Y-%m-%d')
+                try:
+                    self.run_once()
+                except Exception as e:
+                    log(f"    - Warming error: {e}", WARNING)
+            self._stopped.wait(check_interval)
+
+
+def last_warm_report(path=WARM_REPORT_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
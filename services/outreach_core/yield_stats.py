@@ -0,0 +1,171 @@
+"""
+Per-domain and per-query-template email yield, persisted between runs.
+
+The harvest engine records how many addresses each fetched domain showed
+and how many new ones each query template produced. It then skips
+domains that keep showing none, and runs the templates with the best track
+record first. A skipped domain is fetched again once RETRY_PRUNED_AFTER
+has passed since its last fetch, so a site that starts listing contacts
+is picked up again.
+
+Several processes share the stats file. Each keeps the counts it added
+since it last saved, and save() adds them to what is on disk under a file
+lock, so concurrent runs don't overwrite each other's counts.
+"""
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are merged but not locked
+    fcntl = None
+
+from .config import STATE_DIR
+
+YIELD_STATS_PATH = os.path.join(STATE_DIR, 'yield_stats.json')
+
+# Login-walled sites that never show addresses to an anonymous scraper
+NEVER_YIELD_DOMAINS = {
+    "linkedin.com", "crunchbase.com", "facebook.com", "instagram.com",
+    "twitter.com", "x.com", "pitchbook.com", "glassdoor.com",
+}
+
+MIN_FETCHES_TO_PRUNE = 3  # zero-yield fetches before a domain is skipped
+RETRY_PRUNED_AFTER = 7 * 86400  # seconds after its last fetch that a skipped domain is tried again
+PRIOR_EMAILS = 1.0  # smoothing so unseen domains/templates rank as promising
+PRIOR_TRIALS = 1.0
+
+
+def normalize_domain(url):
+    """Returns the lowercased host of `url` without a leading "www."."""
+    host = urlparse(url).netloc.lower() if "//" in url else url.lower()
+    host = host.split(':')[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def query_template(query, topic):
+    """Replaces the topic in `query` so yields are shared across topics."""
+    return query.replace(topic, "{topic}") if topic else query
+
+
+def _merge(base, deltas):
+    """Adds the counters in `deltas` to `base` in place; "last_fetch" times take the latest."""
+    for key, delta in deltas.items():
+        entry = base.setdefault(key, {})
+        for field, value in delta.items():
+            if field == "last_fetch":
+                entry[field] = max(entry.get(field, 0), value)
+            else:
+                entry[field] = entry.get(field, 0) + value
+    return base
+
+
+class YieldStats:
+    """Fetch/email counters keyed by domain and by query template."""
+
+    def __init__(self, path=YIELD_STATS_PATH, clock=time.time):
+        self.path = path
+        self.domains = {}    # domain -> {"fetches": n, "emails": n, "last_fetch": unix time}
+        self.templates = {}  # template -> {"runs": n, "emails": n}
+        self._clock = clock
+        self._pending = ({}, {})  # counts added since the last save: (domains, templates)
+        self._lock = threading.Lock()
+        self.domains, self.templates = self._read()
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}, {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("domains", {}), data.get("templates", {})
+        except (OSError, ValueError):
+            return {}, {}  # a corrupt stats file only costs us the history
+
+    def save(self):
+        """Adds this process's new counts to the file and reloads the merged totals."""
+        if not self.path:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, ({}, {})
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.lock', 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                domains, templates = self._read()
+                _merge(domains, pending[0])
+                _merge(templates, pending[1])
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"domains": domains, "templates": templates}, f)
+                os.replace(tmp_path, self.path)
+        except BaseException:
+            with self._lock:  # keep the counts for the next save
+                _merge(self._pending[0], pending[0])
+                _merge(self._pending[1], pending[1])
+            raise
+        with self._lock:
+            # Counts recorded while saving are in neither the file nor the totals just read
+            self.domains = _merge(domains, self._pending[0])
+            self.templates = _merge(templates, self._pending[1])
+
+    # --- recording ---
+
+    def record_fetch(self, url, emails):
+        """Records one fetch of `url` on which `emails` addresses were found, new or not."""
+        delta = {"fetches": 1, "emails": emails, "last_fetch": self._clock()}
+        key = normalize_domain(url)
+        with self._lock:
+            _merge(self.domains, {key: delta})
+            _merge(self._pending[0], {key: delta})
+
+    def record_query(self, template, new_emails):
+        delta = {"runs": 1, "emails": new_emails}
+        with self._lock:
+            _merge(self.templates, {template: delta})
+            _merge(self._pending[1], {template: delta})
+
+    # --- decisions ---
+
+    def domain_yield(self, url):
+        entry = self.domains.get(normalize_domain(url), {})
+        return (entry.get("emails", 0) + PRIOR_EMAILS) / (entry.get("fetches", 0) + PRIOR_TRIALS)
+
+    def template_yield(self, template):
+        entry = self.templates.get(template, {})
+        return (entry.get("emails", 0) + PRIOR_EMAILS) / (entry.get("runs", 0) + PRIOR_TRIALS)
+
+    def should_skip(self, url):
+        """
+        True for login walls, and for domains that have never shown an address
+        unless their last fetch is older than RETRY_PRUNED_AFTER.
+        """
+        domain = normalize_domain(url)
+        if any(domain == d or domain.endswith("." + d) for d in NEVER_YIELD_DOMAINS):
+            return True
+        entry = self.domains.get(domain)
+        if not entry or entry.get("emails", 0) or entry.get("fetches", 0) < MIN_FETCHES_TO_PRUNE:
+            return False
+        return self._clock() - entry.get("last_fetch", 0) < RETRY_PRUNED_AFTER
+
+    def order_queries(self, queries, topic):
+        """Sorts queries by expected yield; ties keep their original order."""
+        return sorted(queries, key=lambda q: -self.template_yield(query_template(q, topic)))
+
+    def order_urls(self, urls):
+        return sorted(urls, key=lambda u: -self.domain_yield(u))
+
+
+_default_stats = None
+
+
+def get_yield_stats():
+    """Returns the process-wide YieldStats backed by YIELD_STATS_PATH."""
+    global _default_stats
+    if _default_stats is None:
+        _default_stats = YieldStats()
+    return _default_stats
@@ -0,0 +1,77 @@
+/**
+ * Python Deadline Helpers
+ * Gives spawned Python scripts the caller's deadline and stops them cleanly
+ * when it passes or the client goes away.
+ *
+ * The scripts take `--deadline <unix seconds>` and wind down on their own
+ * when it passes, printing a partial result marked `truncated`. SIGTERM
+ * does the same right away. SIGKILL is only sent if the script is still
+ * running after a grace period.
+ */
+
+const DEFAULT_TIMEOUT_MS = 60000;
+const GRACE_MS = 5000;
+
+/**
+ * Appends the deadline option for a run that must finish within timeoutMs
+ * @param {string[]} args - Script path and arguments
+ * @param {number} timeoutMs - Time the caller is willing to wait
+ * @returns {string[]} Arguments including `--deadline`
+ */
+const withDeadline = (args, timeoutMs = DEFAULT_TIMEOUT_MS) => {
+  return [...args, '--deadline', ((Date.now() + timeoutMs) / 1000).toFixed(3)];
+};
+
+/**
+ * Stops a spawned script once its deadline has passed or the HTTP client disconnects
+ * @param {ChildProcess} child - The spawned Python process
+ * @param {Object} options - { timeoutMs, req }; with req, a client disconnect before the response is sent cancels the run
+ * @returns {{timedOut: boolean, cancelled: boolean}} Live state, read it in the 'close' handler
+ */
+const superviseProcess = (child, { timeoutMs = DEFAULT_TIMEOUT_MS, req } = {}) => {
+  const state = { timedOut: false, cancelled: false };
+  let killTimer = null;
+
+  const stop = () => {
+    if (child.exitCode !== null || child.signalCode !== null) {
+      return;
+    }
+    child.kill('SIGTERM');
+    killTimer = setTimeout(() => child.kill('SIGKILL'), GRACE_MS);
+  };
+
+  // The script stops itself at the deadline; this only catches one that doesn't
+  const deadlineTimer = setTimeout(() => {
+    state.timedOut = true;
+    stop();
+  }, timeoutMs + GRACE_MS);
+
+  // Watch the response, not the request: the request stream closes as soon as
+  // its body has been read, while the response closes early only on a disconnect
+  const res = req && req.res;
+  const onClientGone = () => {
+    if (!res.writableFinished) {
+      state.cancelled = true;
+      stop();
+    }
+  };
+  if (res) {
+    res.on('close', onClientGone);
+  }
+
+  child.on('close', () => {
+    clearTimeout(deadlineTimer);
+    clearTimeout(killTimer);
+    if (res) {
+      res.removeListener('close', onClientGone);
+    }
+  });
+
+  return state;
+};
+
+module.exports = {
+  DEFAULT_TIMEOUT_MS,
+  withDeadline,
+  superviseProcess
+};
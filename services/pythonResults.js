@@ -0,0 +1,64 @@
+/**
+ * Python Result Reader
+ * Parses the result channel of the spawned Python scripts.
+ *
+ * The scripts write one JSON document per line to stdout (or to the file
+ * descriptor named by OUTREACH_RESULT_FD) and all progress output to
+ * stderr, so every complete line on the channel is a result frame. Frames
+ * are parsed as they arrive instead of buffering the whole output and
+ * scanning it for something that looks like JSON.
+ */
+
+const { StringDecoder } = require('string_decoder');
+
+/**
+ * Creates a line reader for one process's result channel
+ * @param {Function} [onFrame] - Called with each parsed frame as it arrives
+ * @returns {{push: Function, last: Function, frames: Object[]}}
+ */
+const createResultReader = (onFrame) => {
+  const frames = [];
+  // Keeps a multi-byte character split across two chunks intact
+  const decoder = new StringDecoder('utf8');
+  let pending = '';
+
+  const parseLine = (line) => {
+    if (!line.trim()) {
+      return;
+    }
+    try {
+      const frame = JSON.parse(line);
+      frames.push(frame);
+      if (onFrame) {
+        onFrame(frame);
+      }
+    } catch (e) {
+      // Not a frame; only a stray print from a library can get here
+      console.error('Ignoring non-JSON line on the Python result channel:', line.slice(0, 200));
+    }
+  };
+
+  return {
+    frames,
+    // Feeds a stdout chunk; complete lines are parsed right away
+    push(chunk) {
+      pending += typeof chunk === 'string' ? chunk : decoder.write(chunk);
+      let newline = pending.indexOf('\n');
+      while (newline !== -1) {
+        parseLine(pending.slice(0, newline));
+        pending = pending.slice(newline + 1);
+        newline = pending.indexOf('\n');
+      }
+    },
+    // The most recent frame, or null if the script emitted none; call once the process has closed
+    last() {
+      parseLine(pending + decoder.end());
+      pending = '';
+      return frames.length ? frames[frames.length - 1] : null;
+    }
+  };
+};
+
+module.exports = {
+  createResultReader
+};
@@ -0,0 +1,31 @@
+"""
+Test setup for the Python services.
+
+The services import each other script-style (`from outreach_core import ...`)
+from the services directory, and keep their state under OUTREACH_STATE_DIR,
+which config.py reads at import. Both are set up here, before any test
+module imports them.
+"""
+import os
+import sys
+import tempfile
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICES_DIR)
+os.environ.setdefault('OUTREACH_STATE_DIR', tempfile.mkdtemp(prefix='outreach-test-state-'))
+for name in ('OUTREACH_DEADLINE', 'OUTREACH_TIMEOUT', 'OUTREACH_CACHE_BACKEND', 'OUTREACH_RESULT_FD'):
+    os.environ.pop(name, None)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Every test starts with empty caches and no shared tier."""
+    from outreach_core.cache import all_caches, set_shared_backend
+    set_shared_backend(None)
+    for cache in all_caches():
+        cache.clear()
+    yield
+    for cache in all_caches():
+        cache.clear()
@@ -0,0 +1,79 @@
+/**
+ * Tests for the Python deadline helpers; run with `node --test services/tests`
+ */
+
+const test = require('node:test');
+const assert = require('node:assert');
+const http = require('node:http');
+const { spawn } = require('node:child_process');
+const express = require('express');
+const { withDeadline, superviseProcess } = require('../pythonDeadline');
+
+// Stands in for a Python script: exits on its own after ms unless signalled
+const spawnScript = (ms) => spawn(process.execPath, ['-e', `setTimeout(() => {}, ${ms})`]);
+
+const startServer = (t, handler) => new Promise((resolve) => {
+  const app = express();
+  app.use(express.json());
+  app.post('/run', handler);
+  const server = app.listen(0, () => resolve(server));
+  t.after(() => {
+    server.closeAllConnections();
+    server.close();
+  });
+});
+
+const postJson = (server, body) => {
+  const req = http.request({
+    port: server.address().port,
+    path: '/run',
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' }
+  });
+  req.end(JSON.stringify(body));
+  return req;
+};
+
+const readJson = (req) => new Promise((resolve, reject) => {
+  req.on('error', reject);
+  req.on('response', (res) => {
+    let data = '';
+    res.on('data', (chunk) => { data += chunk; });
+    res.on('end', () => resolve(JSON.parse(data)));
+  });
+});
+
+test('withDeadline appends an absolute deadline in seconds', () => {
+  const args = withDeadline(['services/script.py', 'query'], 30000);
+  assert.deepStrictEqual(args.slice(0, 3), ['services/script.py', 'query', '--deadline']);
+  const deadline = Number(args[3]);
+  assert.ok(Math.abs(deadline - (Date.now() / 1000 + 30)) < 1);
+});
+
+test('a request with a JSON body does not cancel its script', async (t) => {
+  const server = await startServer(t, (req, res) => {
+    const child = spawnScript(300);
+    const run = superviseProcess(child, { timeoutMs: 10000, req });
+    child.on('close', (code, signal) => res.json({ code, signal, cancelled: run.cancelled }));
+  });
+  const result = await readJson(postJson(server, { query: 'fintech' }));
+  assert.deepStrictEqual(result, { code: 0, signal: null, cancelled: false });
+});
+
+test('a client that goes away cancels its script', async (t) => {
+  let onSpawned;
+  let onClosed;
+  const spawned = new Promise((resolve) => { onSpawned = resolve; });
+  const closed = new Promise((resolve) => { onClosed = resolve; });
+  const server = await startServer(t, (req, res) => {
+    const child = spawnScript(10000);
+    const run = superviseProcess(child, { timeoutMs: 10000, req });
+    child.on('close', (code, signal) => onClosed({ signal, cancelled: run.cancelled }));
+    onSpawned();
+  });
+  const req = postJson(server, { query: 'fintech' });
+  req.on('error', () => {}); // the hang-up caused below
+  await spawned;
+  req.destroy();
+  assert.deepStrictEqual(await closed, { signal: 'SIGTERM', cancelled: true });
+});
@@ -0,0 +1,148 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import ai_outreach_assistant as app_module  # noqa: E402
+from outreach_core.outbox import Outbox  # noqa: E402
+from outreach_core.suppression import SuppressionList  # noqa: E402
+from outreach_core import validate  # noqa: E402
+from outreach_core.validate import StaticResolver, set_default_resolver  # noqa: E402
+
+DRAFT = "Hi there, we are building something you may like. " * 3
+
+
+class IdleDrainer:
+    """Stands in for the background drainer so tests drive every step themselves."""
+
+    def __init__(self, outbox, send, **options):
+        self.woken = 0
+
+    def start(self):
+        return self
+
+    def wake(self):
+        self.woken += 1
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    box = Outbox(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(app_module, 'get_outbox', lambda: box)
+    yield box
+    box.close()
+
+
+@pytest.fixture
+def suppression(tmp_path, monkeypatch):
+    store = SuppressionList(str(tmp_path / "suppression.sqlite3"))
+    monkeypatch.setattr(app_module, 'get_suppression_list', lambda: store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def client(outbox, suppression, monkeypatch):
+    monkeypatch.setattr(app_module, 'OutboxDrainer', IdleDrainer)
+    monkeypatch.setattr(app_module, 'WARM_ENABLED', False)
+    return app_module.create_app().test_client()
+
+
+@pytest.fixture
+def resolver():
+    previous = validate._default_resolver
+    set_default_resolver(StaticResolver({"acme.io": ["mx.acme.io"], "beta.io": ["mx.beta.io"]}))
+    yield
+    set_default_resolver(previous)
+
+
+def no_llm(*args, **kwargs):
+    raise AssertionError("the request must not draft")
+
+
+def send_intro(client, emails, **extra):
+    return client.post('/api/send-intro', json=dict({
+        "emails": emails, "query": "fintech", "project_summary": "We build payment rails.",
+        "fromName": "Ada", "fromEmail": "ada@startup.io"}, **extra))
+
+
+def test_send_intro_queues_without_drafting(client, outbox, monkeypatch):
+    monkeypatch.setattr(app_module, 'draft_intro_email_with_ai', no_llm)
+    monkeypatch.setattr(app_module, 'draft_personalized_intros', no_llm)
+    response = send_intro(client, ["ceo@acme.io", "not-an-email", "ceo@acme.io"], personalize=True)
+    assert response.status_code == 202
+    report = response.get_json()
+    assert report["queued"] == ["ceo@acme.io"]
+    assert {r["reason"] for r in report["rejected"]} == {"syntax", "duplicate"}
+    assert client.get(report["status_url"]).get_json()["counts"]["queued"] == 1
+    assert client.get('/api/send-intro/unknown').status_code == 404
+
+
+def test_send_intro_filters_suppressed_addresses(client, suppression):
+    suppression.add(["ceo@acme.io"], "opted_out")
+    response = send_intro(client, ["CEO+vc@acme.io"])
+    assert response.status_code == 400
+    assert response.get_json()["suppressed"] == [{"email": "CEO+vc@acme.io", "reason": "opted_out"}]
+
+
+def test_send_intro_requires_its_fields(client):
+    assert client.post('/api/send-intro', json={"emails": ["a@acme.io"]}).status_code == 400
+
+
+def test_prepare_validates_and_drafts_in_the_drainer(outbox, resolver, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'draft_personalized_intros',
+                        lambda topic, summary, emails, sender=None: calls.append(("variants", emails)) or
+                        {emails[0]: DRAFT + "\n[Your Name]"})
+    monkeypatch.setattr(app_module, 'draft_intro_email_with_ai',
+                        lambda topic, summary: calls.append(("shared", topic)) or DRAFT)
+    common = {"subject": "Intro", "topic": "fintech", "project_summary": "We build payment rails.",
+              "personalize": True, "from_name": "Ada", "from_email": "ada@startup.io"}
+    outbox.enqueue("c1", [dict(common, recipient=r) for r in ("ceo@acme.io", "cto@beta.io", "x@nomx.io")])
+    batch = outbox.claim(10)
+    skips = app_module.prepare_outbox_batch(batch)
+    by_recipient = {m["recipient"]: m for m in batch}
+    assert skips == {by_recipient["x@nomx.io"]["id"]: "undeliverable (no_mx)"}
+    assert by_recipient["ceo@acme.io"]["body"].endswith("\nAda")
+    assert by_recipient["cto@beta.io"]["body"] == DRAFT
+    assert calls == [("variants", ["ceo@acme.io", "cto@beta.io"]), ("shared", "fintech")]
+
+
+def test_record_contacted_suppresses_the_recipient(suppression):
+    app_module.record_contacted({"recipient": "ceo@acme.io"})
+    assert suppression.is_suppressed("CEO@acme.io")
+
+
+def test_suppress_route(client, suppression):
+    assert client.post('/api/suppress', json={"emails": ["a@acme.io"]}).get_json() == {
+        "added": 1, "reason": "opted_out"}
+    assert client.post('/api/suppress', json={"emails": ["a@acme.io"], "reason": "spam"}).status_code == 400
+    assert suppression.is_suppressed("a@acme.io")
+
+
+def test_an_opt_out_after_queueing_stops_the_send(outbox, suppression, monkeypatch):
+    sent = []
+    monkeypatch.setattr(app_module, 'send_email_via_api', lambda to, *args: sent.append(to) or True)
+    outbox.enqueue("c1", [{"recipient": "ceo@acme.io", "subject": "Intro", "body": DRAFT,
+                           "from_name": "Ada", "from_email": "ada@startup.io"}])
+    [message] = outbox.claim(1)
+    suppression.add(["ceo@acme.io"], "opted_out")
+    with pytest.raises(app_module.SkipMessage, match="opted_out"):
+        app_module.send_outbox_message(message)
+    assert sent == []
+
+
+def test_two_campaigns_email_a_person_once(outbox, suppression, resolver, monkeypatch):
+    from outreach_core.outbox import OutboxDrainer
+    sent = []
+    monkeypatch.setattr(app_module, 'send_email_via_api', lambda to, *args: sent.append(to) or True)
+    for campaign, recipient in (("c1", "ceo@acme.io"), ("c2", "CEO+news@acme.io"), ("c3", "ceo@acme.io")):
+        outbox.enqueue(campaign, [{"recipient": recipient, "subject": "Intro", "body": DRAFT,
+                                   "from_name": "Ada", "from_email": "ada@startup.io"}])
+    drainer = OutboxDrainer(outbox, app_module.send_outbox_message, prepare=app_module.prepare_outbox_batch,
+                            on_sent=app_module.record_contacted, batch_size=2)
+    drainer.drain()
+    drainer.stop()
+    assert sent == ["ceo@acme.io"]
+    counts = [outbox.status(c)["counts"] for c in ("c1", "c2", "c3")]
+    assert [c["sent"] for c in counts] == [1, 0, 0]
+    assert [c["skipped"] for c in counts] == [0, 1, 1]
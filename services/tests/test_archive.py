@@ -0,0 +1,125 @@
+import os
+import gzip
+import time
+
+import pytest
+
+from outreach_core.archive import WarcArchive, build_response_record, reextract_emails
+
+PAGE = b"<html><body><h1>Team</h1><p>Write to jane@acme.io or bob [at] acme [dot] io</p></body></html>"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = WarcArchive(str(tmp_path / 'archive'))
+    yield archive
+    archive.close()
+
+
+def segments(archive):
+    return sorted(name for name in os.listdir(archive.root) if name.endswith('.warc.gz'))
+
+
+def test_round_trip(archive):
+    headers = {"Content-Type": "text/html; charset=utf-8", "Content-Encoding": "gzip", "Server": "nginx"}
+    archive.append("https://acme.io/team", 200, headers, PAGE, reason='OK', content_type='text/html')
+    response = archive.lookup("https://acme.io/team")
+    assert response.url == "https://acme.io/team"
+    assert response.status == 200
+    assert bytes(response.body) == PAGE
+    assert response.headers["Server"] == "nginx"
+    assert response.headers["Content-Length"] == str(len(PAGE))
+    assert "Content-Encoding" not in response.headers  # the body is stored decoded
+    assert not response.truncated
+    assert "jane@acme.io" in response.text()
+    assert archive.lookup("https://acme.io/other") is None
+
+
+def test_segments_are_standard_gzip_warc(archive):
+    archive.append("https://a.example/", 200, {}, b"<p>one</p>")
+    archive.append("https://b.example/", 404, {}, b"<p>two</p>")
+    with gzip.open(os.path.join(archive.root, segments(archive)[0]), 'rb') as f:
+        data = f.read()
+    assert data.startswith(b"WARC/1.1\r\nWARC-Type: warcinfo")
+    assert data.count(b"WARC-Type: response") == 2
+    assert b"WARC-Target-URI: https://b.example/" in data
+
+
+def test_each_record_inflates_on_its_own(archive):
+    first = archive.append("https://a.example/", 200, {}, b"<p>one</p>")
+    second = archive.append("https://b.example/", 200, {}, b"<p>two</p>")
+    assert first[1] > 0  # after the warcinfo record
+    assert second[1] == first[1] + first[2]
+    assert bytes(archive.read(*second).body) == b"<p>two</p>"
+    assert bytes(archive.read(*first).body) == b"<p>one</p>"
+
+
+def test_truncated_capture_is_flagged(archive):
+    archive.append("https://a.example/", 200, {}, b"<p>cut", truncated=True)
+    assert archive.lookup("https://a.example/").truncated
+
+
+def test_latest_capture_wins(archive, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now)
+    archive.append("https://a.example/", 200, {}, b"<p>old</p>")
+    monkeypatch.setattr(time, 'time', lambda: now + 5)
+    archive.append("https://a.example/", 200, {}, b"<p>new</p>")
+    assert bytes(archive.lookup("https://a.example/").body) == b"<p>new</p>"
+    assert [bytes(r.body) for r in archive.iter_latest()] == [b"<p>new</p>"]
+    assert len(archive) == 2
+
+
+def test_mapping_follows_a_growing_segment(archive):
+    first = archive.append("https://a.example/", 200, {}, b"<p>one</p>")
+    archive.read(*first)  # maps the segment at its current size
+    second = archive.append("https://b.example/", 200, {}, b"<p>two</p>")
+    assert bytes(archive.read(*second).body) == b"<p>two</p>"
+
+
+def test_rolls_over_to_a_new_segment(tmp_path):
+    archive = WarcArchive(str(tmp_path / 'archive'), segment_bytes=1)
+    try:
+        first = archive.append("https://a.example/", 200, {}, b"<p>one</p>")
+        second = archive.append("https://b.example/", 200, {}, b"<p>two</p>")
+        assert (first[0], second[0]) == ("segment-00000.warc.gz", "segment-00001.warc.gz")
+        assert bytes(archive.read(*second).body) == b"<p>two</p>"
+    finally:
+        archive.close()
+
+
+def test_another_process_reads_the_same_archive(archive):
+    archive.append("https://a.example/", 200, {}, b"<p>one</p>")
+    other = WarcArchive(archive.root)
+    try:
+        assert bytes(other.lookup("https://a.example/").body) == b"<p>one</p>"
+        other.append("https://b.example/", 200, {}, b"<p>two</p>")
+    finally:
+        other.close()
+    assert bytes(archive.lookup("https://b.example/").body) == b"<p>two</p>"
+
+
+def test_text_uses_the_declared_charset(archive):
+    body = "<p>Café Müller</p>".encode('latin-1')
+    archive.append("https://a.example/", 200, {"Content-Type": "text/html; charset=iso-8859-1"}, body)
+    archive.append("https://b.example/", 200, {"Content-Type": "text/html; charset=bogus"}, b"<p>plain</p>")
+    assert archive.lookup("https://a.example/").text() == "Café Müller"
+    assert archive.lookup("https://b.example/").text() == "plain"
+
+
+def test_record_header_lengths():
+    record = build_response_record("https://a.example/", 200, "OK", {"Transfer-Encoding": "chunked"}, b"body", 0)
+    head, _, block = record.partition(b"\r\n\r\n")
+    length = int(dict(line.split(b": ", 1) for line in head.split(b"\r\n")[1:])[b"Content-Length"])
+    assert len(block) == length + 4  # the block, then the record's closing CRLF CRLF
+    assert b"Transfer-Encoding" not in block
+
+
+def test_reextract_emails_offline(archive):
+    archive.append("https://acme.io/team", 200, {"Content-Type": "text/html"}, PAGE)
+    archive.append("https://other.example/", 200, {"Content-Type": "text/html"}, b"<p>no contacts</p>")
+    results = reextract_emails(archive)
+    assert {r["email"] for r in results} == {"jane@acme.io", "bob@acme.io"}
+    assert all(r["source_link"] == "https://acme.io/team" for r in results)
+    assert reextract_emails(archive, url_filter="other.example") == []
+    assert {r["email"] for r in reextract_emails(archive, include_obfuscated=False)} == {"jane@acme.io"}
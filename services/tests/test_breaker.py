@@ -0,0 +1,182 @@
+import time
+
+import pytest
+
+from outreach_core.breaker import (
+    CLOSED, HALF_OPEN, OPEN, BreakerBoard, CircuitBreaker, CircuitOpen, is_upstream_failure,
+)
+from outreach_core.deadline import DeadlineExceeded, deadline_scope
+from outreach_core.scheduler import Overloaded
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('serpapi', window=60, failure_ratio=0.5, min_calls=4,
+                          open_seconds=10, max_open_seconds=40, clock=clock)
+
+
+def fail(breaker, error=None):
+    with pytest.raises(type(error or ConnectionError())):
+        with breaker.guard():
+            raise error or ConnectionError("refused")
+
+
+def succeed(breaker):
+    with breaker.guard():
+        pass
+
+
+def test_is_upstream_failure():
+    assert is_upstream_failure(ConnectionError())
+    assert is_upstream_failure(HTTPError(503))
+    assert is_upstream_failure(HTTPError(429))
+    assert is_upstream_failure(HTTPError(408))
+    assert not is_upstream_failure(HTTPError(404))
+    assert not is_upstream_failure(HTTPError(400))
+
+
+def test_opens_once_enough_calls_fail(breaker):
+    succeed(breaker)
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state == CLOSED  # under min_calls
+    fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen) as raised:
+        succeed(breaker)
+    assert raised.value.name == 'serpapi'
+    assert raised.value.retry_after == 10
+
+
+def test_failures_outside_the_window_are_forgotten(breaker, clock):
+    fail(breaker)
+    fail(breaker)
+    fail(breaker)
+    clock.now += 61
+    succeed(breaker)
+    assert breaker.snapshot()["calls"] == 1
+    fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_client_errors_do_not_count(breaker):
+    for _ in range(5):
+        fail(breaker, HTTPError(404))
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["failures"] == 0
+
+
+def test_marked_outcomes(breaker):
+    for _ in range(4):
+        with breaker.guard() as set_outcome:
+            set_outcome('error')  # a bad reply that was returned, not raised
+    assert breaker.state == OPEN
+
+    other = CircuitBreaker('openrouter', min_calls=2)
+    for _ in range(3):
+        with pytest.raises(ConnectionError), other.guard() as set_outcome:
+            set_outcome('ok')
+            raise ConnectionError("not the upstream's fault")
+    assert other.state == CLOSED
+
+
+def test_probe_closes_or_doubles_the_wait(breaker, clock):
+    for _ in range(4):
+        fail(breaker)
+    clock.now += 10
+
+    fail(breaker)  # the probe
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["retry_in"] == 20
+    clock.now += 20
+    fail(breaker)
+    assert breaker.snapshot()["retry_in"] == 40
+    clock.now += 40
+    fail(breaker)
+    assert breaker.snapshot()["retry_in"] == 40  # capped at max_open_seconds
+
+    clock.now += 40
+    succeed(breaker)
+    assert breaker.state == CLOSED
+    for _ in range(4):
+        fail(breaker)
+    assert breaker.snapshot()["retry_in"] == 10  # back to the first wait
+
+
+def test_only_one_probe_at_a_time(breaker, clock):
+    for _ in range(4):
+        fail(breaker)
+    clock.now += 10
+    assert breaker.before_call() is True
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.release_probe()
+    assert breaker.before_call() is True
+
+
+@pytest.mark.parametrize("error", [Overloaded("bulk", "queue_full"), DeadlineExceeded("late")])
+def test_our_own_errors_do_not_count_and_free_the_probe(breaker, clock, error):
+    for _ in range(4):
+        fail(breaker)
+    clock.now += 10
+    fail(breaker, error)
+    assert breaker.state == HALF_OPEN
+    succeed(breaker)  # the probe slot was given back
+    assert breaker.state == CLOSED
+
+
+def test_failures_after_the_deadline_do_not_count(breaker):
+    with deadline_scope(time.time() - 1):
+        for _ in range(5):
+            fail(breaker, TimeoutError("cut short"))
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls"] == 0
+
+
+def test_calls_admitted_before_opening_are_ignored(breaker):
+    for _ in range(4):
+        fail(breaker)
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+
+def test_board_keeps_host_breakers_in_an_lru():
+    board = BreakerBoard(max_hosts=2)
+    a = board.get('host:a.com')
+    b = board.get('host:b.com')
+    assert board.get('host:a.com') is a  # now most recently used
+    board.get('host:c.com')
+    assert board.get('host:a.com') is a
+    assert board.get('host:b.com') is not b  # dropped and recreated
+    assert board.get('serpapi') is board.get('serpapi')
+    assert [breaker.name for breaker in board.providers()] == ['serpapi']
+    assert a.min_calls < board.get('serpapi').min_calls
+
+
+def test_board_lists_open_hosts():
+    board = BreakerBoard()
+    host = board.get('host:down.example')
+    for _ in range(host.min_calls):
+        fail(host)
+    board.get('host:up.example')
+    assert board.open_hosts() == ['host:down.example']
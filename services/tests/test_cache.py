@@ -0,0 +1,305 @@
+import time
+import fnmatch
+import threading
+import socketserver
+
+import pytest
+
+from outreach_core import breaker
+from outreach_core.breaker import BreakerBoard
+from outreach_core.cache import (
+    KEY_PREFIX, MemoryBackend, RedisBackend, RedisError, SQLiteBackend, TTLCache, backend_from_url,
+    hash_key, set_shared_backend,
+)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Just enough of a Redis server for RedisBackend, speaking RESP2."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(('127.0.0.1', 0), RESPHandler)
+        self.password = password
+        self.data = {}
+        self.commands = []
+        self.drop_next = False
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}"
+
+    def run(self, args, state):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        if name == 'AUTH':
+            if args[1].decode() != self.password:
+                return RedisError('WRONGPASS invalid password')
+            state['authed'] = True
+            return 'OK'
+        if self.password and not state.get('authed'):
+            return RedisError('NOAUTH Authentication required.')
+        if name == 'SELECT':
+            state['db'] = int(args[1])
+            return 'OK'
+        db = self.data.setdefault(state.get('db', 0), {})
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in db.items() if expires_at <= now]:
+            del db[key]
+        if name == 'GET':
+            entry = db.get(args[1])
+            return entry[0] if entry else None
+        if name == 'SET':
+            assert args[3].upper() == b'PX'
+            db[args[1]] = (args[2], now + int(args[4]) / 1000)
+            return 'OK'
+        if name == 'DEL':
+            return sum(db.pop(key, None) is not None for key in args[1:])
+        if name == 'SCAN':
+            # One key per page, so clients have to follow the cursor. Like
+            # Redis, keys present for the whole scan are all returned even
+            # when others are deleted between pages
+            after = b'' if args[1] == b'0' else bytes.fromhex(args[1].decode())
+            pattern = args[3].decode()
+            keys = sorted(key for key in db if key > after and fnmatch.fnmatchcase(key.decode(), pattern))
+            page = keys[:1]
+            return [page[0].hex().encode() if len(keys) > 1 else b'0', page]
+        return RedisError(f"ERR unknown command '{name}'")
+
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        state = {}
+        while True:
+            line = self.rfile.readline()
+            if not line or self.server.drop_next:
+                self.server.drop_next = False
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(encode(self.server.run(args, state)))
+
+    def finish(self):
+        try:
+            super().finish()
+        except OSError:
+            pass
+
+
+def encode(reply):
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, RedisError):
+        return b'-%s\r\n' % str(reply).encode()
+    if isinstance(reply, str):
+        return b'+%s\r\n' % reply.encode()
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, bytes):
+        return b'$%d\r\n%s\r\n' % (len(reply), reply)
+    return b'*%d\r\n' % len(reply) + b''.join(encode(item) for item in reply)
+
+
+@pytest.fixture
+def redis():
+    server = FakeRedis()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    """Failures in one test must not leave the "cache" breaker open for the next."""
+    board = BreakerBoard()
+    monkeypatch.setattr(breaker, '_board', board)
+    return board
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    return SQLiteBackend(str(tmp_path / 'cache.sqlite3'))
+
+
+def test_hash_key_is_stable_and_canonical():
+    key = hash_key('search', {"q": "fintech", "num": 10})
+    assert key == hash_key('search', {"num": 10, "q": "fintech"})
+    assert key.startswith(KEY_PREFIX + ':search:')
+    assert key != hash_key('page', {"q": "fintech", "num": 10})
+    assert hash_key('llm', ('model', 'prompt')) == hash_key('llm', ['model', 'prompt'])
+
+
+def test_memory_backend_expires_and_evicts():
+    backend = MemoryBackend(maxsize=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    backend.get('a')
+    backend.set('c', 3, 60)
+    assert (backend.get('a'), backend.get('b'), backend.get('c')) == (1, None, 3)
+    backend.set('old', 4, -1)
+    assert backend.get('old') is None
+
+
+def test_sqlite_backend(sqlite_backend, tmp_path):
+    sqlite_backend.set(KEY_PREFIX + ':x', b'value', 60)
+    sqlite_backend.set(KEY_PREFIX + ':gone', b'value', -1)
+    sqlite_backend.set('other:y', b'kept', 60)
+    assert sqlite_backend.get(KEY_PREFIX + ':x') == b'value'
+    assert sqlite_backend.get(KEY_PREFIX + ':gone') is None
+    # A second process sees the same table
+    other = SQLiteBackend(sqlite_backend.path)
+    assert other.get(KEY_PREFIX + ':x') == b'value'
+    other.delete(KEY_PREFIX + ':x')
+    assert sqlite_backend.get(KEY_PREFIX + ':x') is None
+    sqlite_backend.set(KEY_PREFIX + ':z', b'value', 60)
+    sqlite_backend.clear()
+    assert sqlite_backend.get(KEY_PREFIX + ':z') is None
+    assert sqlite_backend.get('other:y') == b'kept'  # only our own keys are cleared
+
+
+def test_sqlite_backend_purges_expired_rows(sqlite_backend):
+    sqlite_backend.PURGE_EVERY = 2
+    sqlite_backend.set('a', b'1', -1)
+    sqlite_backend.set('b', b'2', 60)
+    rows = sqlite_backend._conn.execute("SELECT key FROM cache").fetchall()
+    assert rows == [('b',)]
+
+
+def test_redis_round_trip(redis):
+    backend = RedisBackend(redis.url)
+    backend.set('k', b'\x00binary\r\nvalue', 60)
+    assert backend.get('k') == b'\x00binary\r\nvalue'
+    assert backend.get('missing') is None
+    backend.delete('k')
+    assert backend.get('k') is None
+    assert redis.connections == 1  # one connection, reused
+
+
+def test_redis_ttl_is_sent_in_milliseconds(redis):
+    backend = RedisBackend(redis.url)
+    backend.set('short', b'v', 0.05)
+    assert backend.get('short') == b'v'
+    time.sleep(0.1)
+    assert backend.get('short') is None
+
+
+def test_redis_auth_and_database():
+    server = FakeRedis(password='s3cr:t')
+    try:
+        backend = RedisBackend(server.url.replace('//', '//:s3cr%3At@') + '/2')
+        backend.set('k', b'v', 60)
+        assert server.commands[:2] == ['AUTH', 'SELECT']
+        assert server.data[2][b'k'][0] == b'v'
+
+        with pytest.raises(RedisError, match='NOAUTH'):
+            RedisBackend(server.url).get('k')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_redis_clear_follows_the_scan_cursor(redis):
+    backend = RedisBackend(redis.url)
+    for name in ('a', 'b', 'c'):
+        backend.set(f"{KEY_PREFIX}:page:{name}", b'v', 60)
+    backend.set('unrelated', b'v', 60)
+    backend.clear()
+    assert list(redis.data[0]) == [b'unrelated']
+
+
+def test_redis_error_reply_keeps_working(redis):
+    backend = RedisBackend(redis.url)
+    with pytest.raises(RedisError, match='unknown command'):
+        backend.command('FLUSHALL')
+    backend.set('k', b'v', 60)
+    assert backend.get('k') == b'v'
+
+
+def test_redis_reconnects_after_a_dropped_connection(redis):
+    backend = RedisBackend(redis.url)
+    backend.set('k', b'v', 60)
+    redis.drop_next = True
+    with pytest.raises(RedisError, match='connection closed'):
+        backend.get('k')
+    assert backend.get('k') == b'v'
+    assert redis.connections == 2
+
+
+def test_backend_from_url(tmp_path):
+    assert backend_from_url('memory') is None
+    assert backend_from_url('') is None
+    assert isinstance(backend_from_url(f"sqlite://{tmp_path}/c.sqlite3"), SQLiteBackend)
+    redis = backend_from_url('redis://:pw@cache.internal:6380/3')
+    assert (redis.host, redis.port, redis.db, redis.password) == ('cache.internal', 6380, 3, 'pw')
+    with pytest.raises(ValueError, match='TLS'):
+        backend_from_url('rediss://cache.internal')
+    with pytest.raises(ValueError):
+        backend_from_url('memcached://cache.internal')
+
+
+def test_l2_hit_fills_l1(sqlite_backend):
+    set_shared_backend(sqlite_backend)
+    writer = TTLCache('t-shared')
+    writer.set(('q', 1), {"results": [1, 2]})
+    reader = TTLCache('t-shared')  # another process, same name
+    assert reader.get(('q', 1)) == {"results": [1, 2]}
+    assert reader.stats()["l2_hits"] == 1
+    sqlite_backend.clear()
+    assert reader.get(('q', 1)) == {"results": [1, 2]}  # now from L1
+    assert reader.stats()["hits"] == 2
+
+
+def test_l1_copy_keeps_the_l2_expiry(sqlite_backend, monkeypatch):
+    set_shared_backend(sqlite_backend)
+    TTLCache('t-expiry', ttl=60).set('k', 'v')
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 59.9)
+    reader = TTLCache('t-expiry', ttl=60)
+    assert reader.get('k') == 'v'
+    assert reader._local._data['k'][0] - time.monotonic() < 1
+
+
+def test_unshared_cache_never_touches_l2(sqlite_backend):
+    set_shared_backend(sqlite_backend)
+    TTLCache('t-local', shared=False).set('k', 'v')
+    assert TTLCache('t-local', shared=False).get('k') is None
+
+
+def test_delete_reaches_both_tiers(sqlite_backend):
+    set_shared_backend(sqlite_backend)
+    cache = TTLCache('t-delete')
+    cache.set('k', 'v')
+    cache.delete('k')
+    assert cache.get('k') is None
+    assert TTLCache('t-delete').get('k') is None
+
+
+class BrokenBackend:
+    def __init__(self):
+        self.calls = 0
+
+    def _fail(self, *args):
+        self.calls += 1
+        raise RedisError("connection closed")
+
+    get = set = delete = clear = _fail
+
+
+def test_l2_errors_are_misses_and_trip_the_breaker(breakers):
+    backend = BrokenBackend()
+    set_shared_backend(backend)
+    cache = TTLCache('t-broken')
+    cache.set('k', 'v')
+    assert cache.get('k') == 'v'  # L1 still serves
+    for i in range(10):
+        assert cache.get(('missing', i), 'default') == 'default'
+    assert breakers.get('cache').state == breaker.OPEN
+    calls = backend.calls
+    assert cache.get('another') is None
+    assert backend.calls == calls  # failed fast, without trying the backend
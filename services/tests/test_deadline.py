@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+
+import pytest
+
+from outreach_core import deadline as dl
+from outreach_core.deadline import (
+    Deadline, DeadlineExceeded, check_deadline, clamp_timeout, deadline_reached, deadline_scope,
+    parse_deadline, pop_deadline_option, truncated,
+)
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_default_deadline_ignores_the_environment():
+    # The service process may have OUTREACH_TIMEOUT set; it must not apply to every request
+    code = ("import threading, outreach_core.deadline as d; r = [];"
+            "t = threading.Thread(target=lambda: r.append(d.remaining())); t.start(); t.join();"
+            "print(d.remaining(), r[0])")
+    env = dict(os.environ, OUTREACH_TIMEOUT='0', OUTREACH_DEADLINE='')
+    out = subprocess.run([sys.executable, '-c', code], cwd=SERVICES_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["None", "None"]
+
+
+def test_scope_sets_and_restores_the_deadline():
+    with deadline_scope(time.time() - 1):
+        assert deadline_reached()
+        assert truncated()
+        with pytest.raises(DeadlineExceeded):
+            check_deadline("a fetch")
+    assert not deadline_reached()
+
+
+def test_clamp_timeout():
+    with deadline_scope(time.time() + 2):
+        assert clamp_timeout(10) <= 2
+        assert clamp_timeout(1) == 1
+    assert clamp_timeout(10) == 10
+    with deadline_scope(time.time() - 1), pytest.raises(DeadlineExceeded):
+        clamp_timeout(10, "an LLM call")
+
+
+def test_call_budget():
+    with deadline_scope(None, max_calls=2) as deadline:
+        deadline.charge()
+        deadline.charge()
+        with pytest.raises(DeadlineExceeded, match="call budget spent"):
+            deadline.charge("a search")
+        assert deadline.budget_spent
+        assert deadline_reached()
+
+
+def test_parse_deadline():
+    assert parse_deadline("1700000000.5") == 1700000000.5
+    assert abs(parse_deadline("5", relative=True) - (time.time() + 5)) < 1
+    for bad in ("soon", "", "nan", "inf", None):
+        with pytest.raises(ValueError):
+            parse_deadline(bad)
+
+
+def test_pop_deadline_option(monkeypatch):
+    argv = ["script.py", "--timeout", "30", "query"]
+    assert abs(pop_deadline_option(argv) - (time.time() + 30)) < 1
+    assert argv == ["script.py", "query"]
+    argv = ["script.py", "--deadline=123", "query"]
+    assert pop_deadline_option(argv) == 123
+    assert argv == ["script.py", "query"]
+    monkeypatch.setenv('OUTREACH_DEADLINE', '456')
+    assert pop_deadline_option(["script.py"]) == 456
+    with pytest.raises(ValueError, match="--timeout"):
+        pop_deadline_option(["script.py", "--timeout", "abc"])
+    monkeypatch.setenv('OUTREACH_DEADLINE', 'tomorrow')
+    with pytest.raises(ValueError, match="OUTREACH_DEADLINE"):
+        pop_deadline_option(["script.py"])
+
+
+def test_start_script_rejects_a_bad_deadline(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        dl.start_script(["script.py", "--deadline", "later"])
+    assert exit_info.value.code == 2
+    assert '"error"' in capsys.readouterr().out
+
+
+def test_flask_requests_get_their_own_deadline():
+    flask = pytest.importorskip("flask")
+    app = dl.install_deadlines(flask.Flask(__name__))
+
+    @app.route('/check')
+    def check():
+        return flask.jsonify({"reached": deadline_reached(), "remaining": dl.remaining()})
+
+    client = app.test_client()
+    assert client.get('/check', headers={"X-Deadline": str(time.time() - 1)}).get_json()["reached"] is True
+    assert client.get('/check').get_json() == {"reached": False, "remaining": None}
+    assert client.get('/check', headers={"X-Timeout": "later"}).status_code == 400
+    assert client.get('/check', headers={"X-Deadline": "nan"}).status_code == 400
+
+
+def test_cancel_stops_everything(monkeypatch):
+    monkeypatch.setattr(dl, '_cancelled', threading.Event())
+    dl.cancel()
+    assert Deadline(None).remaining() == 0.0
+    with pytest.raises(DeadlineExceeded, match="cancelled"):
+        check_deadline()
+
+
+SIGNAL_SCRIPT = """
+import sys, time
+from outreach_core.deadline import deadline_reached, start_script, truncated
+from outreach_core.output import emit
+start_script(sys.argv)
+print("ready", file=sys.stderr, flush=True)
+while {keep_going}:
+    time.sleep(0.01)
+emit({{"partial": truncated()}})
+"""
+
+
+def run_until_ready(keep_going):
+    process = subprocess.Popen([sys.executable, '-c', SIGNAL_SCRIPT.format(keep_going=keep_going)],
+                               cwd=SERVICES_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    assert process.stderr.readline().strip() == "ready"
+    return process
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or os.name == 'nt', reason="POSIX signals")
+def test_sigterm_winds_down_with_a_partial_result():
+    process = run_until_ready("not deadline_reached()")
+    process.send_signal(signal.SIGTERM)
+    out, _ = process.communicate(timeout=10)
+    assert process.returncode == 0
+    assert out.strip() == '{"partial":true}'
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM') or os.name == 'nt', reason="POSIX signals")
+def test_second_signal_exits_at_once():
+    process = run_until_ready("True")
+    process.send_signal(signal.SIGTERM)
+    time.sleep(0.2)
+    assert process.poll() is None  # the first one only asks work to stop
+    process.send_signal(signal.SIGTERM)
+    process.communicate(timeout=10)
+    assert process.returncode == -signal.SIGTERM
+
+
+def test_unscoped_work_does_not_stay_truncated(monkeypatch):
+    # Background threads share the default deadline; one of them giving up must not mark the rest partial
+    DeadlineExceeded("a refresh")
+    assert not truncated()
+    with deadline_scope(None) as deadline:
+        DeadlineExceeded("a search")
+        assert deadline.truncated and truncated()
+    assert not truncated()
+    monkeypatch.setattr(dl, '_cancelled', threading.Event())
+    dl.cancel()
+    assert truncated()
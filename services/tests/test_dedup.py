@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from outreach_core.dedup import (
+    NearDuplicateIndex, drop_near_duplicates, hamming, simhash, snippet_index, tokens,
+)
+
+WORDS = ("fintech investor seed round series venture capital fund partner portfolio startup founder "
+         "growth market payments lending banking crypto insurance wealth analytics platform").split()
+
+
+def article(seed, length=2000):
+    # Page length: on a short text even a small edit can move the SimHash past 3 bits
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def test_tokens_and_hamming():
+    assert tokens("Top 10 Fintech-Investors!") == ["top", "10", "fintech", "investors"]
+    assert tokens(None) == []
+    assert hamming(0b1011, 0b0001) == 2
+
+
+def test_simhash_ignores_case_and_punctuation():
+    text = article(1)
+    assert simhash(text) == simhash(text.upper().replace(' ', ',  '))
+    assert simhash("") == 0
+    assert simhash("two words") != 0  # too short to shingle, hashed word by word
+
+
+def test_small_edits_stay_close_and_other_texts_do_not():
+    text = article(1)
+    edited = text.replace("fintech", "FinTech") + " syndicated from the original"
+    assert hamming(simhash(text), simhash(edited)) <= 3
+    assert hamming(simhash(text), simhash(article(2))) > 10
+
+
+def test_index_finds_copies_and_remembers_originals():
+    index = NearDuplicateIndex()
+    original = article(1)
+    assert index.check(original, "https://a.example/list") is None
+    assert index.check(original + " Read more at b.example", "https://b.example/copy") == "https://a.example/list"
+    assert index.check(article(2), "https://c.example/other") is None
+    assert index.check(article(2), "https://d.example/") == "https://c.example/other"
+    assert (index.checked, index.duplicates) == (4, 2)
+
+
+def test_short_texts_are_never_matched():
+    index = NearDuplicateIndex()
+    assert index.check("Access denied", "https://a.example") is None
+    assert index.check("Access denied", "https://b.example") is None
+    assert index.fingerprint("Access denied") is None
+
+
+def test_banded_lookup_finds_every_fingerprint_within_the_distance():
+    rng = random.Random(7)
+    index = NearDuplicateIndex(max_distance=3)
+    base = rng.getrandbits(64)
+    index._add(base, "base")
+    for _ in range(200):
+        flipped = base
+        for bit in rng.sample(range(64), rng.randint(0, 3)):
+            flipped ^= 1 << bit
+        assert index._find(flipped) == "base"
+    assert index._find(base ^ 0b1111) is None  # four bits apart
+
+
+def test_max_distance_must_fit_the_bands():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(max_distance=4)
+
+
+def test_snippet_index_matches_short_texts():
+    index = snippet_index()
+    snippet = "Acme Ventures backs early stage fintech founders across Europe with seed checks and follow on"
+    assert index.check(snippet, 1) is None
+    assert index.check(snippet + ".", 2) == 1
+
+
+def test_drop_near_duplicates_keeps_the_first_copy():
+    items = [{"id": 1, "text": article(1)}, {"id": 2, "text": article(1) + " copy"}, {"id": 3, "text": article(3)}]
+    kept = drop_near_duplicates(items, text_of=lambda item: item["text"], key_of=lambda item: item["id"])
+    assert [item["id"] for item in kept] == [1, 3]
@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from outreach_core import llm
+from outreach_core.drafts import (
+    build_variants_prompt, draft_intro_variants, fill_sender, parse_variants, validate_draft,
+)
+
+GOOD_BODY = " ".join(["word"] * 40)
+
+
+class FakeClient:
+    """Stands in for the OpenAI client; replies with `replies` in turn and counts the calls."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **options):
+        self.prompts.append(messages[0]["content"])
+        reply = self.replies[min(len(self.prompts), len(self.replies)) - 1]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def install(*replies):
+        fake = FakeClient(*replies)
+        monkeypatch.setattr(llm, 'get_openrouter_client', lambda api_key=None: fake)
+        return fake
+    return install
+
+
+def variants_reply(**bodies):
+    return json.dumps({"variants": [{"id": rid, "body": body} for rid, body in bodies.items()]})
+
+
+def test_parse_variants_tolerates_fences_and_chatter():
+    reply = "Sure!\n```json\n" + variants_reply(a="hello") + "\n```"
+    assert parse_variants(reply) == {"a": "hello"}
+    assert parse_variants("not json") == {}
+    assert parse_variants('{"variants": [{"id": 1}]}') == {}
+
+
+def test_validate_draft_rejects_placeholders_and_bad_lengths():
+    assert validate_draft(GOOD_BODY) is None
+    assert validate_draft("too short") == "too_short"
+    assert validate_draft(" ".join(["word"] * 300)) == "too_long"
+    assert validate_draft(GOOD_BODY + " Hi [First Name]") == "placeholder"
+    assert validate_draft(GOOD_BODY + "\nBest regards,\n[Your Name]") == "placeholder"
+
+
+def test_prompt_signs_with_sender_or_leaves_signature_out():
+    recipients = [{"id": "1", "email": "a@b.com"}]
+    assert '"Ada Lovelace"' in build_variants_prompt("fintech", "summary", recipients, sender="Ada Lovelace")
+    assert "[Your Name]" not in build_variants_prompt("fintech", "summary", recipients)
+
+
+def test_fill_sender():
+    assert fill_sender("Thanks,\n[Your Name]", "Ada") == "Thanks,\nAda"
+    assert fill_sender("Thanks,\n[your full name]", "Ada") == "Thanks,\nAda"
+    assert fill_sender("Thanks,\n[Your Name]", None) == "Thanks,\n[Your Name]"
+    assert fill_sender(None, "Ada") is None
+
+
+def test_drafts_every_recipient_in_one_call(client):
+    fake = client(variants_reply(a=GOOD_BODY, b=GOOD_BODY))
+    drafts = draft_intro_variants("fintech", "summary", [{"id": "a"}, {"id": "b"}], api_key="k", retries=0)
+    assert drafts == {"a": GOOD_BODY, "b": GOOD_BODY}
+    assert len(fake.prompts) == 1
+
+
+def test_retries_only_invalid_drafts(client):
+    fake = client(variants_reply(a=GOOD_BODY, b="short"), variants_reply(b=GOOD_BODY))
+    drafts = draft_intro_variants("fintech", "summary", [{"id": "a"}, {"id": "b"}], api_key="k", retries=1)
+    assert drafts == {"a": GOOD_BODY, "b": GOOD_BODY}
+    assert len(fake.prompts) == 2
+    assert '"b"' in fake.prompts[1] and '"a"' not in fake.prompts[1]
+
+
+def test_retry_of_a_failed_chunk_reaches_the_model(client):
+    fake = client("not json", "not json", variants_reply(a=GOOD_BODY))
+    drafts = draft_intro_variants("fintech", "summary", [{"id": "a"}], api_key="k", retries=2)
+    assert drafts == {"a": GOOD_BODY}
+    assert len(fake.prompts) == 3
+
+
+def test_unparseable_reply_is_not_cached(client):
+    fake = client("not json", variants_reply(a=GOOD_BODY))
+    assert draft_intro_variants("fintech", "summary", [{"id": "a"}], api_key="k", retries=0) == {}
+    assert draft_intro_variants("fintech", "summary", [{"id": "a"}], api_key="k", retries=0) == {"a": GOOD_BODY}
+    assert len(fake.prompts) == 2
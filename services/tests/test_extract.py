@@ -0,0 +1,237 @@
+import json
+import time
+
+import pytest
+
+from outreach_core import extract
+from outreach_core.deadline import deadline_scope
+from outreach_core.extract import email_context, find_emails, format_email_results, harvest_emails
+from outreach_core.records import EmailHarvest
+from outreach_core.yield_stats import MIN_FETCHES_TO_PRUNE, YieldStats
+
+
+class FakeWeb:
+    """Stands in for SerpAPI and the page fetcher."""
+
+    def __init__(self):
+        self.pages = {}
+        self.results = {}
+        self.fetched = []
+        self.queries = []
+
+    def scrape(self, url, max_chars=None):
+        self.fetched.append(url)
+        return self.pages.get(url, "")
+
+    async def search(self, query, num_results=10, api_key=None):
+        self.queries.append(query)
+        results = self.results.get(query, [])
+        if isinstance(results, Exception):
+            raise results
+        return results
+
+
+@pytest.fixture
+def web(monkeypatch):
+    web = FakeWeb()
+    monkeypatch.setattr(extract, 'scrape_text_from_url', web.scrape)
+    monkeypatch.setattr(extract, 'serpapi_search_async', web.search)
+    monkeypatch.setattr(extract, 'QUERY_DELAY', 0)
+    return web
+
+
+def hit(link, snippet="", title="Result"):
+    return {"title": title, "link": link, "snippet": snippet}
+
+
+def emails_of(results):
+    return [r["email"] for r in results]
+
+
+def test_find_emails():
+    text = "Mail jane@acme.io or bob.smith+vc@globex.co.uk; not me@localhost. Or tom [at] initech [dot] com"
+    assert find_emails(text) == ["jane@acme.io", "bob.smith+vc@globex.co.uk"]
+    assert find_emails(text, include_obfuscated=True)[-1] == "tom@initech.com"
+    assert find_emails("") == []
+
+
+def test_email_context():
+    text = "a" * 200 + " jane@acme.io " + "b" * 200
+    context = email_context(text, "jane@acme.io", window=10)
+    assert context == "a" * 9 + " jane@acme.io " + "b" * 9
+    assert email_context(text, "bob@acme.io", default="n/a") == "n/a"
+
+
+def test_format_email_results_accepts_a_mapping():
+    assert format_email_results({"jane@acme.io": {"title": "Acme", "link": "https://acme.io"}}) == [{
+        "email": "jane@acme.io", "source_title": "Acme", "source_link": "https://acme.io", "context": "",
+    }]
+
+
+def test_target_sites_are_scraped_first(web):
+    web.pages["https://acme.io/team"] = "Partners: jane@acme.io, bob (at) acme (dot) io"
+    found = harvest_emails("fintech", target_sites=["https://acme.io/team"], search_queries=["q"],
+                           min_emails=2, adaptive=False)
+    assert emails_of(found) == ["jane@acme.io", "bob@acme.io"]
+    assert found[0]["source_title"] == "From acme.io"
+    assert found[0]["source_link"] == "https://acme.io/team"
+    assert "jane@acme.io" in found[0]["context"]
+    assert web.queries == []  # enough already
+
+
+def test_search_snippets_and_linked_pages(web):
+    web.results["q1"] = [hit("https://a.io", "write to jane@a.io"), hit("https://b.io", "no address here")]
+    web.pages["https://b.io"] = "Contact: bob@b.io"
+    found = harvest_emails("fintech", search_queries=["q1"], min_emails=5, adaptive=False)
+    assert emails_of(found) == ["jane@a.io", "bob@b.io"]
+    assert found[1]["context"] == "Found on linked page"
+
+
+def test_stops_once_enough_emails_are_found(web):
+    web.results["q1"] = [hit("https://a.io", "jane@a.io bob@a.io")]
+    web.results["q2"] = [hit("https://b.io", "tom@b.io")]
+    found = harvest_emails("fintech", search_queries=["q1", "q2"], min_emails=2, adaptive=False)
+    assert emails_of(found) == ["jane@a.io", "bob@a.io"]
+    assert web.queries == ["q1"]
+    assert web.fetched == []  # the snippets were enough
+
+
+def test_max_results_caps_the_hits_counted(web):
+    web.results["q1"] = [hit(f"https://{i}.io", f"p{i}@{i}.io") for i in range(6)]
+    web.results["q2"] = [hit("https://x.io", "x@x.io")]
+    found = harvest_emails("fintech", search_queries=["q1", "q2"], min_emails=50, max_results=3, adaptive=False)
+    assert web.queries == ["q1"]
+    assert len(found) == 4  # the rest of the wave is still scanned
+
+
+def test_a_failing_query_does_not_end_the_harvest(web):
+    web.results["q1"] = ConnectionError("refused")
+    web.results["q2"] = [hit("https://a.io", "jane@a.io")]
+    assert emails_of(harvest_emails("fintech", search_queries=["q1", "q2"], adaptive=False)) == ["jane@a.io"]
+
+
+def test_overload_is_not_swallowed(web):
+    web.results["q1"] = extract.Overloaded("bulk", "queue_full")
+    with pytest.raises(extract.Overloaded):
+        harvest_emails("fintech", search_queries=["q1"], adaptive=False)
+
+
+def test_samples_top_up_a_shortfall(web):
+    web.results["q1"] = [hit("https://a.io", "jane@a.io")]
+    found = harvest_emails("fintech", search_queries=["q1"], min_emails=3, adaptive=False,
+                           sample_emails=["jane@a.io", "info@globex.io", "hello@initech.io", "more@x.io"])
+    assert emails_of(found) == ["jane@a.io", "info@globex.io", "hello@initech.io"]
+    assert found[1]["source_link"] == "https://www.globex.io"
+
+
+def test_past_deadline_only_samples_are_returned(web):
+    web.pages["https://acme.io"] = "jane@acme.io"
+    web.results["q1"] = [hit("https://a.io", "bob@a.io")]
+    with deadline_scope(time.time() - 1):
+        found = harvest_emails("fintech", target_sites=["https://acme.io"], search_queries=["q1"],
+                               min_emails=1, sample_emails=["info@globex.io"], adaptive=False)
+    assert emails_of(found) == ["info@globex.io"]
+    assert web.fetched == [] and web.queries == []
+
+
+def test_the_query_delay_ends_at_the_deadline(web, monkeypatch):
+    monkeypatch.setattr(extract, 'QUERY_DELAY', 30)
+    web.results["q1"] = [hit("https://a.io", "no address")]
+    started = time.time()
+    with deadline_scope(time.time() + 0.2):
+        harvest_emails("fintech", search_queries=["q1", "q2"], adaptive=False)
+    assert time.time() - started < 5
+    assert web.queries == ["q1"]
+
+
+def test_syndicated_copies_are_skipped(web):
+    article = " ".join(f"word{i}" for i in range(400))
+    web.results["q1"] = [hit("https://a.io/post", "no address"), hit("https://b.io/copy", "no address either")]
+    web.results["q2"] = [hit("https://a.io/post", "no address")]
+    web.pages["https://a.io/post"] = article + " jane@a.io"
+    web.pages["https://b.io/copy"] = article + " bob@b.io"
+    found = harvest_emails("fintech", search_queries=["q1", "q2"], min_emails=5, adaptive=False,
+                           compact=True)
+    assert isinstance(found, EmailHarvest)
+    assert list(found) == ["jane@a.io"]  # the copy on b.io was not scanned
+    assert web.fetched.count("https://a.io/post") == 1  # not fetched again for q2
+
+
+def test_scrape_top_k_fetches_only_the_best_ranked_pages(web):
+    web.results["q1"] = [
+        hit("https://cooking.io", "pasta recipes and sauces", "Cooking"),
+        hit("https://vc.io", "fintech venture capital investors", "Fintech VC"),
+        hit("https://sports.io", "football scores", "Sports"),
+    ]
+    harvest_emails("fintech", search_queries=["q1"], adaptive=False,
+                   relevance_query="fintech venture investors", scrape_top_k=1)
+    assert web.fetched == ["https://vc.io"]
+
+
+def test_sync_wrapper_refuses_a_running_loop(web):
+    import asyncio
+
+    async def main():
+        harvest_emails("fintech", adaptive=False)
+
+    with pytest.raises(RuntimeError, match="running event loop"):
+        asyncio.run(main())
+
+
+@pytest.fixture
+def stats(tmp_path, monkeypatch):
+    stats = YieldStats(str(tmp_path / "yield.json"))
+    monkeypatch.setattr(extract, 'get_yield_stats', lambda: stats)
+    return stats
+
+
+def test_adaptive_harvest_records_and_saves_yield(web, stats, tmp_path):
+    web.results['"fintech" team'] = [hit("https://a.io", "no address"), hit("https://b.io", "no address")]
+    web.pages["https://a.io"] = "jane@a.io and again jane@a.io, bob@a.io"
+    web.pages["https://b.io"] = "nothing to see"
+    harvest_emails("fintech", search_queries=['"fintech" team', "empty"], min_emails=5)
+    assert stats.domains["a.io"]["emails"] == 2 and stats.domains["b.io"]["emails"] == 0
+    assert stats.templates['"{topic}" team'] == {"runs": 1, "emails": 2}
+    assert stats.templates["empty"] == {"runs": 1, "emails": 0}
+    with open(tmp_path / "yield.json", encoding='utf-8') as f:
+        assert json.load(f)["templates"]['"{topic}" team']["emails"] == 2
+
+
+def test_failed_fetches_say_nothing_about_a_domain(web, stats):
+    web.results["q1"] = [hit("https://down.io", "no address")]
+    harvest_emails("fintech", search_queries=["q1"])
+    assert "down.io" not in stats.domains
+
+
+def test_adaptive_harvest_skips_barren_domains_and_orders_by_yield(web, stats):
+    for _ in range(MIN_FETCHES_TO_PRUNE):
+        stats.record_fetch("https://barren.io", 0)
+    for _ in range(3):
+        stats.record_fetch("https://rich.io", 5)
+        stats.record_query("best {topic}", 5)
+    web.results["worst fintech"] = [hit("https://barren.io/x"), hit("https://plain.io"), hit("https://rich.io")]
+    web.results["best fintech"] = []
+    harvest_emails("fintech", search_queries=["worst fintech", "best fintech"],
+                   target_sites=["https://www.linkedin.com/company/acme"])
+    assert web.queries == ["best fintech", "worst fintech"]
+    assert web.fetched == ["https://rich.io", "https://plain.io"]
+
+
+def test_non_adaptive_harvest_leaves_the_stats_alone(web, stats):
+    web.results["q1"] = [hit("https://a.io")]
+    web.pages["https://a.io"] = "jane@a.io"
+    harvest_emails("fintech", search_queries=["q1"], adaptive=False)
+    assert stats.domains == {} and stats.templates == {}
+
+
+def test_a_truncated_query_is_not_recorded(web, stats, monkeypatch):
+    web.results["q1"] = [hit(f"https://{i}.io") for i in range(8)]
+    with deadline_scope(time.time() + 60) as deadline:
+        def scrape(url, max_chars=None):
+            deadline.expires_at = time.time() - 1  # time runs out during the first wave
+            return web.scrape(url, max_chars)
+        monkeypatch.setattr(extract, 'scrape_text_from_url', scrape)
+        harvest_emails("fintech", search_queries=["q1"], min_emails=5)
+    assert deadline.truncated
+    assert len(web.fetched) == extract.SCRAPE_WAVE_SIZE
+    assert "q1" not in stats.templates
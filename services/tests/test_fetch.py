@@ -0,0 +1,171 @@
+import pytest
+
+from outreach_core import breaker, fetch
+from outreach_core.breaker import BreakerBoard, CLOSED, OPEN
+from outreach_core.cache import page_cache
+from outreach_core.fetch import (
+    FetchError, fetch_page_html, fetch_page_text, html_to_text, is_html, scrape_text_from_url, scrape_url_content,
+)
+
+
+class FakeResponse:
+    def __init__(self, body=b'', status_code=200, content_type='text/html; charset=utf-8', chunk=64):
+        self.status_code = status_code
+        self.reason = 'OK'
+        self.headers = {'Content-Type': content_type} if content_type else {}
+        self.body = body
+        self.chunk = chunk
+        self.chunks_read = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk):
+            self.chunks_read += 1
+            yield self.body[start:start + self.chunk]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+
+    def get(self, url, timeout=None, stream=False):
+        assert stream
+        self.requests.append(url)
+        page = self.pages[url]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(fetch, 'get_session', lambda: session)
+    monkeypatch.setattr(breaker, '_board', BreakerBoard())
+    return session
+
+
+def paragraphs(n):
+    return b'<html><body>' + b''.join(b'<p>paragraph %d</p>' % i for i in range(n)) + b'</body></html>'
+
+
+def test_html_to_text():
+    html = "<html><head><style>p {}</style><script>var x = '<p>no</p>';</script></head>" \
+           "<body><p> Hello </p><p>w&amp;rld</p></body></html>"
+    assert html_to_text(html) == "Hello w&rld"
+    assert html_to_text(b"<p>caf\xc3\xa9</p>") == "café"
+
+
+def test_is_html():
+    assert is_html("text/html; charset=utf-8")
+    assert is_html("Application/XHTML+XML")
+    assert not is_html("application/pdf")
+
+
+def test_stops_reading_once_the_text_is_long_enough(session):
+    response = session.pages['https://a.example/'] = FakeResponse(paragraphs(500))
+    text = fetch_page_text('https://a.example/', max_chars=50)
+    assert text.startswith("paragraph 0 paragraph 1")
+    assert len(text) > 50
+    assert response.chunks_read < len(response.body) // response.chunk
+    assert response.closed
+
+
+def test_stops_at_the_byte_cap(session):
+    response = session.pages['https://a.example/'] = FakeResponse(paragraphs(500))
+    text = fetch_page_text('https://a.example/', max_bytes=200)
+    assert response.chunks_read == 4
+    assert "paragraph 499" not in text
+
+
+def test_text_split_across_chunks_is_joined(session):
+    session.pages['https://a.example/'] = FakeResponse(b"<p>Write to jane@acme.io today</p><p>Bye</p>", chunk=5)
+    assert fetch_page_text('https://a.example/') == "Write to jane@acme.io today Bye"
+    session.pages['https://b.example/'] = FakeResponse(b"<p>" + b"word " * 400 + b"</p>", chunk=7)
+    text = fetch_page_text('https://b.example/', max_chars=100)
+    assert len(text) > 100
+    assert set(text.split()[:-1]) == {"word"}  # only the cut-off end may be a partial word
+
+
+def test_decodes_the_declared_charset_across_chunks(session):
+    body = ("<p>" + "é" * 100 + "</p>").encode('utf-8')
+    session.pages['https://a.example/'] = FakeResponse(body, content_type='text/html; charset=UTF-8', chunk=7)
+    session.pages['https://b.example/'] = FakeResponse("<p>Müller</p>".encode('latin-1'),
+                                                       content_type='text/html; charset=latin-1')
+    session.pages['https://c.example/'] = FakeResponse(b"<p>plain</p>", content_type='text/html; charset=nope')
+    assert fetch_page_text('https://a.example/') == "é" * 100
+    assert fetch_page_text('https://b.example/') == "Müller"
+    assert fetch_page_text('https://c.example/') == "plain"
+
+
+def test_pages_without_a_content_type_are_read(session):
+    session.pages['https://a.example/'] = FakeResponse(b"<p>hi</p>", content_type=None)
+    assert fetch_page_text('https://a.example/') == "hi"
+
+
+def test_non_html_is_rejected_without_reading_it(session):
+    response = session.pages['https://a.example/doc.pdf'] = FakeResponse(b"%PDF-1.4", content_type='application/pdf')
+    for _ in range(3):
+        with pytest.raises(FetchError, match='Unsupported content type'):
+            fetch_page_text('https://a.example/doc.pdf')
+    assert response.chunks_read == 0 and response.closed
+    assert breaker.host_breaker('a.example').state == CLOSED  # the host is fine
+
+
+def test_status_errors(session):
+    session.pages['https://a.example/missing'] = FakeResponse(status_code=404)
+    with pytest.raises(FetchError) as raised:
+        fetch_page_text('https://a.example/missing')
+    assert raised.value.status == 404
+    assert scrape_url_content('https://a.example/missing') == "Failed to retrieve content (Status code: 404)"
+    assert breaker.host_breaker('a.example').state == CLOSED
+
+
+def test_a_failing_host_trips_its_breaker(session):
+    session.pages['https://down.example/'] = FakeResponse(status_code=503)
+    session.pages['https://down.example/other'] = ConnectionError("refused")
+    for url in ('https://down.example/', 'https://down.example/other'):
+        with pytest.raises(FetchError):
+            fetch_page_text(url)
+    assert breaker.host_breaker('down.example').state == OPEN
+    with pytest.raises(FetchError, match='Circuit open'):
+        fetch_page_text('https://www.down.example/')
+    assert len(session.requests) == 2  # failed fast, without a request
+
+
+def test_complete_pages_are_cached(session):
+    session.pages['https://a.example/'] = FakeResponse(b"<p>short page</p>")
+    fetch_page_text('https://a.example/', max_chars=5000)
+    fetch_page_text('https://a.example/', max_chars=5)
+    fetch_page_text('https://a.example/')
+    assert session.requests == ['https://a.example/']
+
+
+def test_a_cut_short_page_is_fetched_again_for_more_text(session):
+    session.pages['https://a.example/'] = FakeResponse(paragraphs(500))
+    short = fetch_page_text('https://a.example/', max_chars=50)
+    assert fetch_page_text('https://a.example/', max_chars=20) == short  # enough already
+    longer = fetch_page_text('https://a.example/', max_chars=2000)
+    assert len(longer) > 2000
+    assert len(session.requests) == 2
+
+
+def test_fetch_page_html_returns_markup_and_caches_text(session):
+    session.pages['https://a.example/'] = FakeResponse(b"<ul><li>Acme</li><li>Globex</li></ul>")
+    assert fetch_page_html('https://a.example/') == "<ul><li>Acme</li><li>Globex</li></ul>"
+    assert page_cache.get('https://a.example/') == ("Acme Globex", True)
+    assert fetch_page_text('https://a.example/') == "Acme Globex"
+    assert len(session.requests) == 1
+
+
+def test_scrapers_never_raise(session):
+    session.pages['https://a.example/'] = ConnectionError("refused")
+    session.pages['https://b.example/'] = FakeResponse(paragraphs(500))
+    assert scrape_text_from_url('https://a.example/') == ""
+    assert scrape_url_content('https://a.example/').startswith("Error scraping content: refused")
+    assert scrape_url_content('https://b.example/', max_chars=30).endswith("... [content truncated]")
+    assert len(scrape_text_from_url('https://b.example/', max_chars=30)) == 30
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from outreach_core.deadline import deadline_scope, deadline_reached
+from outreach_core.jobs import JobStore, NullJobStore, new_job_id
+
+
+@pytest.fixture
+def job(tmp_path):
+    return JobStore("research-1", root=str(tmp_path))
+
+
+def test_new_job_id():
+    assert new_job_id("Fintech Investors in EU!").startswith("fintech-investors-in-eu-")
+    assert new_job_id() != new_job_id()
+    JobStore(new_job_id("a/../b"))  # always a valid ID
+
+
+@pytest.mark.parametrize("job_id", ["../escape", "a/b", "", "with space"])
+def test_invalid_job_ids(job_id, tmp_path):
+    with pytest.raises(ValueError):
+        JobStore(job_id, root=str(tmp_path))
+
+
+def test_put_and_get(job):
+    assert not job.exists()
+    job.put("search", "fintech investors", [{"link": "https://a.example"}])
+    assert job.exists()
+    assert job.has("search", "fintech investors")
+    assert job.get("search", "fintech investors") == [{"link": "https://a.example"}]
+    assert job.get("search", "other", "default") == "default"
+    assert not os.path.exists(job._unit_path("search", "fintech investors") + '.tmp')
+
+
+def test_keys_that_look_alike_get_their_own_files(job):
+    job.put("profile", "Acme/Inc", 1)
+    job.put("profile", "Acme?Inc", 2)
+    job.put("profile", "x" * 100 + "a", 3)
+    job.put("profile", "x" * 100 + "b", 4)
+    assert [job.get("profile", key) for key in ("Acme/Inc", "Acme?Inc", "x" * 100 + "a", "x" * 100 + "b")] == [1, 2, 3, 4]
+
+
+def test_a_corrupt_checkpoint_is_recomputed(job):
+    job.put("search", "q", ["old"])
+    with open(job._unit_path("search", "q"), 'w') as f:
+        f.write('{"value": [')
+    assert job.step("search", "q", lambda: ["new"]) == ["new"]
+    assert job.get("search", "q") == ["new"]
+
+
+def test_step_resumes_from_checkpoints(job, tmp_path):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert job.step("profile", "acme", compute) == {"n": 1}
+    resumed = JobStore("research-1", root=str(tmp_path))  # a later run of the same job
+    assert resumed.step("profile", "acme", compute) == {"n": 1}
+    assert len(calls) == 1
+
+
+def test_step_skips_saving_rejected_results(job):
+    assert job.step("search", "q", lambda: [], save_if=bool) == []
+    assert not job.has("search", "q")
+    assert job.step("search", "q", lambda: ["hit"], save_if=bool) == ["hit"]
+    assert job.has("search", "q")
+
+
+def test_step_does_not_save_work_cut_short_by_the_deadline(job):
+    with deadline_scope(time.time() - 1):
+        def compute():
+            deadline_reached()  # the work notices the deadline and returns early
+            return ["partial"]
+        assert job.step("search", "q", compute) == ["partial"]
+    assert not job.has("search", "q")
+
+
+def test_status(job):
+    assert job.status() is None
+    job.set_status("running", topic="fintech")
+    job.set_status("done")
+    meta = job.get("meta", "job")
+    assert (meta["status"], meta["topic"]) == ("done", "fintech")
+    assert job.status() == "done"
+
+
+def test_null_store_never_checkpoints():
+    store = NullJobStore()
+    calls = []
+    for _ in range(2):
+        store.step("search", "q", lambda: calls.append(1) or ["hit"])
+    assert len(calls) == 2
+    assert not store.exists() and not store.has("search", "q")
+    store.set_status("done")
+    assert store.status() is None
@@ -0,0 +1,72 @@
+from outreach_core.config import LISTING_MIN_CONFIDENCE
+from outreach_core.listing import clean_name, extract_listing, looks_like_name, score_group
+
+COMPANIES = ["Stripe", "Plaid", "Chime", "Revolut", "Monzo"]
+
+
+def page(body, title="<h1>Top 5 Fintech Startups</h1>"):
+    return f"<html><body>{title}{body}</body></html>"
+
+
+def test_clean_name():
+    assert clean_name("3. Stripe – payments for the internet") == "Stripe"
+    assert clean_name("#12 Plaid: bank APIs") == "Plaid"
+    assert clean_name("(4) Chime (YC W14)") == "Chime"
+
+
+def test_looks_like_name():
+    assert looks_like_name("Plaid Technologies")
+    assert looks_like_name("eToro")
+    assert not looks_like_name("why this matters for founders")
+    assert not looks_like_name("This is a sentence.")
+
+
+def test_score_group():
+    names, confidence = score_group([f"{i}. {name}" for i, name in enumerate(COMPANIES, 1)])
+    assert names == COMPANIES and confidence == 1.0
+    assert score_group(["Stripe", "Plaid"]) == (["Stripe", "Plaid"], 0.0)
+    assert score_group(["Conclusion", "FAQ"]) == ([], 0.0)
+
+
+def test_numbered_list_in_article():
+    items = "".join(f"<li>{name} - does fintech things</li>" for name in COMPANIES)
+    names, confidence = extract_listing(page(f"<article><ol>{items}</ol></article>"))
+    assert names == COMPANIES
+    assert confidence >= LISTING_MIN_CONFIDENCE
+
+
+def test_numbered_list_of_links_is_kept():
+    items = "".join(f'<li><a href="/{name}">{name}</a></li>' for name in COMPANIES)
+    names, confidence = extract_listing(page(f"<main><ol>{items}</ol></main>"))
+    assert names == COMPANIES
+    assert confidence >= LISTING_MIN_CONFIDENCE
+
+
+def test_menu_outside_nav_loses_to_the_article_headings():
+    # Regression: a <div><ul> site menu used to win with 0.85 and be profiled as companies
+    menu = "".join(f'<li><a href="/{item.lower()}">{item}</a></li>' for item in
+                   ["Products", "Pricing", "Careers", "Customers", "Partners", "Resources", "Company"])
+    headings = "".join(f"<h2>{name}</h2><p>{name} is a company that builds things.</p>" for name in COMPANIES)
+    html = f'<html><body><div class="menu"><ul>{menu}</ul></div><h1>Top 5 Fintech Startups</h1>{headings}</body></html>'
+    names, confidence = extract_listing(html)
+    assert names == COMPANIES
+    assert confidence >= LISTING_MIN_CONFIDENCE
+
+
+def test_menu_alone_is_not_confident():
+    menu = "".join(f'<li><a href="/{item.lower()}">{item}</a></li>' for item in
+                   ["Products", "Pricing", "Careers", "Customers", "Partners"])
+    html = f'<html><body><div><ul>{menu}</ul></div><h1>Our blog</h1><p>Nothing listed here.</p></body></html>'
+    assert extract_listing(html)[1] < LISTING_MIN_CONFIDENCE
+
+
+def test_skips_nav_and_footer():
+    nav = "".join(f"<li>{item}</li>" for item in ["Home", "About", "Blog", "Contact", "Jobs"])
+    items = "".join(f"<li>{name}</li>" for name in COMPANIES)
+    names, _ = extract_listing(page(f"<nav><ul>{nav}</ul></nav><ol>{items}</ol><footer><ul>{nav}</ul></footer>"))
+    assert names == COMPANIES
+
+
+def test_page_without_structure():
+    assert extract_listing("") == ([], 0.0)
+    assert extract_listing(b"<p>Just prose about fintech.</p>") == ([], 0.0)
@@ -0,0 +1,86 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from outreach_core import breaker, llm
+from outreach_core.breaker import BreakerBoard, CircuitOpen, OPEN
+from outreach_core.deadline import DeadlineExceeded, deadline_scope
+from outreach_core.llm import complete, complete_async
+
+
+class FakeClient:
+    def __init__(self, reply="Hello"):
+        self.reply = reply
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **options):
+        self.calls.append(options)
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(llm, 'get_openrouter_client', lambda api_key=None: client)
+    monkeypatch.setattr(breaker, '_board', BreakerBoard())
+    return client
+
+
+def test_complete_sends_one_user_message(client):
+    assert complete("Write an intro", model="some/model") == "Hello"
+    assert client.calls == [{"model": "some/model", "messages": [{"role": "user", "content": "Write an intro"}]}]
+
+
+def test_replies_are_cached_per_model_and_prompt(client):
+    complete("Write an intro", model="a")
+    complete("Write an intro", model="a")
+    complete("Write an intro", model="b")
+    complete("Write an intro", model="a", use_cache=False)
+    assert [call["model"] for call in client.calls] == ["a", "b", "a"]
+
+
+def test_errors_are_raised_and_not_cached(client):
+    client.reply = ConnectionError("refused")
+    with pytest.raises(ConnectionError):
+        complete("Write an intro")
+    client.reply = "Hello"
+    assert complete("Write an intro") == "Hello"
+
+
+def test_an_open_breaker_fails_fast(client):
+    client.reply = ConnectionError("refused")
+    for _ in range(20):
+        with pytest.raises(ConnectionError):
+            complete("Write an intro", use_cache=False)
+        if breaker.get_breaker('openrouter').state == OPEN:
+            break
+    calls = len(client.calls)
+    with pytest.raises(CircuitOpen):
+        complete("Write an intro", use_cache=False)
+    assert len(client.calls) == calls
+
+
+def test_the_deadline_bounds_the_call(client):
+    with deadline_scope(time.time() + 30):
+        complete("Write an intro")
+    assert 0 < client.calls[0]["timeout"] <= 30
+    with deadline_scope(time.time() - 1), pytest.raises(DeadlineExceeded):
+        complete("Another prompt")
+    assert len(client.calls) == 1
+
+
+def test_complete_async(client):
+    import asyncio
+    assert asyncio.run(complete_async("Write an intro")) == "Hello"
+
+
+def test_one_client_per_key(monkeypatch):
+    openai = pytest.importorskip('openai')
+    monkeypatch.setattr(llm, '_clients', {})
+    assert llm.get_openrouter_client("key-a") is llm.get_openrouter_client("key-a")
+    assert llm.get_openrouter_client("key-a") is not llm.get_openrouter_client("key-b")
+    assert isinstance(llm.get_openrouter_client("key-a"), openai.OpenAI)
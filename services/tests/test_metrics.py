@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+from outreach_core import metrics
+from outreach_core.metrics import Registry, dump, instrument_app, render, track_upstream
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_counter_and_gauge(registry):
+    requests = registry.counter('test_requests_total', 'Requests.', ('route',))
+    requests.inc(route='/a')
+    requests.inc(2, route='/a')
+    assert requests.value(route='/a') == 3
+    assert requests.value(route='/b') == 0
+    depth = registry.gauge('test_depth', 'Depth.')
+    depth.inc(5)
+    depth.dec(2)
+    assert depth.value() == 3
+    depth.set(0.5)
+    assert registry.render() == (
+        "# HELP test_requests_total Requests.\n"
+        "# TYPE test_requests_total counter\n"
+        'test_requests_total{route="/a"} 3\n'
+        "# HELP test_depth Depth.\n"
+        "# TYPE test_depth gauge\n"
+        "test_depth 0.5\n"
+    )
+
+
+def test_labels_must_match(registry):
+    counter = registry.counter('test_total', 'Things.', ('kind',))
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(kind='a', extra='b')
+
+
+def test_label_values_are_escaped(registry):
+    counter = registry.counter('test_total', 'Things.', ('path',))
+    counter.inc(path='a"b\\c\nd')
+    assert 'test_total{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_registering_twice_returns_the_same_metric(registry):
+    first = registry.counter('test_total', 'Things.')
+    assert registry.counter('test_total', 'Things.') is first
+    with pytest.raises(ValueError, match='already registered'):
+        registry.gauge('test_total', 'Things.')
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive(registry):
+    histogram = registry.histogram('test_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, route='/a')
+    assert histogram.count(route='/a') == 4
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'test_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_seconds_bucket{route="/a",le="1.0"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 3.65',
+        'test_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_histogram_timer(registry):
+    histogram = registry.histogram('test_seconds', 'Latency.')
+    with pytest.raises(RuntimeError), histogram.time():
+        raise RuntimeError
+    assert histogram.count() == 1
+
+
+def test_collectors_render_alongside(registry):
+    registry.counter('test_total', 'Things.').inc()
+
+    def collect():
+        gauge = metrics.Gauge('test_collected', 'Collected at render time.')
+        gauge.set(7)
+        return [gauge]
+
+    registry.add_collector(collect)
+    assert 'test_collected 7' in registry.render()
+
+
+def test_track_upstream_outcomes():
+    before = {outcome: metrics.upstream_requests.value(service='test', outcome=outcome)
+              for outcome in ('ok', 'error', 'rate_limited')}
+    with track_upstream('test'):
+        assert metrics.upstream_in_flight.value(service='test') == 1
+    with pytest.raises(ConnectionError), track_upstream('test'):
+        raise ConnectionError
+    with track_upstream('test') as set_outcome:
+        set_outcome('rate_limited')
+    for outcome in before:
+        assert metrics.upstream_requests.value(service='test', outcome=outcome) == before[outcome] + 1
+    assert metrics.upstream_in_flight.value(service='test') == 0
+
+
+def test_cache_collector_reports_every_cache():
+    from outreach_core.cache import search_cache
+    search_cache.set('q', ['result'])
+    search_cache.get('q')
+    text = render()
+    assert 'outreach_cache_hits_total{cache="search"} 1' in text
+    assert 'outreach_cache_entries{cache="search"} 1' in text
+
+
+def test_instrumented_app():
+    flask = pytest.importorskip('flask')
+    app = instrument_app(flask.Flask(__name__))
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        if item_id == 0:
+            raise RuntimeError("boom")
+        return {"id": item_id}
+
+    client = app.test_client()
+    client.get('/items/1')
+    client.get('/items/2')
+    client.get('/missing')
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    client.get('/items/0')
+    response = client.get('/metrics')
+    assert response.content_type == metrics.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert 'outreach_http_request_duration_seconds_count{route="/items/<int:item_id>",method="GET",status="200"} 2' in text
+    assert 'outreach_http_request_duration_seconds_count{route="unmatched",method="GET",status="404"} 1' in text
+    assert 'outreach_http_request_duration_seconds_count{route="/items/<int:item_id>",method="GET",status="500"} 1' in text
+    assert 'outreach_http_requests_in_flight{route="/items/<int:item_id>"} 0' in text
+
+
+def test_dump(tmp_path):
+    path = dump(str(tmp_path / 'run.prom'))
+    with open(path, encoding='utf-8') as f:
+        assert '# TYPE outreach_upstream_requests_total counter' in f.read()
+    assert not os.path.exists(path + '.tmp')
@@ -0,0 +1,231 @@
+import sqlite3
+
+import pytest
+
+from outreach_core.deadline import deadline_scope, remaining
+from outreach_core.outbox import (
+    FAILED, QUEUED, SENDING, SENT, SKIPPED, Outbox, OutboxDrainer, SkipMessage, campaign_id, retry_delay,
+)
+from outreach_core.scheduler import BULK, current_priority, priority
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def message(recipient, body="Hello there", **extra):
+    return dict({"recipient": recipient, "subject": "Intro", "body": body,
+                 "from_name": "Ada", "from_email": "ada@startup.io"}, **extra)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def outbox(tmp_path, clock):
+    box = Outbox(str(tmp_path / "outbox.sqlite3"), max_attempts=3, lease_seconds=60, clock=clock)
+    yield box
+    box.close()
+
+
+def statuses(outbox, campaign="c1"):
+    return {m["recipient"]: m["status"] for m in outbox.status(campaign)["messages"]}
+
+
+def test_campaign_id_is_stable():
+    assert campaign_id("Fintech VCs", "Ada@startup.io") == campaign_id("Fintech VCs", "ada@startup.io")
+    assert campaign_id("Fintech VCs", "ada@startup.io").startswith("fintech-vcs-")
+    assert campaign_id("Fintech VCs", "ada@startup.io") != campaign_id("Fintech VCs", "bob@startup.io")
+
+
+def test_enqueue_dedups_per_campaign(outbox):
+    assert outbox.enqueue("c1", [message("A@x.io"), message("b@x.io")]) == {
+        "queued": ["a@x.io", "b@x.io"], "duplicates": []}
+    assert outbox.enqueue("c1", [message("a@x.io")]) == {"queued": [], "duplicates": ["a@x.io"]}
+    assert outbox.enqueue("c2", [message("a@x.io")])["queued"] == ["a@x.io"]
+    assert outbox.pending() == 3
+
+
+def test_claim_leases_until_the_lease_runs_out(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io")])
+    assert [m["recipient"] for m in outbox.claim(10)] == ["a@x.io"]
+    assert outbox.claim(10) == []  # leased to the first claimer
+    assert statuses(outbox) == {"a@x.io": SENDING}
+    clock.now += 61  # the sender died without reporting back
+    assert [m["recipient"] for m in outbox.claim(10)] == ["a@x.io"]
+
+
+def test_a_lease_can_be_renewed_only_by_its_holder(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io")])
+    [first] = outbox.claim(10)
+    clock.now += 30
+    assert outbox.renew_lease(first)
+    clock.now += 61  # the first claimer hangs past the renewed lease
+    [second] = outbox.claim(10)
+    assert not outbox.renew_lease(first)
+    assert outbox.renew_lease(second)
+
+
+def test_failures_back_off_then_give_up(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io")])
+    for attempt in (1, 2):
+        [claimed] = outbox.claim(10)
+        assert outbox.mark_failed(claimed["id"], "smtp down") == QUEUED
+        assert outbox.next_due_in() == pytest.approx(retry_delay(attempt))
+        assert outbox.claim(10) == []
+        clock.now += retry_delay(attempt)
+    [claimed] = outbox.claim(10)
+    assert outbox.mark_failed(claimed["id"], "smtp down") == FAILED
+    status = outbox.status("c1")
+    assert status["done"] and status["counts"][FAILED] == 1
+    assert status["messages"][0]["attempts"] == 3 and status["messages"][0]["last_error"] == "smtp down"
+
+
+def test_retry_delay_is_capped():
+    assert retry_delay(1) < retry_delay(2) < retry_delay(3)
+    assert retry_delay(50) == retry_delay(60)
+
+
+def test_old_schema_is_migrated(tmp_path, clock):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE outbox (id INTEGER PRIMARY KEY, campaign TEXT NOT NULL, recipient TEXT NOT NULL,
+            subject TEXT NOT NULL, body TEXT NOT NULL, from_name TEXT NOT NULL, from_email TEXT NOT NULL,
+            status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL,
+            last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, UNIQUE (recipient, campaign));
+    """)
+    conn.close()
+    box = Outbox(path, clock=clock)
+    box.enqueue("c1", [message("a@x.io", body="", topic="fintech", project_summary="we build", personalize=True)])
+    [claimed] = box.claim(1)
+    assert (claimed["topic"], claimed["project_summary"], claimed["personalize"]) == ("fintech", "we build", 1)
+    box.close()
+
+
+def drainer_for(outbox, send, **options):
+    return OutboxDrainer(outbox, send, concurrency=2, poll_interval=0.01, **options)
+
+
+def test_drain_sends_and_retries(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io"), message("b@x.io")])
+    drainer = drainer_for(outbox, lambda m: m["recipient"] == "a@x.io")
+    assert drainer.drain() == 2
+    assert statuses(outbox) == {"a@x.io": SENT, "b@x.io": QUEUED}
+    drainer.stop()
+
+
+def test_sends_keep_the_drainers_priority_and_get_their_own_deadline(outbox):
+    outbox.enqueue("c1", [message("a@x.io"), message("b@x.io")])
+    seen = []
+    drainer = drainer_for(outbox, lambda m: seen.append((current_priority(), remaining())) or True,
+                          send_timeout=10)
+    with deadline_scope(None), priority(BULK):
+        drainer.drain()
+    drainer.stop()
+    assert [p for p, _ in seen] == [BULK, BULK]
+    assert all(0 < left <= 10 for _, left in seen)
+    assert drainer_for(outbox, lambda m: True, send_timeout=1000).send_timeout == 30  # half the lease
+
+
+def test_a_message_claimed_by_another_drainer_is_not_sent(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io")])
+    sent = []
+
+    def prepare(batch):
+        clock.now += 61  # drafting outlasted the lease
+        outbox.claim(10)  # and another drainer took the message over
+        return {}
+
+    drainer = drainer_for(outbox, lambda m: sent.append(m) or True, prepare=prepare)
+    drainer.drain()
+    drainer.stop()
+    assert sent == []
+    assert statuses(outbox) == {"a@x.io": SENDING}
+
+
+def test_send_can_skip(outbox):
+    outbox.enqueue("c1", [message("a@x.io")])
+
+    def send(m):
+        raise SkipMessage("opted out")
+
+    drainer = drainer_for(outbox, send)
+    drainer.drain()
+    assert statuses(outbox) == {"a@x.io": SKIPPED}
+    assert outbox.status("c1")["messages"][0]["last_error"] == "opted out"
+    drainer.stop()
+
+
+def test_an_after_send_error_does_not_resend(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io")])
+    sent = []
+
+    def on_sent(m):
+        raise RuntimeError("suppression store is down")
+
+    drainer = drainer_for(outbox, lambda m: sent.append(m["recipient"]) or True, on_sent=on_sent)
+    drainer.drain()
+    clock.now += 10_000
+    drainer.drain()
+    assert sent == ["a@x.io"]
+    assert statuses(outbox) == {"a@x.io": SENT}
+    drainer.stop()
+
+
+def test_prepare_skips_and_drafts_once(outbox, clock):
+    outbox.enqueue("c1", [message("a@x.io", body="", topic="fintech"),
+                          message("dead@x.io", body="", topic="fintech"),
+                          message("b@x.io", body="", topic="fintech")])
+    prepared, sent = [], []
+
+    def prepare(batch):
+        prepared.append(sorted(m["recipient"] for m in batch))
+        for m in batch:
+            if m["recipient"] == "a@x.io" and not m["body"]:
+                m["body"] = f"Draft about {m['topic']}"
+        return {m["id"]: "undeliverable (no_mx)" for m in batch if m["recipient"] == "dead@x.io"}
+
+    def send(m):
+        sent.append((m["recipient"], m["body"]))
+        return len(sent) > 1  # the first send fails and is retried
+
+    drainer = drainer_for(outbox, send, prepare=prepare)
+    drainer.drain()
+    assert prepared == [["a@x.io", "b@x.io", "dead@x.io"]]
+    assert statuses(outbox) == {"a@x.io": QUEUED, "dead@x.io": SKIPPED, "b@x.io": QUEUED}  # b had no draft
+    clock.now += 10_000
+    drainer.drain()
+    assert sent == [("a@x.io", "Draft about fintech"), ("a@x.io", "Draft about fintech")]
+    assert statuses(outbox)["a@x.io"] == SENT
+    drainer.stop()
+
+
+def test_a_failing_prepare_fails_the_batch(outbox):
+    outbox.enqueue("c1", [message("a@x.io")])
+
+    def prepare(batch):
+        raise RuntimeError("resolver exploded")
+
+    drainer = drainer_for(outbox, lambda m: True, prepare=prepare)
+    drainer.drain()
+    status = outbox.status("c1")
+    assert status["counts"][QUEUED] == 1 and "resolver exploded" in status["messages"][0]["last_error"]
+    drainer.stop()
+
+
+def test_background_thread_drains_when_woken(outbox):
+    import threading
+    done = threading.Event()
+    drainer = drainer_for(outbox, lambda m: done.set() or True).start()
+    outbox.enqueue("c1", [message("a@x.io")])
+    drainer.wake()
+    assert done.wait(5)
+    drainer.stop(timeout=5)
+    assert statuses(outbox) == {"a@x.io": SENT}
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from outreach_core import log as log_module
+from outreach_core import output
+from outreach_core.log import DEBUG, WARNING, log, set_level
+from outreach_core.output import dumps, emit, loads
+
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DOCUMENT = {"emails": [{"email": "jané@acme.io", "context": "line\nbreak"}], "truncated": False, "n": 1.5}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(output, 'orjson', None)
+    elif output.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_dumps_is_one_compact_utf8_line(codec):
+    data = dumps(DOCUMENT)
+    assert isinstance(data, bytes)
+    assert b'\n' not in data and b', ' not in data
+    assert "jané".encode('utf-8') in data
+    assert loads(data) == DOCUMENT
+    assert loads(data.decode('utf-8')) == DOCUMENT
+
+
+def test_dumps_accepts_non_string_keys(codec):
+    assert loads(dumps({1: "a"})) == {"1": "a"}
+
+
+def test_dumps_reports_what_json_cannot_encode(codec):
+    with pytest.raises(TypeError):
+        dumps({"emails": {"a@x.io"}})
+
+
+@pytest.fixture
+def stdout_channel(monkeypatch):
+    # emit() holds on to the first stdout it sees; make it pick up the captured one
+    monkeypatch.setattr(output, '_channel', None)
+
+
+def test_emit_writes_one_frame_per_line(capsysbinary, stdout_channel):
+    emit({"progress": 1})
+    emit(DOCUMENT)
+    out = capsysbinary.readouterr().out
+    assert [loads(line) for line in out.splitlines()] == [{"progress": 1}, DOCUMENT]
+    assert out.endswith(b'\n')
+
+
+def test_log_goes_to_stderr_above_the_level(capsys, monkeypatch):
+    monkeypatch.setattr(log_module, '_threshold', log_module.INFO)
+    log("working")
+    log("details", DEBUG)
+    set_level("warning")
+    log("still working")
+    log("careful", WARNING)
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == "working\ncareful\n"
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="inherits a pipe by descriptor number")
+def test_result_fd_keeps_stray_output_off_the_channel():
+    code = ("import sys; from outreach_core.output import emit; from outreach_core.log import log;"
+            "print('stray print'); log('progress'); emit({'ok': True})")
+    read_fd, write_fd = os.pipe()
+    env = dict(os.environ, OUTREACH_RESULT_FD=str(write_fd))
+    try:
+        process = subprocess.run([sys.executable, '-c', code], cwd=SERVICES_DIR, env=env, pass_fds=(write_fd,),
+                                 capture_output=True, text=True, check=True)
+    finally:
+        os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as channel:
+        frames = channel.read().splitlines()
+    assert [json.loads(frame) for frame in frames] == [{"ok": True}]
+    assert process.stdout == "stray print\n"
+    assert process.stderr == "progress\n"
@@ -0,0 +1,171 @@
+import time
+import threading
+
+import pytest
+
+from outreach_core.deadline import deadline_reached, deadline_scope, remaining
+from outreach_core.profiles import ProfileStore, normalize_company, parse_profile_fields, website_domain
+from outreach_core.scheduler import BULK, current_priority
+
+PROFILE = """**Company Name:** Stripe, Inc.
+**One-Line Pitch:** Payments infrastructure for the internet.
+- **Key People (Founders/CEO):** Patrick Collison
+  John Collison
+**Website:** https://www.stripe.com/about
+**Funding Status:** Information not found.
+**Contact Information:**
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles.sqlite3'), ttl=60)
+    yield store
+    store.close()
+
+
+def age(store, name, seconds):
+    with store._lock, store._conn:
+        store._conn.execute("UPDATE profiles SET updated_at = updated_at - ? WHERE key = ?",
+                            (seconds, normalize_company(name)))
+
+
+def test_normalize_company():
+    assert normalize_company("Stripe, Inc.") == "stripe"
+    assert normalize_company("ACME Holdings Ltd") == "acme"
+    assert normalize_company("Company") == "company"  # a lone suffix is still a name
+    assert normalize_company(None) == ""
+
+
+def test_parse_profile_fields():
+    fields = parse_profile_fields(PROFILE)
+    assert fields == {
+        "name": "Stripe, Inc.",
+        "pitch": "Payments infrastructure for the internet.",
+        "people": "Patrick Collison\nJohn Collison",
+        "website": "https://www.stripe.com/about",
+    }
+    assert website_domain(fields) == "stripe.com"
+    assert website_domain({}) is None
+
+
+def test_put_and_lookup_by_name_or_domain(store):
+    store.put("Stripe, Inc.", PROFILE, sources=["https://stripe.com"])
+    record = store.get("stripe")
+    assert record["name"] == "Stripe, Inc."
+    assert record["domain"] == "stripe.com"
+    assert record["sources"] == ["https://stripe.com"]
+    assert not record["stale"]
+    found = store.get_many(["STRIPE INC", "https://www.stripe.com", "Unknown Co", ""])
+    assert set(found) == {"STRIPE INC", "https://www.stripe.com"}
+    assert store.get("Unknown") is None
+
+
+def test_get_many_in_chunks(store):
+    for i in range(5):
+        store.put(f"Company {i} Ltd", f"profile {i}")
+    names = [f"company {i}" for i in range(5)] + [f"missing {i}" for i in range(2000)]
+    assert sorted(store.get_many(names)) == [f"company {i}" for i in range(5)]
+
+
+def test_missing_profile_is_built_and_stored(store):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"profile": PROFILE, "sources": ["https://stripe.com"]}
+
+    profile, record = store.get_or_build("Stripe", build)
+    assert (profile, record) == (PROFILE, None)
+    profile, record = store.get_or_build("Stripe", build)
+    assert profile == PROFILE and record["name"] == "Stripe"
+    assert len(calls) == 1
+
+
+def test_failed_build_stores_nothing(store):
+    assert store.get_or_build("Acme", lambda: None) == (None, None)
+    assert store.get("Acme") is None
+
+
+def test_stale_profile_is_served_then_refreshed_in_the_background(store):
+    store.put("Acme", "old profile")
+    age(store, "Acme", 120)
+    release = threading.Event()
+    seen = []
+
+    def build():
+        seen.append(current_priority())
+        release.wait(5)
+        return {"profile": "new profile"}
+
+    profile, record = store.get_or_build("Acme", build)
+    assert profile == "old profile" and record["stale"]
+    assert store.refresh_async("acme", build) is store.refresh_async("Acme", build)  # one refresh at a time
+    release.set()
+    store.wait(5)
+    assert seen == [BULK]
+    record = store.get("Acme")
+    assert record["profile"] == "new profile" and not record["stale"]
+
+
+def test_failed_refresh_keeps_the_old_copy(store):
+    store.put("Acme", "old profile")
+    age(store, "Acme", 120)
+
+    def build():
+        raise RuntimeError("LLM down")
+
+    assert store.refresh_async("Acme", build).result(5) is False
+    assert store.refresh_async("Acme", lambda: None).result(5) is False
+    assert store.get("Acme")["profile"] == "old profile"
+
+
+def test_refresh_runs_under_the_callers_deadline(store):
+    store.put("Acme", "old profile")
+    seen = []
+
+    def build():
+        seen.append(remaining())
+        return {"profile": "new profile"}
+
+    with deadline_scope(time.time() + 30):
+        store.refresh_async("Acme", build).result(5)
+    assert 0 < seen[0] <= 30
+    assert store.get("Acme")["profile"] == "new profile"
+
+
+def test_a_truncated_refresh_keeps_the_old_copy(store):
+    store.put("Acme", "old profile")
+
+    def build():
+        deadline.expires_at = time.time() - 1  # runs out while the profile is built
+        assert deadline_reached()
+        return {"profile": "half a profile"}
+
+    with deadline_scope(time.time() + 30) as deadline:
+        assert store.refresh_async("Acme", build).result(5) is False
+    assert store.get("Acme")["profile"] == "old profile"
+
+
+def test_wait_gives_up_after_the_timeout(store):
+    release = threading.Event()
+    for name in ("Acme", "Globex"):
+        store.refresh_async(name, lambda: release.wait(5) and None)
+    started = time.time()
+    store.wait(timeout=0.1)
+    assert time.time() - started < 2
+    release.set()
+    store.wait(5)
+
+
+def test_profiles_persist_across_stores(tmp_path):
+    path = str(tmp_path / 'profiles.sqlite3')
+    first = ProfileStore(path)
+    first.put("Acme", "profile")
+    first.close()
+    second = ProfileStore(path)
+    try:
+        assert second.get("acme")["profile"] == "profile"
+        assert second.get("acme")["updated_at"] <= time.time()
+    finally:
+        second.close()
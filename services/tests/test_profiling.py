@@ -0,0 +1,146 @@
+import os
+import time
+import threading
+
+import pytest
+
+from outreach_core import profiling
+from outreach_core.profiling import parse_mode, pop_profile_option, profile_request
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', None)
+    return tmp_path
+
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+
+@pytest.mark.parametrize("value, mode", [
+    (None, None), ("", None), ("0", None), ("off", None), ("False", None),
+    ("1", "cprofile"), ("true", "cprofile"), ("cprofile", "cprofile"), (" Sample ", "sample"), ("what", "cprofile"),
+])
+def test_parse_mode(value, mode):
+    assert parse_mode(value) == mode
+
+
+def test_pop_profile_option(monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', None)
+    argv = ["script.py", "--profile", "topic"]
+    assert pop_profile_option(argv) == "cprofile"
+    assert argv == ["script.py", "topic"]
+    argv = ["script.py", "--profile=sample"]
+    assert pop_profile_option(argv) == "sample"
+    assert argv == ["script.py"]
+    assert pop_profile_option(["script.py", "--profile=0"]) is None
+    assert pop_profile_option(argv) is None
+    monkeypatch.setattr(profiling, 'PROFILE_MODE', "sample")
+    assert pop_profile_option(["script.py"]) == "sample"
+
+
+def test_off_by_default_records_nothing(profile_dir):
+    with profile_request("idle") as profile:
+        busy_work()
+    assert profile is None
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_cprofile_mode_writes_stats_and_summary(profile_dir):
+    with profile_request("GET /profile", "cprofile") as profile:
+        busy_work()
+    assert [os.path.splitext(path)[1] for path in profile.paths] == ['.prof', '.txt']
+    assert f"-GET-profile-{os.getpid()}-" in profile.base_name
+    assert profile.peak_bytes > 0
+    with open(profile.paths[1], encoding='utf-8') as f:
+        summary = f.read()
+    assert summary.startswith("GET /profile: ")
+    assert "busy_work" in summary
+    assert "Peak traced memory" in summary
+
+    import pstats
+    assert pstats.Stats(profile.paths[0]).total_calls > 0
+
+
+def test_sample_mode_covers_other_threads(profile_dir):
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            busy_work()
+
+    thread = threading.Thread(target=worker, name="scrape-worker")
+    with profile_request("run", "sample") as profile:
+        thread.start()
+        time.sleep(0.2)
+        stop.set()
+        thread.join()
+    assert [os.path.splitext(path)[1] for path in profile.paths] == ['.folded', '.txt']
+    with open(profile.paths[0], encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines
+    assert any(line.startswith("scrape-worker;") and "busy_work" in line for line in lines)
+    assert all(int(line.rsplit(' ', 1)[1]) > 0 for line in lines)
+    assert not any(line.startswith("profile-sampler;") for line in lines)
+
+
+def test_one_profile_at_a_time(profile_dir, capsys):
+    with profile_request("outer", "cprofile") as outer:
+        with profile_request("inner", "cprofile") as inner:
+            busy_work()
+    assert outer is not None and inner is None
+    assert "another profile is running" in capsys.readouterr().err
+    with profile_request("after", "cprofile") as after:
+        pass
+    assert after is not None  # the lock was released
+
+
+def test_profile_is_written_when_the_block_raises(profile_dir):
+    with pytest.raises(RuntimeError):
+        with profile_request("failing", "cprofile") as profile:
+            raise RuntimeError("boom")
+    assert len(profile.paths) == 2 and all(os.path.exists(path) for path in profile.paths)
+
+
+def test_write_errors_do_not_fail_the_request(tmp_path, monkeypatch, capsys):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(blocker / 'profiling'))
+    with profile_request("request", "cprofile") as profile:
+        result = busy_work()
+    assert result and profile.paths == []
+    assert "Profile write error" in capsys.readouterr().err
+
+
+def test_leaves_tracemalloc_as_it_found_it(profile_dir):
+    import tracemalloc
+    assert not tracemalloc.is_tracing()
+    with profile_request("request", "cprofile"):
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+    tracemalloc.start()
+    try:
+        with profile_request("request", "cprofile"):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_flask_routes_profile_on_request(profile_dir):
+    flask = pytest.importorskip('flask')
+    app = profiling.install_profiling(flask.Flask(__name__))
+
+    @app.route('/work')
+    def work():
+        return {"total": busy_work()}
+
+    client = app.test_client()
+    assert 'X-Profile-File' not in client.get('/work').headers
+    assert list(profile_dir.iterdir()) == []
+    name = client.get('/work?profile=1').headers['X-Profile-File']
+    assert (profile_dir / (name + '.prof')).exists()
+    name = client.get('/work', headers={'X-Profile': 'sample'}).headers['X-Profile-File']
+    assert (profile_dir / (name + '.folded')).exists()
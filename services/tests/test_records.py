@@ -0,0 +1,73 @@
+import io
+import json
+
+from outreach_core.records import EmailHarvest, StringPool
+
+
+def test_string_pool_interns_once():
+    pool = StringPool()
+    assert pool.intern("Acme") == pool.intern("Acme") == 0
+    assert pool.intern(None) == pool.intern("") == 1
+    assert (pool[0], pool[1], len(pool)) == ("Acme", "", 2)
+
+
+def test_literal_sources_in_discovery_order():
+    harvest = EmailHarvest()
+    harvest.add("a@x.io", "Result A", "https://x.io/a", "snippet a")
+    harvest.add_source("b@y.io", {"title": "Sample", "link": "https://y.io"})
+    assert list(harvest) == ["a@x.io", "b@y.io"]
+    assert "a@x.io" in harvest and "c@z.io" not in harvest
+    assert harvest.to_dicts() == [
+        {"email": "a@x.io", "source_title": "Result A", "source_link": "https://x.io/a", "context": "snippet a"},
+        {"email": "b@y.io", "source_title": "Sample", "source_link": "https://y.io", "context": ""},
+    ]
+
+
+def test_adding_again_replaces_the_source_but_keeps_the_position():
+    harvest = EmailHarvest()
+    harvest.add("a@x.io", "First", "https://x.io/1", "one")
+    harvest.add("b@x.io", "Other", "https://x.io/2", "two")
+    harvest.add("a@x.io", "Second", "https://x.io/3", "three")
+    assert len(harvest) == 2
+    first = harvest.to_dicts()[0]
+    assert (first["email"], first["source_title"], first["context"]) == ("a@x.io", "Second", "three")
+
+
+def test_page_hits_share_one_trimmed_copy_of_the_page():
+    text = "x" * 1000 + " jane@acme.io " + "y" * 50 + " bob@acme.io " + "z" * 1000
+    harvest = EmailHarvest()
+    harvest.add_page_hits(["jane@acme.io", "bob@acme.io", "ghost@acme.io"], "Team", "https://acme.io", text,
+                          window=20, default="Found on website")
+    assert len(harvest.pages) == 1
+    assert len(harvest.pages[0]) < 150  # only the stretch covering both contexts
+    jane, bob, ghost = harvest.to_dicts()
+    start = text.find("jane@acme.io")
+    assert jane["context"] == text[start - 20:start + len("jane@acme.io") + 20]
+    assert "bob@acme.io" in bob["context"] and len(bob["context"]) == len("bob@acme.io") + 40
+    assert ghost["context"] == "Found on website"
+
+
+def test_page_hits_at_the_edges_of_the_page():
+    harvest = EmailHarvest()
+    harvest.add_page_hits(["a@x.io", "a@x.io"], "T", "L", "a@x.io is ours", window=200)
+    assert harvest.to_dicts() == [{"email": "a@x.io", "source_title": "T", "source_link": "L",
+                                   "context": "a@x.io is ours"}]
+
+
+def test_page_without_found_addresses_stores_nothing():
+    harvest = EmailHarvest()
+    harvest.add_page_hits(["ghost@x.io"], "T", "L", "no address here", default="n/a")
+    assert harvest.pages == []
+    assert harvest.to_dicts()[0]["context"] == "n/a"
+
+
+def test_dump_json_matches_to_dicts():
+    harvest = EmailHarvest()
+    harvest.add("a@x.io", "Tïtle \"quoted\"", "L", "ctx")
+    harvest.add_page_hits(["b@x.io"], "T", "L", "mail b@x.io now")
+    out = io.StringIO()
+    harvest.dump_json(out)
+    assert json.loads(out.getvalue()) == harvest.to_dicts()
+    empty = io.StringIO()
+    EmailHarvest().dump_json(empty)
+    assert empty.getvalue() == '[]'
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from outreach_core import relevance
+from outreach_core.relevance import (
+    NUMPY_MIN_CANDIDATES, rank, rank_contacts, rank_results, relevance_scores, tokenize,
+)
+
+WORDS = "fintech seed investor climate hardware biotech saas payments lending europe angel fund".split()
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The Top 5 fintech investors in Europe, a list") == ["top", "fintech", "investors", "europe", "list"]
+    assert tokenize(None) == []
+
+
+def test_scores():
+    scores = relevance_scores("fintech investors", [
+        "Fintech investors backing seed rounds",
+        "Climate hardware accelerators",
+        "",
+        "Investors: fintech, fintech, fintech",
+    ])
+    assert scores[0] > 0 and scores[3] > 0
+    assert scores[1] == scores[2] == 0.0
+    assert all(0.0 <= score <= 1.0 + 1e-9 for score in scores)
+
+
+def test_a_query_without_known_terms_scores_zero():
+    assert relevance_scores("the and of", ["fintech investors"]) == [0.0]
+    assert relevance_scores("quantum", ["fintech investors"]) == [0.0]
+    assert relevance_scores("fintech", []) == []
+
+
+def test_rare_terms_weigh_more():
+    texts = ["fintech europe"] + ["fintech"] * 5 + ["europe"]
+    scores = relevance_scores("fintech europe", texts)
+    # "europe" is rarer among the candidates, so the text matching it beats the "fintech" ones
+    assert scores[6] > scores[1]
+
+
+@pytest.mark.parametrize("size", [NUMPY_MIN_CANDIDATES, NUMPY_MIN_CANDIDATES + 137])
+def test_numpy_and_python_agree(size):
+    pytest.importorskip("numpy")
+    rng = random.Random(size)
+    texts = [' '.join(rng.choice(WORDS + ["the", "a", "x"]) for _ in range(rng.randint(0, 12))) for _ in range(size)]
+    texts[3] = "the a of"  # only stopwords
+    fast = relevance_scores("fintech angel investor europe", texts)
+    slow = relevance_scores("fintech angel investor europe", texts, use_numpy=False)
+    assert fast == pytest.approx(slow)
+
+
+def test_falls_back_to_python_without_numpy(monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def no_numpy(name, *args, **kwargs):
+        if name == 'numpy':
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_numpy)
+    monkeypatch.setattr(relevance, 'NUMPY_MIN_CANDIDATES', 1)
+    scores = relevance_scores("fintech", ["fintech seed", "climate"])
+    assert scores[0] > 0 and scores[1] == 0.0
+
+
+def test_rank_is_stable_and_cuts_to_top_k():
+    items = ["climate", "fintech a", "hardware", "fintech b", "fintech fintech seed"]
+    ranked = rank("fintech", items)
+    assert ranked[:2] == ["fintech a", "fintech b"]  # equal scores keep their order
+    assert ranked[3:] == ["climate", "hardware"]
+    assert rank("fintech", items, top_k=1) == ["fintech a"]
+    assert rank("fintech", [], top_k=3) == []
+
+
+def test_rank_results_and_contacts_use_their_fields():
+    results = [{"title": "Climate funds", "snippet": "hardware"}, {"title": "Fintech angels", "snippet": "seed"}]
+    assert rank_results("fintech", results)[0]["title"] == "Fintech angels"
+    contacts = [{"email": "a@x.io", "context": "climate"}, {"email": "b@y.io", "source_title": "Fintech list"}]
+    assert [c["email"] for c in rank_contacts("fintech", contacts, top_k=1)] == ["b@y.io"]
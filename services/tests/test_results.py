@@ -0,0 +1,60 @@
+import pytest
+
+from outreach_core import results
+from outreach_core.results import SearchResult, prefetch_content
+
+
+@pytest.fixture
+def scrapes(monkeypatch):
+    calls = []
+
+    def scrape(url, max_chars=3000):
+        calls.append((url, max_chars))
+        return f"content of {url}"
+
+    monkeypatch.setattr(results, 'scrape_url_content', scrape)
+    return calls
+
+
+def test_content_is_scraped_once_on_first_read(scrapes):
+    result = SearchResult.from_organic({"title": "Acme", "snippet": "VC", "link": "https://acme.io"}, max_chars=500)
+    assert not result.content_loaded
+    assert result.to_dict() == {"title": "Acme", "snippet": "VC", "link": "https://acme.io"}
+    assert scrapes == []
+    assert result["content"] == "content of https://acme.io"
+    assert result.content == "content of https://acme.io"
+    assert scrapes == [("https://acme.io", 500)]
+    assert result.to_dict()["content"] == "content of https://acme.io"
+
+
+def test_result_without_a_link_is_never_scraped(scrapes):
+    result = SearchResult.from_organic({"title": "Acme"})
+    assert result.content == ""
+    assert scrapes == []
+
+
+def test_dict_style_access(scrapes):
+    result = SearchResult("Acme", "VC", "https://acme.io")
+    assert result.get("title") == "Acme"
+    assert result.get("missing", "default") == "default"
+    result["title"] = "Acme Ventures"
+    result["content"] = "given"
+    assert (result.title, result.content) == ("Acme Ventures", "given")
+    assert scrapes == []
+    with pytest.raises(KeyError):
+        result["missing"]
+    with pytest.raises(KeyError):
+        result["max_chars"] = 1
+
+
+def test_to_dict_can_force_the_content(scrapes):
+    assert SearchResult("A", "", "https://a.io").to_dict(include_content=True)["content"] == "content of https://a.io"
+
+
+def test_prefetch_loads_only_what_is_missing(scrapes):
+    loaded = SearchResult("A", "", "https://a.io")
+    loaded["content"] = "already here"
+    batch = [loaded, SearchResult("B", "", "https://b.io"), SearchResult("C", "", "")]
+    assert prefetch_content(batch) is batch
+    assert [r.content for r in batch] == ["already here", "content of https://b.io", ""]
+    assert scrapes == [("https://b.io", 3000)]
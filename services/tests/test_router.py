@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from outreach_core.router import DEFAULT_KEYWORDS, KeywordRouter, get_router
+
+
+@pytest.mark.parametrize("text, routed", [
+    ("Find me fintech investors", True),
+    ("FIND me fintech investors", True),
+    ("who   is the CEO of Stripe?", True),
+    ("Any recommendations?", True),
+    ("I'm finding it hard", True),
+    ("Thanks, that was helpful", False),
+    ("They bestow awards", False),  # "best" only as a word
+    ("A topical question", False),  # nor "top"
+    ("", False),
+    (None, False),
+])
+def test_default_routes(text, routed):
+    assert get_router().needs_web_search(text) is routed
+
+
+def test_matches_are_distinct_and_normalized():
+    router = KeywordRouter()
+    assert router.matches("Look  Up the latest news, latest NEWS!") == {"look up", "latest", "news"}
+    assert router.matches("recommend a recommendation") == {"recommend", "recommendation"}
+
+
+def test_weights_add_up_to_the_threshold():
+    router = KeywordRouter({"investor": 0.5, "fintech": 0.5, "weather": 0.0}, threshold=1.0)
+    assert not router.needs_web_search("investors")
+    assert not router.needs_web_search("investor investor")  # a repeat counts once
+    assert router.needs_web_search("fintech investors")
+    assert router.score("weather for fintech") == 0.5
+
+
+def test_no_keywords_never_routes():
+    router = KeywordRouter({})
+    assert not router.needs_web_search("find the best investors")
+    assert router.classify_batch(["find", "best"]) == [False, False]
+
+
+def test_batch_agrees_with_single_messages():
+    router = KeywordRouter({"investor": 0.5, "fintech": 0.5, "look up": 1.0})
+    messages = ["fintech investors", "fintech", "investor\nnews", "", "look\nup", "please look up"]
+    assert router.classify_batch(messages) == [router.needs_web_search(m) for m in messages]
+    assert router.classify_batch(messages) == [True, False, False, False, True, True]
+    default = get_router()
+    assert default.classify_batch(messages) == [default.needs_web_search(m) for m in messages]
+
+
+def test_batch_matches_stay_within_their_message():
+    router = KeywordRouter({"look up": 1.0})
+    assert router.matches_batch(["look", "up"]) == [set(), set()]
+    assert router.matches_batch([]) == []
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / 'router.json'
+    path.write_text(json.dumps({"keywords": {"angel": 0.6, "seed round": 0.6}, "threshold": 1.2}))
+    router = KeywordRouter.from_file(str(path))
+    assert router.threshold == 1.2
+    assert not router.needs_web_search("angel investors")
+    assert router.needs_web_search("angels in a seed round")
+    assert router.weights.keys() == {"angel", "seed round"}
+
+
+def test_every_default_keyword_matches_itself():
+    router = KeywordRouter()
+    for keyword in DEFAULT_KEYWORDS:
+        assert router.matches(f"x {keyword} y") == {keyword}
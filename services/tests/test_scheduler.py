@@ -0,0 +1,152 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from outreach_core import scheduler as sched
+from outreach_core.deadline import DeadlineExceeded, deadline_scope
+from outreach_core.scheduler import (
+    BULK, INTERACTIVE, Overloaded, PriorityClass, Scheduler, current_priority, priority, upstream_slot,
+)
+
+
+def make_scheduler(capacity=2, bulk_concurrency=1, max_queue=2, max_wait=5.0):
+    return Scheduler([
+        PriorityClass(INTERACTIVE, capacity, max_queue, max_wait),
+        PriorityClass(BULK, bulk_concurrency, max_queue, max_wait),
+    ], capacity=capacity)
+
+
+def wait_until(condition, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.005)
+
+
+def start(scheduler, name, order):
+    """Acquires a slot for `name` in a thread, records it in `order` and holds it until released."""
+    def run():
+        scheduler.acquire(name)
+        order.append(name)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = make_scheduler()
+    monkeypatch.setattr(sched, '_scheduler', scheduler)
+    return scheduler
+
+
+def test_priority_follows_the_context_into_worker_threads():
+    with priority(BULK):
+        assert current_priority() == BULK
+    assert current_priority() == INTERACTIVE
+
+    async def main():
+        with priority(BULK):
+            return await asyncio.to_thread(current_priority)
+    assert asyncio.run(main()) == BULK
+
+
+def test_bulk_is_capped_below_capacity(scheduler):
+    scheduler.acquire(BULK)
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(BULK, max_wait=0.05)
+    scheduler.acquire(INTERACTIVE)  # the rest is left for interactive work
+    assert scheduler.running == {INTERACTIVE: 1, BULK: 1}
+
+
+def test_interactive_waiters_go_before_bulk(scheduler):
+    scheduler.acquire(INTERACTIVE)
+    scheduler.acquire(INTERACTIVE)
+    order = []
+    bulk = start(scheduler, BULK, order)
+    wait_until(lambda: scheduler.waiting[BULK] == 1)
+    interactive = start(scheduler, INTERACTIVE, order)
+    wait_until(lambda: scheduler.waiting[INTERACTIVE] == 1)
+
+    scheduler.release(INTERACTIVE)
+    interactive.join(5)
+    assert order == [INTERACTIVE]
+    assert scheduler.waiting[BULK] == 1
+    scheduler.release(INTERACTIVE)
+    bulk.join(5)
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_waiters_are_served_in_order(scheduler):
+    scheduler.acquire(INTERACTIVE)
+    scheduler.acquire(INTERACTIVE)
+    order = []
+    first = start(scheduler, INTERACTIVE, order)
+    wait_until(lambda: scheduler.waiting[INTERACTIVE] == 1)
+    scheduler.release(INTERACTIVE)
+    # The releasing thread can't take the slot back ahead of the waiter
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(INTERACTIVE, max_wait=0.05)
+    first.join(5)
+    assert order == [INTERACTIVE]
+
+
+def test_full_queue_sheds_at_once(scheduler):
+    scheduler.acquire(BULK)
+    order = []
+    for _ in range(2):
+        start(scheduler, BULK, order)
+    wait_until(lambda: scheduler.waiting[BULK] == 2)
+    began = time.monotonic()
+    with pytest.raises(Overloaded) as raised:
+        scheduler.acquire(BULK)
+    assert time.monotonic() - began < 1
+    assert (raised.value.priority, raised.value.reason) == (BULK, 'queue_full')
+    for _ in range(3):
+        scheduler.release(BULK)
+    wait_until(lambda: len(order) == 2)
+
+
+def test_class_wait_limit_raises_overloaded():
+    scheduler = make_scheduler(max_wait=0.05)
+    scheduler.acquire(BULK)
+    with pytest.raises(Overloaded, match='timeout'):
+        scheduler.acquire(BULK)
+    assert scheduler.waiting[BULK] == 0
+
+
+def test_unknown_class(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.acquire('urgent')
+
+
+def test_slot_releases_on_error(scheduler):
+    with pytest.raises(RuntimeError), scheduler.slot(BULK):
+        assert scheduler.running[BULK] == 1
+        raise RuntimeError
+    assert scheduler.running[BULK] == 0
+
+
+def test_upstream_slot_waits_no_longer_than_the_deadline(scheduler):
+    scheduler.acquire(BULK)
+    with priority(BULK), deadline_scope(time.time() + 0.1):
+        began = time.monotonic()
+        with pytest.raises(DeadlineExceeded), upstream_slot():
+            pass
+        assert time.monotonic() - began < 1
+    with deadline_scope(time.time() - 1), pytest.raises(DeadlineExceeded):
+        upstream_slot()
+
+
+def test_upstream_slot_charges_the_call_budget(scheduler):
+    with deadline_scope(None, max_calls=2) as deadline:
+        with upstream_slot():
+            pass
+        with upstream_slot():
+            pass
+        with pytest.raises(DeadlineExceeded, match="call budget"):
+            upstream_slot()
+        assert deadline.budget_spent
+    assert scheduler.running[INTERACTIVE] == 0
@@ -0,0 +1,94 @@
+import pytest
+
+from outreach_core import breaker, search
+from outreach_core.breaker import BreakerBoard, OPEN
+from outreach_core.search import SearchError, search_many, serpapi_search
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+
+class FakeSession:
+    def __init__(self):
+        self.responses = {}
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        response = self.responses[params["q"]]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(search, 'get_session', lambda: session)
+    monkeypatch.setattr(breaker, '_board', BreakerBoard())
+    return session
+
+
+def test_returns_organic_results_and_caches_them(session):
+    session.responses["vc"] = FakeResponse({"organic_results": [{"link": "https://a.io"}]})
+    assert serpapi_search("vc", 20, api_key="key") == [{"link": "https://a.io"}]
+    assert serpapi_search("vc", 20, api_key="key") == [{"link": "https://a.io"}]
+    assert len(session.calls) == 1
+    assert session.calls[0] == {"engine": "google", "q": "vc", "api_key": "key", "num": "20"}
+    serpapi_search("vc", api_key="key")  # a different `num` is a different search
+    assert "num" not in session.calls[1]
+
+
+def test_no_results_is_an_empty_list(session):
+    session.responses["nothing"] = FakeResponse({})
+    assert serpapi_search("nothing") == []
+
+
+@pytest.mark.parametrize("response, message", [
+    (FakeResponse({"error": "Invalid API key."}, 401), "SerpAPI error: Invalid API key."),
+    (FakeResponse({}, 503), "SerpAPI returned status 503"),
+    (FakeResponse(ValueError("not JSON")), "not JSON"),
+    (ConnectionError("refused"), "refused"),
+])
+def test_failures_raise_search_error(session, response, message):
+    session.responses["vc"] = response
+    with pytest.raises(SearchError, match=message):
+        serpapi_search("vc")
+    session.responses["vc"] = FakeResponse({"organic_results": [{"link": "https://a.io"}]})
+    assert serpapi_search("vc")  # errors are not cached
+
+
+def test_an_api_error_payload_does_not_trip_the_breaker(session):
+    session.responses["vc"] = FakeResponse({"error": "Google hasn't returned any results."})
+    for _ in range(5):
+        with pytest.raises(SearchError):
+            serpapi_search("vc")
+    assert breaker.get_breaker('serpapi').state != OPEN
+
+
+def test_an_open_breaker_fails_fast(session):
+    session.responses["vc"] = FakeResponse({}, 503)
+    for _ in range(10):
+        with pytest.raises(SearchError):
+            serpapi_search("vc")
+        if breaker.get_breaker('serpapi').state == OPEN:
+            break
+    calls = len(session.calls)
+    with pytest.raises(SearchError, match="Circuit open"):
+        serpapi_search("vc")
+    assert len(session.calls) == calls
+
+
+def test_search_many_keeps_order_and_drops_failures(session):
+    session.responses["a"] = FakeResponse({"organic_results": [{"link": "https://a.io"}]})
+    session.responses["b"] = ConnectionError("refused")
+    session.responses["c"] = FakeResponse({"organic_results": [{"link": "https://c.io"}]})
+    assert search_many(["a", "b", "c"]) == [[{"link": "https://a.io"}], [], [{"link": "https://c.io"}]]
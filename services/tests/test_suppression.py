@@ -0,0 +1,144 @@
+import os
+import sqlite3
+
+import pytest
+
+from outreach_core.suppression import (
+    CONTACTED, OPTED_OUT, BloomFilter, SuppressionList, normalize_address,
+)
+
+
+@pytest.mark.parametrize("raw, normalized", [
+    ("  Founder@Acme.io ", "founder@acme.io"),
+    ("founder+vc@acme.io", "founder@acme.io"),
+    ("J.Doe+vc@GoogleMail.com", "jdoe@gmail.com"),
+    ("j.doe@acme.io", "j.doe@acme.io"),
+    ("not-an-address", ""),
+    ("+tag@acme.io", ""),
+    (None, ""),
+])
+def test_normalize_address(raw, normalized):
+    assert normalize_address(raw) == normalized
+
+
+def test_bloom_filter_round_trip():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}@acme.io")
+    assert all(f"user{i}@acme.io" in bloom for i in range(1000))
+    false_positives = sum(f"other{i}@acme.io" in bloom for i in range(10000))
+    assert false_positives < 300  # about 1% expected
+    copy, high_water = BloomFilter.from_bytes(bloom.to_bytes(42))
+    assert high_water == 42 and copy.count == 1000 and copy.capacity == 1000
+    assert "user7@acme.io" in copy
+    with pytest.raises(ValueError):
+        BloomFilter.from_bytes(b"junk")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "suppression.sqlite3")
+
+
+def test_filter_splits_candidates_in_order(path):
+    store = SuppressionList(path)
+    assert store.add(["jdoe@gmail.com", "ceo@acme.io"]) == 2
+    allowed, suppressed = store.filter(["new@beta.io", "J.Doe@gmail.com", "bad", "CEO+x@acme.io"])
+    assert allowed == ["new@beta.io", "bad"]
+    assert suppressed == [{"email": "J.Doe@gmail.com", "reason": CONTACTED},
+                          {"email": "CEO+x@acme.io", "reason": CONTACTED}]
+
+
+def test_opt_out_overrides_contacted_but_not_the_reverse(path):
+    store = SuppressionList(path)
+    store.add(["ceo@acme.io"], CONTACTED)
+    assert store.add(["ceo@acme.io"], OPTED_OUT) == 0
+    store.add(["ceo@acme.io"], CONTACTED)
+    assert store.filter(["ceo@acme.io"])[1][0]["reason"] == OPTED_OUT
+    with pytest.raises(ValueError):
+        store.add(["ceo@acme.io"], "spam")
+
+
+def test_false_positives_fall_through_to_the_exact_check(path):
+    store = SuppressionList(path, capacity=10, error_rate=0.5)
+    store.add([f"user{i}@acme.io" for i in range(10)])
+    candidates = [f"other{i}@beta.io" for i in range(200)]
+    assert store.filter(candidates) == (candidates, [])
+    assert store.stats()["false_positives"] > 0
+
+
+def test_remove_lets_an_address_through(path):
+    store = SuppressionList(path)
+    store.add(["ceo@acme.io"])
+    assert store.remove(["CEO@acme.io"]) == 1
+    assert not store.is_suppressed("ceo@acme.io")
+
+
+def test_an_address_added_after_removing_the_newest_one_is_suppressed(path):
+    store = SuppressionList(path)
+    store.add(["a@x.com"])
+    store.add(["b@x.com"])
+    store.remove(["b@x.com"])
+    store.add(["c@x.com"], OPTED_OUT)  # must not reuse b's row ID, which the filter has already seen
+    assert store.filter(["c@x.com"]) == ([], [{"email": "c@x.com", "reason": OPTED_OUT}])
+
+
+def test_a_table_from_before_autoincrement_is_migrated(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE suppression (id INTEGER PRIMARY KEY, address TEXT NOT NULL UNIQUE,
+            reason TEXT NOT NULL, created_at REAL NOT NULL);
+        INSERT INTO suppression VALUES (1, 'a@x.com', 'contacted', 0), (2, 'b@x.com', 'opted_out', 0);
+    """)
+    conn.close()
+    store = SuppressionList(path)
+    assert store.filter(["a@x.com", "b@x.com", "c@x.com"])[0] == ["c@x.com"]
+    store.remove(["b@x.com"])
+    store.add(["c@x.com"])
+    assert store.is_suppressed("c@x.com")
+    store.close()
+    conn = sqlite3.connect(path)
+    assert "AUTOINCREMENT" in conn.execute("SELECT sql FROM sqlite_master WHERE name = 'suppression'").fetchone()[0]
+    conn.close()
+
+def test_other_processes_writes_are_caught_up(path):
+    first, second = SuppressionList(path), SuppressionList(path)
+    first.add(["ceo@acme.io"])
+    assert second.is_suppressed("ceo@acme.io")
+
+
+def test_filter_is_saved_and_caught_up_on_load(path):
+    store = SuppressionList(path, save_interval=0)
+    store.add(["a@acme.io"])
+    store.close()
+    assert os.path.exists(path + ".bloom")
+    writer = SuppressionList(path, save_interval=3600)
+    writer.add(["b@acme.io"])  # in the table, not yet in the saved filter
+    reader = SuppressionList(path)
+    assert reader.is_suppressed("a@acme.io") and reader.is_suppressed("b@acme.io")
+    assert reader.stats()["entries"] == 2
+
+
+def test_filter_grows_past_its_capacity(path):
+    store = SuppressionList(path, capacity=8)
+    store.add([f"user{i}@acme.io" for i in range(20)])
+    stats = store.stats()
+    assert stats["capacity"] >= 20 and stats["entries"] == 20
+    store.close()
+    assert SuppressionList(path).stats()["capacity"] == stats["capacity"]
+
+
+def test_a_corrupt_or_stale_filter_is_rebuilt(path):
+    store = SuppressionList(path, save_interval=0)
+    store.add(["a@acme.io"])
+    store.close()
+    with open(path + ".bloom", "wb") as f:
+        f.write(b"junk")
+    assert SuppressionList(path).is_suppressed("a@acme.io")
+    os.remove(path)  # the table is replaced; the saved filter is now ahead of it
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    fresh = SuppressionList(path)
+    assert fresh.stats()["entries"] == 0
+    assert not fresh.is_suppressed("a@acme.io")
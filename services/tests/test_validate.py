@@ -0,0 +1,129 @@
+import sys
+import time
+import socket
+import types
+
+import pytest
+
+from outreach_core import validate
+from outreach_core.validate import (
+    DNSLookupError, StaticResolver, SystemResolver, check_local, domain_accepts_mail, validate_contacts,
+)
+
+
+@pytest.mark.parametrize("email, reason", [
+    ("founder@acme.io", None),
+    ("not-an-email", "syntax"),
+    ("a..b@acme.io", "syntax"),
+    (".a@acme.io", "syntax"),
+    ("logo@2x.png", "tld"),
+    ("info@example.com", "placeholder"),
+    ("x@fintechvc-12.com", "placeholder"),
+    ("x@mailinator.com", "disposable"),
+])
+def test_check_local(email, reason):
+    assert check_local(email) == reason
+
+
+def test_validate_contacts_with_a_static_resolver():
+    resolver = StaticResolver({"acme.io": ["mx.acme.io"], "dead.io": []})
+    result = validate_contacts(["Founder@ACME.io", "founder@acme.io", "ceo@dead.io", "bad", "x@example.com"],
+                               resolver=resolver)
+    assert result["valid"] == ["Founder@acme.io"]
+    assert {r["email"]: r["reason"] for r in result["rejected"]} == {
+        "founder@acme.io": "duplicate", "ceo@dead.io": "no_mx", "bad": "syntax", "x@example.com": "placeholder",
+    }
+
+
+def test_transient_failures_keep_the_address():
+    class Flaky:
+        def mx_hosts(self, domain):
+            raise DNSLookupError("timeout")
+
+    assert validate_contacts(["ceo@acme.io"], resolver=Flaky())["valid"] == ["ceo@acme.io"]
+    assert domain_accepts_mail("acme.io", Flaky()) is None
+
+
+def test_skipping_mx_checks():
+    class Broken:
+        def mx_hosts(self, domain):
+            raise AssertionError("no lookups expected")
+
+    assert validate_contacts(["ceo@acme.io"], resolver=Broken(), check_mx=False)["valid"] == ["ceo@acme.io"]
+
+
+@pytest.fixture
+def no_dnspython(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'dns', None)
+    monkeypatch.setitem(sys.modules, 'dns.resolver', None)
+    monkeypatch.setitem(sys.modules, 'dns.exception', None)
+
+
+def test_fallback_accepts_a_domain_with_an_address(monkeypatch, no_dnspython):
+    monkeypatch.setattr(validate.socket, 'getaddrinfo', lambda *a, **k: [("addr",)])
+    assert SystemResolver().mx_hosts("acme.io") == ["acme.io"]
+
+
+def test_fallback_treats_a_missing_address_as_unknown(monkeypatch, no_dnspython):
+    # An MX-only domain has no A record; without dnspython that is not proof of anything
+    def getaddrinfo(*args, **kwargs):
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    monkeypatch.setattr(validate.socket, 'getaddrinfo', getaddrinfo)
+    with pytest.raises(DNSLookupError):
+        SystemResolver().mx_hosts("mx-only.io")
+    assert validate_contacts(["ceo@mx-only.io"], resolver=SystemResolver())["valid"] == ["ceo@mx-only.io"]
+
+
+def test_fallback_applies_the_timeout(monkeypatch, no_dnspython):
+    monkeypatch.setattr(validate.socket, 'getaddrinfo', lambda *a, **k: time.sleep(1))
+    started = time.monotonic()
+    with pytest.raises(DNSLookupError, match="timed out"):
+        SystemResolver(timeout=0.05).mx_hosts("slow.io")
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.fixture
+def fake_dnspython(monkeypatch):
+    """A dnspython stand-in whose answers come from `records[(domain, rdtype)]`."""
+    exception = types.ModuleType('dns.exception')
+    resolver = types.ModuleType('dns.resolver')
+
+    class DNSException(Exception):
+        pass
+
+    exception.DNSException = DNSException
+    for name in ('NXDOMAIN', 'NoAnswer', 'NoNameservers', 'LifetimeTimeout'):
+        setattr(resolver, name, type(name, (DNSException,), {}))
+    records = {}
+
+    def resolve(domain, rdtype, lifetime=None):
+        answer = records.get((domain, rdtype), resolver.NoAnswer)
+        if isinstance(answer, type):
+            raise answer()
+        return [types.SimpleNamespace(exchange=host) for host in answer]
+
+    resolver.resolve = resolve
+    package = types.ModuleType('dns')
+    package.resolver, package.exception = resolver, exception
+    monkeypatch.setitem(sys.modules, 'dns', package)
+    monkeypatch.setitem(sys.modules, 'dns.resolver', resolver)
+    monkeypatch.setitem(sys.modules, 'dns.exception', exception)
+    return resolver, records
+
+
+def test_dnspython_mx_lookup(fake_dnspython):
+    resolver, records = fake_dnspython
+    records[("acme.io", "MX")] = ["mx1.acme.io."]
+    records[("a-only.io", "A")] = ["1.2.3.4"]
+    records[("gone.io", "MX")] = resolver.NXDOMAIN
+    records[("nothing.io", "A")] = resolver.NoAnswer
+    records[("broken.io", "MX")] = resolver.NoNameservers
+    records[("slow.io", "MX")] = resolver.LifetimeTimeout
+    system = SystemResolver()
+    assert system.mx_hosts("acme.io") == ["mx1.acme.io"]
+    assert system.mx_hosts("a-only.io") == ["a-only.io"]
+    assert system.mx_hosts("gone.io") == []
+    assert system.mx_hosts("nothing.io") == []
+    for domain in ("broken.io", "slow.io"):
+        with pytest.raises(DNSLookupError):
+            system.mx_hosts(domain)
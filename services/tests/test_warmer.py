@@ -0,0 +1,147 @@
+import json
+import time
+
+import pytest
+
+from outreach_core import warmer
+from outreach_core.cache import search_cache
+from outreach_core.deadline import current_deadline
+from outreach_core.scheduler import BULK, current_priority, upstream_slot
+from outreach_core.warmer import (
+    CacheWarmer, compact_query_log, in_window, last_warm_report, normalize_topic, read_query_log,
+    record_query, top_topics,
+)
+
+
+def at_hour(hour):
+    return time.mktime((2026, 10, 19, hour, 30, 0, 0, 0, -1))
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'state' / 'query_log.jsonl')
+
+
+def test_normalize_topic():
+    assert normalize_topic("  Fintech   INVESTORS ") == "fintech investors"
+    assert normalize_topic(None) == ""
+
+
+def test_record_and_read(log_path):
+    record_query("emails", "Fintech  Investors", path=log_path)
+    record_query("emails", "   ", path=log_path)  # nothing to warm
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write('{"t": 1, "sour')  # cut short by a concurrent writer
+    entries = list(read_query_log(log_path))
+    assert [(e["source"], e["topic"]) for e in entries] == [("emails", "fintech investors")]
+    assert list(read_query_log(log_path + '.missing')) == []
+
+
+def test_record_never_fails_the_caller(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    record_query("emails", "fintech", path=str(blocker / 'query_log.jsonl'))
+
+
+def test_top_topics_counts_recent_queries_per_source(log_path):
+    for source, topic in [("emails", "fintech"), ("emails", "Fintech"), ("emails", "climate"),
+                          ("recommendations", "fintech"), ("unknown", "fintech")]:
+        record_query(source, topic, path=log_path)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"t": time.time() - 30 * 86400, "source": "emails", "topic": "old"}) + '\n')
+    assert top_topics(2, path=log_path) == [("emails", "fintech", 2), ("emails", "climate", 1)]
+    assert top_topics(10, sources={"recommendations"}, path=log_path) == [("recommendations", "fintech", 1)]
+    assert "old" not in {topic for _, topic, _ in top_topics(10, path=log_path)}
+
+
+def test_compaction_keeps_the_newer_half(log_path, monkeypatch):
+    monkeypatch.setattr(warmer, 'QUERY_LOG_MAX_BYTES', 10**9)
+    for i in range(4):
+        record_query("emails", f"topic {i}", path=log_path)
+    compact_query_log(log_path)
+    assert [e["topic"] for e in read_query_log(log_path)] == ["topic 2", "topic 3"]
+
+
+def test_log_is_compacted_past_its_size_limit(log_path, monkeypatch):
+    monkeypatch.setattr(warmer, 'QUERY_LOG_MAX_BYTES', 200)
+    for i in range(10):
+        record_query("emails", f"topic {i}", path=log_path)
+    entries = list(read_query_log(log_path))
+    assert 0 < len(entries) < 10
+    assert entries[-1]["topic"] == "topic 9"
+
+
+@pytest.mark.parametrize("hours, hour, inside", [
+    ("6-7", 6, True), ("6-7", 7, True), ("6-7", 8, False), ("6-7", 5, False),
+    ("22-4", 23, True), ("22-4", 2, True), ("22-4", 12, False),
+    ("6", 6, True), ("6", 7, False),
+    ("", 12, True),
+])
+def test_in_window(hours, hour, inside):
+    assert in_window(hours, at_hour(hour)) is inside
+
+
+def make_warmer(tmp_path, log_path, recipes, **options):
+    return CacheWarmer(recipes, log_path=log_path, report_path=str(tmp_path / 'warm_report.json'), **options)
+
+
+def test_run_warms_the_top_topics_at_bulk_priority(tmp_path, log_path):
+    for topic in ("fintech", "fintech", "climate"):
+        record_query("emails", topic, path=log_path)
+    record_query("unknown", "ignored", path=log_path)
+    seen = []
+
+    def recipe(topic):
+        seen.append((topic, current_priority(), current_deadline().remaining()))
+        if search_cache.get(topic) is None:
+            search_cache.set(topic, "results")
+
+    report = make_warmer(tmp_path, log_path, {"emails": recipe}).run_once()
+    assert seen == [("fintech", BULK, None), ("climate", BULK, None)]
+    assert [(t["topic"], t["queries"], t["ok"]) for t in report["topics"]] == [("fintech", 2, True),
+                                                                                ("climate", 1, True)]
+    assert report["warming"]["search"] == {"hits": 0, "misses": 2, "hit_ratio": 0.0}
+    assert last_warm_report(str(tmp_path / 'warm_report.json'))["topics"] == report["topics"]
+
+
+def test_run_stops_when_the_budget_is_spent(tmp_path, log_path):
+    for topic in ("a", "a", "a", "b", "b", "c"):
+        record_query("emails", topic, path=log_path)
+    warmed = []
+
+    def recipe(topic):
+        for _ in range(2):
+            with upstream_slot():
+                pass
+        warmed.append(topic)
+
+    report = make_warmer(tmp_path, log_path, {"emails": recipe}, budget=3).run_once()
+    assert warmed == ["a"]
+    assert [(t["topic"], t["ok"]) for t in report["topics"]] == [("a", True), ("b", False)]
+    assert report["calls"] == 3
+    assert report["truncated"]
+
+
+def test_a_failing_recipe_does_not_stop_the_run(tmp_path, log_path):
+    for topic in ("a", "a", "b"):
+        record_query("emails", topic, path=log_path)
+
+    def recipe(topic):
+        if topic == "a":
+            raise RuntimeError("search failed")
+
+    report = make_warmer(tmp_path, log_path, {"emails": recipe}).run_once()
+    assert [(t["topic"], t["ok"]) for t in report["topics"]] == [("a", False), ("b", True)]
+
+
+def test_due_once_a_day_inside_the_window(tmp_path, log_path):
+    cache_warmer = make_warmer(tmp_path, log_path, {}, hours="6-7")
+    assert cache_warmer.due(at_hour(6))
+    assert not cache_warmer.due(at_hour(9))
+    cache_warmer._last_run_day = time.strftime('%Y-%m-%d', time.localtime(at_hour(6)))
+    assert not cache_warmer.due(at_hour(7))
+    assert cache_warmer.due(at_hour(6) + 86400)
+
+
+def test_missing_report():
+    assert last_warm_report('/nonexistent/warm_report.json') is None
@@ -0,0 +1,103 @@
+import json
+import multiprocessing
+
+from outreach_core.yield_stats import (
+    MIN_FETCHES_TO_PRUNE, RETRY_PRUNED_AFTER, YieldStats, normalize_domain, query_template,
+)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_domain_and_template():
+    assert normalize_domain("https://WWW.Acme.io:443/team") == "acme.io"
+    assert normalize_domain("acme.io") == "acme.io"
+    assert query_template('"fintech" contact email', "fintech") == '"{topic}" contact email'
+
+
+def test_login_walls_are_always_skipped(tmp_path):
+    stats = YieldStats(str(tmp_path / "stats.json"))
+    assert stats.should_skip("https://www.linkedin.com/in/someone")
+    assert stats.should_skip("https://uk.linkedin.com/company/x")
+    assert not stats.should_skip("https://acme.io")
+
+
+def test_a_domain_showing_known_emails_is_not_pruned(tmp_path):
+    stats = YieldStats(str(tmp_path / "stats.json"))
+    for _ in range(MIN_FETCHES_TO_PRUNE + 2):
+        stats.record_fetch("https://acme.io/team", 2)  # same two addresses every time
+    assert not stats.should_skip("https://acme.io/about")
+
+
+def test_a_pruned_domain_is_retried_later(tmp_path):
+    clock = Clock()
+    stats = YieldStats(str(tmp_path / "stats.json"), clock=clock)
+    for _ in range(MIN_FETCHES_TO_PRUNE):
+        stats.record_fetch("https://empty.io", 0)
+    assert stats.should_skip("https://empty.io")
+    clock.now += RETRY_PRUNED_AFTER + 1
+    assert not stats.should_skip("https://empty.io")
+    stats.record_fetch("https://empty.io", 0)  # the retry found nothing either
+    assert stats.should_skip("https://empty.io")
+    clock.now += RETRY_PRUNED_AFTER + 1
+    stats.record_fetch("https://empty.io", 1)
+    assert not stats.should_skip("https://empty.io")
+
+
+def test_ordering_prefers_productive_domains_and_templates(tmp_path):
+    stats = YieldStats(str(tmp_path / "stats.json"))
+    stats.record_fetch("https://good.io", 5)
+    stats.record_fetch("https://meh.io", 0)
+    assert stats.order_urls(["https://meh.io", "https://new.io", "https://good.io"]) == [
+        "https://good.io", "https://new.io", "https://meh.io"]
+    stats.record_query('"{topic}" email', 4)
+    assert stats.order_queries(['"x" founders', '"x" email'], "x") == ['"x" email', '"x" founders']
+
+
+def test_saves_from_two_instances_are_merged(tmp_path):
+    path = str(tmp_path / "stats.json")
+    first, second = YieldStats(path), YieldStats(path)
+    first.record_fetch("https://acme.io", 2)
+    second.record_fetch("https://acme.io", 3)
+    second.record_query("{topic} email", 1)
+    first.save()
+    second.save()
+    first.save()  # nothing new: must not double count
+    with open(path) as f:
+        data = json.load(f)
+    assert data["domains"]["acme.io"]["fetches"] == 2
+    assert data["domains"]["acme.io"]["emails"] == 5
+    assert data["templates"]["{topic} email"] == {"runs": 1, "emails": 1}
+    assert second.domains["acme.io"]["emails"] == 5
+
+
+def _record_and_save(path, n):
+    stats = YieldStats(path)
+    for _ in range(n):
+        stats.record_fetch("https://acme.io", 1)
+        stats.save()
+
+
+def test_concurrent_processes_lose_no_counts(tmp_path):
+    path = str(tmp_path / "stats.json")
+    workers = [multiprocessing.Process(target=_record_and_save, args=(path, 20)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert YieldStats(path).domains["acme.io"]["fetches"] == 80
+
+
+def test_a_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "stats.json"
+    path.write_text("{not json")
+    stats = YieldStats(str(path))
+    assert stats.domains == {}
+    stats.record_fetch("https://acme.io", 1)
+    stats.save()
+    assert YieldStats(str(path)).domains["acme.io"]["emails"] == 1
@@ -1,111 +1,99 @@
 import os 
 import sys
-import json
-import requests 
-from bs4 import BeautifulSoup 
+
+from outreach_core import SearchError, SearchResult, prefetch_content, serpapi_search as core_search
+from outreach_core.deadline import deadline_reached, truncated, start_script
+from outreach_core.dedup import NearDuplicateIndex, drop_near_duplicates, snippet_index
+from outreach_core.log import log, WARNING
+from outreach_core.output import emit
+from outreach_core.router import get_router
+from outreach_core.warmer import record_query
+from outreach_core.config import METRICS_DUMP
+from outreach_core.metrics import install_dump
+from outreach_core.profiling import pop_profile_option, profile_run
   
 # --- CONFIGURATION --- 
 SERPAPI_API_KEY = os.environ.get('SERPAPI_API_KEY', 'bbda309a8354ab544f486db9291b5ddc8e166eeb9da7cdf327c47d26671dcc22')
+REPORT_RESULTS = 3  # results shown in the report
   
 # --- HELPER FUNCTIONS (Search and Scrape) --- 
 def serpapi_search(query, num_results=5): 
     try: 
-        params = {
-            "engine": "google",
-            "q": query,
-            "api_key": SERPAPI_API_KEY,
-            "num": num_results
-        }
-        
-        response = requests.get("https://serpapi.com/search", params=params)
-        data = response.json()
-        
-        if "error" in data:
-            print(json.dumps({"error": f"SerpAPI error: {data['error']}"}))
-            return []
-            
-        organic_results = data.get("organic_results", [])
-        results = [{'link': item.get('link', ''), 
-                   'snippet': item.get('snippet', ''),
-                   'title': item.get('title', '')} 
-                  for item in organic_results]
-        return results
+        organic_results = core_search(query, num_results, api_key=SERPAPI_API_KEY)
+        # Page content is only scraped if something reads result['content']
+        return [SearchResult.from_organic(item) for item in organic_results]
+    except SearchError as e:
+        log(f"    - Search error: {e}", WARNING)
+        return []
     except Exception as e: 
-        print(json.dumps({"error": f"An error occurred during search: {str(e)}"}))
+        log(f"    - An error occurred during search: {e}", WARNING)
         return [] 
   
-def scrape_url_content(url, max_chars=3000): 
-    try: 
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'} 
-        response = requests.get(url, headers=headers, timeout=10) 
-        
-        if response.status_code != 200: 
-            return f"Failed to retrieve content (Status code: {response.status_code})" 
-            
-        soup = BeautifulSoup(response.text, 'html.parser') 
-        
-        # Remove script and style elements 
-        for script in soup(["script", "style"]): 
-            script.extract() 
-            
-        # Get text and clean it up 
-        text = soup.get_text(separator=' ', strip=True) 
-        
-        # Truncate if too long 
-        if len(text) > max_chars: 
-            text = text[:max_chars] + "... [content truncated]" 
-            
-        return text 
-    except Exception as e: 
-        return f"Error scraping content: {str(e)}" 
-  
 # --- THE "BRAIN" FOR RECOMMENDATIONS --- 
-def get_recommendations_from_web(user_query): 
+def get_recommendations_from_web(user_query, enrich=False): 
     """ 
     This function orchestrates the entire Search-and-Recommend process. 
+
+    By default the report is built from titles and snippets alone, so it costs
+    one SerpAPI round trip. With `enrich`, the pages of the results shown in
+    the report are scraped (concurrently) and a short excerpt is added.
     """ 
+    record_query("recommendations", user_query)
     try:
         # 1. Search using SerpAPI
         search_results = serpapi_search(user_query) 
         if not search_results: 
-            print(json.dumps({"error": "No search results found"}))
+            emit({"error": "No search results found"})
             return
     
-        # 2. Scrape content from top results 
-        results_with_content = []
-        for result in search_results: 
-            content = scrape_url_content(result['link'])
-            result['content'] = content
-            results_with_content.append(result)
+        # 2. Collapse syndicated copies, then only fetch the pages the report will actually read
+        search_results = drop_near_duplicates(search_results, lambda r: r.snippet, lambda r: r.link, snippet_index())
+        if enrich:
+            search_results = distinct_pages(search_results)
     
-        # 3. Format the results in a structured way
-        formatted_results = format_investor_results(results_with_content, user_query)
-        # Only print the JSON response, no other output
-        print(json.dumps({"result": formatted_results}))
+        # 3. Format the results in a structured way; past the deadline, snippets only
+        formatted_results = format_investor_results(search_results, user_query,
+                                                    include_details=enrich and not truncated())
+        # The report is the only frame on the result channel
+        emit({"result": formatted_results, "truncated": truncated()})
         return
     except Exception as e:
-        print(json.dumps({"error": f"Error processing request: {str(e)}"}))
+        emit({"error": f"Error processing request: {str(e)}"})
 
-def format_investor_results(results, query):
+def distinct_pages(results):
+    """
+    Prefetches results a report's worth at a time, dropping any whose page
+    copies an earlier one, until REPORT_RESULTS distinct pages are loaded.
     """
-    Format the search results into a structured recommendation report
+    pages_seen = NearDuplicateIndex()
+    kept = []
+    pending = list(results)
+    while pending and len(kept) < REPORT_RESULTS and not deadline_reached():
+        batch, pending = pending[:REPORT_RESULTS - len(kept)], pending[REPORT_RESULTS - len(kept):]
+        prefetch_content(batch)
+        kept.extend(result for result in batch if pages_seen.check(result.content, result.link) is None)
+    return kept + pending
+
+def format_investor_results(results, query, include_details=False):
+    """
+    Format the search results into a structured recommendation report.
+
+    Only the first REPORT_RESULTS results are read, and page content is only
+    touched when `include_details` is set.
     """
     try:
         # Extract key information from results
         investors = []
-        for result in results:
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            content = result.get('content', '')
-            source = result.get('link', '')
-            
-            # Add this result as a source
-            investors.append({
-                'name': title,
-                'description': snippet,
-                'source': source,
-                'details': content[:300] + "..." if len(content) > 300 else content
-            })
+        for result in results[:REPORT_RESULTS]:
+            investor = {
+                'name': result.get('title', ''),
+                'description': result.get('snippet', ''),
+                'source': result.get('link', '')
+            }
+            if include_details:
+                content = result.get('content', '')
+                investor['details'] = content[:300] + "..." if len(content) > 300 else content
+            investors.append(investor)
         
         # Create a structured report - don't print anything here
         report = f"""
@@ -118,9 +106,11 @@ Based on your search for "{query}", here's what I found:
 """
         
         # Add investor information
-        for i, investor in enumerate(investors[:3], 1):
+        for i, investor in enumerate(investors, 1):
             report += f"### {i}. {investor['name']}\n"
             report += f"{investor['description']}\n"
+            if investor.get('details'):
+                report += f"> {investor['details']}\n"
             report += f"Source: {investor['source']}\n\n"
         
         # Add actionable next steps
@@ -137,36 +127,38 @@ Based on your search for "{query}", here's what I found:
         
         return report
     except Exception as e:
-        print(json.dumps({"error": f"Error formatting results: {str(e)}"}))
+        log(f"    - Error formatting results: {e}", WARNING)
         return None
 
+def warm_recommendations(topic):
+    """Cache-warmer recipe: the search a recommendation report for `topic` starts with."""
+    serpapi_search(topic)
+
 # --- ROUTER FUNCTION --- 
 def needs_web_search(query): 
     """ 
     Determines if a query requires web search. 
     """ 
-    # Keywords that suggest a need for web search 
-    web_search_keywords = [ 
-        "find", "search", "look up", "discover", "locate", 
-        "identify", "recommend", "suggest", "latest", 
-        "recent", "news", "trends", "investors", "companies", 
-        "startups", "who is", "what is", "where is", "when is", 
-        "how to", "best", "top", "popular", "review" 
-    ] 
-    
-    query_lower = query.lower() 
-    
-    # Check if any web search keywords are in the query 
-    for keyword in web_search_keywords: 
-        if keyword in query_lower: 
-            return True 
-            
-    return False 
+    return get_router().needs_web_search(query)
+
+def needs_web_search_batch(queries):
+    """Routes many chat messages in one call; returns one bool per message."""
+    return get_router().classify_batch(queries)
 
 # Command-line interface
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        query = " ".join(sys.argv[1:])
-        get_recommendations_from_web(query)
+    if METRICS_DUMP:
+        install_dump()
+    profile_run("web_search_recommendations", pop_profile_option(sys.argv))
+    start_script(sys.argv)
+    if len(sys.argv) > 1 and sys.argv[1] == "--route":
+        # One chat message per stdin line -> {"routes": [true, false, ...]}
+        messages = [line.rstrip("\n") for line in sys.stdin]
+        emit({"routes": needs_web_search_batch(messages)})
+    elif len(sys.argv) > 1:
+        args = sys.argv[1:]
+        enrich = "--enrich" in args
+        query = " ".join(arg for arg in args if arg != "--enrich")
+        get_recommendations_from_web(query, enrich=enrich)
     else:
-        print(json.dumps({"error": "No query provided"}))
\ No newline at end of file
+        emit({"error": "No query provided"})
\ No newline at end of file